@@ -0,0 +1,37 @@
+"""Add trigram indexes for asset search
+
+Revision ID: a7b8c9d0e1f2
+Revises: f6a7b8c9d0e1
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7b8c9d0e1f2'
+down_revision: Union[str, None] = 'f6a7b8c9d0e1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Lets the typeahead's ILIKE '%query%' on ticker and name use an index, and
+    # provides similarity() for ranking. SQLite builds an FTS5 table instead
+    # (app/db/asset_search.py).
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index(
+        'ix_assets_name_trgm', 'assets', ['name'], unique=False,
+        postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'},
+    )
+    op.create_index(
+        'ix_assets_ticker_symbol_trgm', 'assets', ['ticker_symbol'], unique=False,
+        postgresql_using='gin', postgresql_ops={'ticker_symbol': 'gin_trgm_ops'},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_assets_ticker_symbol_trgm', table_name='assets')
+    op.drop_index('ix_assets_name_trgm', table_name='assets')
@@ -0,0 +1,158 @@
+"""Add corporate_action_adjustments table
+
+Revision ID: b8c9d0e1f2a3
+Revises: a7b8c9d0e1f2
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+from decimal import Decimal
+import json
+import uuid
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.services.adjustment_factors import demerger_cost_factor, resolve_successor
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8c9d0e1f2a3'
+down_revision: Union[str, None] = 'a7b8c9d0e1f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('corporate_action_adjustments',
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('portfolio_id', sa.UUID(), nullable=False),
+        sa.Column('asset_id', sa.UUID(), nullable=False),
+        sa.Column('transaction_id', sa.UUID(), nullable=False),
+        sa.Column('action_type', sa.String(), nullable=False),
+        sa.Column('effective_date', sa.DateTime(), nullable=False),
+        sa.Column('quantity_numerator', sa.Numeric(precision=18, scale=8), nullable=False),
+        sa.Column('quantity_denominator', sa.Numeric(precision=18, scale=8), nullable=False),
+        sa.Column('cost_numerator', sa.Numeric(precision=24, scale=8), nullable=False),
+        sa.Column('cost_denominator', sa.Numeric(precision=24, scale=8), nullable=False),
+        sa.Column('successor_asset_id', sa.UUID(), nullable=True),
+        sa.ForeignKeyConstraint(['asset_id'], ['assets.id'], ),
+        sa.ForeignKeyConstraint(['portfolio_id'], ['portfolios.id'], ),
+        sa.ForeignKeyConstraint(['successor_asset_id'], ['assets.id'], ),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_corporate_action_adjustments_portfolio_id_asset_id', 'corporate_action_adjustments', ['portfolio_id', 'asset_id'], unique=False)
+    _backfill()
+
+
+def _backfill() -> None:
+    """
+    Derives the adjustments of the corporate actions already recorded, as
+    `crud.corporate_action_adjustment.rebuild` does for new ones. Each
+    demerger's cost basis is stored with it, as `handle_demerger` now does.
+    """
+    connection = op.get_bind()
+    transactions = sa.table(
+        'transactions',
+        sa.column('id', sa.UUID),
+        sa.column('details', sa.JSON),
+    )
+
+    adjustments = sa.table(
+        'corporate_action_adjustments',
+        sa.column('id', sa.UUID),
+        sa.column('portfolio_id', sa.UUID),
+        sa.column('asset_id', sa.UUID),
+        sa.column('transaction_id', sa.UUID),
+        sa.column('action_type', sa.String),
+        sa.column('effective_date', sa.DateTime),
+        sa.column('quantity_numerator', sa.Numeric),
+        sa.column('quantity_denominator', sa.Numeric),
+        sa.column('cost_numerator', sa.Numeric),
+        sa.column('cost_denominator', sa.Numeric),
+        sa.column('successor_asset_id', sa.UUID),
+    )
+
+    actions = connection.execute(sa.text("""
+        SELECT id, portfolio_id, asset_id, transaction_type, transaction_date,
+               quantity, price_per_unit, details
+        FROM transactions
+        WHERE transaction_type IN ('SPLIT', 'MERGER', 'DEMERGER', 'RENAME')
+        ORDER BY portfolio_id, asset_id, transaction_date
+    """)).fetchall()
+
+    print(f"Deriving adjustments for {len(actions)} corporate actions")
+
+    def find(column, value):
+        # column is "isin" or "ticker_symbol"
+        query = f"SELECT id FROM assets WHERE {column} = :key LIMIT 1"
+        return connection.execute(sa.text(query), {'key': value}).scalar()
+
+    one = Decimal(1)
+    rows = []
+    # Remaining cost basis per (portfolio, asset) across its demergers
+    cost_bases = {}
+    for tx_id, portfolio_id, asset_id, t_type, t_date, quantity, price, details in actions:
+        if isinstance(details, str):
+            details = json.loads(details)
+        details = details or {}
+        quantity = Decimal(str(quantity))
+        price = Decimal(str(price))
+        quantity_factor = (one, one)
+        cost_factor = (one, one)
+        if t_type == 'SPLIT':
+            if not (quantity > 0 and price > 0):
+                continue
+            quantity_factor = (quantity, price)
+        elif t_type == 'MERGER':
+            quantity_factor = (quantity, one)
+        elif t_type == 'DEMERGER':
+            allocated = Decimal(str(details.get('total_cost_allocated', '0')))
+            key = (portfolio_id, asset_id)
+            if 'cost_basis_before' in details:
+                cost_bases[key] = Decimal(str(details['cost_basis_before']))
+            elif key not in cost_bases:
+                cost_bases[key] = Decimal(str(connection.execute(sa.text("""
+                    SELECT COALESCE(SUM(quantity * price_per_unit), 0)
+                    FROM transactions
+                    WHERE portfolio_id = :portfolio_id
+                      AND asset_id = :asset_id
+                      AND transaction_type IN ('BUY', 'ESPP_PURCHASE', 'RSU_VEST')
+                      AND transaction_date < :before
+                """), {
+                    'portfolio_id': portfolio_id,
+                    'asset_id': asset_id,
+                    'before': t_date,
+                }).scalar()))
+            cost_basis = cost_bases[key]
+            if 'cost_basis_before' not in details:
+                connection.execute(
+                    sa.update(transactions)
+                    .where(transactions.c.id == tx_id)
+                    .values(details={**details, 'cost_basis_before': str(cost_basis)})
+                )
+            cost_factor = demerger_cost_factor(cost_basis, allocated)
+            cost_bases[key] = cost_basis - allocated
+        rows.append({
+            'id': uuid.uuid4(),
+            'portfolio_id': portfolio_id,
+            'asset_id': asset_id,
+            'transaction_id': tx_id,
+            'action_type': t_type,
+            'effective_date': t_date,
+            'quantity_numerator': quantity_factor[0],
+            'quantity_denominator': quantity_factor[1],
+            'cost_numerator': cost_factor[0],
+            'cost_denominator': cost_factor[1],
+            'successor_asset_id': (
+                None if t_type == 'SPLIT' else resolve_successor(details, find)
+            ),
+        })
+
+    if rows:
+        connection.execute(sa.insert(adjustments), rows)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_corporate_action_adjustments_portfolio_id_asset_id', table_name='corporate_action_adjustments')
+    op.drop_table('corporate_action_adjustments')
@@ -0,0 +1,35 @@
+"""Add composite indexes for hot transaction queries
+
+Revision ID: d4e5f6a7b8c9
+Revises: c7e8f9a0b1c2
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4e5f6a7b8c9'
+down_revision: Union[str, None] = 'c7e8f9a0b1c2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_transactions_portfolio_id_transaction_date', 'transactions', ['portfolio_id', 'transaction_date'], unique=False)
+    op.create_index('ix_transactions_user_id_transaction_date', 'transactions', ['user_id', 'transaction_date'], unique=False)
+    op.create_index('ix_transactions_asset_id_user_id_transaction_date', 'transactions', ['asset_id', 'user_id', 'transaction_date'], unique=False)
+    op.create_index('ix_transactions_user_id_transaction_type_transaction_date', 'transactions', ['user_id', 'transaction_type', 'transaction_date'], unique=False)
+    op.create_index(op.f('ix_transaction_links_sell_transaction_id'), 'transaction_links', ['sell_transaction_id'], unique=False)
+    op.create_index(op.f('ix_transaction_links_buy_transaction_id'), 'transaction_links', ['buy_transaction_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_transaction_links_buy_transaction_id'), table_name='transaction_links')
+    op.drop_index(op.f('ix_transaction_links_sell_transaction_id'), table_name='transaction_links')
+    op.drop_index('ix_transactions_user_id_transaction_type_transaction_date', table_name='transactions')
+    op.drop_index('ix_transactions_asset_id_user_id_transaction_date', table_name='transactions')
+    op.drop_index('ix_transactions_user_id_transaction_date', table_name='transactions')
+    op.drop_index('ix_transactions_portfolio_id_transaction_date', table_name='transactions')
@@ -0,0 +1,42 @@
+"""Add scheduled_job_runs table
+
+Revision ID: e5f6a7b8c9d0
+Revises: d4e5f6a7b8c9
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5f6a7b8c9d0'
+down_revision: Union[str, None] = 'd4e5f6a7b8c9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('scheduled_job_runs',
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('job_name', sa.String(), nullable=False),
+        sa.Column('trigger', sa.String(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('run_date', sa.Date(), nullable=False),
+        sa.Column('claim_key', sa.String(), nullable=True),
+        sa.Column('started_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('duration_seconds', sa.Float(), nullable=True),
+        sa.Column('details', sa.JSON(), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('claim_key')
+    )
+    op.create_index('ix_scheduled_job_runs_job_name_started_at', 'scheduled_job_runs', ['job_name', 'started_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_scheduled_job_runs_job_name_started_at', table_name='scheduled_job_runs')
+    op.drop_table('scheduled_job_runs')
@@ -0,0 +1,30 @@
+"""Add email blind index to users
+
+Revision ID: f6a7b8c9d0e1
+Revises: e5f6a7b8c9d0
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f6a7b8c9d0e1'
+down_revision: Union[str, None] = 'e5f6a7b8c9d0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Only filled in desktop mode, where emails are encrypted; desktop rows are
+    # indexed when the master key is unlocked (see CRUDUser.get_by_email).
+    op.add_column('users', sa.Column('email_index', sa.String(length=64), nullable=True))
+    op.create_index(op.f('ix_users_email_index'), 'users', ['email_index'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_users_email_index'), table_name='users')
+    op.drop_column('users', 'email_index')
@@ -6,6 +6,8 @@ from app.api.v1.endpoints import (
     admin_aliases,
     admin_assets,
     admin_interest_rates,
+    admin_jobs,
+    admin_profiles,
     assets,
     auth,
     capital_gains,
@@ -70,6 +72,16 @@ api_router.include_router(
     prefix="/admin/aliases",
     tags=["admin-aliases"],
 )
+api_router.include_router(
+    admin_profiles.router,
+    prefix="/admin/profiles",
+    tags=["admin-profiles"],
+)
+api_router.include_router(
+    admin_jobs.router,
+    prefix="/admin/jobs",
+    tags=["admin-jobs"],
+)
 api_router.include_router(fx.router, prefix="/fx-rate", tags=["fx-rate"])
 api_router.include_router(risk.router, prefix="/risk", tags=["risk"])
 
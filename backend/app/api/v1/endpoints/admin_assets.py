@@ -7,9 +7,8 @@ import shutil
 import tempfile
 import time
 from datetime import date, datetime
-from typing import Any
+from typing import Any, Literal
 
-import urllib3
 from fastapi import APIRouter, Depends, HTTPException, status
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
@@ -18,11 +17,6 @@ from app.cache.factory import get_cache_client
 from app.core.dependencies import get_current_admin_user
 from app.db.session import get_db
 from app.models.user import User as UserModel
-from app.services.asset_seeder import AssetSeeder
-from app.utils.financial_utils import download_all_sources, process_all_sources
-
-# Suppress InsecureRequestWarning for NSDL connections
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -78,6 +72,7 @@ def _set_rate_limit() -> None:
     description="Downloads and parses asset data from exchanges. Admin only.",
 )
 def sync_assets(
+    mode: Literal["delta", "full"] = "delta",
     db: Session = Depends(get_db),
     current_user: UserModel = Depends(get_current_admin_user),
 ) -> Any:
@@ -87,8 +82,17 @@ def sync_assets(
     Downloads and processes asset data from NSDL, BSE, NSE, and other sources.
     Returns a summary of newly added and updated assets.
 
+    In `delta` mode (the default) sources unchanged since the last sync are
+    skipped and only new or changed instruments are processed; `full`
+    reprocesses every file.
+
     Rate limited to once every 5 minutes.
     """
+    # The seeder and source downloaders pull in pandas and requests
+    from app.services.asset_seeder import AssetSeeder
+    from app.services.asset_sync_state import load_sync_state
+    from app.utils.financial_utils import download_all_sources, process_all_sources
+
     # Check rate limit
     _check_rate_limit()
 
@@ -100,6 +104,8 @@ def sync_assets(
     try:
         # Initialize the asset seeder
         seeder = AssetSeeder(db=db, debug=False)
+        sync_state = load_sync_state(db, full=mode == "full")
+        seeder.sync_state = sync_state
 
         # Get initial counts
         initial_created = seeder.created_count
@@ -111,7 +117,7 @@ def sync_assets(
 
         try:
             # Use consolidated logic
-            files = download_all_sources(temp_dir, logger)
+            files = download_all_sources(temp_dir, logger, sync_state=sync_state)
             process_all_sources(seeder, files, logger)
 
             # Seed/update interest rates (PPF, etc.)
@@ -121,6 +127,8 @@ def sync_assets(
 
             # Commit changes
             db.commit()
+            from app.models import Asset
+            sync_state.save(asset_count=db.query(Asset).count())
 
         finally:
             # Cleanup temp files
@@ -138,6 +146,8 @@ def sync_assets(
             "total_processed": newly_added + updated,
             "newly_added": newly_added,
             "updated": updated,
+            "mode": mode,
+            "sources": sync_state.summary(),
             "timestamp": datetime.utcnow().isoformat() + "Z",
         }
 
@@ -0,0 +1,73 @@
+"""
+Admin endpoints for the background job scheduler: registered jobs, their
+next run time and the history of past runs.
+"""
+import logging
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+
+from app import crud, schemas
+from app.core.config import settings
+from app.core.dependencies import get_current_admin_user
+from app.db.session import get_db
+from app.models.user import User as UserModel
+from app.services.scheduler import JobTrigger, now_ist, scheduler
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+
+@router.get("/", response_model=schemas.ScheduledJobsResponse)
+def list_jobs(
+    db: Session = Depends(get_db),
+    current_user: UserModel = Depends(get_current_admin_user),
+):
+    """List the scheduled jobs with their next run time and last run."""
+    now = now_ist()
+    jobs = []
+    for job in scheduler.jobs.values():
+        try:
+            next_run_at = scheduler.next_run_at(job, now)
+        except Exception as e:
+            logger.warning(f"Could not compute next run for {job.name}: {e}")
+            next_run_at = None
+        jobs.append(
+            schemas.ScheduledJob(
+                name=job.name,
+                description=job.description,
+                run_at=job.run_at.strftime("%H:%M IST"),
+                trading_days_only=job.trading_days_only,
+                next_run_at=next_run_at if settings.SCHEDULER_ENABLED else None,
+                last_run=crud.scheduled_job_run.get_last(db, job_name=job.name),
+            )
+        )
+    return schemas.ScheduledJobsResponse(
+        enabled=settings.SCHEDULER_ENABLED, jobs=jobs
+    )
+
+
+@router.get("/runs", response_model=List[schemas.ScheduledJobRun])
+def list_job_runs(
+    job_name: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db),
+    current_user: UserModel = Depends(get_current_admin_user),
+):
+    """Job history, most recent first, with durations and run statistics."""
+    return crud.scheduled_job_run.get_recent(db, job_name=job_name, limit=limit)
+
+
+@router.post("/{job_name}/run", response_model=schemas.ScheduledJobRun)
+def run_job(
+    job_name: str,
+    current_user: UserModel = Depends(get_current_admin_user),
+):
+    """Run a job now and wait for it to finish. Admin only."""
+    if job_name not in scheduler.jobs:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Job not found"
+        )
+    logger.info(f"Admin {current_user.id} triggered job {job_name}.")
+    return scheduler.run_job(job_name, JobTrigger.API)
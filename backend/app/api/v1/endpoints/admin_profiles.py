@@ -0,0 +1,49 @@
+"""
+Admin endpoints for stored request profiles.
+
+Requests are profiled by an admin adding ``?profile=1`` (or an
+``X-Profile: 1`` header); see `ProfilingMiddleware`. The files open in
+https://www.speedscope.app.
+"""
+from datetime import datetime
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import FileResponse
+from pydantic import BaseModel
+
+from app.core import profiling
+from app.core.dependencies import get_current_admin_user
+from app.models.user import User as UserModel
+
+router = APIRouter()
+
+
+class ProfileInfo(BaseModel):
+    id: str
+    size: int
+    created_at: datetime
+
+
+@router.get("/", response_model=List[ProfileInfo])
+def list_profiles(
+    current_user: UserModel = Depends(get_current_admin_user),
+):
+    """
+    List stored request profiles, newest first. (Admin Only)
+    """
+    return profiling.list_profiles()
+
+
+@router.get("/{profile_id}")
+def download_profile(
+    profile_id: str,
+    current_user: UserModel = Depends(get_current_admin_user),
+):
+    """
+    Download a stored request profile in speedscope format. (Admin Only)
+    """
+    path = profiling.profile_path(profile_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(path, media_type="application/json", filename=path.name)
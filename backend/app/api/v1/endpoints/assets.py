@@ -3,6 +3,7 @@ from typing import Any, List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from app import crud, models, schemas
 from app.core import dependencies as deps
@@ -66,21 +67,9 @@ def read_assets(
     return assets
 
 
-@router.get("/search-stocks/", response_model=List[schemas.AssetSearchResult])
-def search_stocks(
-    query: str = Query(..., min_length=2, max_length=50),
-    asset_type: Optional[str] = None,
-    db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_user),
-):
-    """
-    Search for stocks/assets without creating them. Returns search results
-    from both local database and Yahoo Finance. Use this endpoint for
-    autocomplete/typeahead. Asset is only created when user selects via /lookup/.
-    """
-    results = []
-
-    # 1. Search local database first
+def _local_search_results(
+    db: Session, query: str, asset_type: Optional[str]
+) -> List[dict]:
     # If explicitly searching for STOCK, also include ETF
     search_types = [asset_type] if asset_type else None
     if asset_type and asset_type.upper() == "STOCK":
@@ -89,8 +78,8 @@ def search_stocks(
     local_assets = crud.asset.search_by_name_or_ticker(
         db, query=query, asset_type=search_types
     )
-    for asset in local_assets:
-        results.append({
+    return [
+        {
             "id": str(asset.id),  # Include id for local assets
             "ticker_symbol": asset.ticker_symbol,
             "name": asset.name,
@@ -104,11 +93,33 @@ def search_stocks(
                 if getattr(asset, "bond", None)
                 else None
             ),
-        })
+        }
+        for asset in local_assets
+    ]
 
-    # 2. If few local results, also search Yahoo Finance
-    if len(results) < 5:
-        search_results = financial_data_service.search_stocks(query)
+
+@router.get("/search-stocks/", response_model=List[schemas.AssetSearchResult])
+async def search_stocks(
+    query: str = Query(..., min_length=2, max_length=50),
+    asset_type: Optional[str] = None,
+    db: Session = Depends(deps.get_db),
+    current_user: User = Depends(deps.get_current_user),
+):
+    """
+    Search for stocks/assets without creating them. Returns search results
+    from both local database and Yahoo Finance. Use this endpoint for
+    autocomplete/typeahead. Asset is only created when user selects via /lookup/.
+    """
+    # 1. Search local database first
+    results = await run_in_threadpool(_local_search_results, db, query, asset_type)
+
+    # 2. If few local results, also search Yahoo Finance, unless the query is
+    # a local ticker (ranked first)
+    exact_match = bool(results) and (
+        results[0]["ticker_symbol"].upper() == query.strip().upper()
+    )
+    if len(results) < 5 and not exact_match:
+        search_results = await financial_data_service.asearch_stocks(query)
         for r in search_results:
             ticker = r.get("ticker_symbol", "")
 
@@ -1,11 +1,16 @@
 from enum import Enum
 
 from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from app import crud, schemas
 from app.core import dependencies as deps
+from app.core.config import settings
+from app.db.session import SessionLocal
 from app.models.user import User as UserModel
+from app.services import valuation_stream
+from app.utils import sse
 
 router = APIRouter()
 
@@ -60,3 +65,39 @@ def get_asset_allocation(
     """
     allocation = crud.dashboard.get_allocation(db=db, user_id=current_user.id)
     return {"allocation": allocation}
+
+
+@router.get("/stream", response_class=StreamingResponse)
+def stream_valuation(
+    *,
+    db: Session = Depends(deps.get_db),
+    current_user: UserModel = Depends(deps.get_current_user),
+):
+    """
+    Server-sent events with the live value, day's P&L and top movers of the
+    user's portfolios, sent when they change.
+    """
+    user_id = current_user.id
+    # The request's session would otherwise hold a transaction for as long
+    # as the stream stays open; positions load with a short-lived one.
+    db.close()
+
+    def load_positions() -> valuation_stream.Positions:
+        with SessionLocal() as session:
+            holdings = crud.holding.get_all_portfolios_holdings_and_summary(
+                session, user_id=user_id
+            ).holdings
+            positions = valuation_stream.Positions.from_holdings(session, holdings)
+            # As get_db would; valuing can enrich assets and post PPF interest
+            session.commit()
+            return positions
+
+    return StreamingResponse(
+        valuation_stream.stream_valuation(
+            load_positions,
+            lambda: valuation_stream.holdings_are_stale(user_id),
+            interval=settings.LIVE_STREAM_INTERVAL_SECONDS,
+        ),
+        media_type=sse.MEDIA_TYPE,
+        headers=sse.HEADERS,
+    )
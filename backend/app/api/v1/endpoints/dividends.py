@@ -11,7 +11,11 @@ from app.core import dependencies as deps
 from app.db.session import get_db
 from app.models import User
 from app.schemas.dividends import DividendSummary
-from app.services.dividend_service import DividendService
+from app.services.dividend_service import (
+    ADVANCE_TAX_PERIODS,
+    ENTRY_BATCH_SIZE,
+    DividendService,
+)
 
 router = APIRouter()
 
@@ -55,77 +59,85 @@ def export_dividend_report_csv(
             raise HTTPException(status_code=403, detail="Not enough permissions")
 
     service = DividendService(db)
-    summary = service.get_dividend_report(
+    # Totals are aggregated in SQL up front (which also warms the TTBR cache);
+    # the detail rows are then streamed from the database in batches.
+    bucket_totals = service.get_bucket_totals(
         fy_year=fy, portfolio_id=portfolio_id, user_id=str(current_user.id)
     )
 
-    output = StringIO()
-    writer = csv.writer(output)
-
-    # Write Disclaimer
-    writer.writerow([
-        "Disclaimer: This report is for informational purposes only. "
-        "For foreign dividends, the INR conversion uses a proxy historical "
-        "exchange rate. Please consult a tax professional and verify with "
-        "actual SBI TTBR as per IT Rule 115."
-    ])
-    writer.writerow([]) # Empty row
-
-    # Summary Header
-    writer.writerow([
-        "Advance Tax Bucket",
-        "Total Dividends (INR)"
-    ])
-
-    # Summary Rows
-    periods = [
-        "Upto 15/6",
-        "16/6 - 15/9",
-        "16/9 - 15/12",
-        "16/12 - 15/3",
-        "16/3 - 31/3",
-    ]
-    for period in periods:
+    def generate_csv():
+        output = StringIO()
+        writer = csv.writer(output)
+
+        def flush() -> str:
+            chunk = output.getvalue()
+            output.seek(0)
+            output.truncate(0)
+            return chunk
+
+        # Write Disclaimer
         writer.writerow([
-            period,
-            summary.bucket_totals.get(period, 0)
+            "Disclaimer: This report is for informational purposes only. "
+            "For foreign dividends, the INR conversion uses a proxy historical "
+            "exchange rate. Please consult a tax professional and verify with "
+            "actual SBI TTBR as per IT Rule 115."
         ])
+        writer.writerow([]) # Empty row
+
+        # Summary Header
+        writer.writerow([
+            "Advance Tax Bucket",
+            "Total Dividends (INR)"
+        ])
+
+        # Summary Rows
+        for period in ADVANCE_TAX_PERIODS:
+            writer.writerow([
+                period,
+                bucket_totals.get(period, 0)
+            ])
+
+        writer.writerow([]) # Empty row
 
-    writer.writerow([]) # Empty row
-
-    # Detailed Header
-    writer.writerow([
-        "Asset Name",
-        "Ticker/Symbol",
-        "Date",
-        "Quantity",
-        "Amount (Native)",
-        "Currency",
-        "Proxy TTBR Date (Rule 115)",
-        "Proxy TTBR Rate",
-        "Amount (INR)",
-        "Advance Tax Period"
-    ])
-
-    for entry in summary.entries:
+        # Detailed Header
         writer.writerow([
-            entry.asset_name,
-            entry.asset_ticker,
-            entry.date,
-            entry.quantity,
-            entry.amount_native,
-            entry.currency,
-            entry.ttbr_date if entry.ttbr_date else "N/A",
-            entry.ttbr_rate if entry.ttbr_rate else "N/A",
-            entry.amount_inr,
-            entry.period
+            "Asset Name",
+            "Ticker/Symbol",
+            "Date",
+            "Quantity",
+            "Amount (Native)",
+            "Currency",
+            "Proxy TTBR Date (Rule 115)",
+            "Proxy TTBR Rate",
+            "Amount (INR)",
+            "Advance Tax Period"
         ])
+        yield flush()
+
+        entries = service.iter_dividend_entries(
+            fy_year=fy, portfolio_id=portfolio_id, user_id=str(current_user.id)
+        )
+        for count, entry in enumerate(entries, start=1):
+            writer.writerow([
+                entry.asset_name,
+                entry.asset_ticker,
+                entry.date,
+                entry.quantity,
+                entry.amount_native,
+                entry.currency,
+                entry.ttbr_date if entry.ttbr_date else "N/A",
+                entry.ttbr_rate if entry.ttbr_rate else "N/A",
+                entry.amount_inr,
+                entry.period
+            ])
+            if count % ENTRY_BATCH_SIZE == 0:
+                yield flush()
+        yield flush()
 
     filename = f"dividend_report_{fy.replace('-', '_')}.csv"
 
-    output.seek(0)
     return StreamingResponse(
-        iter([output.getvalue()]),
+        generate_csv(),
         media_type="text/csv",
         headers={"Content-Disposition": f"attachment; filename={filename}"},
     )
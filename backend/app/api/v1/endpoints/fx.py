@@ -12,7 +12,7 @@ router = APIRouter()
 
 
 @router.get("/", response_model=Dict[str, Decimal])
-def get_fx_rate(
+async def get_fx_rate(
     from_currency: str = Query(..., alias="from", min_length=3, max_length=3),
     to_currency: str = Query(..., alias="to", min_length=3, max_length=3),
     date_obj: date = Query(..., alias="date"),
@@ -21,7 +21,7 @@ def get_fx_rate(
     """
     Get exchange rate between two currencies for a specific date.
     """
-    rate = financial_data_service.get_exchange_rate(
+    rate = await financial_data_service.aget_exchange_rate(
         from_currency.upper(), to_currency.upper(), date_obj
     )
     if rate is None:
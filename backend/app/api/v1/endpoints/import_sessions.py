@@ -6,7 +6,6 @@ from decimal import Decimal
 from pathlib import Path
 from typing import Any, List, Optional
 
-import pandas as pd
 from fastapi import (
     APIRouter,
     Body,
@@ -25,8 +24,7 @@ from app.cache.utils import invalidate_caches_for_portfolio
 from app.core import dependencies as deps
 from app.core.config import settings
 from app.schemas.msg import Msg
-from app.services.financial_data_service import financial_data_service
-from app.services.import_parsers import parser_factory
+from app.services.asset_resolver import AssetRef, AssetResolver
 from app.utils.filename import secure_filename
 from app.utils.pydantic_compat import model_dump
 
@@ -51,6 +49,10 @@ async def create_import_session(
     This endpoint handles the file upload, saves it, selects the correct parser
     based on the source_type, parses the data, and stores it for review.
     """
+    import pandas as pd
+
+    from app.services.import_parsers import parser_factory
+
     # 0. Verify user has access to the portfolio
     portfolio = crud.portfolio.get(db=db, id=portfolio_id)
     if not portfolio:
@@ -264,6 +266,8 @@ def get_import_session_preview(
     Get a categorized preview of the parsed data for an import session,
     identifying new, duplicate, and invalid transactions.
     """
+    import pandas as pd
+
     import_session = crud.import_session.get(db=db, id=session_id)
     if not import_session:
         raise HTTPException(status_code=404, detail="Import session not found")
@@ -285,12 +289,18 @@ def get_import_session_preview(
     invalid: list[dict] = []
     needs_mapping: list[schemas.ParsedTransaction] = []
 
-    # Create a temporary map of pending aliases for quick lookup
-    pending_alias_map = {
-        alias.alias_symbol: alias.asset_id for alias in aliases_to_create
-    }
+    resolver = AssetResolver(
+        db,
+        source=import_session.source,
+        pending_aliases={
+            alias.alias_symbol: alias.asset_id for alias in aliases_to_create
+        },
+        # Side-effect free: assets found with the providers are not saved
+        create=False,
+    )
 
     try:
+        rows = []
         for _, row in df.iterrows():
             # Clean NaNs to None to avoid validation errors for optional fields
             row_data = {k: (None if pd.isna(v) else v) for k, v in row.items()}
@@ -300,78 +310,15 @@ def get_import_session_preview(
                 log.error(f"Validation error for row: {row_data}. Error: {e}")
                 invalid.append({"row_data": row_data, "error": str(e)})
                 continue
+            ref = AssetRef(row_data["ticker_symbol"], row_data.get("isin"))
+            rows.append((row_data, parsed_transaction, ref))
 
-            # 1. Asset Identification
-            ticker_symbol = row_data["ticker_symbol"]
-            asset = None
-
-            # Check ISIN first if available
-            if "isin" in row_data and row_data["isin"]:
-                isin_code = row_data["isin"]
-                asset = crud.asset.get_by_isin(db, isin_code=isin_code)
-                if not asset:
-                    # Try to fetch details without creating (side-effect free preview)
-                    details = financial_data_service.get_asset_details(
-                        f"ISIN:{isin_code}"
-                    )
-                    if details:
-                        # Validate and filter through schema to prevent TypeError
-                        asset_in = schemas.AssetCreate(
-                            ticker_symbol=(
-                                details.get("ticker_symbol")
-                                or f"ISIN:{isin_code}".upper()
-                            ),
-                            **{k: v for k, v in details.items() if k != "ticker_symbol"}
-                        )
-                        asset = models.Asset(**model_dump(asset_in))
-                if asset:
-                    log.debug(f"Found asset by ISIN: {isin_code} -> {asset.name}")
-
-            if not asset:
-                # This also handles ticker_symbol with "ISIN:" prefix
-                asset = crud.asset.get_by_ticker(db, ticker_symbol=ticker_symbol)
-                if asset:
-                    log.debug(f"Found asset by ticker: {ticker_symbol} -> {asset.name}")
-
-            # If ticker looks like "ISIN:XXX", try to find externally
-            # (side-effect free preview)
-            if not asset and ticker_symbol.upper().startswith("ISIN:"):
-                details = financial_data_service.get_asset_details(ticker_symbol)
-                if details:
-                    # Validate and filter through schema to prevent TypeError
-                    asset_in = schemas.AssetCreate(
-                        ticker_symbol=(
-                            details.get("ticker_symbol") or ticker_symbol.upper()
-                        ),
-                        **{k: v for k, v in details.items() if k != "ticker_symbol"}
-                    )
-                    asset = models.Asset(**model_dump(asset_in))
-                if asset:
-                    log.info(
-                        f"Auto-matched (transient) by ISIN: {ticker_symbol} "
-                        f"-> {asset.name}"
-                    )
-
-            if not asset:
-                # Check pending aliases from the current session first
-                if ticker_symbol in pending_alias_map:
-                    asset_id = pending_alias_map[ticker_symbol]
-                    asset = crud.asset.get(db, id=asset_id)
-                    if asset:
-                        log.debug(
-                            f"Found in pending aliases: {ticker_symbol}"
-                        )
-                else:
-                    # Then check persisted aliases
-                    asset_alias = crud.asset_alias.get_by_alias(
-                        db,
-                        alias_symbol=ticker_symbol,
-                        source=import_session.source,
-                    )
-                    if asset_alias:
-                        asset = asset_alias.asset
-                        log.debug(f"Found by alias: {ticker_symbol} -> {asset.name}")
+        # 1. Asset Identification, for all rows at once
+        assets = resolver.resolve_many([ref for _, _, ref in rows], fetch=True)
 
+        for row_data, parsed_transaction, ref in rows:
+            ticker_symbol = ref.ticker_symbol
+            asset = assets[ref]
             if not asset:
                 # If no asset or alias is found, it needs user mapping
                 log.debug(f"No match found for: {ticker_symbol}")
@@ -429,6 +376,8 @@ def commit_import_session(
     Commit the selected transactions from an import session to the portfolio.
     This also handles the creation of new asset aliases.
     """
+    import pandas as pd
+
     import_session = crud.import_session.get(db=db, id=session_id)
     if not import_session:
         raise HTTPException(status_code=404, detail="Import session not found")
@@ -446,55 +395,14 @@ def commit_import_session(
             crud.asset_alias.create(db, obj_in=alias_in)
 
         # 2. Commit the selected transactions.
+        transactions = commit_payload.transactions_to_commit
+        assets = AssetResolver(db, source=import_session.source).resolve_many(
+            (AssetRef(tx.ticker_symbol, tx.isin) for tx in transactions),
+            fetch=True,
+        )
         transactions_created = 0
-        for parsed_tx in commit_payload.transactions_to_commit:
-            # Try to find asset: ISIN first, then alias, then ticker, then name
-            asset = None
-            ticker_symbol = parsed_tx.ticker_symbol
-
-            # 1. Try ISIN lookup first (most reliable)
-            if parsed_tx.isin:
-                asset = crud.asset.get_by_isin(db, isin_code=parsed_tx.isin)
-                if not asset:
-                    asset = crud.asset.get_or_create_by_ticker(
-                        db, ticker_symbol=f"ISIN:{parsed_tx.isin}"
-                    )
-
-            # 2. Try alias lookup (with source)
-            if not asset:
-                asset_alias = crud.asset_alias.get_by_alias(
-                    db,
-                    alias_symbol=ticker_symbol,
-                    source=import_session.source,
-                )
-                if asset_alias:
-                    asset = asset_alias.asset
-
-            # 3. Try alias lookup (any source)
-            if not asset:
-                asset_alias = db.query(models.AssetAlias).filter(
-                    models.AssetAlias.alias_symbol == ticker_symbol
-                ).first()
-                if asset_alias:
-                    asset = asset_alias.asset
-
-            # 4. Try ticker lookup (also handles ISIN: prefix)
-            if not asset:
-                if ticker_symbol.upper().startswith("ISIN:"):
-                    asset = crud.asset.get_or_create_by_ticker(
-                        db, ticker_symbol=ticker_symbol
-                    )
-                else:
-                    asset = crud.asset.get_by_ticker(
-                        db, ticker_symbol=ticker_symbol
-                    )
-
-            # 6. Try name lookup
-            if not asset:
-                asset = db.query(models.Asset).filter(
-                    models.Asset.name == ticker_symbol
-                ).first()
-
+        for parsed_tx in transactions:
+            asset = assets[AssetRef(parsed_tx.ticker_symbol, parsed_tx.isin)]
             if not asset:
                 log.error(
                     f"Asset '{parsed_tx.ticker_symbol}' not found during commit for "
@@ -595,6 +503,10 @@ async def create_fd_import_session(
     """
     Create new FD import session from bank statement.
     """
+    import pandas as pd
+
+    from app.services.import_parsers import parser_factory
+
     # 0. Verify user has access to the portfolio
     portfolio = crud.portfolio.get(db=db, id=portfolio_id)
     if not portfolio:
@@ -698,6 +610,8 @@ def get_fd_import_session_preview(
     """
     Get preview of parsed FDs, flagging duplicates by account_number and start_date.
     """
+    import pandas as pd
+
     import_session = crud.import_session.get(db=db, id=session_id)
     if not import_session:
         raise HTTPException(status_code=404, detail="Import session not found")
@@ -1,8 +1,10 @@
+import itertools
 import json
 from datetime import datetime
+from typing import Literal
 
 from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
-from fastapi.responses import JSONResponse
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 
 from app import models, schemas
@@ -23,34 +25,61 @@ def read_user_me(
 
 @router.get("/me/backup")
 def backup_user_data(
+    format: Literal["json", "ndjson"] = "json",
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_active_user),
 ):
     """
     Generate and download a backup of the user's data.
+
+    The backup is streamed as it is read from the database. `format=ndjson`
+    writes one record per line, which can also be restored in a streaming
+    fashion.
     """
-    data = backup_service.create_backup(db, current_user.id)
-    filename = f"arthsaarthi_backup_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}.json"
-    return JSONResponse(
-        content=data,
+    chunks = backup_service.iter_backup(db, current_user.id, fmt=format)
+    timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
+    filename = f"arthsaarthi_backup_{timestamp}.{format}"
+    media_type = "application/x-ndjson" if format == "ndjson" else "application/json"
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
         headers={"Content-Disposition": f"attachment; filename={filename}"},
     )
 
 
+def _is_ndjson_header(line: bytes) -> bool:
+    try:
+        header = json.loads(line)
+    except ValueError:
+        return False
+    return (
+        isinstance(header, dict)
+        and isinstance(header.get("metadata"), dict)
+        and header["metadata"].get("format") == "ndjson"
+    )
+
+
 @router.post("/me/restore")
-async def restore_user_data(
+def restore_user_data(
     file: UploadFile = File(...),
     db: Session = Depends(get_db),
     current_user: models.User = Depends(get_current_active_user),
 ):
     """
-    Restore user data from a backup file.
+    Restore user data from a backup file (JSON or NDJSON).
     WARNING: This will delete all existing data for the user!
     """
-    content = await file.read()
+    first_line = file.file.readline()
+    if _is_ndjson_header(first_line):
+        backup_service.restore_backup_stream(
+            db, current_user.id, itertools.chain([first_line], file.file)
+        )
+        return {"message": "Restore successful"}
+
+    file.file.seek(0)
     try:
-        backup_data = json.loads(content)
-    except json.JSONDecodeError:
+        backup_data = json.load(file.file)
+    except ValueError:
         raise HTTPException(status_code=400, detail="Invalid JSON file")
 
     backup_service.restore_backup(db, current_user.id, backup_data)
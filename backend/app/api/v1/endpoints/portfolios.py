@@ -5,12 +5,12 @@ from typing import Any, List
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from app import crud, models, schemas
 from app.cache.factory import get_cache_client
 from app.core import dependencies
 from app.core.constants import DASHBOARD_HISTORY_RANGES
-from app.services.benchmark_service import BenchmarkService
 from app.services.financial_data_service import FinancialDataService
 
 from . import bonds as bonds_router
@@ -142,7 +142,7 @@ def get_portfolio_analytics(
 
 
 @router.get("/{portfolio_id}/summary", response_model=schemas.PortfolioSummary)
-def get_portfolio_summary(
+async def get_portfolio_summary(
     *,
     db: Session = Depends(dependencies.get_db),
     portfolio_id: uuid.UUID,
@@ -151,20 +151,20 @@ def get_portfolio_summary(
     """
     Get summary metrics for a specific portfolio.
     """
-    portfolio = crud.portfolio.get(db=db, id=portfolio_id)
+    portfolio = await run_in_threadpool(crud.portfolio.get, db=db, id=portfolio_id)
     if not portfolio:
         raise HTTPException(status_code=404, detail="Portfolio not found")
     if portfolio.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not enough permissions")
 
-    result = crud.holding.get_portfolio_holdings_and_summary(
+    result = await crud.holding.get_portfolio_holdings_and_summary_async(
         db=db, portfolio_id=portfolio_id
     )
     return result.summary
 
 
 @router.get("/{portfolio_id}/holdings", response_model=schemas.HoldingsResponse)
-def get_portfolio_holdings(
+async def get_portfolio_holdings(
     *,
     db: Session = Depends(dependencies.get_db),
     portfolio_id: uuid.UUID,
@@ -173,13 +173,13 @@ def get_portfolio_holdings(
     """
     Get the consolidated holdings for a specific portfolio.
     """
-    portfolio = crud.portfolio.get(db=db, id=portfolio_id)
+    portfolio = await run_in_threadpool(crud.portfolio.get, db=db, id=portfolio_id)
     if not portfolio:
         raise HTTPException(status_code=404, detail="Portfolio not found")
     if portfolio.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not enough permissions")
 
-    result = crud.holding.get_portfolio_holdings_and_summary(
+    result = await crud.holding.get_portfolio_holdings_and_summary_async(
         db=db, portfolio_id=portfolio_id
     )
     return {"holdings": result.holdings}
@@ -280,9 +280,10 @@ router.include_router(
 
 
 
-def get_benchmark_service(
-    db: Session = Depends(dependencies.get_db),
-) -> BenchmarkService:
+def get_benchmark_service(db: Session = Depends(dependencies.get_db)):
+    # pandas/numpy/pyxirr: imported when first needed, not at startup
+    from app.services.benchmark_service import BenchmarkService
+
     cache_client = get_cache_client()
     financial_service = FinancialDataService(cache_client=cache_client)
     return BenchmarkService(db=db, financial_service=financial_service)
@@ -298,7 +299,7 @@ def get_benchmark_comparison(
     hybrid_preset: str = None,
     risk_free_rate: float = 7.0,
     current_user: models.User = Depends(dependencies.get_current_user),
-    benchmark_service: BenchmarkService = Depends(get_benchmark_service),
+    benchmark_service=Depends(get_benchmark_service),
 ) -> Any:
     """
     Compare portfolio performance with a benchmark (hypothesis: invested in index).
@@ -12,7 +12,6 @@ from sqlalchemy.orm import Session
 from app.core import dependencies as deps
 from app.models import User
 from app.schemas.schedule_fa import ScheduleFAEntry, ScheduleFASummary
-from app.services.schedule_fa_service import ScheduleFAService
 
 router = APIRouter()
 
@@ -35,6 +34,8 @@ def get_schedule_fa(
     - Initial value (Jan 1), Peak value, Closing value (Dec 31)
     - Gross proceeds from sales
     """
+    from app.services.schedule_fa_service import ScheduleFAService  # numpy
+
     service = ScheduleFAService(db)
     entries_data = service.get_schedule_fa(
         user_id=str(current_user.id),
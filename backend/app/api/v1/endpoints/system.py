@@ -16,7 +16,7 @@ from sqlalchemy.orm import Session
 from app import models, schemas
 from app.core.config import settings
 from app.db.session import get_db
-from app.services.snapshot_service import take_daily_snapshots_for_all
+from app.services.scheduler import EOD_SNAPSHOT_JOB, JobStatus, JobTrigger, scheduler
 
 logger = logging.getLogger(__name__)
 
@@ -368,16 +368,18 @@ class SnapshotResponse(BaseModel):
     date: date
 
 @router.post("/snapshots/run-daily", response_model=SnapshotResponse)
-def run_daily_snapshots(db: Session = Depends(get_db)):
+def run_daily_snapshots():
     """
-    Run the daily portfolio snapshot process.
+    Run the end-of-day price warming and portfolio snapshot job now.
     Used by Android WorkManager background task to automate daily snapshots.
+    The run is recorded in the scheduler's job history.
     """
-    try:
-        logger.info("Triggering daily portfolio snapshots via API...")
-        count = take_daily_snapshots_for_all(db)
-        logger.info(f"API daily snapshot completed. {count} portfolios updated.")
-        return SnapshotResponse(updated=count, date=date.today())
-    except Exception as e:
-        logger.error(f"Failed to run daily snapshots from API: {e}", exc_info=True)
+    logger.info("Triggering daily portfolio snapshots via API...")
+    run = scheduler.run_job(EOD_SNAPSHOT_JOB, JobTrigger.API)
+    if run.status != JobStatus.SUCCESS.value:
+        logger.error(f"Failed to run daily snapshots from API: {run.error}")
         raise HTTPException(status_code=500, detail="Snapshot process failed")
+    logger.info(
+        f"API daily snapshot completed. {run.details['updated']} portfolios updated."
+    )
+    return SnapshotResponse(updated=run.details["updated"], date=run.run_date)
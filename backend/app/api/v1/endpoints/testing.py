@@ -1,10 +1,8 @@
 import logging
 
-from alembic.config import Config
 from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.orm import Session
 
-from alembic import command
 from app.core import config
 from app.core import dependencies as deps
 from app.db.base import Base  # Import Base with all models registered
@@ -34,6 +32,10 @@ def reset_db(
             detail="This endpoint is only available in the test environment.",
         )
 
+    from alembic.config import Config
+
+    from alembic import command
+
     logger.info(f"E2E: Resetting database (Type: {config.settings.DATABASE_TYPE})...")
 
     if config.settings.DATABASE_TYPE == "sqlite":
@@ -1,9 +1,11 @@
+import base64
+import binascii
 import logging
 import uuid
 import uuid as uuid_module
 from datetime import date, datetime
 from decimal import Decimal
-from typing import Any, List, Optional, Union
+from typing import Any, List, Literal, Optional, Union
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
@@ -12,6 +14,7 @@ from app import crud, models, schemas
 from app.cache.utils import invalidate_caches_for_portfolio
 from app.core import config, dependencies
 from app.crud import crud_corporate_action
+from app.crud.crud_corporate_action_adjustment import ADJUSTED_ACTIONS
 from app.crud.crud_ppf import trigger_ppf_recalculation
 from app.models.user import User
 from app.schemas.enums import TransactionType
@@ -21,6 +24,44 @@ router = APIRouter()
 logger = logging.getLogger(__name__)
 
 
+def _encode_cursor(transaction: models.Transaction) -> str:
+    raw = f"{transaction.transaction_date.isoformat()}|{transaction.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        date_part, id_part = raw.split("|", 1)
+        return datetime.fromisoformat(date_part), uuid.UUID(id_part)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+
+def _sort_key(transaction: models.Transaction) -> tuple[datetime, uuid.UUID]:
+    # Normalise tz-awareness (DB rows are naive; synthetic are naive too now)
+    return transaction.transaction_date.replace(tzinfo=None), transaction.id
+
+
+def _adjusted_holdings(
+    transaction: models.Transaction,
+) -> set[tuple[uuid.UUID, uuid.UUID]]:
+    """The holding a corporate-action transaction adjusts, if it is one."""
+    if transaction.transaction_type in ADJUSTED_ACTIONS:
+        return {(transaction.portfolio_id, transaction.asset_id)}
+    return set()
+
+
+def _rebuild_adjustments(
+    db: Session, holdings: set[tuple[uuid.UUID, uuid.UUID]]
+) -> None:
+    db.flush()
+    for portfolio_id, asset_id in holdings:
+        crud.corporate_action_adjustment.rebuild(
+            db, portfolio_id=portfolio_id, asset_id=asset_id
+        )
+
+
 @router.get("/", response_model=schemas.TransactionsResponse)
 def read_transactions(
     *,
@@ -32,11 +73,25 @@ def read_transactions(
     end_date: Optional[date] = None,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
+    count: Literal["exact", "estimate", "none"] = "exact",
     current_user: User = Depends(dependencies.get_current_user),
 ) -> Any:
     """
     Retrieve transactions for the current user, with optional filters.
+
+    Results are ordered newest first. When a page is full the response carries
+    a ``next_cursor``; passing it back as ``cursor`` fetches the following page
+    by keyset instead of OFFSET, so deep pages cost the same as the first one.
+    ``count`` controls whether ``total`` is exact, a planner estimate, or
+    omitted.
     """
+    after = _decode_cursor(cursor) if cursor else None
+    # Offset pages past the first also read the row just before the page: its
+    # sort key is the upper bound of the synthetic FD rows this page shows.
+    lookbehind = after is None and skip > 0
+    page_skip = skip - 1 if lookbehind else skip
+    page_limit = limit + 1 if lookbehind and limit else limit
     if portfolio_id:
         portfolio = crud.portfolio.get(db=db, id=portfolio_id)
         if not portfolio:
@@ -51,13 +106,33 @@ def read_transactions(
             transaction_type=transaction_type,
             start_date=start_date,
             end_date=end_date,
-            skip=skip,
-            limit=limit,
+            skip=page_skip,
+            limit=page_limit,
+            after=after,
+            count=count,
         )
     else:
         transactions, total = crud.transaction.get_multi_by_user_with_filters(  # type: ignore
-            db=db, user_id=current_user.id, portfolio_id=None, skip=skip, limit=limit
+            db=db,
+            user_id=current_user.id,
+            portfolio_id=None,
+            skip=page_skip,
+            limit=page_limit,
+            after=after,
+            count=count,
         )
+    preceding = transactions.pop(0) if lookbehind and transactions else None
+    next_cursor = None
+    if limit and len(transactions) == limit:
+        next_cursor = _encode_cursor(transactions[-1])
+    # A page only shows the synthetic FD rows that sort between its boundaries,
+    # so walking either the cursor chain or the offsets yields each of them
+    # exactly once. An offset past every stored row shows none: the page
+    # holding the last row already showed the older ones.
+    upper_key = _sort_key(preceding) if preceding is not None else after
+    lower_key = _sort_key(transactions[-1]) if next_cursor else None
+    show_synthetic = not lookbehind or preceding is not None
+    synthetic = []
     if portfolio_id and not asset_id and not transaction_type:
         all_fds = crud.fixed_deposit.get_multi_by_portfolio(
             db, portfolio_id=portfolio_id
@@ -96,8 +171,7 @@ def read_transactions(
                 details={"_fd_id": fd_id_str},
             )
             buy_tx.asset = dummy_asset
-            transactions.append(buy_tx)
-            total += 1
+            synthetic.append(buy_tx)
 
             # 2️⃣  FD_MATURITY entry – maturity payout
             # (matured FDs only, deletable → deletes the FD record)
@@ -117,15 +191,19 @@ def read_transactions(
                     details={"_fd_id": fd_id_str},
                 )
                 sell_tx.asset = dummy_asset
-                transactions.append(sell_tx)
-                total += 1
-
-        # Normalise tz-awareness before sorting
-        # (DB rows are naive; synthetic are naive too now)
-        transactions.sort(
-            key=lambda t: t.transaction_date.replace(tzinfo=None),
-            reverse=True,
-        )
+                synthetic.append(sell_tx)
+
+        if total is not None:
+            total += len(synthetic)
+        synthetic = [
+            tx
+            for tx in synthetic
+            if show_synthetic
+            and (upper_key is None or _sort_key(tx) < upper_key)
+            and (lower_key is None or _sort_key(tx) > lower_key)
+        ]
+        transactions.extend(synthetic)
+        transactions.sort(key=_sort_key, reverse=True)
 
 
     if config.settings.DEBUG:
@@ -139,7 +217,7 @@ def read_transactions(
         else:
             print("No transactions found to log.")
         print("---------------------------------------------")
-    return {"transactions": transactions, "total": total}
+    return {"transactions": transactions, "total": total, "next_cursor": next_cursor}
 
 
 @router.get("/available-lots/{asset_id}", response_model=List[dict])
@@ -379,9 +457,11 @@ def update_transaction(
         trigger_ppf_recalculation(db, asset_id=transaction.asset_id)
     # --- End Smart Recalculation ---
 
+    adjusted = _adjusted_holdings(transaction)
     updated_transaction = crud.transaction.update(
         db=db, db_obj=transaction, obj_in=transaction_in
     )
+    _rebuild_adjustments(db, adjusted | _adjusted_holdings(updated_transaction))
     db.commit()
     db.refresh(updated_transaction)
 
@@ -437,7 +517,9 @@ def delete_transaction(
         trigger_ppf_recalculation(db, asset_id=transaction.asset_id)
     # --- End Smart Recalculation ---
 
+    adjusted = _adjusted_holdings(transaction)
     crud.transaction.remove(db=db, id=transaction_id)
+    _rebuild_adjustments(db, adjusted)
     db.commit()
 
     # Invalidate cache after successful deletion
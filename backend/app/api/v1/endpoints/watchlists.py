@@ -1,12 +1,15 @@
 import uuid
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session, joinedload
+from starlette.concurrency import run_in_threadpool
 
 from app import crud
+from app.core.config import settings
 from app.core.dependencies import get_current_active_user
-from app.db.session import get_db
+from app.db.session import SessionLocal, get_db
 from app.models.user import User as UserModel
 from app.models.watchlist import Watchlist as WatchlistModel
 from app.models.watchlist import WatchlistItem as WatchlistItemModel
@@ -15,9 +18,11 @@ from app.schemas.watchlist import (
     WatchlistCreate,
     WatchlistItem,
     WatchlistItemCreate,
+    WatchlistQuotes,
     WatchlistUpdate,
 )
-from app.services.financial_data_service import financial_data_service
+from app.services import watchlist_quotes
+from app.utils import sse
 
 router = APIRouter()
 
@@ -51,8 +56,62 @@ def create_watchlist(
     return watchlist
 
 
+@router.get("/quotes", response_model=WatchlistQuotes)
+async def read_watchlist_quotes(
+    *,
+    request: Request,
+    response: Response,
+    db: Session = Depends(get_db),
+    current_user: UserModel = Depends(get_current_active_user),
+):
+    """
+    Live quotes for every asset on the current user's watchlists. Responses
+    carry an ETag; polling with If-None-Match gets a 304 until a quote
+    changes.
+    """
+    assets = await run_in_threadpool(
+        watchlist_quotes.watchlist_assets, db, current_user.id
+    )
+    quotes = await watchlist_quotes.aget_quotes(assets)
+    etag = watchlist_quotes.etag(quotes)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return WatchlistQuotes(quotes=list(quotes.values()))
+
+
+@router.get("/quotes/stream", response_class=StreamingResponse)
+def stream_watchlist_quotes(
+    *,
+    db: Session = Depends(get_db),
+    current_user: UserModel = Depends(get_current_active_user),
+):
+    """
+    Server-sent events with the quotes for the current user's watchlists:
+    all of them first, then only those that change.
+    """
+    user_id = current_user.id
+    # The request's session would otherwise hold a transaction for as long
+    # as the stream stays open; each event reads with a short-lived one.
+    db.close()
+
+    def load_assets():
+        with SessionLocal() as session:
+            return watchlist_quotes.watchlist_assets(session, user_id)
+
+    return StreamingResponse(
+        watchlist_quotes.stream_quotes(
+            load_assets,
+            interval=settings.LIVE_STREAM_INTERVAL_SECONDS,
+        ),
+        media_type=sse.MEDIA_TYPE,
+        headers=sse.HEADERS,
+    )
+
+
 @router.get("/{watchlist_id}", response_model=Watchlist)
-def read_watchlist(
+async def read_watchlist(
     *,
     db: Session = Depends(get_db),
     watchlist_id: uuid.UUID,
@@ -61,8 +120,8 @@ def read_watchlist(
     """
     Get watchlist by ID, with its items and asset details.
     """
-    watchlist = (
-        db.query(WatchlistModel)
+    watchlist = await run_in_threadpool(
+        lambda: db.query(WatchlistModel)
         .options(joinedload(WatchlistModel.items).joinedload(WatchlistItemModel.asset))
         .filter(WatchlistModel.id == watchlist_id)
         .first()
@@ -74,21 +133,14 @@ def read_watchlist(
         raise HTTPException(status_code=403, detail="Not enough permissions")
 
     # Enrich with live data
-    if watchlist.items:
-        assets_to_fetch = [
-            {"ticker_symbol": item.asset.ticker_symbol, "exchange": item.asset.exchange}
-            for item in watchlist.items
-        ]
-        price_data = financial_data_service.get_current_prices(assets_to_fetch)
-        for item in watchlist.items:
-            data = price_data.get(item.asset.ticker_symbol)
-            if data:
-                item.asset.current_price = data.get("current_price")
-                item.asset.day_change = (
-                    data["current_price"] - data["previous_close"]
-                    if "current_price" in data and "previous_close" in data
-                    else None
-                )
+    quotes = await watchlist_quotes.aget_quotes(
+        [item.asset for item in watchlist.items]
+    )
+    for item in watchlist.items:
+        quote = quotes[item.asset_id]
+        if quote.current_price is not None:
+            item.asset.current_price = quote.current_price
+            item.asset.day_change = quote.day_change
 
     return watchlist
 
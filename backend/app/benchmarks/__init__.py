@@ -0,0 +1,9 @@
+"""
+Performance benchmarks for the analytics, tax, import and backup paths, and
+the startup import-time budget.
+
+`synthetic` generates realistic users and serves offline market data,
+`suite` runs and stores the benchmarks and `startup` measures how long
+importing the app takes. Run them with ``python -m app.scripts.benchmark_suite``
+and ``python -m app.scripts.benchmark_startup``.
+"""
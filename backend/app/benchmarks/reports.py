@@ -0,0 +1,45 @@
+"""
+Storing benchmark reports as JSON, named by time and commit, and finding
+them again by file name or commit prefix.
+"""
+import json
+import subprocess
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+
+def git_revision() -> Dict[str, Any]:
+    def git(*args: str) -> str:
+        return subprocess.run(
+            ["git", *args], capture_output=True, text=True, check=True
+        ).stdout.strip()
+
+    try:
+        return {
+            "commit": git("rev-parse", "HEAD"),
+            "dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+        }
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+
+
+def save_report(report: Dict[str, Any], directory: Path) -> Path:
+    directory.mkdir(parents=True, exist_ok=True)
+    created = datetime.fromisoformat(report["created_at"].rstrip("Z"))
+    commit = (report["git"].get("commit") or "unknown")[:12]
+    path = directory / f"{created:%Y%m%dT%H%M%S}-{commit}.json"
+    path.write_text(json.dumps(report, indent=2))
+    return path
+
+
+def find_report(directory: Path, ref: str) -> Optional[Path]:
+    """A report file path, or the latest stored report of a commit prefix."""
+    path = Path(ref)
+    if path.is_file():
+        return path
+    matches = [
+        p for p in sorted(directory.glob("*.json"))
+        if json.loads(p.read_text()).get("git", {}).get("commit", "").startswith(ref)
+    ]
+    return matches[-1] if matches else None
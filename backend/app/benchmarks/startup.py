@@ -0,0 +1,188 @@
+"""
+The startup import-time budget.
+
+`python -X importtime` reports, for every module an interpreter imports, the
+time spent in the module itself and including its own imports. Startup is
+measured by importing the app that way in a fresh interpreter, so nothing is
+already loaded. A run fails the budget when it imports one of the heavy
+packages that are meant to load on first use, when its import time exceeds
+the budget, or when it is slower than a stored baseline by more than the
+threshold.
+"""
+import re
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Mapping, Optional
+
+from app.benchmarks.reports import git_revision
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+
+DEFAULT_TARGET = "app.main"
+DEFAULT_RUNS = 5
+# Deliberately generous; comparing against a stored baseline catches the
+# smaller regressions
+DEFAULT_BUDGET_SECONDS = 2.0
+DEFAULT_THRESHOLD = 0.2
+REPORT_VERSION = 1
+
+# Imported by the endpoints and services that need them, never at startup
+DEFERRED_PACKAGES = ("numpy", "pandas", "pyxirr", "yfinance", "openpyxl", "pdfplumber")
+
+_IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)$")
+
+
+@dataclass
+class ImportRecord:
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int  # 0 for top-level imports
+
+    @property
+    def package(self) -> str:
+        return self.module.split(".")[0]
+
+
+def parse_importtime(output: str) -> List[ImportRecord]:
+    """The records of `-X importtime` output, in the order it prints them."""
+    records = []
+    for line in output.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            records.append(
+                ImportRecord(
+                    module=module,
+                    self_us=int(self_us),
+                    cumulative_us=int(cumulative_us),
+                    depth=len(indent) // 2,
+                )
+            )
+    return records
+
+
+@dataclass
+class StartupRun:
+    wall_seconds: float
+    records: List[ImportRecord]
+
+    @property
+    def import_seconds(self) -> float:
+        return sum(r.self_us for r in self.records) / 1e6
+
+    def imported_packages(self) -> List[str]:
+        return sorted({r.package for r in self.records})
+
+    def package_seconds(self) -> Dict[str, float]:
+        """Import time spent in each top-level package's own modules."""
+        totals: Dict[str, int] = defaultdict(int)
+        for r in self.records:
+            totals[r.package] += r.self_us
+        return {package: us / 1e6 for package, us in totals.items()}
+
+
+def measure_startup(
+    target: str = DEFAULT_TARGET, env: Optional[Mapping[str, str]] = None
+) -> StartupRun:
+    """Imports `target` in a fresh interpreter under `-X importtime`."""
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        cwd=BACKEND_DIR,
+        env=dict(env) if env is not None else None,
+        capture_output=True,
+        text=True,
+    )
+    wall_seconds = time.perf_counter() - started
+    if result.returncode != 0:
+        errors = [
+            line for line in result.stderr.splitlines()
+            if not line.startswith("import time:")
+        ]
+        raise RuntimeError(
+            f"Importing {target} failed:\n" + "\n".join(errors[-20:])
+        )
+    return StartupRun(wall_seconds, parse_importtime(result.stderr))
+
+
+def build_report(
+    runs: List[StartupRun], target: str, deployment_mode: str, top: int = 20
+) -> Dict[str, Any]:
+    import_times = [run.import_seconds for run in runs]
+    median_run = sorted(runs, key=lambda run: run.import_seconds)[len(runs) // 2]
+    slowest = sorted(
+        median_run.package_seconds().items(), key=lambda item: item[1], reverse=True
+    )
+    return {
+        "version": REPORT_VERSION,
+        "kind": "startup",
+        "created_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        "git": git_revision(),
+        "python": sys.version.split()[0],
+        "target": target,
+        "deployment_mode": deployment_mode,
+        "runs": len(runs),
+        "import_seconds": {
+            "median": statistics.median(import_times),
+            "min": min(import_times),
+        },
+        "wall_seconds": {
+            "median": statistics.median(run.wall_seconds for run in runs),
+            "min": min(run.wall_seconds for run in runs),
+        },
+        "modules": len(median_run.records),
+        "packages": dict(slowest[:top]),
+        "deferred_imported": sorted(
+            set(median_run.imported_packages()) & set(DEFERRED_PACKAGES)
+        ),
+    }
+
+
+def check_budget(
+    report: Dict[str, Any],
+    budget_seconds: float = DEFAULT_BUDGET_SECONDS,
+    baseline: Optional[Dict[str, Any]] = None,
+    threshold: float = DEFAULT_THRESHOLD,
+) -> List[str]:
+    """Reasons the run fails the budget; empty if it passes."""
+    problems = [
+        f"{report['target']} imports {package} at startup"
+        for package in report["deferred_imported"]
+    ]
+    median = report["import_seconds"]["median"]
+    if median > budget_seconds:
+        problems.append(
+            f"Import time {median * 1000:.0f} ms exceeds the "
+            f"{budget_seconds * 1000:.0f} ms budget"
+        )
+    if baseline is not None:
+        before = baseline["import_seconds"]["median"]
+        if before and median > before * (1 + threshold):
+            problems.append(
+                f"Import time regressed from {before * 1000:.0f} ms to "
+                f"{median * 1000:.0f} ms ({median / before:.2f}x)"
+            )
+    return problems
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    lines = [
+        f"import {report['target']} ({report['deployment_mode']} mode, "
+        f"{report['runs']} runs, {report['modules']} modules)",
+        f"  import time  median {report['import_seconds']['median'] * 1000:.0f} ms"
+        f"  min {report['import_seconds']['min'] * 1000:.0f} ms",
+        f"  wall time    median {report['wall_seconds']['median'] * 1000:.0f} ms"
+        f"  min {report['wall_seconds']['min'] * 1000:.0f} ms",
+        "",
+        f"{'package':<30}{'self ms':>10}",
+    ]
+    for package, seconds in report["packages"].items():
+        lines.append(f"{package:<30}{seconds * 1000:>10.1f}")
+    return "\n".join(lines)
@@ -0,0 +1,414 @@
+"""
+The benchmark suite: named cases over a synthetic user, timed repeatedly and
+stored as JSON reports for comparison across commits (in the spirit of asv).
+
+Each case gets a fresh session per run, so ORM identity-map caching does not
+carry over between runs, and the analytics cache is disabled so every run
+computes its result. Alongside wall-clock time each case records how many
+SQL statements it ran, which catches N+1 regressions that timing noise hides.
+"""
+import statistics
+import time
+import uuid
+from contextlib import ExitStack, contextmanager
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from unittest.mock import patch
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app import crud, models, schemas
+from app.benchmarks.reports import git_revision
+from app.benchmarks.synthetic import (
+    MarketUniverse,
+    SyntheticSpec,
+    create_benchmark_user,
+    generate_backup,
+    generate_import_rows,
+    load_synthetic_user,
+    offline_market_data,
+)
+from app.cache.base import CacheClient
+from app.core import metrics
+from app.services import backup_service
+from app.services.capital_gains_service import CapitalGainsService
+from app.services.schedule_fa_service import ScheduleFAService
+
+DEFAULT_REPEAT = 5
+DEFAULT_THRESHOLD = 0.2  # a median 20% slower than the baseline is a regression
+REPORT_VERSION = 1
+
+
+class NullCache(CacheClient):
+    """A cache that never hits, so benchmarks measure the computation."""
+
+    def get(self, key: str) -> Optional[str]:
+        return None
+
+    def delete_multi(self, keys: List[str]) -> None:
+        pass
+
+    def set(self, key: str, value: str, expire: Optional[int] = None) -> None:
+        pass
+
+    def delete(self, key: str) -> None:
+        pass
+
+    def incr(self, key: str, expire: Optional[int] = None) -> int:
+        return 1
+
+
+@dataclass
+class BenchmarkContext:
+    """The synthetic data the cases run against."""
+
+    session_factory: Callable[[], Session]
+    universe: MarketUniverse
+    user_id: uuid.UUID
+    portfolio_ids: List[uuid.UUID]  # largest first
+    import_user_id: uuid.UUID
+    restore_user_id: uuid.UUID
+    backup_lines: List[str] = field(default_factory=list)
+    import_rows: List[Dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def calendar_year(self) -> int:
+        return self.universe.spec.end_date.year - 1
+
+    @property
+    def financial_year(self) -> str:
+        """The last complete Indian financial year, e.g. "2024-25"."""
+        end = self.universe.spec.end_date
+        start = end.year - 2 if end.month < 4 else end.year - 1
+        return f"{start}-{str(start + 1)[-2:]}"
+
+
+@dataclass
+class Benchmark:
+    name: str
+    func: Callable[[Session, BenchmarkContext, Any], Any]
+    # Runs (untimed) before every run; its result is passed to `func`
+    setup: Optional[Callable[[Session, BenchmarkContext], Any]] = None
+
+
+BENCHMARKS: Dict[str, Benchmark] = {}
+
+
+def benchmark(name: str, setup: Optional[Callable] = None) -> Callable:
+    def decorator(func: Callable) -> Callable:
+        BENCHMARKS[name] = Benchmark(name, func, setup)
+        return func
+
+    return decorator
+
+
+# --- Cases ---
+
+
+@benchmark("holdings.portfolio")
+def _holdings_portfolio(db: Session, ctx: BenchmarkContext, _: Any) -> Any:
+    return crud.holding.get_portfolio_holdings_and_summary(
+        db, portfolio_id=ctx.portfolio_ids[0]
+    )
+
+
+@benchmark("holdings.all_portfolios")
+def _holdings_all(db: Session, ctx: BenchmarkContext, _: Any) -> Any:
+    return crud.holding.get_all_portfolios_holdings_and_summary(
+        db, user_id=ctx.user_id
+    )
+
+
+@benchmark("dashboard.summary")
+def _dashboard_summary(db: Session, ctx: BenchmarkContext, _: Any) -> Any:
+    return crud.dashboard.get_summary(db, user_id=ctx.user_id)
+
+
+@benchmark("history.1y")
+def _history_year(db: Session, ctx: BenchmarkContext, _: Any) -> Any:
+    return crud.dashboard.get_history(db, user_id=ctx.user_id, range_str="1y")
+
+
+@benchmark("history.all")
+def _history_all(db: Session, ctx: BenchmarkContext, _: Any) -> Any:
+    return crud.dashboard.get_history(db, user_id=ctx.user_id, range_str="all")
+
+
+@benchmark("analytics.portfolio")
+def _analytics_portfolio(db: Session, ctx: BenchmarkContext, _: Any) -> Any:
+    return crud.analytics.get_portfolio_analytics(
+        db, portfolio_id=ctx.portfolio_ids[0]
+    )
+
+
+@benchmark("tax.capital_gains")
+def _capital_gains(db: Session, ctx: BenchmarkContext, _: Any) -> Any:
+    return CapitalGainsService(db).calculate_capital_gains(
+        portfolio_id=None, fy_year=ctx.financial_year, user_id=str(ctx.user_id)
+    )
+
+
+@benchmark("tax.schedule_fa")
+def _schedule_fa(db: Session, ctx: BenchmarkContext, _: Any) -> Any:
+    return ScheduleFAService(db).get_schedule_fa(
+        user_id=str(ctx.user_id), calendar_year=ctx.calendar_year
+    )
+
+
+@benchmark("assets.search")
+def _asset_search(db: Session, ctx: BenchmarkContext, _: Any) -> Any:
+    # A ticker prefix and a word from the middle of a name, per instrument
+    return [
+        crud.asset.search_by_name_or_ticker(db, query=query)
+        for instrument in ctx.universe.instruments.values()
+        for query in (instrument.ticker[:3], instrument.name.split()[-1])
+    ]
+
+
+def _new_import_session(db: Session, ctx: BenchmarkContext) -> uuid.UUID:
+    """A parsed import session into a new, empty portfolio."""
+    portfolio = crud.portfolio.create_with_owner(
+        db,
+        obj_in=schemas.PortfolioCreate(name=f"Import {uuid.uuid4().hex[:8]}"),
+        user_id=ctx.import_user_id,
+    )
+    import_session = models.ImportSession(
+        portfolio_id=portfolio.id,
+        user_id=ctx.import_user_id,
+        file_name="benchmark.csv",
+        file_path="benchmark.csv",
+        source="benchmark",
+        status="PARSED",
+    )
+    db.add(import_session)
+    db.commit()
+    return import_session.id
+
+
+@benchmark("import.commit", setup=_new_import_session)
+def _import_commit(db: Session, ctx: BenchmarkContext, session_id: uuid.UUID) -> Any:
+    from app.api.v1.endpoints.import_sessions import commit_import_session
+
+    return commit_import_session(
+        session_id,
+        schemas.ImportSessionCommit(
+            transactions_to_commit=[
+                schemas.ParsedTransaction(**row) for row in ctx.import_rows
+            ]
+        ),
+        db=db,
+        current_user=db.get(models.User, ctx.import_user_id),
+    )
+
+
+@benchmark("backup.export")
+def _backup_export(db: Session, ctx: BenchmarkContext, _: Any) -> int:
+    return sum(len(c) for c in backup_service.iter_backup(db, ctx.user_id, "ndjson"))
+
+
+@benchmark("backup.restore")
+def _backup_restore(db: Session, ctx: BenchmarkContext, _: Any) -> None:
+    # Includes replacing the previous run's data, as every restore does
+    backup_service.restore_backup_stream(db, ctx.restore_user_id, ctx.backup_lines)
+
+
+# --- Running ---
+
+
+@contextmanager
+def benchmark_environment(universe: MarketUniverse) -> Iterator[None]:
+    """Offline market data and no analytics caching."""
+    with ExitStack() as stack:
+        stack.enter_context(offline_market_data(universe))
+        stack.enter_context(
+            patch("app.cache.utils.get_cache_client", lambda: NullCache())
+        )
+        yield
+
+
+def prepare(
+    session_factory: Callable[[], Session], universe: MarketUniverse
+) -> BenchmarkContext:
+    """Loads the synthetic user and the inputs of the write benchmarks."""
+    db = session_factory()
+    try:
+        backup = generate_backup(universe)
+        user = load_synthetic_user(db, universe, backup=backup)
+        portfolio_ids = [
+            row.id
+            for row in db.execute(
+                select(models.Portfolio.id)
+                .join(models.Transaction)
+                .where(models.Portfolio.user_id == user.id)
+                .group_by(models.Portfolio.id)
+                .order_by(func.count(models.Transaction.id).desc())
+            )
+        ]
+        lines = [
+            line
+            for chunk in backup_service.iter_backup(db, user.id, "ndjson")
+            for line in chunk.splitlines()
+        ]
+        import_user = create_benchmark_user(db)
+        restore_user = create_benchmark_user(db)
+        return BenchmarkContext(
+            session_factory=session_factory,
+            universe=universe,
+            user_id=user.id,
+            portfolio_ids=portfolio_ids,
+            import_user_id=import_user.id,
+            restore_user_id=restore_user.id,
+            backup_lines=lines,
+            import_rows=generate_import_rows(universe),
+        )
+    finally:
+        db.close()
+
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    timings: List[float]
+    queries: int
+    query_seconds: float
+
+    @property
+    def median(self) -> float:
+        return statistics.median(self.timings)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "runs": len(self.timings),
+            "min": min(self.timings),
+            "median": self.median,
+            "mean": statistics.fmean(self.timings),
+            "stdev": statistics.stdev(self.timings) if len(self.timings) > 1 else 0.0,
+            "queries": self.queries,
+            "query_seconds": self.query_seconds,
+        }
+
+
+def _run_once(case: Benchmark, ctx: BenchmarkContext):
+    db = ctx.session_factory()
+    try:
+        arg = case.setup(db, ctx) if case.setup else None
+        with metrics.track_queries() as stats:
+            started = time.perf_counter()
+            case.func(db, ctx, arg)
+            elapsed = time.perf_counter() - started
+        db.rollback()
+        return elapsed, stats
+    finally:
+        db.close()
+
+
+def run_benchmark(
+    case: Benchmark, ctx: BenchmarkContext, repeat: int = DEFAULT_REPEAT
+) -> BenchmarkResult:
+    """One untimed warm-up run, then `repeat` timed runs."""
+    _run_once(case, ctx)
+    timings, stats = [], None
+    for _ in range(repeat):
+        elapsed, stats = _run_once(case, ctx)
+        timings.append(elapsed)
+    return BenchmarkResult(case.name, timings, stats.count, stats.duration)
+
+
+def select_benchmarks(only: Optional[List[str]] = None) -> List[Benchmark]:
+    """The cases whose names start with any of `only` (all by default)."""
+    return [
+        case for name, case in BENCHMARKS.items()
+        if not only or any(name.startswith(prefix) for prefix in only)
+    ]
+
+
+# --- Reports ---
+
+
+def build_report(
+    results: List[BenchmarkResult], spec: SyntheticSpec, database: str
+) -> Dict[str, Any]:
+    return {
+        "version": REPORT_VERSION,
+        "created_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        "git": git_revision(),
+        "database": database,
+        "spec": spec.to_dict(),
+        "results": {r.name: r.to_dict() for r in results},
+    }
+
+
+@dataclass
+class Comparison:
+    name: str
+    baseline: float
+    current: float
+    ratio: float
+    status: str  # "regression", "improvement" or "ok"
+    query_delta: int
+
+
+def compare_reports(
+    baseline: Dict[str, Any],
+    current: Dict[str, Any],
+    threshold: float = DEFAULT_THRESHOLD,
+) -> List[Comparison]:
+    """Compares the median of every case present in both reports."""
+    comparisons = []
+    for name, result in current["results"].items():
+        before = baseline["results"].get(name)
+        if before is None or not before["median"]:
+            continue
+        ratio = result["median"] / before["median"]
+        if ratio > 1 + threshold:
+            status = "regression"
+        elif ratio < 1 / (1 + threshold):
+            status = "improvement"
+        else:
+            status = "ok"
+        comparisons.append(
+            Comparison(
+                name,
+                before["median"],
+                result["median"],
+                ratio,
+                status,
+                result["queries"] - before["queries"],
+            )
+        )
+    return comparisons
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    lines = [
+        f"{'benchmark':<26}{'median ms':>12}{'min ms':>12}{'stdev ms':>12}"
+        f"{'queries':>9}"
+    ]
+    for name, r in report["results"].items():
+        lines.append(
+            f"{name:<26}{r['median'] * 1000:>12.1f}{r['min'] * 1000:>12.1f}"
+            f"{r['stdev'] * 1000:>12.1f}{r['queries']:>9}"
+        )
+    return "\n".join(lines)
+
+
+def format_comparison(comparisons: List[Comparison]) -> str:
+    lines = [
+        f"{'benchmark':<26}{'before ms':>12}{'after ms':>12}{'ratio':>8}"
+        f"{'queries':>9}  status"
+    ]
+    for c in comparisons:
+        lines.append(
+            f"{c.name:<26}{c.baseline * 1000:>12.1f}{c.current * 1000:>12.1f}"
+            f"{c.ratio:>8.2f}{c.query_delta:>+9}  {c.status}"
+        )
+    return "\n".join(lines)
+
+
+def spec_from_report(report: Dict[str, Any]) -> SyntheticSpec:
+    data = dict(report["spec"])
+    data["end_date"] = date.fromisoformat(data["end_date"])
+    return SyntheticSpec(**data)
@@ -0,0 +1,1019 @@
+"""
+Synthetic users and offline market data for the benchmark suite.
+
+`MarketUniverse` is a seeded, deterministic market: NSE stocks, mutual
+funds, US stocks, the USD/INR rate and the Nifty 50 index, each with a daily
+(weekday) price series. Stock splits, bonus issues and demergers are applied
+to the series on their effective dates.
+
+`generate_backup` writes a user's history in the format of
+`backup_service.create_backup`: thousands of trades across several
+portfolios, monthly SIPs, dividends, the corporate actions above, RSU vests
+with sell-to-cover, ESPP purchases, PPF contributions, fixed and recurring
+deposits, goals and a watchlist. `load_synthetic_user` restores it for a new
+user, so the rows are exactly the ones the application itself would store.
+
+`OfflineProvider` answers the market-data provider calls from the universe
+and `offline_market_data()` installs it in place of the network providers.
+"""
+import bisect
+import math
+import random
+import uuid
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import date, timedelta
+from decimal import ROUND_DOWN, Decimal
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from unittest.mock import patch
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app import crud, models, schemas
+from app.db.initial_data import seed_interest_rates
+from app.services import backup_service
+
+FX_TICKER = "USDINR=X"
+INDEX_TICKER = "^NSEI"
+PPF_ACCOUNT = "SYNPPF0001"
+BENCHMARK_PASSWORD = "Benchmark#Pass1"
+
+STOCK_SECTORS = [
+    ("Financial Services", "Private Sector Bank"),
+    ("Information Technology", "IT Services & Consulting"),
+    ("Energy", "Oil & Gas Refining"),
+    ("Consumer Staples", "Packaged Foods"),
+    ("Healthcare", "Pharmaceuticals"),
+    ("Industrials", "Capital Goods"),
+    ("Materials", "Cement"),
+    ("Consumer Discretionary", "Automobiles"),
+]
+MF_CATEGORIES = [
+    ("Equity Scheme", "Large Cap Fund"),
+    ("Equity Scheme", "Flexi Cap Fund"),
+    ("Equity Scheme", "Mid Cap Fund"),
+    ("Debt Scheme", "Corporate Bond Fund"),
+    ("Hybrid Scheme", "Balanced Advantage Fund"),
+    ("Other Scheme", "FoF Overseas"),
+]
+INVESTMENT_STYLES = ["Value", "Growth", "Blend"]
+SPLIT_RATIOS = [(2, 1), (5, 1), (10, 1)]  # (new, old)
+BONUS_RATIOS = [(1, 1), (1, 2)]  # (bonus shares, per old shares)
+DEMERGER_COST_PCTS = [15, 20, 25, 30]
+
+CENT = Decimal("0.01")
+THOUSANDTH = Decimal("0.001")
+
+
+@dataclass
+class SyntheticSpec:
+    """
+    Size and shape of a synthetic user. `trades` counts discretionary buys
+    and sells; SIPs, dividends, awards and corporate actions come on top.
+    """
+
+    seed: int = 42
+    years: int = 6
+    end_date: date = field(default_factory=date.today)
+    equity_portfolios: int = 2
+    trades: int = 3000
+    stocks: int = 40
+    mutual_funds: int = 12
+    foreign_stocks: int = 2
+    splits: int = 3
+    bonuses: int = 2
+    demergers: int = 1
+    fixed_deposits: int = 4
+    recurring_deposits: int = 2
+
+    @property
+    def start_date(self) -> date:
+        return self.end_date - timedelta(days=365 * self.years)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["end_date"] = self.end_date.isoformat()
+        return data
+
+
+@dataclass
+class Instrument:
+    ticker: str
+    name: str
+    asset_type: str
+    currency: str
+    exchange: str
+    isin: Optional[str] = None
+    sector: Optional[str] = None
+    industry: Optional[str] = None
+    country: Optional[str] = None
+    investment_style: Optional[str] = None
+    decimals: int = 2
+    # One close per trading day of the universe, None before listing
+    closes: List[Optional[float]] = field(default_factory=list)
+
+    @property
+    def tradable(self) -> bool:
+        return self.asset_type in ("STOCK", "Mutual Fund")
+
+    def details(self) -> Dict[str, Any]:
+        return {
+            "ticker_symbol": self.ticker,
+            "name": self.name,
+            "asset_type": self.asset_type,
+            "exchange": self.exchange,
+            "currency": self.currency,
+            "isin": self.isin,
+        }
+
+
+@dataclass
+class CorporateAction:
+    kind: str  # SPLIT, BONUS or DEMERGER
+    ticker: str
+    day: date
+    new: int
+    old: int = 1
+    child: Optional[str] = None  # DEMERGER: the demerged company
+    cost_pct: int = 0  # DEMERGER: share of the cost moved to the child
+
+
+def _weekdays(start: date, end: date) -> List[date]:
+    days = []
+    day = start
+    while day <= end:
+        if day.weekday() < 5:
+            days.append(day)
+        day += timedelta(days=1)
+    return days
+
+
+class MarketUniverse:
+    """Seeded instruments, daily closes and corporate actions."""
+
+    def __init__(self, spec: SyntheticSpec):
+        self.spec = spec
+        self.days = _weekdays(spec.start_date, spec.end_date)
+        self.instruments: Dict[str, Instrument] = {}
+        self.actions: List[CorporateAction] = []
+        self._decimal_closes: Dict[str, List[Optional[Decimal]]] = {}
+        self._build(random.Random(spec.seed))
+
+    # --- Construction ---
+    def _walk(
+        self, rng: random.Random, start: float, drift: float, vol: float, first: int = 0
+    ) -> List[Optional[float]]:
+        """A geometric random walk over the trading days from `first` on."""
+        mu = drift / 252 - vol * vol / 504
+        sigma = vol / math.sqrt(252)
+        closes: List[Optional[float]] = [None] * first
+        price = start
+        for _ in range(first, len(self.days)):
+            price *= math.exp(rng.gauss(mu, sigma))
+            closes.append(price)
+        return closes
+
+    def _add(
+        self,
+        rng: random.Random,
+        instrument: Instrument,
+        start: float,
+        drift: float,
+        vol: float,
+        first: int = 0,
+    ) -> None:
+        instrument.closes = self._walk(rng, start, drift, vol, first)
+        self.instruments[instrument.ticker] = instrument
+
+    def _build(self, rng: random.Random) -> None:
+        spec = self.spec
+        for i in range(spec.stocks):
+            sector, industry = STOCK_SECTORS[i % len(STOCK_SECTORS)]
+            stock = Instrument(
+                ticker=f"SYNEQ{i:03d}",
+                name=f"Synthetic {industry} {i} Ltd",
+                asset_type="STOCK",
+                currency="INR",
+                exchange="NSE",
+                isin=f"INESYN{i:05d}0",
+                sector=sector,
+                industry=industry,
+                country="India",
+                investment_style=rng.choice(INVESTMENT_STYLES),
+            )
+            self._add(
+                rng, stock, rng.uniform(80, 3000),
+                rng.uniform(0.04, 0.18), rng.uniform(0.18, 0.40),
+            )
+
+        for i in range(spec.mutual_funds):
+            category, sub_category = MF_CATEGORIES[i % len(MF_CATEGORIES)]
+            debt = category == "Debt Scheme"
+            fund = Instrument(
+                ticker=str(190001 + i),
+                name=f"Synthetic {sub_category} {i} - Direct Plan - Growth",
+                asset_type="Mutual Fund",
+                currency="INR",
+                exchange="AMFI",
+                isin=f"INFSYN{i:05d}0",
+                sector=category,
+                industry=sub_category,
+                country="International" if "Overseas" in sub_category else "India",
+                investment_style="Blend",
+                decimals=4,
+            )
+            self._add(
+                rng, fund, rng.uniform(10, 400),
+                0.07 if debt else rng.uniform(0.08, 0.15),
+                0.02 if debt else rng.uniform(0.12, 0.20),
+            )
+
+        for i in range(spec.foreign_stocks):
+            foreign = Instrument(
+                ticker=f"SYNUS{i}",
+                name=f"Synthetic Technologies {i} Inc",
+                asset_type="STOCK",
+                currency="USD",
+                exchange="NASDAQ",
+                sector="Information Technology",
+                industry="Software",
+                country="United States",
+                investment_style="Growth",
+            )
+            self._add(rng, foreign, rng.uniform(50, 400), 0.12, 0.30)
+
+        self._add(
+            rng, Instrument(FX_TICKER, "USD/INR", "Currency", "INR", "CCY", decimals=4),
+            74.0, 0.025, 0.05,
+        )
+        self._add(
+            rng, Instrument(INDEX_TICKER, "NIFTY 50", "Index", "INR", "NSE"),
+            14000.0, 0.10, 0.16,
+        )
+        self._add_corporate_actions(rng)
+
+    def _scale(self, ticker: str, first: int, factor: float) -> None:
+        closes = self.instruments[ticker].closes
+        for i in range(first, len(closes)):
+            if closes[i] is not None:
+                closes[i] *= factor
+
+    def _add_corporate_actions(self, rng: random.Random) -> None:
+        spec = self.spec
+        stocks = [
+            t for t, i in self.instruments.items()
+            if i.asset_type == "STOCK" and i.currency == "INR"
+        ]
+        count = min(spec.splits + spec.bonuses + spec.demergers, len(stocks))
+        n = len(self.days)
+        for position, ticker in enumerate(rng.sample(stocks, count)):
+            first = rng.randint(n // 5, n * 9 // 10)
+            day = self.days[first]
+            if position < spec.splits:
+                new, old = rng.choice(SPLIT_RATIOS)
+                self._scale(ticker, first, old / new)
+                self.actions.append(CorporateAction("SPLIT", ticker, day, new, old))
+            elif position < spec.splits + spec.bonuses:
+                new, old = rng.choice(BONUS_RATIOS)
+                self._scale(ticker, first, old / (old + new))
+                self.actions.append(CorporateAction("BONUS", ticker, day, new, old))
+            else:
+                pct = rng.choice(DEMERGER_COST_PCTS)
+                parent = self.instruments[ticker]
+                child = Instrument(
+                    ticker=f"{ticker}D",
+                    name=f"{parent.name} (Demerged)",
+                    asset_type="STOCK",
+                    currency="INR",
+                    exchange="NSE",
+                    isin=parent.isin.replace("INESYN", "INESYD"),
+                    sector=parent.sector,
+                    industry=parent.industry,
+                    country="India",
+                    investment_style=parent.investment_style,
+                )
+                start = parent.closes[first - 1] * pct / 100
+                self._add(rng, child, start, 0.12, 0.35, first=first)
+                self._scale(ticker, first, 1 - pct / 100)
+                self.actions.append(
+                    CorporateAction(
+                        "DEMERGER", ticker, day, 1, 1, child=child.ticker, cost_pct=pct
+                    )
+                )
+
+    # --- Prices ---
+    def _closes(self, ticker: str) -> Optional[List[Optional[Decimal]]]:
+        if ticker not in self._decimal_closes:
+            instrument = self.instruments.get(ticker)
+            if instrument is None:
+                return None
+            quantum = Decimal(1).scaleb(-instrument.decimals)
+            self._decimal_closes[ticker] = [
+                None if c is None else Decimal(repr(c)).quantize(quantum)
+                for c in instrument.closes
+            ]
+        return self._decimal_closes[ticker]
+
+    def price(self, ticker: str, day: date) -> Optional[Decimal]:
+        """The last close on or before `day` (None before listing)."""
+        closes = self._closes(ticker)
+        i = bisect.bisect_right(self.days, day) - 1
+        if closes is None or i < 0:
+            return None
+        return closes[i]
+
+    def history(self, ticker: str, start: date, end: date) -> Dict[date, Decimal]:
+        closes = self._closes(ticker)
+        if closes is None:
+            return {}
+        lo = bisect.bisect_left(self.days, start)
+        hi = bisect.bisect_right(self.days, end)
+        return {
+            self.days[i]: closes[i] for i in range(lo, hi) if closes[i] is not None
+        }
+
+    def quote(self, ticker: str) -> Optional[Dict[str, Decimal]]:
+        closes = self._closes(ticker)
+        if not closes or closes[-1] is None:
+            return None
+        previous = closes[-2] if len(closes) > 1 and closes[-2] else closes[-1]
+        return {"current_price": closes[-1], "previous_close": previous}
+
+
+# --- User history ---
+
+
+class _BackupBuilder:
+    """Plays a user's life through the universe, recording backup rows."""
+
+    def __init__(self, universe: MarketUniverse):
+        self.u = universe
+        self.spec = universe.spec
+        self.rng = random.Random(self.spec.seed + 1)
+        self.transactions: List[Dict[str, Any]] = []
+        # portfolio -> ticker -> units held
+        self.holdings: Dict[str, Dict[str, Decimal]] = defaultdict(
+            lambda: defaultdict(Decimal)
+        )
+        # (portfolio, ticker) -> [(day, quantity, price)] of BUY-like rows
+        self.acquisitions: Dict[Tuple[str, str], List[Tuple[date, Decimal, Decimal]]]
+        self.acquisitions = defaultdict(list)
+
+        instruments = universe.instruments.values()
+        self.stocks = [
+            i.ticker for i in instruments
+            if i.asset_type == "STOCK" and i.currency == "INR"
+        ]
+        self.funds = [i.ticker for i in instruments if i.asset_type == "Mutual Fund"]
+        self.foreign = [
+            i.ticker for i in instruments
+            if i.asset_type == "STOCK" and i.currency != "INR"
+        ]
+        self.equity_portfolios = (
+            ["Long Term Equity", "Trading"]
+            + [f"Equity {n}" for n in range(3, self.spec.equity_portfolios + 1)]
+        )[: max(1, self.spec.equity_portfolios)]
+        self.fund_portfolio = "Mutual Funds"
+        self.employer_portfolio = "Employer Stock (US)"
+        self.fixed_income_portfolio = "Fixed Income"
+        # Tickers with a corporate action are held in the first equity
+        # portfolio until the action, so every action produces rows
+        self.pending_actions = {a.ticker: a.day for a in universe.actions}
+
+    # --- Recording ---
+    def _add(
+        self,
+        portfolio: str,
+        t_type: str,
+        ticker: str,
+        day: date,
+        quantity: Decimal,
+        price: Decimal,
+        fees: Decimal = Decimal(0),
+        details: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        self.transactions.append({
+            "portfolio_name": portfolio,
+            "transaction_type": t_type,
+            "quantity": float(quantity),
+            "price_per_unit": float(price),
+            "transaction_date": day.isoformat(),
+            "fees": float(fees),
+            "details": details,
+            "ticker_symbol": ticker,
+            "isin": self.u.instruments[ticker].isin,
+        })
+        if t_type in ("BUY", "ESPP_PURCHASE", "RSU_VEST"):
+            self.acquisitions[(portfolio, ticker)].append((day, quantity, price))
+
+    def _trade_price(self, ticker: str, day: date) -> Decimal:
+        close = float(self.u.price(ticker, day))
+        return Decimal(repr(close * (1 + self.rng.uniform(-0.01, 0.01)))).quantize(
+            CENT
+        )
+
+    @staticmethod
+    def _fees(amount: Decimal) -> Decimal:
+        return (amount * Decimal("0.0003") + 15).quantize(CENT)
+
+    # --- Events ---
+    def _trade(self, day: date) -> None:
+        if self.funds and self.rng.random() < 0.3:
+            self._fund_trade(day)
+        elif self.stocks:
+            self._stock_trade(day)
+
+    def _stock_trade(self, day: date) -> None:
+        rng = self.rng
+        portfolio = rng.choice(self.equity_portfolios)
+        positions = self.holdings[portfolio]
+        held = sorted(
+            t for t, q in positions.items()
+            if q > 0 and not self._reserved(portfolio, t, day)
+        )
+        if held and rng.random() < 0.4:
+            ticker = rng.choice(held)
+            fraction = Decimal(rng.choice(["0.25", "0.5", "1"]))
+            quantity = Decimal(max(1, int(positions[ticker] * fraction)))
+            price = self._trade_price(ticker, day)
+            self._add(
+                portfolio, "SELL", ticker, day, quantity, price,
+                fees=self._fees(quantity * price),
+            )
+            positions[ticker] -= quantity
+            return
+
+        listed = [t for t in self.stocks if self.u.price(t, day) is not None]
+        ticker = rng.choice(listed)
+        price = self._trade_price(ticker, day)
+        quantity = Decimal(max(1, int(rng.uniform(10_000, 150_000) / float(price))))
+        self._add(
+            portfolio, "BUY", ticker, day, quantity, price,
+            fees=self._fees(quantity * price),
+        )
+        positions[ticker] += quantity
+
+    def _reserved(self, portfolio: str, ticker: str, day: date) -> bool:
+        pending = self.pending_actions.get(ticker)
+        return (
+            pending is not None
+            and portfolio == self.equity_portfolios[0]
+            and day <= pending
+        )
+
+    def _open_position(self, day: date, ticker: str) -> None:
+        portfolio = self.equity_portfolios[0]
+        price = self._trade_price(ticker, day)
+        quantity = Decimal(max(10, int(50_000 / float(price))))
+        self._add(
+            portfolio, "BUY", ticker, day, quantity, price,
+            fees=self._fees(quantity * price),
+        )
+        self.holdings[portfolio][ticker] += quantity
+
+    def _buy_fund(self, day: date, ticker: str, amount: Decimal) -> None:
+        nav = self.u.price(ticker, day)
+        quantity = (amount / nav).quantize(THOUSANDTH, rounding=ROUND_DOWN)
+        self._add(self.fund_portfolio, "BUY", ticker, day, quantity, nav)
+        self.holdings[self.fund_portfolio][ticker] += quantity
+
+    def _fund_trade(self, day: date) -> None:
+        rng = self.rng
+        positions = self.holdings[self.fund_portfolio]
+        held = sorted(t for t, q in positions.items() if q > 0)
+        if held and rng.random() < 0.3:
+            ticker = rng.choice(held)
+            fraction = Decimal(repr(rng.uniform(0.2, 0.9)))
+            quantity = (positions[ticker] * fraction).quantize(
+                THOUSANDTH, rounding=ROUND_DOWN
+            )
+            if quantity > 0:
+                nav = self.u.price(ticker, day)
+                self._add(self.fund_portfolio, "SELL", ticker, day, quantity, nav)
+                positions[ticker] -= quantity
+            return
+        amount = Decimal(rng.randrange(10_000, 200_000, 1_000))
+        self._buy_fund(day, rng.choice(self.funds), amount)
+
+    def _sip(self, day: date, ticker: str, amount: Decimal) -> None:
+        self._buy_fund(day, ticker, amount)
+
+    def _dividend(self, day: date, ticker: str, dividend_yield: float) -> None:
+        close = self.u.price(ticker, day)
+        if close is None:
+            return
+        per_share = (close * Decimal(repr(dividend_yield))).quantize(CENT)
+        for portfolio in self.equity_portfolios:
+            held = self.holdings[portfolio][ticker]
+            if held > 0 and per_share > 0:
+                self._add(portfolio, "DIVIDEND", ticker, day, held, per_share)
+
+    def _corporate_action(self, day: date, action: CorporateAction) -> None:
+        ticker = action.ticker
+        for portfolio in self.equity_portfolios:
+            positions = self.holdings[portfolio]
+            held = positions[ticker]
+            if held <= 0:
+                continue
+            if action.kind == "SPLIT":
+                self._add(
+                    portfolio, "SPLIT", ticker, day,
+                    Decimal(action.new), Decimal(action.old),
+                )
+                positions[ticker] = held * action.new / action.old
+            elif action.kind == "BONUS":
+                # Zero-cost BUY for the bonus shares, as handle_bonus_issue does
+                bonus = Decimal(math.floor(held * action.new / action.old))
+                if bonus > 0:
+                    self._add(portfolio, "BUY", ticker, day, bonus, Decimal(0))
+                    positions[ticker] += bonus
+                self._add(
+                    portfolio, "BONUS", ticker, day,
+                    Decimal(action.new), Decimal(action.old),
+                )
+            elif action.kind == "DEMERGER":
+                # Child BUYs per original acquisition, as handle_demerger does
+                ratio = Decimal(action.new)
+                pct = Decimal(action.cost_pct) / 100
+                total_cost = Decimal(0)
+                for acquired, quantity, price in list(
+                    self.acquisitions[(portfolio, ticker)]
+                ):
+                    if acquired > day:
+                        continue
+                    self._add(
+                        portfolio, "BUY", action.child, acquired,
+                        quantity * ratio, price * pct / ratio,
+                        details={"from_demerger": True},
+                    )
+                    positions[action.child] += quantity * ratio
+                    total_cost += quantity * price * pct
+                self._add(
+                    portfolio, "DEMERGER", ticker, day, ratio, Decimal(0),
+                    details={
+                        "new_asset_ticker": action.child,
+                        "cost_allocation_pct": action.cost_pct,
+                        "total_cost_allocated": str(total_cost),
+                    },
+                )
+
+    def _rsu_vest(self, day: date, ticker: str) -> None:
+        fmv = self.u.price(ticker, day)
+        fx_rate = self.u.price(FX_TICKER, day)
+        quantity = Decimal(self.rng.randint(8, 40))
+        withheld = Decimal(math.floor(quantity * Decimal("0.35")))
+        details: Dict[str, Any] = {"fmv": float(fmv), "fx_rate": float(fx_rate)}
+        if withheld:
+            details["sell_to_cover"] = {
+                "quantity": int(withheld), "price_per_unit": float(fmv)
+            }
+        self._add(
+            self.employer_portfolio, "RSU_VEST", ticker, day, quantity, Decimal(0),
+            details=details,
+        )
+        self.holdings[self.employer_portfolio][ticker] += quantity - withheld
+
+    def _espp_purchase(self, day: date, ticker: str) -> None:
+        fmv = self.u.price(ticker, day)
+        offer = self.u.price(ticker, day - timedelta(days=182)) or fmv
+        price = (min(fmv, offer) * Decimal("0.85")).quantize(CENT)
+        quantity = Decimal(int(Decimal(self.rng.randint(3_000, 8_000)) / price))
+        if quantity <= 0:
+            return
+        self._add(
+            self.employer_portfolio, "ESPP_PURCHASE", ticker, day, quantity, price,
+            details={
+                "fmv": float(fmv),
+                "fx_rate": float(self.u.price(FX_TICKER, day)),
+            },
+        )
+        self.holdings[self.employer_portfolio][ticker] += quantity
+
+    def _foreign_sell(self, day: date, ticker: str) -> None:
+        positions = self.holdings[self.employer_portfolio]
+        quantity = Decimal(int(positions[ticker] * Decimal("0.3")))
+        if quantity <= 0:
+            return
+        self._add(
+            self.employer_portfolio, "SELL", ticker, day, quantity,
+            self._trade_price(ticker, day),
+            details={"fx_rate": float(self.u.price(FX_TICKER, day))},
+        )
+        positions[ticker] -= quantity
+
+    def _ppf_contribution(self, day: date, amount: Decimal) -> None:
+        self.transactions.append({
+            "portfolio_name": self.fixed_income_portfolio,
+            "transaction_type": "PPF_CONTRIBUTION",
+            "quantity": float(amount),
+            "price_per_unit": 1.0,
+            "transaction_date": day.isoformat(),
+            "fees": 0.0,
+            "details": None,
+            "ppf_account_number": PPF_ACCOUNT,
+        })
+
+    # --- Schedule ---
+    def build(self) -> Dict[str, Any]:
+        rng = self.rng
+        spec = self.spec
+        days = [d for d in self.u.days if d < spec.end_date]
+        month_starts = [
+            d for i, d in enumerate(days)
+            if i == 0 or (d.year, d.month) != (days[i - 1].year, days[i - 1].month)
+        ]
+        events: List[Tuple[date, int, int, Any, Tuple[Any, ...]]] = []
+
+        def schedule(day: date, priority: int, handler: Any, *args: Any) -> None:
+            events.append((day, priority, len(events), handler, args))
+
+        for day in rng.choices(days, k=spec.trades):
+            schedule(day, 2, self._trade)
+        for action in self.u.actions:
+            schedule(action.day, 0, self._corporate_action, action)
+            opened = rng.choice(days[: len(days) // 10])
+            schedule(opened, 2, self._open_position, action.ticker)
+
+        for ticker in self.funds[: max(1, len(self.funds) // 2)]:
+            amount = Decimal(rng.choice([2_000, 5_000, 10_000, 25_000]))
+            first = rng.randrange(max(1, len(month_starts) // 2))
+            for day in month_starts[first:]:
+                schedule(day, 1, self._sip, ticker, amount)
+
+        for ticker in self.stocks:
+            month = rng.randint(6, 9)
+            dividend_yield = rng.uniform(0.005, 0.03)
+            for day in month_starts:
+                if day.month == month:
+                    schedule(day, 1, self._dividend, ticker, dividend_yield)
+
+        for ticker in self.foreign:
+            for day in month_starts:
+                if day.month in (2, 5, 8, 11):
+                    schedule(day, 1, self._rsu_vest, ticker)
+                if day.month in (3, 9):
+                    schedule(day, 2, self._foreign_sell, ticker)
+        if self.foreign:
+            for day in month_starts:
+                if day.month in (5, 11):
+                    schedule(day, 1, self._espp_purchase, self.foreign[0])
+
+        for day in month_starts:
+            if day.month == 4:
+                schedule(day, 1, self._ppf_contribution, Decimal(150_000))
+
+        for day, _, _, handler, args in sorted(events, key=lambda e: e[:3]):
+            handler(day, *args)
+
+        return {
+            "metadata": {
+                "version": backup_service.BACKUP_VERSION,
+                "export_date": f"{spec.end_date.isoformat()}T00:00:00Z",
+            },
+            "data": {
+                "portfolios": self._portfolios(),
+                "watchlists": [
+                    {"name": "Tracking", "items": self.stocks[:10]}
+                ],
+                "ppf_accounts": [{
+                    "account_number": PPF_ACCOUNT,
+                    "institution": "Synthetic Bank",
+                    "opening_date": spec.start_date.isoformat(),
+                }],
+                "bonds": [],
+                "fixed_deposits": self._fixed_deposits(days),
+                "recurring_deposits": self._recurring_deposits(days),
+                "transactions": self.transactions,
+                "goals": self._goals(),
+            },
+        }
+
+    def _portfolios(self) -> List[Dict[str, Any]]:
+        names = list(self.equity_portfolios)
+        if self.funds:
+            names.append(self.fund_portfolio)
+        if self.foreign:
+            names.append(self.employer_portfolio)
+        names.append(self.fixed_income_portfolio)
+        return [
+            {"name": name, "description": "Synthetic benchmark data"}
+            for name in names
+        ]
+
+    def _fixed_deposits(self, days: List[date]) -> List[Dict[str, Any]]:
+        deposits = []
+        for i in range(self.spec.fixed_deposits):
+            start = self.rng.choice(days[: len(days) * 3 // 4])
+            years = self.rng.choice([1, 2, 3, 5])
+            deposits.append({
+                "portfolio_name": self.fixed_income_portfolio,
+                "account_number": f"SYNFD{i:04d}",
+                "institution": "Synthetic Bank",
+                "principal": float(self.rng.randrange(100_000, 1_000_000, 5_000)),
+                "interest_rate": round(self.rng.uniform(6, 8), 2),
+                "start_date": start.isoformat(),
+                "maturity_date": (start + timedelta(days=365 * years)).isoformat(),
+                "compounding_frequency": "QUARTERLY",
+                "payout_type": "PAYOUT" if i % 3 == 2 else "CUMULATIVE",
+            })
+        return deposits
+
+    def _recurring_deposits(self, days: List[date]) -> List[Dict[str, Any]]:
+        return [
+            {
+                "portfolio_name": self.fixed_income_portfolio,
+                "account_number": f"SYNRD{i:04d}",
+                "institution": "Synthetic Bank",
+                "monthly_installment": float(
+                    self.rng.randrange(2_000, 20_000, 500)
+                ),
+                "interest_rate": round(self.rng.uniform(6, 7.5), 2),
+                "start_date": self.rng.choice(days[: len(days) // 2]).isoformat(),
+                "tenure_months": self.rng.choice([12, 24, 36, 60]),
+            }
+            for i in range(self.spec.recurring_deposits)
+        ]
+
+    def _goals(self) -> List[Dict[str, Any]]:
+        end = self.spec.end_date
+        return [
+            {
+                "name": "Retirement",
+                "target_amount": 50_000_000.0,
+                "target_date": end.replace(year=end.year + 20).isoformat(),
+                "linked_portfolios": self.equity_portfolios[:1]
+                + ([self.fund_portfolio] if self.funds else []),
+                "linked_assets": [],
+            },
+            {
+                "name": "Education",
+                "target_amount": 5_000_000.0,
+                "target_date": end.replace(year=end.year + 8).isoformat(),
+                "linked_portfolios": [],
+                "linked_assets": self.funds[:2],
+            },
+        ]
+
+
+def generate_backup(universe: MarketUniverse) -> Dict[str, Any]:
+    """A user's full history as a backup document (see module docstring)."""
+    return _BackupBuilder(universe).build()
+
+
+def generate_import_rows(
+    universe: MarketUniverse, count: int = 500
+) -> List[Dict[str, Any]]:
+    """
+    Broker statement rows (`ParsedTransaction` fields) for the import commit
+    benchmark: buys and sells of ten stocks over the last two years, in date
+    order and never selling more than was bought.
+    """
+    rng = random.Random(universe.spec.seed + 2)
+    cutoff = universe.spec.end_date - timedelta(days=730)
+    days = sorted(
+        rng.choices(
+            [d for d in universe.days if cutoff <= d < universe.spec.end_date],
+            k=count,
+        )
+    )
+    tickers = [
+        t for t, i in universe.instruments.items()
+        if i.asset_type == "STOCK" and i.currency == "INR" and i.closes[0]
+    ][:10]
+    held: Dict[str, int] = defaultdict(int)
+    rows = []
+    for day in days:
+        owned = [t for t in tickers if held[t] > 0]
+        if owned and rng.random() < 0.35:
+            ticker = rng.choice(owned)
+            quantity = rng.randint(1, held[ticker])
+            t_type = "SELL"
+            held[ticker] -= quantity
+        else:
+            ticker = rng.choice(tickers)
+            quantity = rng.randint(1, 100)
+            t_type = "BUY"
+            held[ticker] += quantity
+        price = float(universe.price(ticker, day))
+        rows.append({
+            "transaction_date": day.isoformat(),
+            "ticker_symbol": ticker,
+            "isin": universe.instruments[ticker].isin,
+            "transaction_type": t_type,
+            "quantity": float(quantity),
+            "price_per_unit": price,
+            "fees": round(quantity * price * 0.0003, 2),
+        })
+    return rows
+
+
+# --- Database ---
+
+
+def ensure_assets(db: Session, universe: MarketUniverse) -> None:
+    """Creates the universe's tradable instruments that are not in `db` yet."""
+    tradable = [i for i in universe.instruments.values() if i.tradable]
+    existing = set(
+        db.scalars(
+            select(models.Asset.ticker_symbol).where(
+                models.Asset.ticker_symbol.in_([i.ticker for i in tradable])
+            )
+        )
+    )
+    db.add_all(
+        models.Asset(
+            ticker_symbol=i.ticker,
+            name=i.name,
+            asset_type=i.asset_type,
+            currency=i.currency,
+            exchange=i.exchange,
+            isin=i.isin,
+            sector=i.sector,
+            industry=i.industry,
+            country=i.country,
+            investment_style=i.investment_style,
+        )
+        for i in tradable
+        if i.ticker not in existing
+    )
+    db.commit()
+
+
+def create_benchmark_user(db: Session, email: Optional[str] = None) -> models.User:
+    user = crud.user.create(
+        db,
+        obj_in=schemas.UserCreate(
+            email=email or f"benchmark-{uuid.uuid4().hex[:12]}@example.com",
+            password=BENCHMARK_PASSWORD,
+            full_name="Benchmark User",
+        ),
+    )
+    db.commit()
+    return user
+
+
+def load_synthetic_user(
+    db: Session,
+    universe: MarketUniverse,
+    backup: Optional[Dict[str, Any]] = None,
+    email: Optional[str] = None,
+) -> models.User:
+    """Creates a user and restores the generated history for them."""
+    ensure_assets(db, universe)
+    seed_interest_rates(db)
+    db.commit()
+    user = create_benchmark_user(db, email)
+    if backup is None:
+        backup = generate_backup(universe)
+    backup_service.restore_backup(db, user.id, backup)
+    return user
+
+
+# --- Offline market data ---
+
+
+class OfflineProvider:
+    """
+    Stands in for all market-data providers (Upstox, yfinance, AMFI and NSE)
+    and answers their calls from a `MarketUniverse`, without network access.
+    """
+
+    def __init__(self, universe: MarketUniverse):
+        self.universe = universe
+
+    def get_current_prices(
+        self, assets: List[Dict[str, Any]]
+    ) -> Dict[str, Dict[str, Decimal]]:
+        prices = {}
+        for asset in assets:
+            ticker = asset.get("ticker_symbol")
+            quote = self.universe.quote(ticker)
+            if quote:
+                prices[ticker] = quote
+        return prices
+
+    def get_historical_prices(
+        self, assets: List[Dict[str, Any]], start_date: date, end_date: date
+    ) -> Dict[str, Dict[date, Decimal]]:
+        history = {}
+        for asset in assets:
+            ticker = asset.get("ticker_symbol")
+            prices = self.universe.history(ticker, start_date, end_date)
+            if prices:
+                history[ticker] = prices
+        return history
+
+    def get_index_history(
+        self, ticker_symbol: str, start_date: date, end_date: date
+    ) -> Dict[str, float]:
+        prices = self.universe.history(ticker_symbol, start_date, end_date)
+        return {d.isoformat(): float(p) for d, p in prices.items()}
+
+    def get_asset_details(
+        self, ticker_symbol: str, *args: Any, **kwargs: Any
+    ) -> Optional[Dict[str, Any]]:
+        instrument = self.universe.instruments.get(ticker_symbol)
+        return instrument.details() if instrument else None
+
+    def get_scheme_by_isin(self, isin_code: str) -> Optional[Dict[str, Any]]:
+        for instrument in self.universe.instruments.values():
+            if instrument.asset_type == "Mutual Fund" and instrument.isin == isin_code:
+                return instrument.details()
+        return None
+
+    def search(self, query: str) -> List[Dict[str, Any]]:
+        query = query.lower()
+        return [
+            i.details() for i in self.universe.instruments.values()
+            if query in i.ticker.lower()
+            or query in i.name.lower()
+            or query == (i.isin or "").lower()
+        ][:10]
+
+    def get_price(self, ticker_symbol: str) -> Optional[Decimal]:
+        quote = self.universe.quote(ticker_symbol)
+        return quote["current_price"] if quote else None
+
+    def get_exchange_rate(
+        self, from_currency: str, to_currency: str, date_obj: date
+    ) -> Optional[Decimal]:
+        return self.universe.price(f"{from_currency}{to_currency}=X", date_obj)
+
+    def get_exchange_rates(
+        self, from_currency: str, to_currency: str, dates: List[date]
+    ) -> Dict[date, Optional[Decimal]]:
+        return {
+            d: self.get_exchange_rate(from_currency, to_currency, d) for d in dates
+        }
+
+    def get_enrichment_data(
+        self, ticker_symbol: str, exchange: Optional[str] = None
+    ) -> Optional[Dict[str, Any]]:
+        instrument = self.universe.instruments.get(ticker_symbol)
+        if instrument is None:
+            return None
+        return {
+            "sector": instrument.sector,
+            "industry": instrument.industry,
+            "country": instrument.country,
+            "market_cap": 100_000_000_000,
+            "investment_style": instrument.investment_style,
+        }
+
+    def get_enrichment_data_batch(
+        self, assets: List[Dict[str, Any]]
+    ) -> Dict[str, Dict[str, Any]]:
+        return {
+            a["ticker_symbol"]: self.get_enrichment_data(a["ticker_symbol"])
+            for a in assets
+            if a["ticker_symbol"] in self.universe.instruments
+        }
+
+    def get_all_nav_data(self) -> Dict[str, Dict[str, Any]]:
+        end = self.universe.spec.end_date
+        return {
+            i.ticker: {
+                "scheme_code": i.ticker,
+                "isin": i.isin,
+                "isin2": None,
+                "scheme_name": i.name,
+                "nav": str(self.universe.price(i.ticker, end)),
+                "date": end.isoformat(),
+                "mf_category": i.sector,
+                "mf_sub_category": i.industry,
+            }
+            for i in self.universe.instruments.values()
+            if i.asset_type == "Mutual Fund"
+        }
+
+
+PROVIDER_ATTRIBUTES = (
+    "upstox_provider", "yfinance_provider", "amfi_provider", "nse_provider"
+)
+
+
+@contextmanager
+def offline_market_data(universe: MarketUniverse) -> Iterator[OfflineProvider]:
+    """Routes every market-data provider call to an `OfflineProvider`."""
+    from app.services.financial_data_service import financial_data_service
+
+    provider = OfflineProvider(universe)
+    with ExitStack() as stack:
+        # create=True: the test suite's mock service has no provider attributes
+        for name in PROVIDER_ATTRIBUTES:
+            stack.enter_context(
+                patch.object(financial_data_service, name, provider, create=True)
+            )
+        # Services that build their own provider instances
+        stack.enter_context(
+            patch(
+                "app.services.schedule_fa_service.YFinanceProvider",
+                lambda cache_client=None: provider,
+            )
+        )
+        stack.enter_context(
+            patch("app.services.providers.amfi_provider.amfi_provider", provider)
+        )
+        yield provider
@@ -2,6 +2,8 @@ import json
 from abc import ABC, abstractmethod
 from typing import Any, List, Optional
 
+from app.core.metrics import record_cache_lookup
+
 
 class CacheClient(ABC):
     """Abstract base class for a cache client."""
@@ -34,6 +36,7 @@ class CacheClient(ABC):
     def get_json(self, key: str) -> Optional[Any]:
         """Gets a JSON value from the cache and deserializes it."""
         value = self.get(key)
+        record_cache_lookup(key, hit=value is not None)
         if value:
             try:
                 return json.loads(value)
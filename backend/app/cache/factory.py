@@ -3,12 +3,6 @@ from typing import Optional
 
 from app.cache.base import CacheClient
 from app.cache.disk_client import DiskCacheClient
-
-try:
-    from app.cache.redis_client import RedisCacheClient
-except ImportError:
-    RedisCacheClient = None
-
 from app.core.config import settings
 
 
@@ -25,7 +19,10 @@ def get_cache_client() -> Optional[CacheClient]:
         or None if caching is disabled or fails to initialize.
     """
     if settings.CACHE_TYPE == "redis":
-        if RedisCacheClient is None:
+        # Imported here so disk-cache installs never load the redis client
+        try:
+            from app.cache.redis_client import RedisCacheClient
+        except ImportError:
             raise ImportError("redis package is required when CACHE_TYPE is 'redis'")
         return RedisCacheClient(redis_url=settings.REDIS_URL)
     elif settings.CACHE_TYPE == "disk":
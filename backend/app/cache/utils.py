@@ -11,6 +11,7 @@ from sqlalchemy.orm import Session
 
 from app import crud
 from app.cache.factory import get_cache_client
+from app.core.metrics import record_cache_lookup
 from app.utils.pydantic_compat import model_validate_json
 
 logger = logging.getLogger(__name__)
@@ -36,7 +37,6 @@ def cache_analytics_data(
     def decorator(func: Callable) -> Callable:
         @functools.wraps(func)
         def wrapper(*args: Any, **kwargs: Any) -> Any:
-            cache = get_cache_client()
             sig = inspect.signature(func)
             bound_args = sig.bind(*args, **kwargs)
             bound_args.apply_defaults()
@@ -55,22 +55,15 @@ def cache_analytics_data(
             cache_key = ":".join(key_parts)
 
             # 1. Try to get from cache
-            cached_result = cache.get(cache_key)
+            cached_result = read_analytics_cache(cache_key, response_model)
             if cached_result is not None:
-                logger.debug(f"Cache HIT for key: {cache_key}")
-                if response_model:
-                    return model_validate_json(response_model, cached_result)
-                return json.loads(cached_result)
-
-            logger.debug(f"Cache MISS for key: {cache_key}")
+                return cached_result
 
             # 2. If miss, execute the function
             result = func(*args, **kwargs)
 
             # 3. Set the result in the cache
-            # Use jsonable_encoder to handle complex types like Pydantic models
-            json_result = json.dumps(jsonable_encoder(result))
-            cache.set(key=cache_key, value=json_result, expire=ttl)
+            write_analytics_cache(cache_key, result, ttl)
 
             return result
 
@@ -79,6 +72,35 @@ def cache_analytics_data(
     return decorator
 
 
+def read_analytics_cache(
+    cache_key: str, response_model: Optional[Type[BaseModel]] = None
+) -> Any:
+    """
+    Reads an entry written by `cache_analytics_data`, or returns None on a miss.
+    Lets callers that cannot use the decorator (e.g. async code paths) share
+    its cache entries.
+    """
+    cache = get_cache_client()
+    cached_result = cache.get(cache_key)
+    record_cache_lookup(cache_key, hit=cached_result is not None)
+    if cached_result is None:
+        logger.debug(f"Cache MISS for key: {cache_key}")
+        return None
+
+    logger.debug(f"Cache HIT for key: {cache_key}")
+    if response_model:
+        return model_validate_json(response_model, cached_result)
+    return json.loads(cached_result)
+
+
+def write_analytics_cache(cache_key: str, result: Any, ttl: int = 900) -> None:
+    """Stores a result in the format `read_analytics_cache` expects."""
+    cache = get_cache_client()
+    # Use jsonable_encoder to handle complex types like Pydantic models
+    json_result = json.dumps(jsonable_encoder(result))
+    cache.set(key=cache_key, value=json_result, expire=ttl)
+
+
 def invalidate_caches_for_portfolio(db: Session, portfolio_id: uuid.UUID):
     """
     Invalidates all cache entries associated with a specific portfolio.
@@ -118,7 +118,7 @@ def seed_assets_command(
             typer.echo(f"Error during download setup: {e}", err=True)
 
     # Execute Phases (consolidated in process_all_sources)
-    process_all_sources(seeder, files)
+    timings = process_all_sources(seeder, files)
 
     # Phase 6: Enrichment (FR6.4)
 
@@ -134,6 +134,11 @@ def seed_assets_command(
         f"{enrichment_stats['errors']} errors"
     )
 
+    if timings:
+        typer.echo("\n--- Phase Timings ---")
+        for source, seconds in timings.items():
+            typer.echo(f"{source}: {seconds:.2f}s")
+
     if seeder.skipped_series_counts:
         typer.echo("\n--- Skipped Series Summary (BSE Equity) ---")
         for series, count in sorted(seeder.skipped_series_counts.items()):
@@ -317,6 +322,123 @@ def dump_table_command(
         typer.secho(f"An error occurred: {e}", fg=typer.colors.RED, err=True)
 
 
+@app.command("perf-report")
+def perf_report_command(
+    email: str = typer.Argument(..., help="Email of the user to measure."),
+    history_range: str = typer.Option(
+        "1y", "--range", help="Dashboard history range to compute."
+    ),
+    prometheus: bool = typer.Option(
+        False, "--prometheus", help="Also print the raw Prometheus metrics."
+    ),
+):
+    """
+    Runs the dashboard and portfolio analytics for a user and reports the
+    time, SQL statements and cache and provider behaviour of each step.
+    Run `clear-cache` first to measure cold calculations.
+    """
+    # Local import to prevent circular dependencies
+    import time
+
+    from app import crud
+    from app.core import metrics
+
+    db: Session = next(get_db_session())
+    user = crud.user.get_by_email(db, email=email)
+    if not user:
+        typer.secho(f"User '{email}' not found.", fg=typer.colors.RED, err=True)
+        raise typer.Exit(code=1)
+
+    steps = [
+        ("dashboard summary", lambda: crud.dashboard.get_summary(
+            db, user_id=user.id
+        )),
+        (f"dashboard history ({history_range})", lambda: crud.dashboard.get_history(
+            db, user_id=user.id, range_str=history_range
+        )),
+        ("all holdings", lambda: crud.holding.get_all_portfolios_holdings_and_summary(
+            db, user_id=user.id
+        )),
+    ]
+    for portfolio in crud.portfolio.get_multi_by_owner(db, user_id=user.id):
+        steps.append((
+            f"holdings: {portfolio.name}",
+            lambda pid=portfolio.id: crud.holding.get_portfolio_holdings_and_summary(
+                db, portfolio_id=pid
+            ),
+        ))
+        steps.append((
+            f"analytics: {portfolio.name}",
+            lambda pid=portfolio.id: crud.analytics.get_portfolio_analytics(
+                db, portfolio_id=pid
+            ),
+        ))
+
+    typer.echo(f"{'step':<40} {'time (ms)':>10} {'queries':>8} {'sql (ms)':>9}")
+    for name, step in steps:
+        started = time.perf_counter()
+        with metrics.track_queries() as queries:
+            step()
+        elapsed = time.perf_counter() - started
+        typer.echo(
+            f"{name[:40]:<40} {elapsed * 1000:>10.1f} {queries.count:>8} "
+            f"{queries.duration * 1000:>9.1f}"
+        )
+    db.commit()
+
+    report = metrics.snapshot()
+    typer.echo("\nCache lookups:")
+    for prefix, entry in report["cache"].items():
+        typer.echo(
+            f"  {prefix:<45} hits {entry['hit']:>5}  misses {entry['miss']:>5}"
+            f"  ratio {entry['hit_ratio']:.2f}"
+        )
+    typer.echo("\nProvider calls:")
+    for call, entry in report["providers"].items():
+        errors = report["provider_errors"].get(call, 0)
+        typer.echo(
+            f"  {call:<45} calls {entry['count']:>4}  mean {entry['mean_ms']:>8.1f} ms"
+            f"  errors {errors}"
+        )
+    if prometheus:
+        typer.echo("")
+        typer.echo(metrics.render())
+
+
+@app.command("backfill-bhavcopy")
+def backfill_bhavcopy_command(
+    start: datetime = typer.Option(
+        ..., "--start", formats=["%Y-%m-%d"], help="First day to archive."
+    ),
+    end: Optional[datetime] = typer.Option(
+        None, "--end", formats=["%Y-%m-%d"], help="Last day to archive (today)."
+    ),
+):
+    """
+    Downloads the NSE bhavcopies of a date range into the local archive that
+    serves NSE closing prices. Days already archived, and days known to have
+    no bhavcopy, are skipped, so an interrupted backfill can be rerun.
+    """
+    # Local import to prevent circular dependencies
+    from app.cache.factory import get_cache_client
+    from app.services.providers.nse_bhavcopy_provider import NseBhavcopyProvider
+
+    end_date = end.date() if end else date.today()
+    if start.date() > end_date:
+        typer.secho("--start must not be after --end.", fg=typer.colors.RED, err=True)
+        raise typer.Exit(code=1)
+
+    typer.echo(f"Archiving NSE bhavcopies from {start.date()} to {end_date}...")
+    provider = NseBhavcopyProvider(get_cache_client())
+    stats = provider.backfill(start.date(), end_date)
+    typer.secho(
+        f"Archived {stats['archived']} days, {stats['missing']} without a "
+        f"bhavcopy, {stats['skipped']} already done, {stats['failed']} failed.",
+        fg=typer.colors.RED if stats["failed"] else typer.colors.GREEN,
+    )
+    typer.echo(f"Archive: {provider.archive.root}")
+
+
 @app.command("clear-cache")
 def clear_cache_command():
     """Clears the application cache (Redis or DiskCache)."""
@@ -145,6 +145,34 @@ class Settings(BaseSettings):
     CORS_ORIGINS: str = "http://localhost:3000,http://localhost,http://127.0.0.1:3000"
     DEBUG: bool = False
     LOG_LEVEL: str = "INFO"
+    # Serve Prometheus metrics at /metrics. The endpoint has no
+    # authentication: only enable it where the port is not public.
+    METRICS_ENABLED: bool = False
+    # Allow admins to profile single requests (?profile=1 or X-Profile header)
+    PROFILING_ENABLED: bool = False
+    PROFILE_DIR: Optional[str] = None
+    # Built-in scheduler for the end-of-day price warming and snapshot job
+    SCHEDULER_ENABLED: bool = True
+    # Time of day (IST, HH:MM) the end-of-day job runs on trading days
+    SCHEDULER_EOD_TIME: str = "16:30"
+    # Time of day (IST, HH:MM) the day's NSE bhavcopy is archived; NSE
+    # publishes it in the early evening
+    SCHEDULER_BHAVCOPY_TIME: str = "19:00"
+    # Portfolios valued and written per bulk snapshot statement
+    SCHEDULER_SNAPSHOT_BATCH_SIZE: int = 200
+    # Users resolved from access tokens are cached in each process; changes
+    # made in another process take up to the TTL to apply. 0 disables it.
+    AUTH_PRINCIPAL_CACHE_TTL_SECONDS: float = 30
+    AUTH_PRINCIPAL_CACHE_SIZE: int = 1024
+    # Seconds between events on the live quote and valuation streams; each
+    # price is fetched at most once per interval for all open streams
+    LIVE_STREAM_INTERVAL_SECONDS: float = 15
+    # Run a background delta sync of the asset master on startup when the
+    # last sync is a day old. Off by default: it downloads every source.
+    ASSET_DELTA_SYNC_ON_STARTUP: bool = False
+    # Replay market-traded transactions in float64 rather than Decimal when
+    # calculating holdings; amounts agree to within rounding at 4 places
+    HOLDINGS_FAST_PATH: bool = False
 
     # For desktop encryption
     ENCRYPTION_KEY_PATH: str = "master.key"
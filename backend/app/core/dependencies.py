@@ -10,6 +10,9 @@ from sqlalchemy.orm import Session
 
 from app import crud
 from app.core import security
+from app.core.config import settings
+from app.core.key_manager import key_manager
+from app.core.principal_cache import principal_cache
 from app.db.session import get_db
 from app.models.user import User
 from app.schemas.token import TokenPayload
@@ -31,6 +34,12 @@ def get_current_user(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
         )
+    # Without the master key the user must log in again, cached or not
+    if settings.DEPLOYMENT_MODE != "desktop" or key_manager.is_key_loaded:
+        user = principal_cache.get(db, token_data.sub)
+        if user is not None:
+            return user
+    version = principal_cache.version(token_data.sub)
     try:
         user = crud.user.get_by_email(db, email=token_data.sub)
         if not user:
@@ -47,6 +56,7 @@ def get_current_user(
             )
         # Re-raise other runtime errors
         raise
+    principal_cache.put(token_data.sub, version, user)
     return user
 
 
@@ -0,0 +1,418 @@
+"""
+In-process performance metrics, exported in the Prometheus text format.
+
+A small thread-safe registry of counters and histograms records:
+
+- HTTP request latency per route template (see `MetricsMiddleware`),
+- SQL statement counts and durations, overall and per request,
+- cache lookups per key prefix, split into hits and misses,
+- market-data provider call latency and errors per provider,
+- timings of the expensive analytics operations.
+
+`GET /metrics` renders the registry for Prometheus to scrape. Scripts and
+the CLI can read the same figures with `track_queries()` and `snapshot()`.
+The desktop build has no Prometheus client installed, so the text format is
+written here rather than through `prometheus_client`.
+"""
+import functools
+import inspect
+import math
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0
+)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str]):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}"
+            )
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: Any) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> Dict[LabelValues, float]:
+        with self._lock:
+            return dict(self._values)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        for key, value in sorted(self.samples().items()):
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}{labels} {_format_value(value)}")
+        return lines
+
+
+@dataclass
+class HistogramSample:
+    buckets: List[int]
+    count: int = 0
+    sum: float = 0.0
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.bounds = tuple(sorted(buckets)) + (math.inf,)
+        self._values: Dict[LabelValues, HistogramSample] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            sample = self._values.get(key)
+            if sample is None:
+                sample = self._values[key] = HistogramSample([0] * len(self.bounds))
+            for i, bound in enumerate(self.bounds):
+                if value <= bound:
+                    sample.buckets[i] += 1
+                    break
+            sample.count += 1
+            sample.sum += value
+
+    def sample(self, **labels: Any) -> Optional[HistogramSample]:
+        return self._values.get(self._key(labels))
+
+    def samples(self) -> Dict[LabelValues, HistogramSample]:
+        with self._lock:
+            return {
+                k: HistogramSample(list(s.buckets), s.count, s.sum)
+                for k, s in self._values.items()
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        for key, sample in sorted(self.samples().items()):
+            cumulative = 0
+            for bound, count in zip(self.bounds, sample.buckets):
+                cumulative += count
+                labels = _format_labels(
+                    self.labelnames + ("le",), key + (_format_value(bound),)
+                )
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(sample.sum)}")
+            lines.append(f"{self.name}_count{labels} {sample.count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> Any:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(
+        self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        for metric in self._metrics.values():
+            metric.reset()
+
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUEST_DURATION = REGISTRY.histogram(
+    "arthsaarthi_http_request_duration_seconds",
+    "HTTP request latency by route template.",
+    ("method", "route", "status"),
+)
+HTTP_REQUEST_QUERIES = REGISTRY.histogram(
+    "arthsaarthi_http_request_db_queries",
+    "SQL statements executed per HTTP request.",
+    ("route",),
+    buckets=COUNT_BUCKETS,
+)
+HTTP_REQUEST_DB_DURATION = REGISTRY.histogram(
+    "arthsaarthi_http_request_db_duration_seconds",
+    "Time spent executing SQL per HTTP request.",
+    ("route",),
+)
+DB_QUERY_DURATION = REGISTRY.histogram(
+    "arthsaarthi_db_query_duration_seconds",
+    "SQL statement execution time.",
+)
+CACHE_LOOKUPS = REGISTRY.counter(
+    "arthsaarthi_cache_lookups_total",
+    "Cache lookups by key prefix and result (hit or miss).",
+    ("prefix", "result"),
+)
+PROVIDER_CALL_DURATION = REGISTRY.histogram(
+    "arthsaarthi_provider_call_duration_seconds",
+    "Market-data provider call latency.",
+    ("provider", "operation"),
+)
+PROVIDER_CALL_ERRORS = REGISTRY.counter(
+    "arthsaarthi_provider_call_errors_total",
+    "Market-data provider calls that raised.",
+    ("provider", "operation"),
+)
+OPERATION_DURATION = REGISTRY.histogram(
+    "arthsaarthi_operation_duration_seconds",
+    "Duration of instrumented analytics operations.",
+    ("operation",),
+)
+
+
+# --- SQL ---
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    duration: float = 0.0
+
+
+_query_stats: ContextVar[Optional[QueryStats]] = ContextVar(
+    "query_stats", default=None
+)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Counts the SQL statements run (in this context) inside the block."""
+    stats = QueryStats()
+    token = _query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _query_stats.reset(token)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_metrics_started", None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    DB_QUERY_DURATION.observe(elapsed)
+    stats = _query_stats.get()
+    if stats is not None:
+        stats.count += 1
+        stats.duration += elapsed
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Records the execution time of every statement run on `engine`."""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+# --- Cache ---
+
+
+def cache_key_prefix(key: str) -> str:
+    """
+    The static part of a cache key, e.g. ``analytics:dashboard_summary`` for
+    ``analytics:dashboard_summary:<user id>``. At most two segments are kept
+    and segments that look like identifiers (digits or upper case) end it, so
+    the label stays low-cardinality.
+    """
+    parts = []
+    for part in key.split(":")[:2]:
+        if not part or any(c.isdigit() or c.isupper() for c in part):
+            break
+        parts.append(part)
+    return ":".join(parts) or "other"
+
+
+def record_cache_lookup(key: str, hit: bool) -> None:
+    CACHE_LOOKUPS.inc(prefix=cache_key_prefix(key), result="hit" if hit else "miss")
+
+
+# --- Providers and operations ---
+
+
+def track_provider_call(provider: str, operation: Optional[str] = None):
+    """Decorator recording latency and errors of a provider method."""
+
+    def decorator(func: Callable) -> Callable:
+        op = operation or func.__name__
+
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                started = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                except Exception:
+                    PROVIDER_CALL_ERRORS.inc(provider=provider, operation=op)
+                    raise
+                finally:
+                    PROVIDER_CALL_DURATION.observe(
+                        time.perf_counter() - started, provider=provider, operation=op
+                    )
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            except Exception:
+                PROVIDER_CALL_ERRORS.inc(provider=provider, operation=op)
+                raise
+            finally:
+                PROVIDER_CALL_DURATION.observe(
+                    time.perf_counter() - started, provider=provider, operation=op
+                )
+
+        return wrapper
+
+    return decorator
+
+
+def record_provider_error(provider: str, operation: str) -> None:
+    """For provider failures that are handled rather than raised."""
+    PROVIDER_CALL_ERRORS.inc(provider=provider, operation=operation)
+
+
+class Timer:
+    """Times an operation into `OPERATION_DURATION`; see `start_timer`."""
+
+    def __init__(self, operation: str):
+        self.operation = operation
+        self.started = time.perf_counter()
+
+    def stop(self) -> float:
+        elapsed = time.perf_counter() - self.started
+        OPERATION_DURATION.observe(elapsed, operation=self.operation)
+        return elapsed
+
+
+def start_timer(operation: str) -> Timer:
+    return Timer(operation)
+
+
+# --- Reporting ---
+
+
+def render() -> str:
+    return REGISTRY.render()
+
+
+def snapshot() -> Dict[str, Any]:
+    """A summary of the collected metrics for logs and the CLI."""
+
+    def latencies(histogram: Histogram) -> Dict[str, Dict[str, float]]:
+        return {
+            "/".join(key) or "all": {
+                "count": s.count,
+                "total_seconds": round(s.sum, 6),
+                "mean_ms": round(s.sum / s.count * 1000, 3) if s.count else 0.0,
+            }
+            for key, s in sorted(histogram.samples().items())
+        }
+
+    lookups = CACHE_LOOKUPS.samples()
+    cache: Dict[str, Dict[str, float]] = {}
+    for (prefix, result), count in lookups.items():
+        entry = cache.setdefault(prefix, {"hit": 0, "miss": 0})
+        entry[result] = int(count)
+    for entry in cache.values():
+        total = entry["hit"] + entry["miss"]
+        entry["hit_ratio"] = round(entry["hit"] / total, 3) if total else 0.0
+
+    errors = {
+        "/".join(key): int(count)
+        for key, count in sorted(PROVIDER_CALL_ERRORS.samples().items())
+    }
+    return {
+        "requests": latencies(HTTP_REQUEST_DURATION),
+        "db_queries": latencies(DB_QUERY_DURATION),
+        "cache": dict(sorted(cache.items())),
+        "providers": latencies(PROVIDER_CALL_DURATION),
+        "provider_errors": errors,
+        "operations": latencies(OPERATION_DURATION),
+    }
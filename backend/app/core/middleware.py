@@ -1,11 +1,21 @@
-"""Security headers middleware for FastAPI."""
+"""Security headers, metrics and profiling middleware for FastAPI."""
+import json
+import logging
+import time
+from typing import Optional
+from urllib.parse import parse_qs
 
+from starlette.concurrency import run_in_threadpool
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.requests import Request
 from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
+from app.core import metrics, profiling
 from app.core.config import settings
 
+logger = logging.getLogger(__name__)
+
 
 class SecurityHeadersMiddleware(BaseHTTPMiddleware):
     """
@@ -47,3 +57,179 @@ class SecurityHeadersMiddleware(BaseHTTPMiddleware):
             ] = "max-age=63072000; includeSubDomains"
 
         return response
+
+
+class MetricsMiddleware:
+    """
+    Records latency, SQL statement count and SQL time of every HTTP request,
+    labelled by route template (``/api/v1/portfolios/{portfolio_id}``) rather
+    than the raw path. Streaming responses are measured until the last chunk
+    has been sent.
+
+    Written as a plain ASGI middleware so the request runs in the same
+    context as the query tracker and no response buffering is added.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        with metrics.track_queries() as queries:
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = scope.get("route")
+                template = getattr(route, "path", None) or "unmatched"
+                metrics.HTTP_REQUEST_DURATION.observe(
+                    time.perf_counter() - started,
+                    method=scope["method"],
+                    route=template,
+                    status=status_code,
+                )
+                metrics.HTTP_REQUEST_QUERIES.observe(queries.count, route=template)
+                metrics.HTTP_REQUEST_DB_DURATION.observe(
+                    queries.duration, route=template
+                )
+
+
+def _profile_mode(scope: Scope) -> Optional[str]:
+    """``"store"`` or ``"download"`` if the request asks to be profiled."""
+    value = None
+    query_string = scope.get("query_string", b"")
+    if b"profile=" in query_string:
+        value = parse_qs(query_string.decode("latin-1")).get("profile", [None])[-1]
+    if value is None:
+        for name, header in scope["headers"]:
+            if name == b"x-profile":
+                value = header.decode("latin-1")
+                break
+    if value is None:
+        return None
+    value = value.strip().lower()
+    if value == "download":
+        return "download"
+    if value in ("1", "true", "store"):
+        return "store"
+    return None
+
+
+def _is_admin_request(scope: Scope) -> bool:
+    # Local imports to prevent circular dependencies at startup
+    from jose import JWTError
+
+    from app import crud
+    from app.core import security
+    from app.db.session import SessionLocal
+
+    authorization = dict(scope["headers"]).get(b"authorization", b"")
+    scheme, _, token = authorization.decode("latin-1").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    try:
+        email = security.decode_access_token(token).get("sub")
+    except JWTError:
+        return False
+    try:
+        with SessionLocal() as db:
+            user = crud.user.get_by_email(db, email=email)
+            return bool(user and user.is_active and user.is_admin)
+    except Exception as e:
+        logger.warning(f"Could not check profiling permission: {e}")
+        return False
+
+
+class ProfilingMiddleware:
+    """
+    Profiles a single request when an admin asks for it with ``?profile=1``
+    or an ``X-Profile: 1`` header. The speedscope file is stored (see
+    ``/api/v1/admin/profiles``) and its id returned in ``X-Profile-Id``;
+    ``profile=download`` returns the file in place of the response.
+
+    Requests without the flag only pay for the flag check; the flag is
+    silently ignored for everyone but active admins, and for all requests
+    unless PROFILING_ENABLED is set.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        mode = (
+            _profile_mode(scope)
+            if scope["type"] == "http" and settings.PROFILING_ENABLED
+            else None
+        )
+        if mode is None or not await run_in_threadpool(_is_admin_request, scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile = profiling.RequestProfile(name=f"{scope['method']} {scope['path']}")
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if mode == "download":
+                    return
+                message = {
+                    **message,
+                    "headers": list(message.get("headers", []))
+                    + [(b"x-profile-id", profile.profile_id.encode())],
+                }
+            elif mode == "download":
+                return
+            await send(message)
+
+        token = profiling.activate(profile)
+        profile.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profile.stop()
+            profiling.deactivate(token)
+            logger.info(
+                "Profiled %s (%s): %.1f ms, %d SQL statements in %.1f ms",
+                profile.name,
+                profile.profile_id,
+                profile.duration * 1000,
+                len(profile.sql),
+                profile.sql_duration * 1000,
+            )
+            if mode == "store":
+                try:
+                    await run_in_threadpool(profile.save)
+                except OSError as e:
+                    logger.error(f"Could not store profile {profile.profile_id}: {e}")
+
+        if mode == "download":
+            body = json.dumps(profile.to_speedscope()).encode()
+            filename = f"{profile.profile_id}{profiling.PROFILE_SUFFIX}"
+            await send({
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (
+                        b"content-disposition",
+                        f"attachment; filename={filename}".encode(),
+                    ),
+                    (b"x-profile-id", profile.profile_id.encode()),
+                    (b"x-profiled-status", str(status_code).encode()),
+                ],
+            })
+            await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,163 @@
+"""
+A short-lived, in-process cache of the users that access tokens resolve to.
+
+Every authenticated request loads its user from the token subject, which in
+desktop mode also means decrypting the stored emails. The cache keeps a
+snapshot of each recently seen user's columns so that repeated requests from
+the same user skip the query.
+
+Each subject has a version that is bumped whenever its user is updated or
+deleted through the ORM (password changes, deactivation, admin edits), once
+when the change is flushed and again when its transaction commits. A snapshot
+is stored under the version read before the user was loaded, so a request
+that loaded the user before the change was committed cannot put the stale
+row back. Other processes don't see the invalidation; there a change takes effect
+when the snapshot expires, at most `AUTH_PRINCIPAL_CACHE_TTL_SECONDS` later.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.core.config import settings
+from app.models.user import User
+
+# (generation of the whole cache, version of the subject)
+Version = Tuple[int, int]
+
+
+class _Entry(NamedTuple):
+    version: Version
+    expires_at: float
+    columns: Dict[str, Any]
+
+
+class PrincipalCache:
+    def __init__(self, maxsize: int, ttl_seconds: float):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        # Only subjects that have been invalidated have a version above 0
+        self._versions: Dict[str, int] = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.maxsize > 0 and self.ttl_seconds > 0
+
+    def version(self, subject: str) -> Version:
+        with self._lock:
+            return self._version(subject)
+
+    def _version(self, subject: str) -> Version:
+        return self._generation, self._versions.get(subject, 0)
+
+    def get(self, db: Session, subject: str) -> Optional[User]:
+        """The cached user for `subject`, attached to `db` without a query."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(subject)
+            if entry is None:
+                return None
+            if (
+                entry.version != self._version(subject)
+                or entry.expires_at <= time.monotonic()
+            ):
+                del self._entries[subject]
+                return None
+            self._entries.move_to_end(subject)
+        return _restore(db, entry.columns)
+
+    def put(self, subject: str, version: Version, user: User) -> None:
+        """
+        Stores a snapshot of `user`, unless `subject` was invalidated since
+        `version` was read.
+        """
+        if not self.enabled:
+            return
+        columns = {
+            attr.key: getattr(user, attr.key)
+            for attr in inspect(User).column_attrs
+        }
+        with self._lock:
+            if version != self._version(subject):
+                return
+            self._entries[subject] = _Entry(
+                version, time.monotonic() + self.ttl_seconds, columns
+            )
+            self._entries.move_to_end(subject)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, subject: str) -> None:
+        with self._lock:
+            self._versions[subject] = self._versions.get(subject, 0) + 1
+            self._entries.pop(subject, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._versions.clear()
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def _restore(db: Session, columns: Dict[str, Any]) -> User:
+    user = User()
+    # Set as loaded state, bypassing the email validator and change tracking
+    for key, value in columns.items():
+        set_committed_value(user, key, value)
+    make_transient_to_detached(user)
+    return db.merge(user, load=False)
+
+
+principal_cache = PrincipalCache(
+    maxsize=settings.AUTH_PRINCIPAL_CACHE_SIZE,
+    ttl_seconds=settings.AUTH_PRINCIPAL_CACHE_TTL_SECONDS,
+)
+
+
+# Session.info key of the subjects flushed in the current transaction; None
+# stands for every user
+_FLUSHED_SUBJECTS = "principal_cache_subjects"
+
+
+def _invalidate(subjects) -> None:
+    if None in subjects:
+        principal_cache.clear()
+    for subject in subjects:
+        if subject is not None:
+            principal_cache.invalidate(subject)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_user(mapper, connection, target: User) -> None:
+    # Tokens name the user by email, which may itself be what changed. It is
+    # read without loading; if it was never loaded, drop every user.
+    state = inspect(target)
+    emails = {state.dict.get("email"), *state.attrs.email.history.deleted}
+    emails.discard(None)
+    subjects = emails or {None}
+    _invalidate(subjects)
+    # Until the commit, other sessions still read the old row and may cache it
+    if state.session is not None:
+        state.session.info.setdefault(_FLUSHED_SUBJECTS, set()).update(subjects)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_users(session: Session) -> None:
+    _invalidate(session.info.pop(_FLUSHED_SUBJECTS, ()))
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_flushed_users(session: Session) -> None:
+    session.info.pop(_FLUSHED_SUBJECTS, None)
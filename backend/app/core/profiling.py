@@ -0,0 +1,278 @@
+"""
+Opt-in per-request profiling with speedscope output.
+
+`RequestProfile` samples the call stacks of the threads working on one
+request (the event loop thread plus every worker thread that runs SQL for
+it) from a background thread, and records each SQL statement with its
+timing. The result is written as a speedscope file
+(https://www.speedscope.app) with a sampled profile per thread and an
+evented "SQL" timeline per thread.
+
+Profiles are started by `ProfilingMiddleware` for admins only and cost
+nothing but a context-variable lookup per statement when no request is being
+profiled.
+"""
+import json
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+SAMPLE_INTERVAL = 0.002  # seconds
+MAX_SQL_STATEMENTS = 10000
+MAX_STORED_PROFILES = 50
+PROFILE_SUFFIX = ".speedscope.json"
+PROFILE_ID_PATTERN = re.compile(r"^[0-9]{8}T[0-9]{6}-[0-9a-f]{8}$")
+
+# Leaf frames of threads that are waiting rather than working
+_IDLE_FRAMES = {
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    ("queue.py", "get"),
+}
+
+FrameKey = Tuple[str, str, int]  # function name, file, first line
+
+
+def profile_dir() -> Path:
+    return Path(
+        settings.PROFILE_DIR
+        or os.path.join(settings.DISK_CACHE_DIR or "/tmp", "profiles")
+    )
+
+
+@dataclass
+class SqlStatement:
+    thread_id: int
+    statement: str
+    start: float
+    end: float = 0.0
+
+
+@dataclass
+class RequestProfile:
+    """Stack samples and SQL statements of one profiled request."""
+
+    name: str
+    interval: float = SAMPLE_INTERVAL
+    profile_id: str = field(
+        default_factory=lambda: (
+            f"{datetime.utcnow():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+        )
+    )
+    started: float = field(default_factory=time.perf_counter)
+    ended: Optional[float] = None
+    thread_ids: set = field(default_factory=set)
+    # thread id -> list of (timestamp, stack of frame keys, root first)
+    samples: Dict[int, List[Tuple[float, Tuple[FrameKey, ...]]]] = field(
+        default_factory=dict
+    )
+    sql: List[SqlStatement] = field(default_factory=list)
+
+    def __post_init__(self):
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+
+    # --- Sampling ---
+    def start(self) -> None:
+        self.thread_ids.add(threading.get_ident())
+        self._sampler = threading.Thread(
+            target=self._sample_loop, name="request-profiler", daemon=True
+        )
+        self._sampler.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+        self.ended = time.perf_counter()
+
+    def _sample_loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            frames = sys._current_frames()
+            for thread_id in list(self.thread_ids):
+                frame = frames.get(thread_id)
+                if frame is None:
+                    continue
+                stack = _stack(frame)
+                leaf = (os.path.basename(stack[-1][1]), stack[-1][0])
+                if leaf not in _IDLE_FRAMES:
+                    self.samples.setdefault(thread_id, []).append((now, stack))
+
+    # --- SQL ---
+    def statement_started(self, statement: str) -> Optional[SqlStatement]:
+        thread_id = threading.get_ident()
+        self.thread_ids.add(thread_id)
+        if len(self.sql) >= MAX_SQL_STATEMENTS:
+            return None
+        entry = SqlStatement(thread_id, statement, time.perf_counter())
+        self.sql.append(entry)
+        return entry
+
+    @property
+    def duration(self) -> float:
+        return (self.ended or time.perf_counter()) - self.started
+
+    @property
+    def sql_duration(self) -> float:
+        return sum(s.end - s.start for s in self.sql if s.end)
+
+    # --- Export ---
+    def to_speedscope(self) -> Dict[str, Any]:
+        frames: List[Dict[str, Any]] = []
+        frame_index: Dict[Any, int] = {}
+
+        def index(key: Any, frame: Dict[str, Any]) -> int:
+            if key not in frame_index:
+                frame_index[key] = len(frames)
+                frames.append(frame)
+            return frame_index[key]
+
+        end_value = self.duration
+        profiles = []
+        for thread_id, samples in sorted(self.samples.items()):
+            stacks, weights = [], []
+            previous = self.started
+            for timestamp, stack in samples:
+                stacks.append([
+                    index(key, {"name": key[0], "file": key[1], "line": key[2]})
+                    for key in stack
+                ])
+                weights.append(min(timestamp - previous, self.interval * 10))
+                previous = timestamp
+            profiles.append({
+                "type": "sampled",
+                "name": f"{self.name} (thread {thread_id})",
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": end_value,
+                "samples": stacks,
+                "weights": weights,
+            })
+
+        by_thread: Dict[int, List[SqlStatement]] = {}
+        for statement in self.sql:
+            if statement.end:
+                by_thread.setdefault(statement.thread_id, []).append(statement)
+        for thread_id, statements in sorted(by_thread.items()):
+            events = []
+            for s in statements:
+                text = " ".join(s.statement.split())
+                frame = index(("sql", text), {"name": text[:500]})
+                events.append(
+                    {"type": "O", "frame": frame, "at": s.start - self.started}
+                )
+                events.append({"type": "C", "frame": frame, "at": s.end - self.started})
+            profiles.append({
+                "type": "evented",
+                "name": f"SQL (thread {thread_id}, {len(statements)} statements)",
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": end_value,
+                "events": events,
+            })
+
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": self.name,
+            "exporter": "arthsaarthi",
+            "activeProfileIndex": 0,
+            "shared": {"frames": frames},
+            "profiles": profiles,
+        }
+
+    def save(self, directory: Optional[Path] = None) -> Path:
+        directory = directory or profile_dir()
+        directory.mkdir(parents=True, exist_ok=True)
+        path = directory / f"{self.profile_id}{PROFILE_SUFFIX}"
+        path.write_text(json.dumps(self.to_speedscope()))
+        _prune(directory)
+        return path
+
+
+def _stack(frame) -> Tuple[FrameKey, ...]:
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+        frame = frame.f_back
+    stack.reverse()
+    return tuple(stack)
+
+
+def _prune(directory: Path) -> None:
+    files = sorted(directory.glob(f"*{PROFILE_SUFFIX}"))
+    for old in files[:-MAX_STORED_PROFILES]:
+        try:
+            old.unlink()
+        except OSError:
+            pass
+
+
+def list_profiles() -> List[Dict[str, Any]]:
+    directory = profile_dir()
+    if not directory.exists():
+        return []
+    result = []
+    for path in sorted(directory.glob(f"*{PROFILE_SUFFIX}"), reverse=True):
+        stat = path.stat()
+        result.append({
+            "id": path.name[: -len(PROFILE_SUFFIX)],
+            "size": stat.st_size,
+            "created_at": datetime.fromtimestamp(stat.st_mtime),
+        })
+    return result
+
+
+def profile_path(profile_id: str) -> Optional[Path]:
+    if not PROFILE_ID_PATTERN.match(profile_id):
+        return None
+    path = profile_dir() / f"{profile_id}{PROFILE_SUFFIX}"
+    return path if path.exists() else None
+
+
+# --- SQL recording ---
+
+_active_profile: ContextVar[Optional[RequestProfile]] = ContextVar(
+    "active_profile", default=None
+)
+
+
+def activate(profile: RequestProfile):
+    return _active_profile.set(profile)
+
+
+def deactivate(token) -> None:
+    _active_profile.reset(token)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _active_profile.get()
+    if profile is not None:
+        context._profile_statement = profile.statement_started(statement)
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    entry = getattr(context, "_profile_statement", None)
+    if entry is not None:
+        entry.end = time.perf_counter()
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Lets profiled requests record the statements they run on `engine`."""
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
@@ -3,6 +3,7 @@ from .crud_asset import asset
 from .crud_asset_alias import asset_alias
 from .crud_audit_log import audit_log
 from .crud_bond import bond
+from .crud_corporate_action_adjustment import corporate_action_adjustment
 from .crud_dashboard import dashboard
 from .crud_fixed_deposit import fixed_deposit
 from .crud_goal import goal, goal_link
@@ -12,6 +13,7 @@ from .crud_import_session import import_session
 from .crud_portfolio import portfolio
 from .crud_recurring_deposit import recurring_deposit
 from .crud_risk import risk_profile
+from .crud_scheduled_job_run import scheduled_job_run
 from .crud_testing import testing
 from .crud_transaction import transaction
 from .crud_user import user
@@ -24,6 +26,7 @@ __all__ = [
     "asset_alias",
     "audit_log",
     "bond",
+    "corporate_action_adjustment",
     "dashboard",
     "fixed_deposit",
     "goal",
@@ -39,4 +42,5 @@ __all__ = [
     "watchlist",
     "watchlist_item",
     "risk_profile",
+    "scheduled_job_run",
 ]
@@ -1,66 +1,78 @@
+import functools
 import logging
-import time
 import uuid
 from collections import defaultdict
 from datetime import date
 from decimal import Decimal
 from typing import Any, Dict, List, Optional, Tuple
 
-import numpy as np
 from dateutil.relativedelta import relativedelta
 from sqlalchemy.orm import Session
 
 from app import crud, schemas
 from app.cache.utils import cache_analytics_data
+from app.core import metrics
 from app.core.financial_definitions import TRANSACTION_BEHAVIORS, CashFlowType
 from app.crud.crud_dashboard import _get_portfolio_history
 from app.crud.crud_holding import (
     _calculate_fd_current_value,
     _calculate_rd_value_at_date,
 )
+from app.crud.crud_transaction import TransactionRecord
 from app.models.fixed_deposit import FixedDeposit
 from app.models.recurring_deposit import RecurringDeposit
-from app.models.transaction import Transaction
 from app.models.transaction_link import TransactionLink
-from app.utils.pydantic_compat import model_copy, model_validate
 
 logger = logging.getLogger(__name__)
 
-try:
-    from pyxirr import xirr
-except ImportError:
-    logger.warning("pyxirr not found, using numpy fallback for XIRR")
+def _numpy_xirr(dates, payments):
+    """Newton-Raphson XIRR, used when pyxirr is not installed."""
+    import numpy as np
 
-    def xirr(dates, payments):
-        if not dates or not payments or len(dates) != len(payments):
-            return 0.0
+    if not dates or not payments or len(dates) != len(payments):
+        return 0.0
+
+    try:
+        # Pre-process dates into year fractions from first date
+        d0 = dates[0]
+        years = np.array([(d - d0).days / 365.0 for d in dates])
+        pmts = np.array(payments, dtype=float)
+
+        rate = 0.1  # Initial guess
+        for _ in range(50):
+            # NPV
+            npv = np.sum(pmts / (1 + rate) ** years)
+            # NPV Derivative
+            deriv = np.sum(-years * pmts / (1 + rate) ** (years + 1))
+
+            if abs(deriv) < 1e-9:
+                break
+            new_rate = rate - npv / deriv
+            if abs(new_rate - rate) < 1e-6:
+                return new_rate
+            rate = new_rate
+            if abs(rate) > 100:
+                break
+        return rate
+    except Exception as e:
+        logger.error(f"XIRR fallback failed: {e}")
+        return 0.0
+
+
+@functools.lru_cache(maxsize=None)
+def _xirr_function():
+    """pyxirr (or numpy, for the fallback) is imported on first use, not at startup."""
+    try:
+        from pyxirr import xirr
+        return xirr
+    except ImportError:
+        logger.warning("pyxirr not found, using numpy fallback for XIRR")
+        return _numpy_xirr
+
+
+def xirr(dates, payments):
+    return _xirr_function()(dates, payments)
 
-        # Newton-Raphson implementation
-        try:
-            # Pre-process dates into year fractions from first date
-            d0 = dates[0]
-            years = np.array([(d - d0).days / 365.0 for d in dates])
-            pmts = np.array(payments, dtype=float)
-
-            rate = 0.1  # Initial guess
-            for _ in range(50):
-                # NPV
-                npv = np.sum(pmts / (1 + rate) ** years)
-                # NPV Derivative
-                deriv = np.sum(-years * pmts / (1 + rate) ** (years + 1))
-
-                if abs(deriv) < 1e-9:
-                    break
-                new_rate = rate - npv / deriv
-                if abs(new_rate - rate) < 1e-6:
-                    return new_rate
-                rate = new_rate
-                if abs(rate) > 100:
-                    break
-            return rate
-        except Exception as e:
-            logger.error(f"XIRR fallback failed: {e}")
-            return 0.0
 
 SHARPE_ANNUALIZATION_FACTOR = 252
 SHARPE_STEP_FUNCTION_THRESHOLD = 0.8
@@ -95,7 +107,7 @@ def _calculate_xirr(dates: List[date], values: List[Decimal]) -> float:
 
 
 def _get_realized_and_unrealized_cash_flows(
-    transactions: List[schemas.Transaction],
+    transactions: List[TransactionRecord],
     transaction_links: Optional[List[TransactionLink]] = None,
 ) -> Dict[str, Any]:
     """
@@ -152,7 +164,7 @@ def _get_realized_and_unrealized_cash_flows(
     buy_id_to_copy_map = {}  # To easily find the mutable copy by ID for linking
     for t in sorted_txs:
         if t.transaction_type in ("BUY", "ESPP_PURCHASE", "RSU_VEST"):
-            buy_copy = model_copy(t, deep=True)
+            buy_copy = t
             # Only scale if demerger exists AND buy is before demerger date
             if (
                 remaining_ratio < Decimal("1.0")
@@ -160,10 +172,11 @@ def _get_realized_and_unrealized_cash_flows(
                 and earliest_demerger_date
                 and t.transaction_date.date() < earliest_demerger_date
             ):
-                buy_copy.price_per_unit = buy_copy.price_per_unit * remaining_ratio
+                buy_copy = t._replace(
+                    price_per_unit=t.price_per_unit * remaining_ratio
+                )
 
-            # Use a dict to track quantity to avoid mutating the original model.
-            # Ensures we don't accidentally modify SQLAlchemy instances.
+            # Records are immutable, so the remaining quantity is tracked here.
             lot = {"transaction": buy_copy, "available_quantity": buy_copy.quantity}
             buys.append(lot)
             buy_id_to_copy_map[buy_copy.id] = lot
@@ -459,13 +472,15 @@ def _calculate_xirr_from_cashflows_tuple(
 
 
 def _get_portfolio_cash_flows(
-    transactions: List[Transaction],
+    transactions: List[TransactionRecord],
     all_fixed_deposits: List[FixedDeposit],
     all_recurring_deposits: List[RecurringDeposit],
 ) -> List[Tuple[date, Decimal]]:
     """
     Generates a unified list of cash flow tuples (date, amount) for an entire portfolio.
     """
+    from app.services import deposit_valuation  # numpy; imported on demand
+
     cash_flows = []
 
     # 1. Cashflows from standard transactions (Stocks, MFs, PPF, etc.)
@@ -561,14 +576,7 @@ def _get_portfolio_cash_flows(
         else:
             # For matured cumulative FDs, the full maturity value is an inflow
             if today >= fd.maturity_date:
-                maturity_value = _calculate_fd_current_value(
-                    principal=fd.principal_amount,
-                    interest_rate=fd.interest_rate,
-                    start_date=fd.start_date,
-                    end_date=fd.maturity_date,
-                    compounding_frequency=fd.compounding_frequency,
-                    interest_payout=fd.interest_payout,
-                )
+                maturity_value = deposit_valuation.fd_value_on(fd, fd.maturity_date)
                 cash_flows.append((fd.maturity_date, maturity_value))
 
     # 3. Cashflows from Recurring Deposits
@@ -583,13 +591,7 @@ def _get_portfolio_cash_flows(
 
         # For matured RDs, the full maturity value is an inflow
         if today >= maturity_date:
-            maturity_value = _calculate_rd_value_at_date(
-                monthly_installment=rd.monthly_installment,
-                interest_rate=rd.interest_rate,
-                start_date=rd.start_date,
-                tenure_months=rd.tenure_months,
-                calculation_date=maturity_date,
-            )
+            maturity_value = deposit_valuation.rd_value_on(rd, maturity_date)
             cash_flows.append((maturity_date, maturity_value))
 
     # Sort by date to ensure correct XIRR calculation
@@ -623,7 +625,7 @@ class CRUDAnalytics:
             logger.debug(f"No active holding found for asset {asset_id}.")
             return schemas.AssetAnalytics(xirr_current=0.0, xirr_historical=0.0)
 
-        transactions = crud.transaction.get_multi_by_portfolio_and_asset(
+        transactions = crud.transaction.get_records(
             db, portfolio_id=portfolio_id, asset_id=asset_id
         )
 
@@ -635,12 +637,8 @@ class CRUDAnalytics:
             .all()
         )
 
-        transactions_schemas = [
-            model_validate(schemas.Transaction, tx) for tx in transactions
-        ]
-
         analytics_result = _get_realized_and_unrealized_cash_flows(
-            transactions_schemas, transaction_links=links
+            transactions, transaction_links=links
         )
         realized_cfs = analytics_result["realized_cash_flows"]
         unrealized_cfs = analytics_result["unrealized_cash_flows"]
@@ -753,7 +751,7 @@ class CRUDAnalytics:
         self, db: Session, *, portfolio_id: uuid.UUID
     ) -> schemas.PortfolioAnalytics:
         """Calculates analytics for a whole portfolio."""
-        start_time = time.time()
+        timer = metrics.start_timer("portfolio_analytics")
         # First, call the holdings summary to ensure any missing PPF interest
         # transactions are created for the current session. This is the key
         # to making the subsequent cash flow calculation correct.
@@ -762,9 +760,7 @@ class CRUDAnalytics:
         )
 
         # Now, gather all transactions and assets to build the cash flow list.
-        transactions = crud.transaction.get_multi_by_portfolio(
-            db, portfolio_id=portfolio_id
-        )
+        transactions = crud.transaction.get_records(db, portfolio_id=portfolio_id)
         all_fixed_deposits = crud.fixed_deposit.get_multi_by_portfolio(
             db, portfolio_id=portfolio_id
         )
@@ -790,11 +786,10 @@ class CRUDAnalytics:
         sharpe_ratio_value = self._calculate_sharpe_ratio(db, portfolio_id)
         xirr_value = _calculate_xirr(dates, values)
 
-        end_time = time.time()
         logger.info(
             "Portfolio analytics for portfolio %s took %.4f seconds.",
             portfolio_id,
-            end_time - start_time,
+            timer.stop(),
         )
 
         return schemas.PortfolioAnalytics(
@@ -826,6 +821,8 @@ class CRUDAnalytics:
         )
         daily_values = [v if v > 0 else 1e-9 for v in daily_values]
 
+        import numpy as np
+
         daily_returns = np.diff(daily_values) / daily_values[:-1]
         if len(daily_returns) < 2:
             return 0.0
@@ -1,11 +1,12 @@
 import uuid
 from typing import List, Optional
 
-from sqlalchemy import func, or_
+from sqlalchemy import and_, case, column, func, or_, text
 from sqlalchemy.orm import Session, joinedload
 
 from app import crud, models, schemas
 from app.crud.base import CRUDBase
+from app.db import asset_search
 from app.models.asset import Asset
 from app.schemas.asset import AssetCreate, AssetUpdate
 from app.services.financial_data_service import financial_data_service
@@ -169,15 +170,46 @@ class CRUDAsset(CRUDBase[Asset, AssetCreate, AssetUpdate]):
     def search_by_name_or_ticker(
         self, db: Session, *, query: str, asset_type: Optional[str | List[str]] = None
     ) -> List[Asset]:
-        # Use ILIKE for case-insensitive search on PostgreSQL, and it works
-        # correctly on SQLite as well, providing a consistent behavior.
-        search_term = f"%{query}%"
-        db_query = db.query(self.model).filter(
-            or_(
-                self.model.name.ilike(search_term),
-                self.model.ticker_symbol.ilike(search_term),
+        """
+        Typeahead search, best matches first: an exact ISIN or ticker, then
+        tickers starting with the query (shortest first), names starting with
+        it, and names containing it, most similar first. Queries too short to
+        have a trigram only match ticker prefixes.
+        """
+        term = query.strip()
+        upper = term.upper()
+        # Tickers are stored upper-case
+        ticker_prefix = self.model.ticker_symbol.startswith(upper, autoescape=True)
+
+        if len(term) < asset_search.MIN_QUERY_LENGTH:
+            if db.get_bind().dialect.name == "sqlite":
+                # SQLite's LIKE ignores case and so cannot use the index
+                ticker_prefix = and_(
+                    self.model.ticker_symbol >= upper,
+                    self.model.ticker_symbol < upper + "\U0010ffff",
+                )
+            match = ticker_prefix
+        elif asset_search.is_available(db.connection()):
+            match = or_(
+                self.model.id.in_(
+                    text(
+                        f"SELECT asset_id FROM {asset_search.TABLE} "
+                        f"WHERE {asset_search.TABLE} MATCH :phrase"
+                    )
+                    .bindparams(phrase=asset_search.match_phrase(term))
+                    .columns(column("asset_id"))
+                ),
+                self.model.isin == upper,
             )
-        )
+        else:
+            # Served by the pg_trgm indexes on PostgreSQL
+            match = or_(
+                self.model.name.icontains(term, autoescape=True),
+                self.model.ticker_symbol.icontains(term, autoescape=True),
+                self.model.isin == upper,
+            )
+        db_query = db.query(self.model).filter(match)
+
         if asset_type:
             if isinstance(asset_type, list):
                  db_query = db_query.filter(
@@ -191,10 +223,28 @@ class CRUDAsset(CRUDBase[Asset, AssetCreate, AssetUpdate]):
                     func.upper(self.model.asset_type) == asset_type.upper()
                 )
 
+        rank = case(
+            (self.model.isin == upper, 0),
+            (self.model.ticker_symbol == upper, 1),
+            (ticker_prefix, 2),
+            (func.lower(self.model.name).startswith(term.lower(), autoescape=True), 3),
+            else_=4,
+        )
+        if db.get_bind().dialect.name == "postgresql":
+            similarity = func.similarity(self.model.name, term).desc()
+        else:
+            similarity = func.length(self.model.name)
+        # The shortest ticker is the closest of those starting with the query
+        ticker_length = case(
+            (ticker_prefix, func.length(self.model.ticker_symbol)), else_=0
+        )
+        db_query = db_query.order_by(
+            rank, ticker_length, similarity, self.model.ticker_symbol
+        )
+
         # Eager load bond details if asset_type is BOND
         if asset_type == "BOND":
             db_query = db_query.options(joinedload(self.model.bond))
         return db_query.limit(10).all()
 
-
 asset = CRUDAsset(Asset)
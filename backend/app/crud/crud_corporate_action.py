@@ -119,12 +119,17 @@ def handle_stock_split(
     # Create the SPLIT transaction for auditing/event-sourcing
     # We DO NOT mutate historical transactions anymore.
     # The holdings calculation logic (crud_holding.py) parses this SPLIT transaction
-    # and effectively "replays" the split to adjust quantity/cost basis at runtime.
+    # and effectively "replays" the split to adjust quantity/cost basis at runtime;
+    # lot matching and capital gains look its ratio up in the asset's
+    # corporate-action adjustments instead.
     # This preserves the historical truth of the original BUY transactions.
 
     split_audit_transaction = crud.transaction.create_with_portfolio(
         db=db, obj_in=transaction_in, portfolio_id=portfolio_id
     )
+    crud.corporate_action_adjustment.rebuild(
+        db, portfolio_id=portfolio_id, asset_id=asset_id
+    )
     logger.info("Saved SPLIT audit transaction.")
 
     return split_audit_transaction
@@ -323,6 +328,9 @@ def handle_merger(
     merger_audit = crud.transaction.create_with_portfolio(
         db=db, obj_in=transaction_in, portfolio_id=portfolio_id
     )
+    crud.corporate_action_adjustment.rebuild(
+        db, portfolio_id=portfolio_id, asset_id=asset_id
+    )
     logger.info("Saved MERGER audit transaction.")
 
     return merger_audit
@@ -436,9 +444,27 @@ def handle_demerger(
         )
         logger.info(f"Created child BUY: {new_qty} @ {adjusted_price}")
 
+    # The holding's cost basis before this demerger, net of earlier ones. It
+    # fixes the demerger's cost factor, so later back-dated BUYs don't move it.
+    cost_basis_before = sum(
+        (buy.quantity * buy.price_per_unit for buy in original_buys),
+        Decimal("0.0"),
+    )
+    earlier_demergers = db.query(models.Transaction.details).filter(
+        models.Transaction.portfolio_id == portfolio_id,
+        models.Transaction.asset_id == asset_id,
+        models.Transaction.transaction_type == TransactionType.DEMERGER,
+        models.Transaction.transaction_date < record_date,
+    )
+    for (earlier_details,) in earlier_demergers:
+        cost_basis_before -= Decimal(
+            str((earlier_details or {}).get("total_cost_allocated", "0"))
+        )
+
     # Add metadata to the DEMERGER audit transaction
     updated_details = dict(transaction_in.details or {})
     updated_details["total_cost_allocated"] = str(total_cost_allocated)
+    updated_details["cost_basis_before"] = str(cost_basis_before)
     transaction_in_with_cost = model_copy(transaction_in,
         update={"details": updated_details}
     )
@@ -447,6 +473,9 @@ def handle_demerger(
     demerger_audit = crud.transaction.create_with_portfolio(
         db=db, obj_in=transaction_in_with_cost, portfolio_id=portfolio_id
     )
+    crud.corporate_action_adjustment.rebuild(
+        db, portfolio_id=portfolio_id, asset_id=asset_id
+    )
     logger.info(f"Saved DEMERGER. Cost allocated: {total_cost_allocated}")
 
     return demerger_audit
@@ -543,6 +572,9 @@ def handle_rename(
     rename_audit = crud.transaction.create_with_portfolio(
         db=db, obj_in=transaction_in, portfolio_id=portfolio_id
     )
+    crud.corporate_action_adjustment.rebuild(
+        db, portfolio_id=portfolio_id, asset_id=asset_id
+    )
     logger.info("Saved RENAME audit transaction.")
 
     return rename_audit
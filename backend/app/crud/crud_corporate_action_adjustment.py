@@ -0,0 +1,200 @@
+import logging
+import uuid
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.crud.crud_transaction import TransactionRecord
+from app.models.asset import Asset
+from app.models.corporate_action_adjustment import CorporateActionAdjustment
+from app.models.portfolio import Portfolio
+from app.models.transaction import Transaction
+from app.services.adjustment_factors import (
+    IN_PLACE_ACTIONS,
+    SUCCESSION_ACTIONS,
+    AdjustmentTable,
+    demerger_cost_factor,
+    resolve_successor,
+)
+
+logger = logging.getLogger(__name__)
+
+# BONUS is left out: its zero-cost BUY already carries the bonus shares.
+ADJUSTED_ACTIONS = IN_PLACE_ACTIONS | SUCCESSION_ACTIONS
+
+_ACQUISITION_TYPES = ["BUY", "ESPP_PURCHASE", "RSU_VEST"]
+_ONE = Decimal(1)
+
+
+class CRUDCorporateActionAdjustment:
+    """
+    Pre-resolved corporate-action adjustments, one row per action on a
+    portfolio's holding of an asset. Rows are derived data: `rebuild`
+    re-derives a holding's rows from its audit transactions whenever one of
+    them is created, changed or deleted. A demerger's cost factor divides the
+    cost basis at that point, which `handle_demerger` stores with it as
+    `cost_basis_before`, so like its `total_cost_allocated` it is fixed when
+    the demerger is recorded and later BUYs do not move it.
+    """
+
+    def _successor(
+        self, db: Session, tx: TransactionRecord
+    ) -> Optional[uuid.UUID]:
+        def find(column: str, value: str) -> Optional[uuid.UUID]:
+            return (
+                db.query(Asset.id)
+                .filter(getattr(Asset, column) == value)
+                .limit(1)
+                .scalar()
+            )
+
+        return resolve_successor(tx.details, find)
+
+    def _derive(
+        self, db: Session, *, portfolio_id: uuid.UUID, asset_id: uuid.UUID
+    ) -> List[CorporateActionAdjustment]:
+        actions = crud.transaction.get_records(
+            db,
+            portfolio_id=portfolio_id,
+            asset_id=asset_id,
+            transaction_types=list(ADJUSTED_ACTIONS),
+        )
+        rows = []
+        # Cost basis of the holding before its first demerger, reduced by
+        # each demerger's allocation to the child
+        cost_basis: Optional[Decimal] = None
+        for tx in actions:
+            quantity = (_ONE, _ONE)
+            cost = (_ONE, _ONE)
+            if tx.transaction_type == "SPLIT":
+                # quantity = new shares, price_per_unit = old shares
+                if not (tx.quantity > 0 and tx.price_per_unit > 0):
+                    continue
+                quantity = (tx.quantity, tx.price_per_unit)
+            elif tx.transaction_type == "MERGER":
+                quantity = (tx.quantity, _ONE)
+            elif tx.transaction_type == "DEMERGER":
+                details = tx.details or {}
+                allocated = Decimal(str(details.get("total_cost_allocated", "0")))
+                if "cost_basis_before" in details:
+                    cost_basis = Decimal(str(details["cost_basis_before"]))
+                else:
+                    # Recorded before the cost basis was stored with it: take
+                    # it from the BUYs once and keep it from then on
+                    if cost_basis is None:
+                        cost_basis = self._cost_basis(
+                            db, portfolio_id=portfolio_id, asset_id=asset_id,
+                            before=tx.transaction_date,
+                        )
+                    self._store_cost_basis(db, tx, cost_basis)
+                cost = demerger_cost_factor(cost_basis, allocated)
+                cost_basis -= allocated
+            rows.append(
+                CorporateActionAdjustment(
+                    portfolio_id=portfolio_id,
+                    asset_id=asset_id,
+                    transaction_id=tx.id,
+                    action_type=tx.transaction_type,
+                    effective_date=tx.transaction_date,
+                    quantity_numerator=quantity[0],
+                    quantity_denominator=quantity[1],
+                    cost_numerator=cost[0],
+                    cost_denominator=cost[1],
+                    successor_asset_id=(
+                        None if tx.transaction_type == "SPLIT"
+                        else self._successor(db, tx)
+                    ),
+                )
+            )
+        return rows
+
+    def _cost_basis(
+        self,
+        db: Session,
+        *,
+        portfolio_id: uuid.UUID,
+        asset_id: uuid.UUID,
+        before: datetime,
+    ) -> Decimal:
+        cost_basis = Decimal("0.0")
+        for buy in crud.transaction.get_records(
+            db,
+            portfolio_id=portfolio_id,
+            asset_id=asset_id,
+            transaction_types=_ACQUISITION_TYPES,
+            before=before,
+        ):
+            cost_basis += buy.quantity * (buy.price_per_unit or Decimal("0"))
+        return cost_basis
+
+    def _store_cost_basis(
+        self, db: Session, tx: TransactionRecord, cost_basis: Decimal
+    ) -> None:
+        details = {**(tx.details or {}), "cost_basis_before": str(cost_basis)}
+        db.query(Transaction).filter(Transaction.id == tx.id).update(
+            {Transaction.details: details}, synchronize_session="fetch"
+        )
+
+    def rebuild(
+        self, db: Session, *, portfolio_id: uuid.UUID, asset_id: uuid.UUID
+    ) -> List[CorporateActionAdjustment]:
+        """Re-derives a holding's adjustments from its audit transactions."""
+        db.query(CorporateActionAdjustment).filter(
+            CorporateActionAdjustment.portfolio_id == portfolio_id,
+            CorporateActionAdjustment.asset_id == asset_id,
+        ).delete(synchronize_session=False)
+        rows = self._derive(db, portfolio_id=portfolio_id, asset_id=asset_id)
+        db.add_all(rows)
+        db.flush()
+        logger.debug(
+            f"Rebuilt {len(rows)} adjustments for asset {asset_id} "
+            f"in portfolio {portfolio_id}"
+        )
+        return rows
+
+    def get_splits(
+        self,
+        db: Session,
+        *,
+        user_id: uuid.UUID,
+        asset_id: uuid.UUID,
+        portfolio_id: Optional[uuid.UUID] = None,
+    ) -> List[CorporateActionAdjustment]:
+        """An asset's splits across the user's portfolios, or in one."""
+        query = db.query(CorporateActionAdjustment).filter(
+            CorporateActionAdjustment.asset_id == asset_id,
+            CorporateActionAdjustment.action_type == "SPLIT",
+        )
+        if portfolio_id:
+            query = query.filter(CorporateActionAdjustment.portfolio_id == portfolio_id)
+        else:
+            query = query.join(
+                Portfolio, Portfolio.id == CorporateActionAdjustment.portfolio_id
+            ).filter(Portfolio.user_id == user_id)
+        return query.order_by(CorporateActionAdjustment.effective_date).all()
+
+    def get_tables(
+        self,
+        db: Session,
+        *,
+        portfolio_id: Optional[uuid.UUID] = None,
+        user_id: Optional[uuid.UUID] = None,
+    ) -> Dict[Tuple[uuid.UUID, uuid.UUID], AdjustmentTable]:
+        """The adjustment tables of a portfolio's or a user's holdings."""
+        query = db.query(CorporateActionAdjustment)
+        if portfolio_id:
+            query = query.filter(CorporateActionAdjustment.portfolio_id == portfolio_id)
+        if user_id:
+            query = query.join(
+                Portfolio, Portfolio.id == CorporateActionAdjustment.portfolio_id
+            ).filter(Portfolio.user_id == user_id)
+        by_holding: Dict[Tuple[uuid.UUID, uuid.UUID], list] = {}
+        for row in query.all():
+            by_holding.setdefault((row.portfolio_id, row.asset_id), []).append(row)
+        return {key: AdjustmentTable(rows) for key, rows in by_holding.items()}
+
+
+corporate_action_adjustment = CRUDCorporateActionAdjustment()
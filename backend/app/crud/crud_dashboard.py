@@ -1,5 +1,4 @@
 import logging
-import time
 import uuid
 from collections import defaultdict
 from datetime import date, timedelta
@@ -9,6 +8,7 @@ from typing import Any, Dict, List
 from sqlalchemy.orm import Session, joinedload
 
 from app.cache.utils import cache_analytics_data
+from app.core import metrics
 from app.models.user import User
 from app.services.financial_data_service import financial_data_service
 
@@ -20,7 +20,7 @@ def _calculate_dashboard_summary(db: Session, *, user: User) -> Dict[str, Any]:
     Calculates the dashboard summary metrics for a given user by aggregating
     summaries from all their portfolios.
     """
-    start_time = time.time()
+    timer = metrics.start_timer("dashboard_summary")
     from app import crud  # Local import to break circular dependency
 
     portfolios = crud.portfolio.get_multi_by_owner(db=db, user_id=user.id)
@@ -86,11 +86,10 @@ def _calculate_dashboard_summary(db: Session, *, user: User) -> Dict[str, Any]:
         for ticker, value in asset_allocation_map.items()
     ]
 
-    end_time = time.time()
     logger.info(
         "Dashboard summary for user %s took %.4f seconds.",
         user.id,
-        end_time - start_time,
+        timer.stop(),
     )
     return {
         "total_value": agg_total_value,
@@ -118,7 +117,7 @@ def _get_portfolio_history(
         portfolio_id: Optional. If provided, calculate history for only this
                       portfolio. If None, calculate for all user portfolios.
     """
-    start_time = time.time()
+    timer = metrics.start_timer("portfolio_history")
     from sqlalchemy import func
 
     from app import crud, models  # Local import to break circular dependency
@@ -147,10 +146,6 @@ def _get_portfolio_history(
         )
 
     # --- Pre-fetch Non-Market Assets for Historical Calculation ---
-    from app.crud.crud_holding import (
-        _calculate_fd_current_value,
-        _calculate_rd_value_at_date,
-    )
     from app.models.asset import Asset
     from app.models.fixed_deposit import FixedDeposit
     from app.models.historical_interest_rate import HistoricalInterestRate
@@ -158,7 +153,7 @@ def _get_portfolio_history(
 
     fd_query = db.query(FixedDeposit)
     rd_query = db.query(RecurringDeposit)
-    # Finding PPF assets to use with process_ppf_holding later if needed
+    # PPF accounts are valued from their transactions, like FDs/RDs below
     ppf_asset_query = db.query(Asset).filter(Asset.asset_type.in_(["PPF"]))
 
     if portfolio_id:
@@ -186,14 +181,6 @@ def _get_portfolio_history(
     all_rds = rd_query.all()
     ppf_assets = ppf_asset_query.distinct().all()
 
-    from dateutil.relativedelta import relativedelta
-
-    # Pre-calculate RD maturity dates to avoid O(N) recalculation inside the daily loop
-    processed_rds = [
-        (rd, rd.start_date + relativedelta(months=rd.tenure_months))
-        for rd in all_rds
-    ]
-
     all_ppf_rates = []
     if ppf_assets:
         all_ppf_rates = db.query(HistoricalInterestRate).filter(
@@ -214,6 +201,29 @@ def _get_portfolio_history(
             )
         ppf_transactions = ppf_tx_query.all()
 
+    # Value every deposit over the whole range in one vectorised pass per
+    # deposit instead of re-simulating each one for every historical day.
+    import numpy as np
+
+    from app.services import deposit_valuation
+
+    history_dates = deposit_valuation.daily_dates(start_date, end_date)
+    deposit_values = np.zeros(len(history_dates))
+    for fd in all_fds:
+        deposit_values += deposit_valuation.fd_value_curve(fd, history_dates)
+    for rd in all_rds:
+        deposit_values += deposit_valuation.rd_value_curve(rd, history_dates)
+    if ppf_assets:
+        ppf_rate_table = deposit_valuation.InterestRateTable.from_rates(all_ppf_rates)
+        for asset in ppf_assets:
+            asset_txns = [tx for tx in ppf_transactions if tx.asset_id == asset.id]
+            try:
+                deposit_values += deposit_valuation.ppf_value_curve(
+                    asset, asset_txns, ppf_rate_table, history_dates
+                )
+            except Exception as e:
+                logger.error(f"Error calculating historical PPF for {asset.id}: {e}")
+
     # Fetch snapshots
     snapshot_query = db.query(
         DailyPortfolioSnapshot.snapshot_date,
@@ -291,22 +301,10 @@ def _get_portfolio_history(
             assets=fx_tickers_list, start_date=start_date, end_date=end_date
         )
 
-    # Build transactions query with optional portfolio filter
-    txn_query = (
-        db.query(crud.transaction.model)
-        .options(joinedload(crud.transaction.model.asset))
-        .filter(
-            crud.transaction.model.user_id == user.id,
-            crud.transaction.model.transaction_date <= end_date,
-        )
+    transactions = crud.transaction.get_records(
+        db, user_id=user.id, portfolio_id=portfolio_id, until=end_date
     )
-    if portfolio_id:
-        txn_query = txn_query.filter(
-            crud.transaction.model.portfolio_id == portfolio_id
-        )
-    transactions = txn_query.order_by(
-        crud.transaction.model.transaction_date.asc()
-    ).all()
+    ticker_by_asset_id = {a.id: a.ticker_symbol for a in all_user_assets}
 
     history_points = []
     current_day = start_date
@@ -317,7 +315,7 @@ def _get_portfolio_history(
     last_known_fx_rates = {}
 
     def _process_transaction(t, daily_holdings, daily_invested_capital):
-        ticker = t.asset.ticker_symbol
+        ticker = ticker_by_asset_id[t.asset_id]
         if t.transaction_type.lower() in ("buy", "rsu_vest", "espp_purchase"):
             daily_holdings[ticker] += t.quantity
             daily_invested_capital[ticker] += t.quantity * t.price_per_unit
@@ -453,94 +451,19 @@ def _get_portfolio_history(
                                 ticker, Decimal("0.0")
                             )
 
-                # 2. Fixed Deposits (Simulated for this historical day)
-                for fd in all_fds:
-                    # Ignore if the FD hasn't started yet on this historical date
-                    if fd.start_date > current_day:
-                        continue
-
-                    # If matured before this historical date, the FD has been
-                    # "withdrawn" from the portfolio. Skip it to match live
-                    # holdings calculation which excludes matured FDs.
-                    if current_day > fd.maturity_date:
-                        continue
-
-                    fd_val = _calculate_fd_current_value(
-                        fd.principal_amount,
-                        fd.interest_rate,
-                        fd.start_date,
-                        current_day,
-                        fd.compounding_frequency,
-                        fd.interest_payout,
-                    )
-
-                    day_total_value += fd_val
-
-                # 3. Recurring Deposits (Simulated for this historical day)
-                for rd, rd_maturity_date in processed_rds:
-                    if rd.start_date > current_day:
-                        continue
-
-                    # If matured before this historical date, the RD has been
-                    # "withdrawn" from the portfolio. Skip it.
-                    if current_day > rd_maturity_date:
-                        continue
-
-                    # rd.start_date <= current_day ensures at least 1 installment
-                    # is paid, so we can directly add the current value without
-                    # redundant loops.
-                    rd_val = _calculate_rd_value_at_date(
-                        rd.monthly_installment,
-                        rd.interest_rate,
-                        rd.start_date,
-                        rd.tenure_months,
-                        current_day,
+                # 2. Deposits (FD, RD, PPF) from the pre-computed curves
+                day_deposit_value = deposit_values[(current_day - start_date).days]
+                if day_deposit_value:
+                    day_total_value += deposit_valuation.to_decimal(
+                        day_deposit_value
                     )
 
-                    day_total_value += rd_val
-
-                # 4. PPF (Simulated for this historical day)
-                from app.crud.crud_ppf import process_ppf_holding
-                if ppf_assets:
-                    # Filter PPF transactions up to the current historical day
-                    day_ppf_txns = [
-                        tx for tx in ppf_transactions
-                        if tx.transaction_date.date() <= current_day
-                    ]
-
-                    for asset in ppf_assets:
-                        asset_txns = [
-                            tx for tx in day_ppf_txns if tx.asset_id == asset.id
-                        ]
-                        if not asset_txns:
-                            continue
-
-                        # process_ppf_holding requires a calculation date for interest
-                        try:
-                            ppf_holding = process_ppf_holding(
-                                db=db,
-                                ppf_asset=asset,
-                                portfolio_id=portfolio_id,
-                                calculation_date=current_day,
-                                simulate_only=True,
-                                transactions=asset_txns,
-                                ppf_rates=all_ppf_rates,
-                                user_id=user.id,
-                            )
-                            day_total_value += ppf_holding.current_value
-                        except Exception as e:
-                            logger.error(
-                                f"Error calculating historical PPF for "
-                                f"{current_day}: {e}"
-                            )
-
         history_points.append({"date": current_day, "value": day_total_value})
         current_day += timedelta(days=1)
 
-    end_time = time.time()
     logger.info(
         "Portfolio history (%s) for user %s took %.4f seconds. %d data points.",
-        range_str, user.id, end_time - start_time, len(history_points),
+        range_str, user.id, timer.stop(), len(history_points),
     )
     return history_points
 
@@ -50,7 +50,6 @@ class CRUDGoal(CRUDBase[Goal, GoalCreate, GoalUpdate]):
 
         from app import crud
         from app.crud.crud_analytics import _calculate_xirr, _get_portfolio_cash_flows
-        from app.models.transaction import Transaction
 
         current_amount = Decimal("0.0")
 
@@ -76,7 +75,7 @@ class CRUDGoal(CRUDBase[Goal, GoalCreate, GoalUpdate]):
 
                 if link.portfolio_id not in portfolio_ids_processed:
                     portfolio_ids_processed.add(link.portfolio_id)
-                    transactions = crud.transaction.get_multi_by_portfolio(
+                    transactions = crud.transaction.get_records(
                         db, portfolio_id=link.portfolio_id
                     )
                     all_fixed_deposits = crud.fixed_deposit.get_multi_by_portfolio(
@@ -124,11 +123,8 @@ class CRUDGoal(CRUDBase[Goal, GoalCreate, GoalUpdate]):
 
                 if link.asset_id not in asset_ids_processed:
                     asset_ids_processed.add(link.asset_id)
-                    user_transactions = (
-                        db.query(Transaction)
-                        .filter(Transaction.asset_id == link.asset_id)
-                        .filter(Transaction.user_id == goal.user_id)
-                        .all()
+                    user_transactions = crud.transaction.get_records(
+                        db, asset_id=link.asset_id, user_id=goal.user_id
                     )
                     if user_transactions:
                         cfs = _get_portfolio_cash_flows(user_transactions, [], [])
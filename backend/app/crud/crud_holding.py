@@ -1,18 +1,25 @@
+import asyncio
 import logging
 import math
-import time
 import uuid
 from collections import defaultdict
+from dataclasses import dataclass, field
 from datetime import date
 from decimal import Decimal
-from typing import List
+from typing import Any, Dict, List, Optional
 
 from dateutil.relativedelta import relativedelta
-from sqlalchemy import func
+from sqlalchemy import func, select
 from sqlalchemy.orm import Session, joinedload
+from starlette.concurrency import run_in_threadpool
 
 from app import crud, models, schemas
-from app.cache.utils import cache_analytics_data
+from app.cache.utils import (
+    cache_analytics_data,
+    read_analytics_cache,
+    write_analytics_cache,
+)
+from app.core import metrics
 from app.core.config import settings
 from app.crud.crud_ppf import process_ppf_holding
 from app.models.recurring_deposit import RecurringDeposit
@@ -23,6 +30,9 @@ from app.utils.pydantic_compat import model_dump_json
 
 logger = logging.getLogger(__name__)
 
+PORTFOLIO_HOLDINGS_CACHE_PREFIX = "analytics:portfolio_holdings_and_summary"
+ALL_PORTFOLIOS_HOLDINGS_CACHE_PREFIX = "analytics:all_portfolios_holdings_and_summary"
+
 
 def _to_finite_decimal(val: object, default: Decimal = Decimal("0.0")) -> Decimal:
     if val is None:
@@ -378,6 +388,94 @@ def _calculate_summary(
     )
 
 
+@dataclass
+class MarketReplay:
+    """The positions left after replaying a set of market-traded transactions."""
+
+    transactions: List[models.Transaction]
+    holdings_state: Dict[str, Dict[str, Decimal]]
+    ticker_map: Dict[str, models.Asset]
+    current_holdings_tickers: List[str]
+    total_realized_pnl: Decimal
+
+    def price_requests(self) -> List[Dict[str, Any]]:
+        requests = []
+        for ticker in self.current_holdings_tickers:
+            asset = self.ticker_map.get(ticker)
+            requests.append({
+                "ticker_symbol": ticker,
+                "exchange": asset.exchange if asset else None,
+                "asset_type": asset.asset_type if asset else None,
+            })
+        return requests
+
+    def currencies_needed(self) -> List[str]:
+        currencies = set()
+        for ticker in self.current_holdings_tickers:
+            asset = self.ticker_map.get(ticker)
+            if asset and asset.currency and asset.currency != "INR":
+                currencies.add(asset.currency)
+        return sorted(currencies)
+
+    def fx_requests(self) -> List[Dict[str, Any]]:
+        return [
+            {
+                "ticker_symbol": f"{currency}INR=X",
+                "asset_type": "Currency",
+                "exchange": None
+            }
+            for currency in self.currencies_needed()
+        ]
+
+
+@dataclass
+class MarketQuotes:
+    """Live prices for a `MarketReplay`: the held assets and their FX rates."""
+
+    prices: Dict[str, Dict[str, Decimal]] = field(default_factory=dict)
+    fx_prices: Dict[str, Dict[str, Decimal]] = field(default_factory=dict)
+
+
+@dataclass
+class PreloadedDeposits:
+    """A portfolio's deposits and PPF assets, loaded for many portfolios at once."""
+
+    fixed_deposits: List[models.FixedDeposit] = field(default_factory=list)
+    recurring_deposits: List[RecurringDeposit] = field(default_factory=list)
+    ppf_assets: List[models.Asset] = field(default_factory=list)
+
+
+def _fetch_market_quotes(replay: MarketReplay) -> MarketQuotes:
+    price_requests = replay.price_requests()
+    fx_requests = replay.fx_requests()
+    return MarketQuotes(
+        prices=(
+            financial_data_service.get_current_prices(price_requests)
+            if price_requests
+            else {}
+        ),
+        fx_prices=(
+            financial_data_service.get_current_prices(fx_requests)
+            if fx_requests
+            else {}
+        ),
+    )
+
+
+async def _afetch_market_quotes(replay: MarketReplay) -> MarketQuotes:
+    """Async variant of `_fetch_market_quotes`; both lookups run concurrently."""
+
+    async def fetch(requests: List[Dict[str, Any]]) -> Dict[str, Dict[str, Decimal]]:
+        if not requests:
+            return {}
+        return await financial_data_service.aget_current_prices(requests)
+
+    prices, fx_prices = await asyncio.gather(
+        fetch(replay.price_requests()), fetch(replay.fx_requests())
+    )
+    return MarketQuotes(prices=prices, fx_prices=fx_prices)
+
+
 def _process_market_traded_assets(
     db: Session,
     portfolio_id: uuid.UUID | None,
@@ -386,9 +484,25 @@ def _process_market_traded_assets(
     user_id: uuid.UUID | None = None,
 ) -> tuple[List[schemas.Holding], Decimal]:
     """Processes all market-traded assets like Stocks, MFs, ETFs, and Bonds."""
-    holdings_list = []
-    total_realized_pnl = initial_realized_pnl
+    replay = _replay_market_traded_assets(db, transactions, initial_realized_pnl)
+    quotes = _fetch_market_quotes(replay)
+    return _value_market_traded_assets(db, replay, quotes)
+
 
+def _replay_market_traded_assets(
+    db: Session,
+    transactions: List[models.Transaction],
+    initial_realized_pnl: Decimal,
+    asset_map: Optional[Dict[uuid.UUID, models.Asset]] = None,
+    sell_links_map: Optional[Dict[uuid.UUID, List[TransactionLink]]] = None,
+) -> MarketReplay:
+    """
+    Replays the transactions into per-ticker quantity, cost and realized P&L.
+    The transactions are only read, so they may be `TransactionRecord`s
+    rather than ORM instances. `asset_map` and `sell_links_map` may be passed
+    pre-loaded (see `get_holdings_and_summaries_bulk`); otherwise they are
+    queried here.
+    """
     # Optimization: Use the already fetched transactions list instead of a new DB query.
     relevant_types = {
         "BUY", "SELL", "RSU_VEST", "ESPP_PURCHASE", "SPLIT",
@@ -399,18 +513,16 @@ def _process_market_traded_assets(
         if tx.transaction_type in relevant_types
     }
 
-    holdings_state = defaultdict(
-        lambda: {
-            "quantity": Decimal("0.0"),
-            "total_invested": Decimal("0.0"),
-            "realized_pnl": Decimal("0.0"),
-        }
-    )
-
-    portfolio_assets = (
-        db.query(models.Asset).filter(models.Asset.id.in_(unique_asset_ids)).all()
-    )
-    asset_map = {asset.id: asset for asset in portfolio_assets}
+    if asset_map is None:
+        portfolio_assets = (
+            db.query(models.Asset).filter(models.Asset.id.in_(unique_asset_ids)).all()
+        )
+        asset_map = {asset.id: asset for asset in portfolio_assets}
+    else:
+        portfolio_assets = [
+            asset_map[asset_id] for asset_id in unique_asset_ids
+            if asset_id in asset_map
+        ]
 
     # Optimization: Create a map for quick ticker lookup to avoid O(N) scans
     ticker_map = {
@@ -423,17 +535,22 @@ def _process_market_traded_assets(
     transactions.sort(key=lambda tx: tx.transaction_date)
 
     # --- Pre-fetch Transaction Links ---
-    transaction_ids = [tx.id for tx in transactions]
-    all_links = (
-        db.query(TransactionLink)
-        .options(joinedload(TransactionLink.buy_transaction, innerjoin=True))
-        .filter(TransactionLink.sell_transaction_id.in_(transaction_ids))
-        .all()
-    )
+    if sell_links_map is None:
+        transaction_ids = [tx.id for tx in transactions]
+        all_links = (
+            db.query(TransactionLink)
+            .options(joinedload(TransactionLink.buy_transaction, innerjoin=True))
+            .filter(TransactionLink.sell_transaction_id.in_(transaction_ids))
+            .all()
+        )
 
-    sell_links_map = defaultdict(list)
-    for link in all_links:
-        sell_links_map[link.sell_transaction_id].append(link)
+        sell_links_map = defaultdict(list)
+        for link in all_links:
+            sell_links_map[link.sell_transaction_id].append(link)
+    else:
+        all_links = [
+            link for tx in transactions for link in sell_links_map.get(tx.id, [])
+        ]
 
     # Map transaction ID to object for quick lookup of Buy price
     tx_map = {tx.id: tx for tx in transactions}
@@ -443,6 +560,49 @@ def _process_market_traded_assets(
         if link.buy_transaction_id not in tx_map and link.buy_transaction:
             tx_map[link.buy_transaction_id] = link.buy_transaction
 
+    if settings.HOLDINGS_FAST_PATH:
+        from app.services import fast_replay  # numpy; imported on demand
+
+        holdings_state, total_realized_pnl = fast_replay.accumulate_positions(
+            transactions, asset_map, sell_links_map, tx_map, initial_realized_pnl
+        )
+    else:
+        holdings_state, total_realized_pnl = _accumulate_positions(
+            transactions, asset_map, sell_links_map, tx_map, initial_realized_pnl
+        )
+
+    current_holdings_tickers = [
+        ticker for ticker, data in holdings_state.items() if data["quantity"] > 0
+    ]
+    return MarketReplay(
+        transactions=transactions,
+        holdings_state=holdings_state,
+        ticker_map=ticker_map,
+        current_holdings_tickers=current_holdings_tickers,
+        total_realized_pnl=total_realized_pnl,
+    )
+
+
+def _accumulate_positions(
+    transactions: List[models.Transaction],
+    asset_map: Dict[uuid.UUID, models.Asset],
+    sell_links_map: Dict[uuid.UUID, List[TransactionLink]],
+    tx_map: Dict[uuid.UUID, models.Transaction],
+    initial_realized_pnl: Decimal,
+) -> tuple[Dict[str, Dict[str, Decimal]], Decimal]:
+    """
+    Per-ticker quantity, amount invested and realized P&L after the
+    transactions (sorted by date), and the total realized P&L.
+    """
+    total_realized_pnl = initial_realized_pnl
+    holdings_state = defaultdict(
+        lambda: {
+            "quantity": Decimal("0.0"),
+            "total_invested": Decimal("0.0"),
+            "realized_pnl": Decimal("0.0"),
+        }
+    )
+
     for tx in transactions:
         asset = asset_map.get(tx.asset_id)
         ticker = asset.ticker_symbol if asset else None
@@ -600,24 +760,19 @@ def _process_market_traded_assets(
                 holdings_state[ticker]["total_invested"] -= cost_of_shares_sold
                 holdings_state[ticker]["quantity"] -= tx.quantity
 
-    current_holdings_tickers = [
-        ticker for ticker, data in holdings_state.items() if data["quantity"] > 0
-    ]
+    return holdings_state, total_realized_pnl
 
-    assets_to_price = []
-    for ticker in current_holdings_tickers:
-        asset = ticker_map.get(ticker)
-        assets_to_price.append({
-            "ticker_symbol": ticker,
-            "exchange": asset.exchange if asset else None,
-            "asset_type": asset.asset_type if asset else None,
-        })
-
-    price_details = (
-        financial_data_service.get_current_prices(assets_to_price)
-        if assets_to_price
-        else {}
-    )
+
+def _value_market_traded_assets(
+    db: Session, replay: MarketReplay, quotes: MarketQuotes
+) -> tuple[List[schemas.Holding], Decimal]:
+    """Values the replayed positions at the given quotes."""
+    holdings_list = []
+    transactions = replay.transactions
+    holdings_state = replay.holdings_state
+    ticker_map = replay.ticker_map
+    current_holdings_tickers = replay.current_holdings_tickers
+    price_details = quotes.prices
 
     # --- On-demand enrichment for assets with NULL sector ---
     # This enriches sector/industry/country when fetching portfolio
@@ -725,31 +880,15 @@ def _process_market_traded_assets(
                 if asset:
                     db.expire(asset)
 
-    # --- Pre-fetch FX rates for foreign assets ---
-    currencies_needed = set()
-    for ticker in current_holdings_tickers:
-        asset = ticker_map.get(ticker)
-        if asset and asset.currency and asset.currency != "INR":
-            currencies_needed.add(asset.currency)
-
+    # --- FX rates for foreign assets ---
     fx_rates = {}
-    if currencies_needed:
-        fx_assets_to_fetch = [
-            {
-                "ticker_symbol": f"{currency}INR=X",
-                "asset_type": "Currency",
-                "exchange": None
-            }
-            for currency in currencies_needed
-        ]
-        fx_prices = financial_data_service.get_current_prices(fx_assets_to_fetch)
-        for currency in currencies_needed:
-            ticker = f"{currency}INR=X"
-            if ticker in fx_prices:
-                fx_rates[currency] = fx_prices[ticker]["current_price"]
-            else:
-                logger.warning(f"Could not fetch FX rate for {currency}")
-                fx_rates[currency] = Decimal(1)
+    for currency in replay.currencies_needed():
+        ticker = f"{currency}INR=X"
+        if ticker in quotes.fx_prices:
+            fx_rates[currency] = quotes.fx_prices[ticker]["current_price"]
+        else:
+            logger.warning(f"Could not fetch FX rate for {currency}")
+            fx_rates[currency] = Decimal(1)
 
     for ticker in current_holdings_tickers:
         asset = ticker_map.get(ticker)
@@ -875,7 +1014,7 @@ def _process_market_traded_assets(
             logger.debug(model_dump_json(h, indent=2))
         logger.debug("------------------------------")
 
-    return holdings_list, total_realized_pnl
+    return holdings_list, replay.total_realized_pnl
 
 
 class CRUDHolding:
@@ -885,7 +1024,7 @@ class CRUDHolding:
     """
 
     @cache_analytics_data(
-        prefix="analytics:portfolio_holdings_and_summary",
+        prefix=PORTFOLIO_HOLDINGS_CACHE_PREFIX,
         arg_names=["portfolio_id"],
         response_model=schemas.PortfolioHoldingsAndSummary,
     )
@@ -893,23 +1032,180 @@ class CRUDHolding:
         self, db: Session, *, portfolio_id: uuid.UUID
     ) -> schemas.PortfolioHoldingsAndSummary:
         """Calculates the consolidated holdings and a summary for a given portfolio."""
-        start_time = time.time()
+        timer = metrics.start_timer("portfolio_holdings_and_summary")
+        replay = self._replay_portfolio(db, portfolio_id)
+        quotes = _fetch_market_quotes(replay)
+        return self._summarize_portfolio(db, portfolio_id, replay, quotes, timer)
+
+    async def get_portfolio_holdings_and_summary_async(
+        self, db: Session, *, portfolio_id: uuid.UUID
+    ) -> schemas.PortfolioHoldingsAndSummary:
+        """
+        Async variant of `get_portfolio_holdings_and_summary`, sharing its cache.
+        Database work runs in the threadpool; the price lookups are awaited so
+        no worker thread is held while waiting on the providers.
+        """
+        cache_key = f"{PORTFOLIO_HOLDINGS_CACHE_PREFIX}:{portfolio_id}"
+        cached = await run_in_threadpool(
+            read_analytics_cache, cache_key, schemas.PortfolioHoldingsAndSummary
+        )
+        if cached is not None:
+            return cached
+
+        timer = metrics.start_timer("portfolio_holdings_and_summary")
+        replay = await run_in_threadpool(self._replay_portfolio, db, portfolio_id)
+        quotes = await _afetch_market_quotes(replay)
+        result = await run_in_threadpool(
+            self._summarize_portfolio, db, portfolio_id, replay, quotes, timer
+        )
+        await run_in_threadpool(write_analytics_cache, cache_key, result)
+        return result
+
+    def _replay_portfolio(
+        self, db: Session, portfolio_id: uuid.UUID
+    ) -> MarketReplay:
         logger.info(
             f"Starting holdings calculation for portfolio_id: {portfolio_id}"
         )
-        transactions = crud.transaction.get_multi_by_portfolio(
-            db=db, portfolio_id=portfolio_id
+        transactions = crud.transaction.get_records(db, portfolio_id=portfolio_id)
+        return _replay_market_traded_assets(db, transactions, Decimal("0.0"))
+
+    def get_holdings_and_summaries_bulk(
+        self, db: Session, *, portfolio_ids: List[uuid.UUID]
+    ) -> Dict[uuid.UUID, schemas.PortfolioHoldingsAndSummary]:
+        """
+        Holdings and summary for many portfolios with a fixed number of queries
+        and a single price lookup for the union of their held assets, instead
+        of the per-portfolio queries and quotes of
+        `get_portfolio_holdings_and_summary`. Results are not cached. Used by
+        the end-of-day snapshot job.
+        """
+        if not portfolio_ids:
+            return {}
+        timer = metrics.start_timer("bulk_holdings_and_summary")
+        in_portfolios = models.Transaction.portfolio_id.in_(portfolio_ids)
+        portfolio_tx_ids = select(models.Transaction.id).where(in_portfolios)
+
+        transactions_by_portfolio: Dict[uuid.UUID, List[models.Transaction]] = (
+            defaultdict(list)
         )
-        all_fixed_deposits = crud.fixed_deposit.get_multi_by_portfolio(
-            db, portfolio_id=portfolio_id
+        for tx in db.query(models.Transaction).filter(in_portfolios).all():
+            transactions_by_portfolio[tx.portfolio_id].append(tx)
+
+        asset_map = {
+            asset.id: asset
+            for asset in db.query(models.Asset)
+            .options(joinedload(models.Asset.bond))
+            .filter(
+                models.Asset.id.in_(
+                    select(models.Transaction.asset_id).where(in_portfolios)
+                )
+            )
+            .all()
+        }
+
+        sell_links_map: Dict[uuid.UUID, List[TransactionLink]] = defaultdict(list)
+        for link in (
+            db.query(TransactionLink)
+            .options(joinedload(TransactionLink.buy_transaction, innerjoin=True))
+            .filter(TransactionLink.sell_transaction_id.in_(portfolio_tx_ids))
+            .all()
+        ):
+            sell_links_map[link.sell_transaction_id].append(link)
+
+        deposits: Dict[uuid.UUID, PreloadedDeposits] = defaultdict(PreloadedDeposits)
+        for fd in db.query(models.FixedDeposit).filter(
+            models.FixedDeposit.portfolio_id.in_(portfolio_ids)
+        ):
+            deposits[fd.portfolio_id].fixed_deposits.append(fd)
+        for rd in db.query(RecurringDeposit).filter(
+            RecurringDeposit.portfolio_id.in_(portfolio_ids)
+        ):
+            deposits[rd.portfolio_id].recurring_deposits.append(rd)
+        for portfolio_id, ppf_asset in (
+            db.query(models.Transaction.portfolio_id, models.Asset)
+            .join(models.Asset, models.Transaction.asset_id == models.Asset.id)
+            .filter(in_portfolios, func.upper(models.Asset.asset_type) == "PPF")
+            .distinct()
+            .all()
+        ):
+            deposits[portfolio_id].ppf_assets.append(ppf_asset)
+
+        replays = {
+            portfolio_id: _replay_market_traded_assets(
+                db,
+                transactions_by_portfolio.get(portfolio_id, []),
+                Decimal("0.0"),
+                asset_map=asset_map,
+                sell_links_map=sell_links_map,
+            )
+            for portfolio_id in portfolio_ids
+        }
+
+        # One quote lookup for everything held in any of the portfolios
+        price_requests: Dict[str, Dict[str, Any]] = {}
+        fx_requests: Dict[str, Dict[str, Any]] = {}
+        for replay in replays.values():
+            for request in replay.price_requests():
+                price_requests.setdefault(request["ticker_symbol"], request)
+            for request in replay.fx_requests():
+                fx_requests.setdefault(request["ticker_symbol"], request)
+        quotes = MarketQuotes(
+            prices=(
+                financial_data_service.get_current_prices(
+                    list(price_requests.values())
+                )
+                if price_requests
+                else {}
+            ),
+            fx_prices=(
+                financial_data_service.get_current_prices(list(fx_requests.values()))
+                if fx_requests
+                else {}
+            ),
         )
-        all_recurring_deposits = crud.recurring_deposit.get_multi_by_portfolio(
-            db=db, portfolio_id=portfolio_id
+
+        results = {
+            portfolio_id: self._summarize_portfolio(
+                db,
+                portfolio_id,
+                replay,
+                quotes,
+                metrics.start_timer("portfolio_holdings_and_summary"),
+                preloaded=deposits[portfolio_id],
+            )
+            for portfolio_id, replay in replays.items()
+        }
+        logger.info(
+            f"Bulk holdings for {len(portfolio_ids)} portfolios "
+            f"({len(price_requests)} priced assets) took {timer.stop():.4f} seconds."
         )
+        return results
+
+    def _summarize_portfolio(
+        self,
+        db: Session,
+        portfolio_id: uuid.UUID,
+        replay: MarketReplay,
+        quotes: MarketQuotes,
+        timer: metrics.Timer,
+        preloaded: Optional[PreloadedDeposits] = None,
+    ) -> schemas.PortfolioHoldingsAndSummary:
+        transactions = replay.transactions
+        if preloaded is not None:
+            all_fixed_deposits = preloaded.fixed_deposits
+            all_recurring_deposits = preloaded.recurring_deposits
+        else:
+            all_fixed_deposits = crud.fixed_deposit.get_multi_by_portfolio(
+                db, portfolio_id=portfolio_id
+            )
+            all_recurring_deposits = crud.recurring_deposit.get_multi_by_portfolio(
+                db=db, portfolio_id=portfolio_id
+            )
 
         # --- Process Market-Traded Assets First ---
-        market_traded_holdings, total_realized_pnl = _process_market_traded_assets(
-            db, portfolio_id, transactions, Decimal("0.0")
+        market_traded_holdings, total_realized_pnl = _value_market_traded_assets(
+            db, replay, quotes
         )
         logger.info(
             f"Processed {len(market_traded_holdings)} market-traded assets. "
@@ -934,16 +1230,19 @@ class CRUDHolding:
         holdings_list.extend(rd_holdings)
         # Accumulate realized P&L from matured FDs and RDs into the total
         total_realized_pnl += pnl_from_matured_fds + pnl_from_matured_rds
-        ppf_assets = (
-            db.query(models.Asset)
-            .join(models.Transaction)
-            .filter(
-                models.Transaction.portfolio_id == portfolio_id,
-                func.upper(models.Asset.asset_type) == "PPF"
+        if preloaded is not None:
+            ppf_assets = preloaded.ppf_assets
+        else:
+            ppf_assets = (
+                db.query(models.Asset)
+                .join(models.Transaction)
+                .filter(
+                    models.Transaction.portfolio_id == portfolio_id,
+                    func.upper(models.Asset.asset_type) == "PPF"
+                )
+                .distinct()
+                .all()
             )
-            .distinct()
-            .all()
-        )
         logger.info(f"Found {len(ppf_assets)} PPF assets to process.")
         # --- PPF Holdings ---
 
@@ -1010,10 +1309,9 @@ class CRUDHolding:
         logger.debug(
             "[_get_portfolio_holdings_and_summary] Final summary object: %s", summary
         )
-        end_time = time.time()
         logger.info(
             f"Holdings calculation for portfolio {portfolio_id} "
-            f"took {end_time - start_time:.4f} seconds."
+            f"took {timer.stop():.4f} seconds."
         )
 
         return schemas.PortfolioHoldingsAndSummary(
@@ -1021,7 +1319,7 @@ class CRUDHolding:
         )
 
     @cache_analytics_data(
-        prefix="analytics:all_portfolios_holdings_and_summary",
+        prefix=ALL_PORTFOLIOS_HOLDINGS_CACHE_PREFIX,
         arg_names=["user_id"],
         response_model=schemas.PortfolioHoldingsAndSummary,
     )
@@ -1029,7 +1327,7 @@ class CRUDHolding:
         self, db: Session, *, user_id: uuid.UUID
     ) -> schemas.PortfolioHoldingsAndSummary:
         """Calculates consolidated holdings and summary for all user portfolios."""
-        start_time = time.time()
+        timer = metrics.start_timer("all_portfolios_holdings_and_summary")
         logger.info(
             f"Starting holdings calculation for all portfolios of user_id: {user_id}"
         )
@@ -1050,11 +1348,7 @@ class CRUDHolding:
         portfolio_ids = [p.id for p in portfolios]
 
         # Get all transactions, FDs, and RDs for the user
-        transactions = (
-            db.query(models.Transaction)
-            .filter(models.Transaction.user_id == user_id)
-            .all()
-        )
+        transactions = crud.transaction.get_records(db, user_id=user_id)
 
         all_fixed_deposits = db.query(models.FixedDeposit).filter(
             models.FixedDeposit.portfolio_id.in_(portfolio_ids)
@@ -1185,10 +1479,9 @@ class CRUDHolding:
         logger.info(
             f"Calculation complete. Total user portfolios value: {summary.total_value}"
         )
-        end_time = time.time()
         logger.info(
             f"Holdings calculation for all portfolios of user {user_id} "
-            f"took {end_time - start_time:.4f} seconds."
+            f"took {timer.stop():.4f} seconds."
         )
 
         return schemas.PortfolioHoldingsAndSummary(
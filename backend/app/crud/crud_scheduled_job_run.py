@@ -0,0 +1,39 @@
+from datetime import date
+from typing import List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.crud.base import CRUDBase
+from app.models.scheduled_job_run import ScheduledJobRun
+from app.schemas.scheduler import ScheduledJobRun as ScheduledJobRunSchema
+
+
+# Runs are written by the scheduler itself; the API only reads them.
+class CRUDScheduledJobRun(
+    CRUDBase[ScheduledJobRun, ScheduledJobRunSchema, ScheduledJobRunSchema]
+):
+    def get_recent(
+        self, db: Session, *, job_name: Optional[str] = None, limit: int = 50
+    ) -> List[ScheduledJobRun]:
+        query = db.query(ScheduledJobRun)
+        if job_name:
+            query = query.filter(ScheduledJobRun.job_name == job_name)
+        return query.order_by(ScheduledJobRun.started_at.desc()).limit(limit).all()
+
+    def get_last(
+        self,
+        db: Session,
+        *,
+        job_name: str,
+        status: Optional[str] = None,
+        run_date: Optional[date] = None,
+    ) -> Optional[ScheduledJobRun]:
+        query = db.query(ScheduledJobRun).filter(ScheduledJobRun.job_name == job_name)
+        if status:
+            query = query.filter(ScheduledJobRun.status == status)
+        if run_date:
+            query = query.filter(ScheduledJobRun.run_date == run_date)
+        return query.order_by(ScheduledJobRun.started_at.desc()).first()
+
+
+scheduled_job_run = CRUDScheduledJobRun(ScheduledJobRun)
@@ -1,14 +1,13 @@
 import logging
-import math
 import uuid
 from collections import defaultdict
 from datetime import datetime
 from decimal import Decimal
-from typing import List, Optional, Union
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Union
 
-from fastapi import HTTPException, status
-from sqlalchemy import func
-from sqlalchemy.orm import Session, load_only
+from fastapi import HTTPException
+from sqlalchemy import and_, func, or_, select
+from sqlalchemy.orm import Session, joinedload, load_only, selectinload
 
 from app import crud, schemas
 from app.crud.base import CRUDBase
@@ -17,11 +16,37 @@ from app.models.transaction import Transaction
 from app.models.transaction_link import TransactionLink
 from app.schemas.enums import TransactionType
 from app.schemas.transaction import TransactionCreate, TransactionUpdate
+from app.services import transaction_rules
+from app.services.adjustment_factors import LotBook
 from app.utils.pydantic_compat import model_dump
 
 logger = logging.getLogger(__name__)
 
 
+class TransactionRecord(NamedTuple):
+    """
+    A read-only transaction, as loaded by `CRUDTransaction.get_records`.
+
+    The analytics (holdings, history, XIRR and capital gains) only read a
+    transaction's columns. A tuple of them is a fraction of the size of an
+    ORM instance, which carries its instance state and identity-map entry,
+    and several times quicker to build, which matters for long histories.
+    """
+
+    id: uuid.UUID
+    portfolio_id: uuid.UUID
+    asset_id: uuid.UUID
+    transaction_type: str
+    transaction_date: datetime
+    quantity: Decimal
+    price_per_unit: Decimal
+    fees: Decimal
+    details: Optional[Dict[str, Any]]
+
+
+_RECORD_COLUMNS = [getattr(Transaction, name) for name in TransactionRecord._fields]
+
+
 class CRUDTransaction(CRUDBase[Transaction, TransactionCreate, TransactionUpdate]):
     def get_holdings_on_date(
         self, db: Session, *, user_id: uuid.UUID, asset_id: uuid.UUID, on_date: datetime
@@ -48,32 +73,10 @@ class CRUDTransaction(CRUDBase[Transaction, TransactionCreate, TransactionUpdate
         )
 
         units = Decimal("0")
-
         for tx in transactions:
-            ttype = tx.transaction_type
-            qty = tx.quantity
-
-            if ttype in [
-                TransactionType.BUY,
-                TransactionType.ESPP_PURCHASE,
-                TransactionType.RSU_VEST,
-                # TransactionType.BONUS - Excluded as it is an audit record;
-                # actual shares are in a BUY tx
-                TransactionType.CONTRIBUTION
-            ]:
-                units += qty
-            elif ttype == TransactionType.SELL:
-                units -= qty
-            elif ttype == TransactionType.SPLIT:
-                # Split logic: multiplier = new_ratio / old_ratio
-                # quantity = new, price_per_unit = old
-                if tx.price_per_unit and tx.price_per_unit > 0:
-                    multiplier = tx.quantity / tx.price_per_unit
-                    units = units * multiplier
-            # Merger/Demerger/Rename usually effectively close position or open new
-            # assets, but strict holding count logic might need fine tuning
-            # if we wanted to prevent selling "old" merged shares.
-            # For now, SPLIT is the primary in-place modifier.
+            units = transaction_rules.holdings_after(
+                units, tx.transaction_type, tx.quantity, tx.price_per_unit
+            )
 
         return units
 
@@ -115,10 +118,7 @@ class CRUDTransaction(CRUDBase[Transaction, TransactionCreate, TransactionUpdate
         # To prevent duplicate submissions from the frontend, check if a very
         # similar transaction was created recently.
         # This is particularly for the RSU/ESPP flow.
-        if obj_in.transaction_type in [
-            TransactionType.RSU_VEST,
-            TransactionType.ESPP_PURCHASE,
-        ]:
+        if transaction_rules.once_key(obj_in, portfolio_id) is not None:
             logger.debug(
                 f"idempotency check for {obj_in.transaction_type} transaction."
             )
@@ -142,11 +142,7 @@ class CRUDTransaction(CRUDBase[Transaction, TransactionCreate, TransactionUpdate
         if not portfolio:
             raise HTTPException(status_code=404, detail="Portfolio not found")
 
-        # Check for sufficient holdings only for standalone SELL transactions.
-        # This check is skipped for 'Sell to Cover' which is created atomically
-        # with its parent RSU Vest.
-        is_sell_to_cover = obj_in.details and "related_rsu_vest_id" in obj_in.details
-        if obj_in.transaction_type.upper() == "SELL" and not is_sell_to_cover:
+        if transaction_rules.needs_holdings_check(obj_in):
             current_holdings = self.get_holdings_on_date(
                 db,
                 user_id=portfolio.user_id,
@@ -157,15 +153,7 @@ class CRUDTransaction(CRUDBase[Transaction, TransactionCreate, TransactionUpdate
                 f"Checking holdings for SELL. Current: {current_holdings}, "
                 f"Attempting to sell: {obj_in.quantity}"
             )
-            # Use a small epsilon for float comparison if needed, but Decimal is exact
-            if obj_in.quantity > current_holdings:
-                 raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=(
-                        "Insufficient holdings to sell. Current holdings:"
-                        f" {current_holdings}, trying to sell: {obj_in.quantity}"
-                    ),
-                )
+            transaction_rules.check_holdings(obj_in, current_holdings)
 
         db_obj = self.model(
             **model_dump(obj_in, exclude={"links"}),
@@ -177,15 +165,10 @@ class CRUDTransaction(CRUDBase[Transaction, TransactionCreate, TransactionUpdate
         db.refresh(db_obj)
 
         if obj_in.links:
-            for link_data in obj_in.links:
-                link = TransactionLink(
-                    sell_transaction_id=db_obj.id,
-                    buy_transaction_id=link_data.buy_transaction_id,
-                    quantity=link_data.quantity,
-                )
-                db.add(link)
-            db.flush()
-            db.refresh(db_obj)
+            links = [
+                (link_data.buy_transaction_id, link_data.quantity)
+                for link_data in obj_in.links
+            ]
         elif obj_in.transaction_type.upper() == "SELL":
             # --- Auto-FIFO Linking ---
             # If no explicit links provided, automatically create links using FIFO.
@@ -197,108 +180,59 @@ class CRUDTransaction(CRUDBase[Transaction, TransactionCreate, TransactionUpdate
                 portfolio_id=portfolio_id,
                 exclude_sell_id=db_obj.id
             )
-            remaining_qty = obj_in.quantity
-            for lot in available_lots:
-                if remaining_qty <= 0:
-                    break
-                take_qty = min(lot["available_quantity"], remaining_qty)
-                if take_qty > 0:
-                    link = TransactionLink(
-                        sell_transaction_id=db_obj.id,
-                        buy_transaction_id=lot["id"],
-                        quantity=take_qty,
-                    )
-                    db.add(link)
-                    remaining_qty -= take_qty
-                    logger.debug(
-                        f"  Linked {take_qty} from lot {lot['id']} "
-                        f"(date: {lot['date']})"
-                    )
+            links, remaining_qty = transaction_rules.fifo_links(
+                obj_in.quantity,
+                ((lot["id"], lot["available_quantity"]) for lot in available_lots),
+            )
             if remaining_qty > 0:
                 logger.warning(
                     f"Auto-FIFO: Could not fully link SELL tx {db_obj.id}. "
                     f"Remaining: {remaining_qty}"
                 )
+        else:
+            links = []
+        if links:
+            for buy_id, quantity in links:
+                db.add(
+                    TransactionLink(
+                        sell_transaction_id=db_obj.id,
+                        buy_transaction_id=buy_id,
+                        quantity=quantity,
+                    )
+                )
             db.flush()
             db.refresh(db_obj)
 
         # --- Handle "Sell to Cover" for RSU Vest ---
         # If the transaction is an RSU vest and has sell_to_cover details,
         # create a corresponding SELL transaction.
-        logger.debug(
-            "Checking for sell_to_cover. Type: %s, Details: %s",
-            db_obj.transaction_type,
-            db_obj.details,
-        )
-        if (
-            db_obj.transaction_type == TransactionType.RSU_VEST
-            and db_obj.details
-            and "sell_to_cover" in db_obj.details
-        ):
-            logger.debug(
-                "RSU_VEST with sell_to_cover found. Creating SELL transaction."
+        sell_transaction_in = transaction_rules.sell_to_cover(db_obj.id, obj_in)
+        if sell_transaction_in is None:
+            return db_obj
+
+        # --- Idempotency Check ---
+        # Check if a SELL transaction for this RSU vest already exists.
+        existing_sell = db.query(Transaction).filter(
+            Transaction.portfolio_id == portfolio_id,
+            Transaction.transaction_type == TransactionType.SELL,
+            Transaction.details.op("->>")("related_rsu_vest_id")
+            == str(db_obj.id),
+        ).first()
+        if existing_sell:
+            logger.warning(
+                "A 'Sell to Cover' transaction for RSU Vest ID %s already "
+                "exists. Skipping creation of duplicate.",
+                db_obj.id,
             )
-            sell_details = db_obj.details["sell_to_cover"]
-            sell_quantity = Decimal(str(sell_details.get("quantity", 0)))
-
-            if sell_quantity > 0:
-                # --- Idempotency Check ---
-                # Check if a SELL transaction for this RSU vest already exists.
-                existing_sell = db.query(Transaction).filter(
-                    Transaction.portfolio_id == portfolio_id,
-                    Transaction.transaction_type == TransactionType.SELL,
-                    Transaction.details.op("->>")("related_rsu_vest_id")
-                    == str(db_obj.id),
-                ).first()
-
-                if existing_sell:
-                    logger.warning(
-                        "A 'Sell to Cover' transaction for RSU Vest ID %s already "
-                        "exists. Skipping creation of duplicate.",
-                        db_obj.id,
-                    )
-                    return [db_obj, existing_sell]
-
-                logger.debug(
-                    "Sell quantity > 0 (%s). Proceeding with recursive call.",
-                    sell_quantity,
-                )
-                # Create the SELL transaction
-                sell_transaction_in = schemas.TransactionCreate(
-                    asset_id=db_obj.asset_id,
-                    transaction_type=TransactionType.SELL,
-                    quantity=sell_quantity,
-                    price_per_unit=Decimal(str(sell_details.get("price_per_unit", 0))),
-                    transaction_date=db_obj.transaction_date,
-                    details={
-                        "fx_rate": db_obj.details.get("fx_rate"),
-                        "related_rsu_vest_id": str(db_obj.id),
-                    },
-                    links=[
-                        schemas.TransactionLinkCreate(
-                            buy_transaction_id=db_obj.id,
-                            quantity=sell_quantity
-                        )
-                    ]
-                )
-                # Recursively call create_with_portfolio for the SELL transaction
-                logger.debug(
-                    "calling create_with_portfolio for SELL transaction recusively."
-                )
-                logger.debug(f"sell_transaction_in: {sell_transaction_in}")
-                sell_tx = self.create_with_portfolio(
-                    db,
-                    obj_in=sell_transaction_in,
-                    portfolio_id=portfolio_id,
-                )
-                return [db_obj, sell_tx]
-                logger.debug("Done with recursive call.")
-            else:
-                logger.debug("Sell quantity is 0. Skipping SELL transaction creation.")
-        else:
-            logger.debug("Condition for sell_to_cover not met. No recursive call.")
+            return [db_obj, existing_sell]
 
-        return db_obj
+        logger.debug(f"sell_transaction_in: {sell_transaction_in}")
+        sell_tx = self.create_with_portfolio(
+            db,
+            obj_in=sell_transaction_in,
+            portfolio_id=portfolio_id,
+        )
+        return [db_obj, sell_tx]
 
     def get_multi_by_user_with_filters(
         self,
@@ -312,7 +246,22 @@ class CRUDTransaction(CRUDBase[Transaction, TransactionCreate, TransactionUpdate
         end_date: Optional[datetime] = None,
         skip: int = 0,
         limit: int = 100,
-    ) -> tuple[list[Transaction], int]:
+        after: Optional[tuple[datetime, uuid.UUID]] = None,
+        count: str = "exact",
+    ) -> tuple[list[Transaction], Optional[int]]:
+        """
+        Lists transactions newest first, ordered by ``(transaction_date, id)``.
+
+        Passing ``after`` (the date and id of the last row of the previous
+        page) switches from OFFSET to keyset pagination, which stays constant
+        cost regardless of page depth; ``skip`` is ignored in that case.
+
+        ``count`` selects how the total is computed: ``"exact"`` runs a
+        ``COUNT(*)`` over the filtered rows, ``"estimate"`` uses the query
+        planner's row estimate where the database provides one (PostgreSQL)
+        and falls back to an exact count otherwise, and ``"none"`` skips the
+        count entirely and returns ``None``.
+        """
         query = db.query(self.model).filter(
             self.model.user_id == user_id, self.model.portfolio_id == portfolio_id
         )
@@ -328,12 +277,81 @@ class CRUDTransaction(CRUDBase[Transaction, TransactionCreate, TransactionUpdate
         if end_date:
             query = query.filter(self.model.transaction_date <= end_date)
 
-        total = query.count()
-        transactions = (
-            query.order_by(self.model.transaction_date.desc()).offset(skip).limit(limit).all()
-        )
+        total = self._count_filtered(db, query, count)
+
+        if after is not None:
+            after_date, after_id = after
+            query = query.filter(
+                or_(
+                    self.model.transaction_date < after_date,
+                    and_(
+                        self.model.transaction_date == after_date,
+                        self.model.id < after_id,
+                    ),
+                )
+            )
+        query = query.options(
+            joinedload(self.model.asset), selectinload(self.model.sell_links)
+        ).order_by(self.model.transaction_date.desc(), self.model.id.desc())
+        if after is None:
+            query = query.offset(skip)
+        transactions = query.limit(limit).all()
         return transactions, total
 
+    def _count_filtered(self, db: Session, query, mode: str) -> Optional[int]:
+        if mode == "none":
+            return None
+        if mode == "estimate" and db.get_bind().dialect.name == "postgresql":
+            # The planner's row estimate comes from table statistics, so it
+            # costs nothing to obtain even for very large result sets.
+            statement = query.with_entities(self.model.id).statement
+            compiled = statement.compile(
+                dialect=db.get_bind().dialect,
+                compile_kwargs={"literal_binds": True},
+            )
+            plan = (
+                db.connection()
+                .exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}")
+                .scalar()
+            )
+            return int(plan[0]["Plan"]["Plan Rows"])
+        # COUNT over the primary key only, without wrapping the full entity
+        # query in a subquery, so the database can answer it from the
+        # (user_id/portfolio_id, transaction_date) indexes.
+        return query.with_entities(func.count(self.model.id)).order_by(None).scalar()
+
+    def get_records(
+        self,
+        db: Session,
+        *,
+        portfolio_id: Optional[uuid.UUID] = None,
+        user_id: Optional[uuid.UUID] = None,
+        asset_id: Optional[uuid.UUID] = None,
+        transaction_types: Optional[Iterable[str]] = None,
+        until: Optional[datetime] = None,
+        before: Optional[datetime] = None,
+    ) -> List[TransactionRecord]:
+        """
+        The matching transactions as `TransactionRecord`s, in date order, for
+        read-only use. Only the columns are selected; no ORM instances are
+        built.
+        """
+        query = select(*_RECORD_COLUMNS).order_by(self.model.transaction_date)
+        if portfolio_id:
+            query = query.where(self.model.portfolio_id == portfolio_id)
+        if user_id:
+            query = query.where(self.model.user_id == user_id)
+        if asset_id:
+            query = query.where(self.model.asset_id == asset_id)
+        if transaction_types is not None:
+            query = query.where(self.model.transaction_type.in_(transaction_types))
+        if until:
+            query = query.where(self.model.transaction_date <= until)
+        if before:
+            query = query.where(self.model.transaction_date < before)
+        make = TransactionRecord._make
+        return [make(row) for row in db.execute(query)]
+
     def get_multi_by_portfolio(
         self, db: Session, *, portfolio_id: uuid.UUID
     ) -> List[Transaction]:
@@ -445,43 +463,39 @@ class CRUDTransaction(CRUDBase[Transaction, TransactionCreate, TransactionUpdate
             .scalar()
         )
 
-        # Fetch all relevant transactions sorted by date
+        # Fetch all relevant transactions; splits come from the pre-resolved
+        # corporate-action adjustments
         query = db.query(Transaction).filter(
             Transaction.user_id == user_id,
             Transaction.asset_id == asset_id,
             Transaction.transaction_type.in_(
-                ["BUY", "ESPP_PURCHASE", "RSU_VEST", "SELL", "SPLIT"]
+                ["BUY", "ESPP_PURCHASE", "RSU_VEST", "SELL"]
             ),
         )
         if portfolio_id:
             query = query.filter(Transaction.portfolio_id == portfolio_id)
 
-        transactions = query.all()
+        splits = crud.corporate_action_adjustment.get_splits(
+            db, user_id=user_id, asset_id=asset_id, portfolio_id=portfolio_id
+        )
 
         # Sort by date, then by type priority (Acquisitions BEFORE Disposals)
         # This ensures that if RSU Vest and Sell-to-Cover share the exact same
         # timestamp, the Vest is processed first so the lot exists for the Sell
         # to consume.
-        def get_type_priority(tx_type: str) -> int:
-            if tx_type in ["BUY", "ESPP_PURCHASE", "RSU_VEST"]:
-                return 1
-            if tx_type == "SPLIT":
-                return 2
-            if tx_type == "SELL":
-                return 3
-            return 4
-
-        transactions.sort(key=lambda t: (
-            t.transaction_date, get_type_priority(t.transaction_type)
-        ))
+        order = transaction_rules.LOT_EVENT_PRIORITY
+        events = [
+            (tx.transaction_date, order[tx.transaction_type], tx)
+            for tx in query.all()
+        ] + [(split.effective_date, 2, split) for split in splits]
+        events.sort(key=lambda event: event[:2])
 
         # --- Pre-fetch Transaction Links (Avoid N+1 Queries) ---
         # Identify all relevant SELL transactions to batch-fetch their links.
         sell_tx_ids = [
             tx.id
-            for tx in transactions
-            if tx.transaction_type == "SELL"
-            and (not exclude_sell_id or tx.id != exclude_sell_id)
+            for _, priority, tx in events
+            if priority == 3 and (not exclude_sell_id or tx.id != exclude_sell_id)
         ]
 
         links_map = defaultdict(list)
@@ -494,97 +508,39 @@ class CRUDTransaction(CRUDBase[Transaction, TransactionCreate, TransactionUpdate
             for link in all_links:
                 links_map[link.sell_transaction_id].append(link)
 
-        lots = []  # List of buys: {tx, available_quantity}
-        lots_map = {}  # Map of transaction_id -> lot (for O(1) lookup)
-        # Optimization: track the first available lot to avoid O(N*M) scans
-        fifo_index = 0
+        # INR holdings are floored after a split, as fractional shares are
+        # not issued
+        book = LotBook(floor_splits=asset_currency == "INR")
 
-        for tx in transactions:
-            if tx.transaction_type in ["BUY", "ESPP_PURCHASE", "RSU_VEST"]:
-                lot = {
-                    "transaction": tx,
-                    "available_quantity": tx.quantity,
-                    "price_per_unit": tx.price_per_unit,
-                    "date": tx.transaction_date,
-                }
-                lots.append(lot)
-                lots_map[tx.id] = lot
-            elif tx.transaction_type == "SPLIT":
-                if tx.price_per_unit > 0 and tx.quantity > 0:
-                    ratio = tx.quantity / tx.price_per_unit
-
-                    # 1. Calculate total available quantity before split
-                    total_before = sum(lot["available_quantity"] for lot in lots)
-
-                    # 2. Scale each lot's quantity and adjust price per unit
-                    for lot in lots:
-                        lot["available_quantity"] *= ratio
-                        lot["price_per_unit"] /= ratio
-
-                    # 3. Floor total if asset currency is INR and
-                    # deduct fractional difference
-                    if asset_currency == "INR":
-                        total_after = total_before * ratio
-                        total_after_floored = Decimal(math.floor(total_after))
-                        fraction = total_after - total_after_floored
-                        if fraction > 0:
-                            remaining_fraction = fraction
-                            for lot in reversed(lots):
-                                if remaining_fraction <= 0:
-                                    break
-                                deduct = min(
-                                    lot["available_quantity"],
-                                    remaining_fraction
-                                )
-                                lot["available_quantity"] -= deduct
-                                remaining_fraction -= deduct
-            elif tx.transaction_type == "SELL":
+        for _, priority, tx in events:
+            if priority == 1:
+                book.add(tx.id, tx.quantity, tx.price_per_unit, payload=tx)
+            elif priority == 2:
+                book.split(tx.quantity_numerator / tx.quantity_denominator)
+            else:
                 # Skip the excluded sell (used during auto-linking)
                 if exclude_sell_id and tx.id == exclude_sell_id:
                     continue
-                sell_qty = tx.quantity
-
-                # 1. Process Specific Links
-                # Use pre-fetched links from map
-                links = links_map.get(tx.id, [])
-
-                linked_buy_ids = {}
-                for link in links:
-                    linked_buy_ids[link.buy_transaction_id] = link.quantity
-                    sell_qty -= link.quantity
-
-                    # Deduct from the specific lot
-                    if link.buy_transaction_id in lots_map:
-                        lot = lots_map[link.buy_transaction_id]
-                        lot["available_quantity"] -= link.quantity
-
-                # 2. Process Remaining Quantity (Unlinked) via FIFO
-                if sell_qty > 0:
-                    while fifo_index < len(lots) and sell_qty > 0:
-                        lot = lots[fifo_index]
-                        if lot["available_quantity"] <= 0:
-                            fifo_index += 1
-                            continue
-
-                        take = min(lot["available_quantity"], sell_qty)
-                        lot["available_quantity"] -= take
-                        sell_qty -= take
-
-                        if lot["available_quantity"] <= 0:
-                            fifo_index += 1
-
-        # Filter out fully consumed lots
+                # Specific links first (pre-fetched), the rest via FIFO
+                book.sell(
+                    tx.quantity,
+                    (
+                        (link.buy_transaction_id, link.quantity)
+                        for link in links_map.get(tx.id, [])
+                    ),
+                )
+
+        # Fully consumed lots are left out
         available_lots = [
             {
-                "id": lot["transaction"].id,
-                "date": lot["date"],
-                "available_quantity": lot["available_quantity"],
-                "price_per_unit": lot["price_per_unit"],
-                "type": lot["transaction"].transaction_type,
-                "details": lot["transaction"].details
+                "id": lot.key,
+                "date": lot.payload.transaction_date,
+                "available_quantity": lot.quantity,
+                "price_per_unit": lot.price,
+                "type": lot.payload.transaction_type,
+                "details": lot.payload.details
             }
-            for lot in lots
-            if lot["available_quantity"] > 0
+            for lot in book.open_lots()
         ]
 
         return available_lots
@@ -5,6 +5,7 @@ from sqlalchemy.orm import Session
 from app.core.config import settings
 from app.core.security import DUMMY_PASSWORD_HASH, get_password_hash, verify_password
 from app.crud.base import CRUDBase
+from app.db.custom_types import blind_index
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate, UserUpdateMe
 from app.utils.pydantic_compat import model_dump
@@ -13,17 +14,29 @@ from app.utils.pydantic_compat import model_dump
 class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
     def get_by_email(self, db: Session, *, email: str) -> Optional[User]:
         if settings.DEPLOYMENT_MODE == "desktop":
-            # In desktop mode, we can't query the encrypted email directly.
-            # Since there's only one user, we fetch them all and compare in Python.
-            users = db.query(User).all()
-            for user in users:
-                if user.email == email:
-                    return user
-            return None
+            # In desktop mode the email is encrypted, so it is looked up
+            # through its blind index.
+            user = db.query(User).filter(User.email_index == blind_index(email)).first()
+            if user is not None and user.email == email:
+                return user
+            return self._get_unindexed_by_email(db, email=email)
         else:
             # In server mode, email is not encrypted, so we can query it.
             return db.query(User).filter(User.email == email).first()
 
+    def _get_unindexed_by_email(self, db: Session, *, email: str) -> Optional[User]:
+        """
+        Users stored before the blind index existed are found by decrypting
+        their emails. Each one is indexed on the way (saved with the caller's
+        commit), so this scan runs once, on the first desktop login.
+        """
+        found = None
+        for user in db.query(User).filter(User.email_index.is_(None)).all():
+            user.email_index = blind_index(user.email)
+            if user.email == email:
+                found = user
+        return found
+
     def create(self, db: Session, *, obj_in: UserCreate, is_admin: bool = None) -> User:
         admin_status = is_admin if is_admin is not None else obj_in.is_admin
         db_obj = User(
@@ -0,0 +1,107 @@
+"""
+The SQLite full-text index behind asset typeahead search.
+
+`assets_search` is an FTS5 table with the trigram tokenizer over each asset's
+ticker and name, kept in step with `assets` by triggers, so any substring of
+three or more characters is found through the index rather than by scanning
+every asset. It stores the asset id itself rather than sharing rowids with
+`assets`, whose implicit rowids VACUUM may renumber.
+
+PostgreSQL gets the equivalent from pg_trgm GIN indexes on the same columns
+(see the Alembic migration), which serve the plain ILIKE query.
+
+Builds of SQLite without FTS5 or the trigram tokenizer (3.34+) keep working
+without the index; search then falls back to scanning.
+"""
+import logging
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import OperationalError
+
+logger = logging.getLogger(__name__)
+
+TABLE = "assets_search"
+# Shorter queries have no trigram to look up
+MIN_QUERY_LENGTH = 3
+
+_CREATE_TABLE = (
+    f"CREATE VIRTUAL TABLE {TABLE} USING fts5("
+    "asset_id UNINDEXED, ticker_symbol, name, tokenize = 'trigram')"
+)
+_POPULATE = (
+    f"INSERT INTO {TABLE} (asset_id, ticker_symbol, name) "
+    "SELECT id, ticker_symbol, name FROM assets"
+)
+_TRIGGERS = (
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {TABLE}_insert AFTER INSERT ON assets BEGIN
+        INSERT INTO {TABLE} (asset_id, ticker_symbol, name)
+        VALUES (new.id, new.ticker_symbol, new.name);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {TABLE}_delete AFTER DELETE ON assets BEGIN
+        DELETE FROM {TABLE} WHERE asset_id = old.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {TABLE}_update
+    AFTER UPDATE OF id, ticker_symbol, name ON assets BEGIN
+        DELETE FROM {TABLE} WHERE asset_id = old.id;
+        INSERT INTO {TABLE} (asset_id, ticker_symbol, name)
+        VALUES (new.id, new.ticker_symbol, new.name);
+    END
+    """,
+)
+
+# Cached per pooled DBAPI connection
+_INFO_KEY = "asset_search_available"
+
+
+def _exists(connection: Connection) -> bool:
+    return (
+        connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {"name": TABLE},
+        ).first()
+        is not None
+    )
+
+
+def ensure_index(connection: Connection) -> bool:
+    """
+    Creates the index, filled from the existing assets, and its triggers
+    unless they exist. Returns False if this SQLite cannot build it.
+    """
+    if not _exists(connection):
+        try:
+            connection.execute(text(_CREATE_TABLE))
+        except OperationalError as e:
+            logger.warning(f"Asset search index unavailable, searches will scan: {e}")
+            connection.info[_INFO_KEY] = False
+            return False
+        connection.execute(text(_POPULATE))
+    for trigger in _TRIGGERS:
+        connection.execute(text(trigger))
+    connection.info[_INFO_KEY] = True
+    return True
+
+
+def drop_index(connection: Connection) -> None:
+    # The triggers go with the assets table
+    connection.execute(text(f"DROP TABLE IF EXISTS {TABLE}"))
+    connection.info.pop(_INFO_KEY, None)
+
+
+def is_available(connection: Connection) -> bool:
+    if connection.dialect.name != "sqlite":
+        return False
+    if _INFO_KEY not in connection.info:
+        connection.info[_INFO_KEY] = _exists(connection)
+    return connection.info[_INFO_KEY]
+
+
+def match_phrase(query: str) -> str:
+    """`query` as an FTS5 phrase, matching it as a substring."""
+    return '"' + query.replace('"', '""') + '"'
@@ -21,3 +21,5 @@ from app.models.risk import UserRiskProfile  # noqa
 from app.models.portfolio_snapshot import DailyPortfolioSnapshot  # noqa
 
 
+from app.models.scheduled_job_run import ScheduledJobRun  # noqa
+from app.models.corporate_action_adjustment import CorporateActionAdjustment  # noqa
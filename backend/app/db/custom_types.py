@@ -1,5 +1,8 @@
+import hashlib
+import hmac
 import os
 import uuid
+from typing import Optional
 
 from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 from sqlalchemy import LargeBinary, String
@@ -50,6 +53,8 @@ class GUID(TypeDecorator):
 
 
 NONCE_SIZE = 12
+# Derives the blind-index key from the master key, keeping the two separate
+BLIND_INDEX_CONTEXT = b"arthsaarthi:blind-index:v1"
 
 
 class EncryptedString(TypeDecorator):
@@ -110,3 +115,24 @@ class EncryptedString(TypeDecorator):
             return decrypted_bytes.decode("utf-8")
         except Exception as e:
             raise e
+
+
+def blind_index(value: Optional[str]) -> Optional[str]:
+    """
+    A deterministic HMAC-SHA256 of a value stored in an `EncryptedString`
+    column, for finding it by equality through an indexed companion column
+    (the encrypted value stays the source of truth). Returns None outside
+    desktop mode, where values are stored in plain text.
+    """
+    if value is None or settings.DEPLOYMENT_MODE != "desktop":
+        return None
+
+    if not key_manager.is_key_loaded:
+        raise RuntimeError(
+            "Cannot index data: master key is not loaded in KeyManager."
+        )
+
+    index_key = hmac.new(
+        key_manager.master_key, BLIND_INDEX_CONTEXT, hashlib.sha256
+    ).digest()
+    return hmac.new(index_key, value.encode("utf-8"), hashlib.sha256).hexdigest()
@@ -1,11 +1,11 @@
 import logging
 import os
 
-from alembic.config import Config
 from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import Session
 
-from alembic import command
 from app.core.config import settings
+from app.db import asset_search
 from app.db.base import Base
 from app.db.session import engine as db_engine
 
@@ -28,6 +28,11 @@ def _ensure_sqlite_columns_exist() -> None:
     Inspects all SQLAlchemy models in Base.metadata and ensures missing columns
     are added via ALTER TABLE ADD COLUMN. This prevents 'no such column' errors
     when local SQLite database files are upgraded from older application versions.
+
+    Missing non-unique indexes declared on the models are created as well, so
+    desktop databases pick up the same query indexes Alembic adds on PostgreSQL.
+    Unique indexes are skipped because legacy data may violate them. The
+    asset search index is built from the existing assets if it is missing.
     """
     if settings.DATABASE_TYPE != "sqlite":
         return
@@ -58,6 +63,21 @@ def _ensure_sqlite_columns_exist() -> None:
                             f"'{table_name}.{col.name}' ({col_type})"
                         )
                         conn.execute(text(stmt))
+
+                existing_indexes = {
+                    i["name"] for i in inspector.get_indexes(table_name)
+                }
+                for index in table.indexes:
+                    if index.unique or index.name in existing_indexes:
+                        continue
+                    logger.info(
+                        f"SQLite auto-migration: Creating missing index "
+                        f"'{index.name}' on '{table_name}'"
+                    )
+                    index.create(bind=conn, checkfirst=True)
+
+            if "assets" in existing_tables:
+                asset_search.ensure_index(conn)
     except Exception as e:
         logger.error(
             f"SQLite auto-column migration check encountered an error: {e}",
@@ -65,19 +85,69 @@ def _ensure_sqlite_columns_exist() -> None:
         )
 
 
+def _backfill_corporate_action_adjustments() -> None:
+    """
+    Derives the corporate-action adjustments of every holding with a split,
+    merger, demerger or rename while the table is still empty, as the Alembic
+    migration that added it does on PostgreSQL. Without them, databases from
+    before the table existed would lose their split and demerger adjustments.
+    """
+    if settings.DATABASE_TYPE != "sqlite":
+        return
+    from app import crud
+    from app.crud.crud_corporate_action_adjustment import ADJUSTED_ACTIONS
+    from app.models import CorporateActionAdjustment, Transaction
+
+    try:
+        if "transactions" not in inspect(db_engine).get_table_names():
+            return
+        CorporateActionAdjustment.__table__.create(bind=db_engine, checkfirst=True)
+        with Session(bind=db_engine) as db:
+            if db.query(CorporateActionAdjustment.id).first() is not None:
+                return
+            holdings = (
+                db.query(Transaction.portfolio_id, Transaction.asset_id)
+                .filter(Transaction.transaction_type.in_(ADJUSTED_ACTIONS))
+                .distinct()
+                .all()
+            )
+            for portfolio_id, asset_id in holdings:
+                crud.corporate_action_adjustment.rebuild(
+                    db, portfolio_id=portfolio_id, asset_id=asset_id
+                )
+            db.commit()
+        if holdings:
+            logger.info(
+                f"SQLite auto-migration: Derived corporate-action adjustments "
+                f"for {len(holdings)} holdings"
+            )
+    except Exception as e:
+        logger.error(
+            f"SQLite corporate-action adjustment backfill failed: {e}",
+            exc_info=True,
+        )
+
+
 def run_db_migrations() -> None:
     """
     Executes Alembic migrations programmatically on app startup for PostgreSQL.
     For SQLite (desktop/android), runs _ensure_sqlite_columns_exist to upgrade
-    database tables instantaneously without Alembic CLI file locking deadlocks.
+    database tables instantaneously without Alembic CLI file locking deadlocks,
+    then backfills the data migrations SQLite needs.
     """
     if settings.DATABASE_TYPE == "sqlite":
         logger.info(
             "SQLite database detected: Running automatic column upgrade check..."
         )
         _ensure_sqlite_columns_exist()
+        _backfill_corporate_action_adjustments()
         return
 
+    # Only PostgreSQL servers need Alembic; SQLite installs never load it
+    from alembic.config import Config
+
+    from alembic import command
+
     try:
         current_dir = os.path.dirname(os.path.abspath(__file__))
         backend_dir = os.path.dirname(os.path.dirname(current_dir))
@@ -3,6 +3,7 @@ import logging
 from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 
+from app.core import metrics, profiling
 from app.core.config import settings
 
 if settings.DATABASE_TYPE == "sqlite":
@@ -20,6 +21,8 @@ if settings.DATABASE_TYPE == "sqlite":
         cursor.close()
 else:
     engine = create_engine(str(settings.DATABASE_URL))
+metrics.instrument_engine(engine)
+profiling.instrument_engine(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 logger = logging.getLogger(__name__)
@@ -5,44 +5,24 @@ from logging.handlers import RotatingFileHandler
 from pathlib import Path
 from typing import Optional
 
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 
 from app.api.v1.api import api_router
+from app.core import metrics
 from app.core.config import settings
-from app.core.middleware import SecurityHeadersMiddleware
+from app.core.middleware import (
+    MetricsMiddleware,
+    ProfilingMiddleware,
+    SecurityHeadersMiddleware,
+)
 from app.db.init_db import run_db_migrations
-from app.db.session import SessionLocal
 from app.services.initialization_service import check_and_seed_on_startup
-from app.services.snapshot_service import take_daily_snapshots_for_all
+from app.services.scheduler import scheduler
 
-# --- Background Task for Desktop App ---
-_snapshot_task: Optional[asyncio.Task] = None
-
-async def _desktop_snapshot_loop() -> None:
-    """
-    Background loop that runs only in Desktop mode.
-    It takes a snapshot on startup, then sleeps and wakes up periodically
-    (e.g., every 6 hours) to take another snapshot.
-    """
-    await asyncio.sleep(10)  # Give the server a moment to fully start
-
-    while True:
-        logging.info("Running desktop background snapshot check...")
-        db = SessionLocal()
-        try:
-            # We run the blocking DB operations in a threadpool so it doesn't
-            # block the main asyncio event loop.
-            loop = asyncio.get_running_loop()
-            count = await loop.run_in_executor(None, take_daily_snapshots_for_all, db)
-            logging.info(f"Desktop snapshot check completed. {count} updated.")
-        except Exception as e:
-            logging.error(f"Error in desktop background snapshot loop: {e}")
-        finally:
-            db.close()
-
-        # Sleep for 6 hours (21600 seconds)
-        await asyncio.sleep(21600)
+# --- Background Job Scheduler ---
+_scheduler_task: Optional[asyncio.Task] = None
 
 # --- Logging Configuration ---
 log_level = logging.DEBUG if settings.DEBUG else logging.INFO
@@ -91,7 +71,7 @@ app = FastAPI(
 
 @app.on_event("startup")
 async def startup_event() -> None:
-    global _snapshot_task
+    global _scheduler_task
     # Run DB schema migrations and column auto-sync for upgraded databases
     try:
         run_db_migrations()
@@ -103,13 +83,16 @@ async def startup_event() -> None:
     except Exception as e:
         logging.error(f"Error during startup seeding check: {e}", exc_info=True)
 
-    if settings.DEPLOYMENT_MODE in ("desktop", "android"):
-        logging.info(f"DEBUG: DEPLOYMENT_MODE is '{settings.DEPLOYMENT_MODE}'")
+    if settings.SCHEDULER_ENABLED and settings.ENVIRONMENT != "test":
         logging.info(
-            f"Spawning background snapshot task for "
-            f"{settings.DEPLOYMENT_MODE.capitalize()} App..."
+            f"Starting background job scheduler "
+            f"(DEPLOYMENT_MODE is '{settings.DEPLOYMENT_MODE}')..."
+        )
+        _scheduler_task = asyncio.create_task(
+            scheduler.run_forever(
+                catch_up=settings.DEPLOYMENT_MODE in ("desktop", "android")
+            )
         )
-        _snapshot_task = asyncio.create_task(_desktop_snapshot_loop())
 
 app.add_middleware(
     CORSMiddleware,
@@ -121,5 +104,20 @@ app.add_middleware(
 )
 
 app.add_middleware(SecurityHeadersMiddleware)
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 app.include_router(api_router, prefix="/api/v1")
+
+
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics() -> PlainTextResponse:
+    """
+    Performance metrics in the Prometheus text exposition format. The
+    endpoint is unauthenticated, so it only answers with METRICS_ENABLED.
+    """
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    return PlainTextResponse(
+        metrics.render(), media_type="text/plain; version=0.0.4"
+    )
@@ -15,3 +15,5 @@ from .bond import Bond # noqa
 from .audit_log import AuditLog # noqa
 from app.models.risk import UserRiskProfile  # noqa
 from app.models.portfolio_snapshot import DailyPortfolioSnapshot  # noqa
+from app.models.scheduled_job_run import ScheduledJobRun  # noqa
+from app.models.corporate_action_adjustment import CorporateActionAdjustment  # noqa
@@ -3,9 +3,10 @@ from datetime import date
 from decimal import Decimal
 from typing import TYPE_CHECKING, List, Optional
 
-from sqlalchemy import BigInteger, Date, Numeric, String, UniqueConstraint
+from sqlalchemy import BigInteger, Date, Numeric, String, UniqueConstraint, event
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
+from app.db import asset_search
 from app.db.base_class import Base
 from app.db.custom_types import GUID
 
@@ -54,3 +55,17 @@ class Asset(Base):
         "Bond", back_populates="asset", cascade="all, delete-orphan")
 
     __table_args__ = (UniqueConstraint("ticker_symbol", name="uq_ticker_symbol"),)
+
+
+# Typeahead search index on SQLite; PostgreSQL's trigram indexes are created by
+# Alembic
+@event.listens_for(Asset.__table__, "after_create")
+def _create_search_index(target, connection, **kw):
+    if connection.dialect.name == "sqlite":
+        asset_search.ensure_index(connection)
+
+
+@event.listens_for(Asset.__table__, "before_drop")
+def _drop_search_index(target, connection, **kw):
+    if connection.dialect.name == "sqlite":
+        asset_search.drop_index(connection)
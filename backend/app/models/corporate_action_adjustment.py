@@ -0,0 +1,43 @@
+import uuid
+
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Numeric, String
+
+from app.db.base_class import Base
+from app.db.custom_types import GUID
+
+
+class CorporateActionAdjustment(Base):
+    """
+    The quantity and cost multipliers of one corporate action on a portfolio's
+    holding of an asset, derived from its audit transaction by
+    `crud.corporate_action_adjustment.rebuild`.
+    """
+
+    __tablename__ = "corporate_action_adjustments"
+
+    id = Column(GUID, primary_key=True, default=uuid.uuid4)
+    portfolio_id = Column(GUID, ForeignKey("portfolios.id"), nullable=False)
+    asset_id = Column(GUID, ForeignKey("assets.id"), nullable=False)
+    # The SPLIT, MERGER, DEMERGER or RENAME audit transaction
+    transaction_id = Column(GUID, nullable=False)
+    action_type = Column(String, nullable=False)
+    effective_date = Column(DateTime, nullable=False)
+
+    # Units held afterwards per unit held before (SPLIT: new / old shares;
+    # MERGER: successor shares per old share)
+    quantity_numerator = Column(Numeric(18, 8), nullable=False)
+    quantity_denominator = Column(Numeric(18, 8), nullable=False)
+    # Cost basis kept per unit of cost before (DEMERGER: cost left after the
+    # child's allocation / cost before)
+    cost_numerator = Column(Numeric(24, 8), nullable=False)
+    cost_denominator = Column(Numeric(24, 8), nullable=False)
+    # The asset the holding moves to (MERGER, RENAME) or spins off (DEMERGER)
+    successor_asset_id = Column(GUID, ForeignKey("assets.id"), nullable=True)
+
+    __table_args__ = (
+        Index(
+            "ix_corporate_action_adjustments_portfolio_id_asset_id",
+            "portfolio_id",
+            "asset_id",
+        ),
+    )
@@ -33,3 +33,6 @@ class Portfolio(Base):
         back_populates="portfolio",
         cascade="all, delete-orphan",
     )
+    corporate_action_adjustments = relationship(
+        "CorporateActionAdjustment", cascade="all, delete-orphan"
+    )
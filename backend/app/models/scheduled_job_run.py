@@ -0,0 +1,34 @@
+import uuid
+
+from sqlalchemy import JSON, Column, Date, DateTime, Float, Index, String, Text
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.db.base_class import Base
+
+
+class ScheduledJobRun(Base):
+    """One execution of a background job, kept as the scheduler's history."""
+
+    __tablename__ = "scheduled_job_runs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    job_name = Column(String, nullable=False)
+    # scheduled, startup, api or cli
+    trigger = Column(String, nullable=False)
+    # running, success, failed or skipped
+    status = Column(String, nullable=False)
+    run_date = Column(Date, nullable=False)
+    # "<job_name>:<run_date>" for scheduled runs so that only one worker
+    # process claims a given day; NULL for manual runs, which may repeat.
+    claim_key = Column(String, nullable=True, unique=True)
+
+    started_at = Column(DateTime(timezone=True), nullable=False)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    duration_seconds = Column(Float, nullable=True)
+
+    details = Column(JSON, nullable=True)
+    error = Column(Text, nullable=True)
+
+    __table_args__ = (
+        Index("ix_scheduled_job_runs_job_name_started_at", "job_name", "started_at"),
+    )
@@ -1,6 +1,15 @@
 import uuid
 
-from sqlalchemy import JSON, Boolean, Column, DateTime, ForeignKey, Numeric, String
+from sqlalchemy import (
+    JSON,
+    Boolean,
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Numeric,
+    String,
+)
 from sqlalchemy.orm import relationship
 
 from app.db.base_class import Base
@@ -39,3 +48,31 @@ class Transaction(Base):
         back_populates="buy_transaction",
         cascade="all, delete-orphan",
     )
+
+    # Composite indexes for the hot query patterns: portfolio/user listings and
+    # history replays (ordered by date), per-asset lot and holding lookups, and
+    # per-type reports (dividends, capital gains) over a date range.
+    __table_args__ = (
+        Index(
+            "ix_transactions_portfolio_id_transaction_date",
+            "portfolio_id",
+            "transaction_date",
+        ),
+        Index(
+            "ix_transactions_user_id_transaction_date",
+            "user_id",
+            "transaction_date",
+        ),
+        Index(
+            "ix_transactions_asset_id_user_id_transaction_date",
+            "asset_id",
+            "user_id",
+            "transaction_date",
+        ),
+        Index(
+            "ix_transactions_user_id_transaction_type_transaction_date",
+            "user_id",
+            "transaction_type",
+            "transaction_date",
+        ),
+    )
@@ -11,8 +11,12 @@ class TransactionLink(Base):
     __tablename__ = "transaction_links"
 
     id = Column(GUID, primary_key=True, default=uuid.uuid4)
-    sell_transaction_id = Column(GUID, ForeignKey("transactions.id"), nullable=False)
-    buy_transaction_id = Column(GUID, ForeignKey("transactions.id"), nullable=False)
+    sell_transaction_id = Column(
+        GUID, ForeignKey("transactions.id"), nullable=False, index=True
+    )
+    buy_transaction_id = Column(
+        GUID, ForeignKey("transactions.id"), nullable=False, index=True
+    )
     quantity = Column(Numeric(18, 8), nullable=False)
 
     sell_transaction = relationship(
@@ -1,10 +1,10 @@
 import uuid
 
 from sqlalchemy import Boolean, Column, DateTime, String, func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, validates
 
 from app.db.base_class import Base
-from app.db.custom_types import GUID, EncryptedString
+from app.db.custom_types import GUID, EncryptedString, blind_index
 
 # The following imports are needed for SQLAlchemy to correctly resolve relationships
 # from string-based definitions, preventing circular import errors at runtime.
@@ -17,6 +17,9 @@ class User(Base):
     id = Column(GUID, primary_key=True, default=uuid.uuid4)
     full_name = Column(EncryptedString, index=True, nullable=True)
     email = Column(EncryptedString, unique=True, index=True, nullable=False)
+    # HMAC of the email in desktop mode, where `email` is encrypted with a
+    # random nonce and so cannot be queried directly
+    email_index = Column(String(64), index=True, nullable=True)
     hashed_password = Column(String, nullable=False)
     is_admin = Column(Boolean(), default=False, nullable=False)
     is_active = Column(Boolean(), default=True)
@@ -52,3 +55,8 @@ class User(Base):
     recurring_deposits = relationship(
         "RecurringDeposit", back_populates="user", cascade="all, delete-orphan"
     )
+
+    @validates("email")
+    def _index_email(self, key, value):
+        self.email_index = blind_index(value)
+        return value
@@ -38,6 +38,7 @@ from .dashboard import (
     DashboardSummary,
     PortfolioHistoryPoint,
     PortfolioHistoryResponse,
+    PortfolioValuation,
     TopMover,
 )
 from .fixed_deposit import (
@@ -91,6 +92,7 @@ from .risk import (
     UserRiskProfileCreate,
     UserRiskProfileUpdate,
 )
+from .scheduler import ScheduledJob, ScheduledJobRun, ScheduledJobsResponse
 from .token import Token, TokenPayload
 from .transaction import (
     Transaction,
@@ -108,6 +110,8 @@ from .watchlist import (
     WatchlistCreate,
     WatchlistItem,
     WatchlistItemCreate,
+    WatchlistQuote,
+    WatchlistQuotes,
     WatchlistUpdate,
 )
 
@@ -164,6 +168,7 @@ __all__ = [
     "PortfolioHistoryResponse",
     "PortfolioSummary",
     "PortfolioUpdate",
+    "PortfolioValuation",
     "TopMover",
     "Token",
     "TokenPayload",
@@ -198,6 +203,8 @@ __all__ = [
     "WatchlistCreate",
     "WatchlistItem",
     "WatchlistItemCreate",
+    "WatchlistQuote",
+    "WatchlistQuotes",
     "CapitalGainsSummary",
     "UnrealizedGainsSummary",
     "UnrealizedTaxLot",
@@ -205,6 +212,9 @@ __all__ = [
     "UserRiskProfile",
     "UserRiskProfileCreate",
     "UserRiskProfileUpdate",
+    "ScheduledJob",
+    "ScheduledJobRun",
+    "ScheduledJobsResponse",
 ]
 
 # Manually update forward references to resolve circular dependencies
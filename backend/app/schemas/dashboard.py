@@ -63,6 +63,14 @@ class TopMover(BaseModel):
     daily_change_percentage: float
 
 
+# Pushed by the live valuation stream
+class PortfolioValuation(BaseModel):
+    total_value: Decimal
+    days_pnl: Decimal
+    days_pnl_percentage: float
+    top_movers: List[TopMover]
+
+
 class DashboardSummary(BaseModel):
     total_value: Decimal
     total_unrealized_pnl: Decimal
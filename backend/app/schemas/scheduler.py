@@ -0,0 +1,49 @@
+import uuid
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel
+from pydantic.version import VERSION
+
+try:
+    if VERSION.startswith("2."):
+        from pydantic import ConfigDict
+    else:
+        ConfigDict = None
+except ImportError:
+    ConfigDict = None
+
+
+class ScheduledJobRun(BaseModel):
+    id: uuid.UUID
+    job_name: str
+    trigger: str
+    status: str
+    run_date: date
+    started_at: datetime
+    finished_at: Optional[datetime] = None
+    duration_seconds: Optional[float] = None
+    details: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+
+    if ConfigDict:
+        model_config = ConfigDict(from_attributes=True)
+    else:
+        class Config:
+            orm_mode = True
+
+
+class ScheduledJob(BaseModel):
+    """A registered job, when it next runs and how its last run went."""
+
+    name: str
+    description: str
+    run_at: str
+    trading_days_only: bool
+    next_run_at: Optional[datetime] = None
+    last_run: Optional[ScheduledJobRun] = None
+
+
+class ScheduledJobsResponse(BaseModel):
+    enabled: bool
+    jobs: List[ScheduledJob]
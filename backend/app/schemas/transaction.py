@@ -138,7 +138,8 @@ class Transaction(TransactionBase):
 
 class TransactionsResponse(BaseModel):
     transactions: List[Transaction]
-    total: int
+    total: Optional[int] = None
+    next_cursor: Optional[str] = None
 
 
 class TransactionCreatedResponse(BaseModel):
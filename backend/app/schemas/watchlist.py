@@ -1,6 +1,6 @@
 import uuid
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 
 from pydantic import BaseModel
 from pydantic.version import VERSION
@@ -74,3 +74,16 @@ class Watchlist(WatchlistBase):
     else:
         class Config:
             orm_mode = True
+
+
+# Live quotes for the assets on a user's watchlists
+class WatchlistQuote(BaseModel):
+    asset_id: uuid.UUID
+    ticker_symbol: str
+    current_price: Optional[float] = None
+    previous_close: Optional[float] = None
+    day_change: Optional[float] = None
+
+
+class WatchlistQuotes(BaseModel):
+    quotes: List[WatchlistQuote] = []
@@ -8,9 +8,10 @@ from decimal import Decimal
 # Add backend to PYTHONPATH
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
 
-from sqlalchemy import create_engine, event
+from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
+from app.core import metrics
 from app.db.base_class import Base
 from app.models.asset import Asset
 from app.models.portfolio import Portfolio
@@ -30,15 +31,8 @@ Base.metadata.create_all(bind=engine)
 
 db = SessionLocal()
 
-# Tracking query count
-query_count = 0
-
-@event.listens_for(engine, "before_cursor_execute")
-def receive_before_cursor_execute(
-    conn, cursor, statement, parameters, context, executemany
-):
-    global query_count
-    query_count += 1
+# Count and time every statement, as the API does per request
+metrics.instrument_engine(engine)
 
 def setup_data(num_portfolios=10, txs_per_portfolio=5):
     # Create user
@@ -97,10 +91,7 @@ def run_benchmark():
 
     user = setup_data(num_portfolios=20, txs_per_portfolio=10)
 
-    global query_count
-
     # 1. Benchmark dashboard summary
-    query_count = 0
     start = time.time()
     # Mocking out the external API calls since this is just a DB benchmark
     # The external calls in _process_market_traded_assets might fail without mocking,
@@ -110,16 +101,15 @@ def run_benchmark():
     with patch(
         "app.services.financial_data_service.financial_data_service.get_current_prices",
         return_value={},
-    ):
+    ), metrics.track_queries() as queries:
         dashboard.get_summary(db=db, user_id=user.id)
 
     end = time.time()
     print("--- Dashboard Summary ---")
     print(f"Time: {end - start:.4f} seconds")
-    print(f"Queries: {query_count}")
+    print(f"Queries: {queries.count} ({queries.duration:.4f} seconds)")
 
     # 2. Benchmark dashboard history
-    query_count = 0
     start = time.time()
 
     with patch(
@@ -128,14 +118,14 @@ def run_benchmark():
     ), patch(
         "app.services.financial_data_service.financial_data_service.get_current_prices",
         return_value={},
-    ):
+    ), metrics.track_queries() as queries:
         # "all" range will trigger the `if current_day == end_date:` block
         dashboard.get_history(db=db, user=user, range_str="all")
 
     end = time.time()
     print("\n--- Dashboard History ('all') ---")
     print(f"Time: {end - start:.4f} seconds")
-    print(f"Queries: {query_count}")
+    print(f"Queries: {queries.count} ({queries.duration:.4f} seconds)")
 
 if __name__ == "__main__":
     run_benchmark()
@@ -0,0 +1,177 @@
+"""
+Benchmark for the Schedule FA lot peak-value computation.
+
+Generates a synthetic RSU/ESPP history (hundreds of lots across a few foreign
+tickers, with sell-to-cover and later partial sales) plus a year of daily
+prices, then computes every lot's peak value twice: with the original
+day-by-day scan and with the shared per-ticker range-max index used by
+`ScheduleFAService`. Both must agree; the script prints the timings.
+
+Usage (from the backend directory):
+
+    python -m app.scripts.benchmark_schedule_fa
+    python -m app.scripts.benchmark_schedule_fa --lots 1000 --tickers 5
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+
+# Add backend to PYTHONPATH
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+# Set a dummy SECRET_KEY for config
+os.environ.setdefault("SECRET_KEY", "dummy")
+
+from app.services.schedule_fa_service import (  # noqa: E402
+    PriceRangeMax,
+    ScheduleFAService,
+)
+
+
+def naive_lot_peak_value(lot, start_date, end_date, yahoo_prices):
+    """The original O(days) per-interval scan, kept as the reference."""
+    buy_tx = lot["buy_transaction"]
+    buy_date = buy_tx.transaction_date.date()
+    s_date = start_date.date()
+    e_date = end_date.date()
+
+    critical_dates = {s_date, e_date}
+    if s_date <= buy_date <= e_date:
+        critical_dates.add(buy_date)
+    for d in lot["disposals"]:
+        d_date = d["date"].date()
+        if s_date <= d_date <= e_date:
+            critical_dates.add(d_date)
+            if d_date < e_date:
+                critical_dates.add(d_date + timedelta(days=1))
+    sorted_dates = sorted(critical_dates)
+
+    def get_qty_on_date(d):
+        if d < buy_date:
+            return Decimal(0)
+        return buy_tx.quantity - sum(
+            disp["qty"] for disp in lot["disposals"] if disp["date"].date() < d
+        )
+
+    global_peak, global_peak_date = Decimal(0), None
+    for idx, seg_start in enumerate(sorted_dates):
+        if seg_start >= e_date:
+            break
+        seg_end = sorted_dates[idx + 1] if idx + 1 < len(sorted_dates) else e_date
+        qty = get_qty_on_date(seg_start)
+        if qty <= 0:
+            continue
+        max_p, max_p_date = Decimal(0), seg_start
+        if yahoo_prices:
+            curr = seg_start
+            while curr <= seg_end and curr <= e_date:
+                p = yahoo_prices.get(curr, Decimal(0))
+                if p > max_p:
+                    max_p, max_p_date = p, curr
+                curr += timedelta(days=1)
+        if max_p == 0:
+            max_p, max_p_date = buy_tx.price_per_unit, seg_start
+        val = qty * max_p
+        if val > global_peak:
+            global_peak, global_peak_date = val, max_p_date
+    return global_peak, global_peak_date
+
+
+def generate(n_lots: int, n_tickers: int, year: int, seed: int = 42):
+    rng = random.Random(seed)
+    tickers = [f"RSU{i}" for i in range(n_tickers)]
+
+    prices = {}
+    for ticker in tickers:
+        price = Decimal(rng.randint(50, 500))
+        series = {}
+        day = date(year - 4, 1, 1)
+        while day <= date(year, 12, 31):
+            price = max(Decimal("1"), price * Decimal(str(rng.uniform(0.97, 1.03))))
+            if day.weekday() < 5:  # No quotes at weekends
+                series[day] = price.quantize(Decimal("0.01"))
+            day += timedelta(days=1)
+        prices[ticker] = series
+
+    lots = []
+    history_days = (date(year, 12, 31) - date(year - 4, 1, 1)).days
+    for _ in range(n_lots):
+        ticker = rng.choice(tickers)
+        vest = datetime(year - 4, 1, 1) + timedelta(days=rng.randrange(history_days))
+        qty = Decimal(rng.randint(5, 200))
+        disposals = [
+            # Sell-to-cover on the vest date
+            {"date": vest, "qty": (qty * Decimal("0.3")).quantize(Decimal("1"))}
+        ]
+        for _ in range(rng.randint(0, 4)):
+            sell_on = vest + timedelta(days=rng.randint(30, 1500))
+            disposals.append({"date": sell_on, "qty": Decimal(rng.randint(1, 10))})
+        lots.append(
+            {
+                "asset": SimpleNamespace(ticker_symbol=ticker),
+                "buy_transaction": SimpleNamespace(
+                    quantity=qty,
+                    price_per_unit=Decimal(rng.randint(50, 500)),
+                    transaction_date=vest,
+                ),
+                "disposals": disposals,
+            }
+        )
+    return lots, prices
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--lots", type=int, default=500)
+    parser.add_argument("--tickers", type=int, default=3)
+    parser.add_argument("--year", type=int, default=2024)
+    args = parser.parse_args()
+
+    lots, prices = generate(args.lots, args.tickers, args.year)
+    start_date = datetime(args.year, 1, 1)
+    end_date = datetime(args.year, 12, 31, 23, 59, 59)
+    service = ScheduleFAService(db=None)
+
+    started = time.perf_counter()
+    expected = [
+        naive_lot_peak_value(
+            lot, start_date, end_date, prices[lot["asset"].ticker_symbol]
+        )
+        for lot in lots
+    ]
+    naive_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    indexes = {
+        ticker: PriceRangeMax(series, start_date.date(), end_date.date())
+        for ticker, series in prices.items()
+    }
+    actual = [
+        service._calculate_lot_peak_value(
+            lot,
+            start_date,
+            end_date,
+            prices[lot["asset"].ticker_symbol],
+            price_index=indexes[lot["asset"].ticker_symbol],
+        )
+        for lot in lots
+    ]
+    indexed_time = time.perf_counter() - started
+
+    mismatches = sum(1 for a, b in zip(actual, expected) if a != b)
+    print(f"{len(lots)} lots across {args.tickers} tickers, calendar year {args.year}")
+    print(f"  day-by-day scan:  {naive_time * 1000:9.1f} ms")
+    print(f"  range-max index:  {indexed_time * 1000:9.1f} ms")
+    print(f"  speedup:          {naive_time / indexed_time:9.1f}x")
+    print(f"  mismatches:       {mismatches}")
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Measures how long importing the app takes and checks it against a budget.
+
+Each run imports the app in a fresh interpreter under ``python -X importtime``.
+The command exits with status 1 if the app imports a package that should only
+load on first use (pandas, numpy, yfinance, ...), if the median import time
+is over the budget, or, with ``--compare``, if it regressed against a stored
+report by more than the threshold. Reports are saved as JSON under the output
+directory, named by time and commit.
+
+Usage (from the backend directory):
+
+    python -m app.scripts.benchmark_startup
+    python -m app.scripts.benchmark_startup --mode android --budget 1.5
+    python -m app.scripts.benchmark_startup --compare 1a2b3c4 --threshold 0.1
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Add backend to PYTHONPATH
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from app.benchmarks import reports, startup  # noqa: E402
+
+DEFAULT_OUTPUT_DIR = startup.BACKEND_DIR / ".benchmarks" / "startup"
+
+
+def _startup_environment(mode: str, workdir: str) -> dict:
+    """Settings are read when the app is imported, so they go in the env."""
+    env = dict(os.environ)
+    env.setdefault("SECRET_KEY", "dummy")
+    env["DATABASE_TYPE"] = "sqlite"
+    env["DATABASE_URL"] = f"sqlite:///{workdir}/startup.db"
+    env["CACHE_TYPE"] = "disk"
+    env["DISK_CACHE_DIR"] = os.path.join(workdir, "cache")
+    env["DEPLOYMENT_MODE"] = mode
+    env["ENVIRONMENT"] = "benchmark"
+    return env
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--target", default=startup.DEFAULT_TARGET)
+    parser.add_argument(
+        "--mode", choices=("desktop", "android", "server"), default="desktop"
+    )
+    parser.add_argument("--runs", type=int, default=startup.DEFAULT_RUNS)
+    parser.add_argument(
+        "--budget", type=float, default=startup.DEFAULT_BUDGET_SECONDS,
+        help="Maximum median import time in seconds",
+    )
+    parser.add_argument(
+        "--compare", metavar="REF",
+        help="Baseline report: a file, or a commit with a stored report",
+    )
+    parser.add_argument(
+        "--threshold", type=float, default=startup.DEFAULT_THRESHOLD
+    )
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--output-dir", type=Path, default=DEFAULT_OUTPUT_DIR)
+    parser.add_argument("--no-save", action="store_true")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        path = reports.find_report(args.output_dir, args.compare)
+        if path is None:
+            print(f"No stored report matches '{args.compare}'", file=sys.stderr)
+            return 2
+        baseline = json.loads(path.read_text())
+
+    env = _startup_environment(args.mode, tempfile.mkdtemp(prefix="arthsaarthi-"))
+    # A first import compiles bytecode for changed modules; don't time that
+    startup.measure_startup(args.target, env=env)
+    runs = [
+        startup.measure_startup(args.target, env=env)
+        for _ in range(max(1, args.runs))
+    ]
+    report = startup.build_report(runs, args.target, args.mode, top=args.top)
+    print(startup.format_report(report))
+    if not args.no_save:
+        print(f"\nSaved {reports.save_report(report, args.output_dir)}")
+
+    problems = startup.check_budget(
+        report, args.budget, baseline=baseline, threshold=args.threshold
+    )
+    if baseline is not None and not problems:
+        before = baseline["import_seconds"]["median"]
+        print(f"\nWithin {args.threshold:.0%} of the baseline ({before * 1000:.0f} ms)")
+    for problem in problems:
+        print(f"FAIL: {problem}", file=sys.stderr)
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,134 @@
+"""
+Runs the benchmark suite against a synthetic user and stores the results.
+
+The user (thousands of transactions with splits, bonuses, a demerger, mutual
+fund SIPs, FDs/RDs/PPF and foreign RSUs) is generated from a seed, so runs on
+different commits measure the same data. Market data is served offline. Each
+run is saved as JSON under the output directory, named by time and commit;
+``--compare`` diffs the run against a stored report and exits with status 1
+if any benchmark's median regressed by more than the threshold.
+
+By default a throwaway SQLite database is used; pass ``--database-url`` to run
+against PostgreSQL (the schema is created if needed).
+
+Usage (from the backend directory):
+
+    python -m app.scripts.benchmark_suite
+    python -m app.scripts.benchmark_suite --only holdings --only tax
+    python -m app.scripts.benchmark_suite --compare 1a2b3c4 --threshold 0.1
+    python -m app.scripts.benchmark_suite --trades 10000 --no-save
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add backend to PYTHONPATH
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+DEFAULT_OUTPUT_DIR = BACKEND_DIR / ".benchmarks"
+
+
+def _configure_environment(database_url: str, workdir: str) -> None:
+    """Settings are read on import, so this runs before any app import."""
+    os.environ.setdefault("SECRET_KEY", "dummy")
+    os.environ["DATABASE_URL"] = database_url
+    os.environ["DATABASE_TYPE"] = (
+        "postgres" if database_url.startswith("postgres") else "sqlite"
+    )
+    os.environ["CACHE_TYPE"] = "disk"
+    os.environ["DISK_CACHE_DIR"] = os.path.join(workdir, "cache")
+    os.environ["DEPLOYMENT_MODE"] = "server"
+    os.environ["ENVIRONMENT"] = "benchmark"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--trades", type=int, default=3000)
+    parser.add_argument("--years", type=int, default=6)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--only", action="append",
+        help="Run only benchmarks whose name starts with this (repeatable)",
+    )
+    parser.add_argument("--output-dir", type=Path, default=DEFAULT_OUTPUT_DIR)
+    parser.add_argument(
+        "--compare", metavar="REF",
+        help="Baseline report: a file, or a commit with a stored report",
+    )
+    parser.add_argument("--threshold", type=float, default=0.2)
+    parser.add_argument("--database-url")
+    parser.add_argument("--no-save", action="store_true")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="arthsaarthi-bench-")
+    database_url = args.database_url or f"sqlite:///{workdir}/benchmark.db"
+    _configure_environment(database_url, workdir)
+    logging.basicConfig(level=logging.WARNING)
+
+    from datetime import date
+
+    from app.benchmarks import reports, suite
+    from app.benchmarks.synthetic import MarketUniverse, SyntheticSpec
+    from app.db.base import Base
+    from app.db.session import SessionLocal, engine
+
+    baseline = None
+    if args.compare:
+        path = reports.find_report(args.output_dir, args.compare)
+        if path is None:
+            print(f"No stored report matches '{args.compare}'", file=sys.stderr)
+            return 2
+        baseline = json.loads(path.read_text())
+
+    # Compare like with like: reuse the baseline's data set
+    if baseline is not None:
+        spec = suite.spec_from_report(baseline)
+    else:
+        spec = SyntheticSpec(
+            seed=args.seed, years=args.years, trades=args.trades,
+            end_date=date.today(),
+        )
+    cases = suite.select_benchmarks(args.only)
+    if not cases:
+        print("No benchmarks match --only", file=sys.stderr)
+        return 2
+
+    Base.metadata.create_all(bind=engine)
+    universe = MarketUniverse(spec)
+    with suite.benchmark_environment(universe):
+        started = time.perf_counter()
+        ctx = suite.prepare(SessionLocal, universe)
+        print(
+            f"Loaded synthetic user ({len(ctx.backup_lines)} backup records) "
+            f"in {time.perf_counter() - started:.1f}s"
+        )
+        results = []
+        for case in cases:
+            result = suite.run_benchmark(case, ctx, repeat=args.repeat)
+            print(f"  {case.name:<26}{result.median * 1000:>10.1f} ms")
+            results.append(result)
+
+    report = suite.build_report(results, spec, engine.dialect.name)
+    print()
+    print(suite.format_report(report))
+    if not args.no_save:
+        print(f"\nSaved {reports.save_report(report, args.output_dir)}")
+
+    if baseline is not None:
+        comparisons = suite.compare_reports(baseline, report, args.threshold)
+        print()
+        print(suite.format_comparison(comparisons))
+        if any(c.status == "regression" for c in comparisons):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,12 @@
 import logging
 import sys
 
-from app.db.session import SessionLocal
-from app.services.snapshot_service import take_daily_snapshots_for_all
+from app.services.scheduler import (
+    EOD_SNAPSHOT_JOB,
+    JobStatus,
+    JobTrigger,
+    scheduler,
+)
 
 # Configure basic logging for the script
 logging.basicConfig(
@@ -15,16 +19,15 @@ logger = logging.getLogger(__name__)
 
 def main() -> None:
     logger.info("Starting daily portfolio snapshot job...")
-    db = SessionLocal()
-    try:
-        count = take_daily_snapshots_for_all(db)
-        logger.info(f"Successfully created/updated {count} daily portfolio snapshots.")
-    except Exception as e:
-        logger.error(f"Error running daily snapshot job: {e}")
+    run = scheduler.run_job(EOD_SNAPSHOT_JOB, JobTrigger.CLI)
+    if run.status != JobStatus.SUCCESS.value:
+        logger.error(f"Error running daily snapshot job: {run.error}")
         sys.exit(1)
-    finally:
-        db.close()
 
+    logger.info(
+        f"Successfully created/updated {run.details['updated']} daily portfolio "
+        f"snapshots in {run.duration_seconds}s."
+    )
     logger.info("Daily portfolio snapshot job completed.")
 
 
@@ -0,0 +1,252 @@
+"""
+Corporate-action adjustments as lookups rather than replays.
+
+Splits, demergers, mergers and renames are recorded as audit transactions.
+`crud.corporate_action_adjustment` keeps one row per action with its quantity
+and cost multipliers and, for mergers, renames and demergers, the successor
+asset. `AdjustmentTable` turns a holding's rows into cumulative products so
+the adjustment between two dates is two binary searches and a division, and
+`LotBook` applies splits to open lots only when a lot is next read.
+"""
+import math
+import uuid
+from bisect import bisect_right
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+# Actions that adjust the holding in place. Mergers and renames instead move
+# it to the successor asset, whose BUYs carry the converted lots.
+IN_PLACE_ACTIONS = {"SPLIT", "DEMERGER"}
+SUCCESSION_ACTIONS = {"MERGER", "RENAME"}
+
+_ONE = Decimal(1)
+
+
+def _day(value: Union[date, datetime]) -> date:
+    return value.date() if isinstance(value, datetime) else value
+
+
+def resolve_successor(
+    details: Optional[Dict[str, Any]],
+    find: Callable[[str, str], Optional[uuid.UUID]],
+) -> Optional[uuid.UUID]:
+    """
+    The asset a MERGER, DEMERGER or RENAME moves the holding to: its
+    `new_asset_id`, else the asset its `new_asset_ticker` names, looked up
+    with `find(column, value)` by ISIN for ``ISIN:`` tickers and by ticker
+    symbol otherwise.
+    """
+    details = details or {}
+    if details.get("new_asset_id"):
+        try:
+            return uuid.UUID(str(details["new_asset_id"]))
+        except ValueError:
+            return None
+    ticker = details.get("new_asset_ticker")
+    if not ticker:
+        return None
+    if ticker.upper().startswith("ISIN:"):
+        return find("isin", ticker.split(":", 1)[1])
+    return find("ticker_symbol", ticker.upper())
+
+
+def demerger_cost_factor(
+    cost_basis: Decimal, allocated: Decimal
+) -> Tuple[Decimal, Decimal]:
+    """
+    The (cost kept, cost before) of a demerger that allocated `allocated` of
+    the holding's `cost_basis` to the spin-off.
+    """
+    if cost_basis > 0 and allocated > 0:
+        return cost_basis - allocated, cost_basis
+    return _ONE, _ONE
+
+
+class AdjustmentTable:
+    """
+    The adjustments of one portfolio's holding of an asset, from its
+    `CorporateActionAdjustment` rows.
+
+    Lookups take the dates of two events, such as a lot's purchase and its
+    sale, and cover the actions after the first and on or before the second.
+    """
+
+    def __init__(self, rows: Iterable[Any]):
+        rows = sorted(rows, key=lambda row: row.effective_date)
+        self.rows = rows
+        self.successor = next(
+            (row for row in rows if row.action_type in SUCCESSION_ACTIONS), None
+        )
+        in_place = [row for row in rows if row.action_type in IN_PLACE_ACTIONS]
+        self._dates = [_day(row.effective_date) for row in in_place]
+        self._quantity = [
+            row.quantity_numerator / row.quantity_denominator for row in in_place
+        ]
+        self._cost = [row.cost_numerator / row.cost_denominator for row in in_place]
+        self._cumulative_quantity = self._cumulate(self._quantity)
+        self._cumulative_cost = self._cumulate(self._cost)
+
+    @staticmethod
+    def _cumulate(factors: List[Decimal]) -> List[Decimal]:
+        products = [_ONE]
+        for factor in factors:
+            products.append(products[-1] * factor)
+        return products
+
+    def _factor(
+        self,
+        factors: List[Decimal],
+        cumulative: List[Decimal],
+        after: Union[date, datetime],
+        until: Union[date, datetime],
+    ) -> Decimal:
+        first = bisect_right(self._dates, _day(after))
+        last = bisect_right(self._dates, _day(until))
+        if first >= last:
+            return _ONE
+        if cumulative[first]:
+            return cumulative[last] / cumulative[first]
+        # A factor of zero (all of the cost allocated away) ends the products
+        product = _ONE
+        for factor in factors[first:last]:
+            product *= factor
+        return product
+
+    def quantity_factor(
+        self, after: Union[date, datetime], until: Union[date, datetime]
+    ) -> Decimal:
+        """Units held on `until` per unit held on `after`."""
+        return self._factor(self._quantity, self._cumulative_quantity, after, until)
+
+    def cost_factor(
+        self, after: Union[date, datetime], until: Union[date, datetime]
+    ) -> Decimal:
+        """Cost basis kept on `until` per unit of cost basis on `after`."""
+        return self._factor(self._cost, self._cumulative_cost, after, until)
+
+    def price_factor(
+        self, after: Union[date, datetime], until: Union[date, datetime]
+    ) -> Decimal:
+        """The multiplier of a per-unit cost carried from `after` to `until`."""
+        return self.cost_factor(after, until) / self.quantity_factor(after, until)
+
+    def splits(self) -> List[Any]:
+        return [row for row in self.rows if row.action_type == "SPLIT"]
+
+
+class Lot:
+    __slots__ = ("key", "quantity", "price", "payload", "_epoch")
+
+    def __init__(
+        self, key: uuid.UUID, quantity: Decimal, price: Optional[Decimal],
+        payload: Any, epoch: int,
+    ):
+        self.key = key
+        self.quantity = quantity
+        self.price = price
+        self.payload = payload
+        self._epoch = epoch
+
+
+class LotBook:
+    """
+    The lots of one asset, matched as `CRUDTransaction.get_available_lots`
+    matches them: linked SELLs reduce their lots and the rest of a SELL is
+    taken FIFO.
+
+    A split only records its ratio and scales the running total. Each lot
+    applies the ratios recorded since it was last read, in order, when it is
+    next read, which gives the same quantities and prices as rescaling every
+    lot on each split. Lots that were sold out are never read again, so
+    their splits cost nothing. With `floor_splits` (INR holdings, where
+    fractional shares are not issued) the fraction of a share a split leaves
+    is taken from the latest lots.
+    """
+
+    def __init__(self, floor_splits: bool = False):
+        self.floor_splits = floor_splits
+        self.lots: List[Lot] = []
+        self.lots_by_key: Dict[uuid.UUID, Lot] = {}
+        self.held = Decimal(0)
+        self._ratios: List[Decimal] = []
+        # Lots before it are sold out
+        self._fifo_index = 0
+
+    def _current(self, lot: Lot) -> Lot:
+        epoch = len(self._ratios)
+        if lot._epoch < epoch:
+            if lot.quantity:
+                for ratio in self._ratios[lot._epoch:]:
+                    lot.quantity *= ratio
+                    if lot.price is not None:
+                        lot.price /= ratio
+            lot._epoch = epoch
+        return lot
+
+    def add(
+        self, key: uuid.UUID, quantity: Decimal, price: Optional[Decimal] = None,
+        payload: Any = None,
+    ) -> None:
+        lot = Lot(key, quantity, price, payload, len(self._ratios))
+        self.lots.append(lot)
+        self.lots_by_key[key] = lot
+        self.held += quantity
+
+    def split(self, ratio: Decimal) -> None:
+        total_after = self.held * ratio
+        self.held = total_after
+        self._ratios.append(ratio)
+        if not self.floor_splits:
+            return
+        fraction = total_after - Decimal(math.floor(total_after))
+        for lot in reversed(self.lots):
+            if fraction <= 0:
+                break
+            lot = self._current(lot)
+            deduct = min(lot.quantity, fraction)
+            lot.quantity -= deduct
+            fraction -= deduct
+            self.held -= deduct
+
+    def deduct(self, key: uuid.UUID, quantity: Decimal) -> None:
+        """Takes a linked SELL's quantity from the lot it is linked to."""
+        lot = self.lots_by_key.get(key)
+        if lot is not None:
+            self._current(lot).quantity -= quantity
+            self.held -= quantity
+
+    def consume(self, quantity: Decimal) -> None:
+        """Takes an unlinked quantity from the oldest lots first."""
+        while self._fifo_index < len(self.lots) and quantity > 0:
+            lot = self._current(self.lots[self._fifo_index])
+            if lot.quantity <= 0:
+                self._fifo_index += 1
+                continue
+            take = min(lot.quantity, quantity)
+            lot.quantity -= take
+            quantity -= take
+            self.held -= take
+            if lot.quantity <= 0:
+                self._fifo_index += 1
+
+    def sell(
+        self, quantity: Decimal, links: Iterable[Tuple[uuid.UUID, Decimal]]
+    ) -> None:
+        """
+        Applies a SELL: its `(buy id, quantity)` links reduce those lots and
+        the rest is taken FIFO.
+        """
+        for buy_id, link_quantity in links:
+            quantity -= link_quantity
+            self.deduct(buy_id, link_quantity)
+        if quantity > 0:
+            self.consume(quantity)
+
+    def open_lots(self) -> List[Lot]:
+        """The lots with a quantity left, in purchase order."""
+        return [
+            lot
+            for lot in map(self._current, self.lots[self._fifo_index:])
+            if lot.quantity > 0
+        ]
@@ -0,0 +1,318 @@
+"""
+Resolves the assets that import rows and backup records refer to.
+
+A reference is the ticker symbol a statement or backup names an asset by,
+and its ISIN when known. References are matched against the database, in
+order, by
+
+1. ISIN (an "ISIN:" ticker is its ISIN),
+2. an alias mapped for the import's source (including aliases the user is
+   mapping in the current request),
+3. an alias from any source,
+4. ticker symbol,
+5. asset name,
+
+with one set-based query per step for every reference still unresolved.
+References found nowhere can then be looked up with the data providers, all
+in one batch, and the assets created (or, for side-effect free previews,
+returned unsaved). Results are memoized for the life of the resolver, which
+is meant to last one request or restore.
+"""
+import logging
+import uuid
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Sequence
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app import models, schemas
+from app.services.financial_data_service import financial_data_service
+from app.utils.pydantic_compat import model_dump
+
+logger = logging.getLogger(__name__)
+
+# Values per IN (...) clause. Older SQLite builds (as shipped on some Android
+# versions) allow only 999 parameters per statement.
+_IN_CHUNK_SIZE = 900
+
+ISIN_PREFIX = "ISIN:"
+
+
+@dataclass(frozen=True)
+class AssetRef:
+    ticker_symbol: Optional[str] = None
+    isin: Optional[str] = None
+
+    @property
+    def lookup_isin(self) -> Optional[str]:
+        if self.isin:
+            return self.isin.upper()
+        if self.ticker_symbol and self.ticker_symbol.upper().startswith(ISIN_PREFIX):
+            return self.ticker_symbol[len(ISIN_PREFIX):].upper()
+        return None
+
+
+def _chunks(values: Sequence, size: int = _IN_CHUNK_SIZE) -> Iterable[Sequence]:
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+class AssetResolver:
+    def __init__(
+        self,
+        db: Session,
+        *,
+        source: Optional[str] = None,
+        pending_aliases: Optional[Mapping[str, uuid.UUID]] = None,
+        aliases: bool = True,
+        names: bool = True,
+        fetch_tickers: bool = False,
+        create: bool = True,
+    ):
+        """
+        `source` selects the aliases of step 2 and `pending_aliases` (alias
+        symbol to asset id) adds ones not saved yet. `aliases` and `names`
+        turn steps 2-3 and 5 off, for references that are known to be exact
+        tickers. Providers are asked about ISINs, and about plain tickers
+        only if `fetch_tickers`; what they find is only saved if `create`.
+        """
+        self.db = db
+        self.source = source
+        self.pending_aliases = dict(pending_aliases or {})
+        self.fetch_tickers = fetch_tickers
+        self.create = create
+        self._steps: List[Callable[[List[AssetRef]], Dict[AssetRef, models.Asset]]]
+        self._steps = [self._by_isin]
+        if aliases:
+            self._steps += [self._by_source_alias, self._by_any_alias]
+        self._steps.append(self._by_ticker)
+        if names:
+            self._steps.append(self._by_name)
+        self._local: Dict[AssetRef, Optional[models.Asset]] = {}
+        self._fetched: Dict[AssetRef, Optional[models.Asset]] = {}
+
+    def resolve(
+        self, ref: AssetRef, *, fetch: bool = False
+    ) -> Optional[models.Asset]:
+        return self.resolve_many([ref], fetch=fetch)[ref]
+
+    def resolve_many(
+        self, refs: Iterable[AssetRef], *, fetch: bool = False
+    ) -> Dict[AssetRef, Optional[models.Asset]]:
+        """
+        The asset each reference resolves to, or None. With `fetch`, ISINs
+        (and, if `fetch_tickers` was set, tickers) not found in the database
+        are looked up with the providers.
+        """
+        refs = list(dict.fromkeys(refs))
+        unseen = [ref for ref in refs if ref not in self._local]
+        if unseen:
+            self._resolve_locally(unseen)
+        if fetch:
+            missing = [
+                ref for ref in refs
+                if self._local[ref] is None and ref not in self._fetched
+            ]
+            if missing:
+                self._fetch(missing)
+        return {
+            ref: self._local[ref] or (self._fetched.get(ref) if fetch else None)
+            for ref in refs
+        }
+
+    # --- Database ---
+    def _resolve_locally(self, refs: List[AssetRef]) -> None:
+        pending = refs
+        for step in self._steps:
+            if not pending:
+                break
+            found = step(pending)
+            self._local.update(found)
+            pending = [ref for ref in pending if ref not in found]
+        for ref in pending:
+            self._local[ref] = None
+
+    def _assets_where(self, column, values: Iterable) -> List[models.Asset]:
+        values = list(dict.fromkeys(v for v in values if v))
+        assets: List[models.Asset] = []
+        for chunk in _chunks(values):
+            assets.extend(
+                self.db.scalars(select(models.Asset).where(column.in_(chunk)))
+            )
+        return assets
+
+    def _by_isin(self, refs: List[AssetRef]) -> Dict[AssetRef, models.Asset]:
+        by_isin = {
+            a.isin.upper(): a
+            for a in self._assets_where(
+                models.Asset.isin, (ref.lookup_isin for ref in refs)
+            )
+        }
+        return {
+            ref: by_isin[ref.lookup_isin]
+            for ref in refs
+            if ref.lookup_isin in by_isin
+        }
+
+    def _by_source_alias(self, refs: List[AssetRef]) -> Dict[AssetRef, models.Asset]:
+        symbols = {ref.ticker_symbol for ref in refs if ref.ticker_symbol}
+        asset_ids = {
+            symbol: asset_id
+            for symbol, asset_id in self.pending_aliases.items()
+            if symbol in symbols
+        }
+        if self.source:
+            for chunk in _chunks(list(symbols - asset_ids.keys())):
+                asset_ids.update(
+                    self.db.execute(
+                        select(
+                            models.AssetAlias.alias_symbol,
+                            models.AssetAlias.asset_id,
+                        ).where(
+                            models.AssetAlias.alias_symbol.in_(chunk),
+                            models.AssetAlias.source == self.source,
+                        )
+                    ).tuples().all()
+                )
+        return self._by_asset_id(refs, asset_ids)
+
+    def _by_any_alias(self, refs: List[AssetRef]) -> Dict[AssetRef, models.Asset]:
+        symbols = list({ref.ticker_symbol for ref in refs if ref.ticker_symbol})
+        asset_ids: Dict[str, uuid.UUID] = {}
+        for chunk in _chunks(symbols):
+            for symbol, asset_id in self.db.execute(
+                select(models.AssetAlias.alias_symbol, models.AssetAlias.asset_id)
+                .where(models.AssetAlias.alias_symbol.in_(chunk))
+                .order_by(models.AssetAlias.source)
+            ):
+                asset_ids.setdefault(symbol, asset_id)
+        return self._by_asset_id(refs, asset_ids)
+
+    def _by_asset_id(
+        self, refs: List[AssetRef], asset_ids: Dict[str, uuid.UUID]
+    ) -> Dict[AssetRef, models.Asset]:
+        by_id = {
+            a.id: a for a in self._assets_where(models.Asset.id, asset_ids.values())
+        }
+        found = {}
+        for ref in refs:
+            asset = by_id.get(asset_ids.get(ref.ticker_symbol))
+            if asset is not None:
+                found[ref] = asset
+        return found
+
+    def _by_ticker(self, refs: List[AssetRef]) -> Dict[AssetRef, models.Asset]:
+        # "ISIN:" tickers were looked up by ISIN
+        tickers = {
+            ref: ref.ticker_symbol.upper()
+            for ref in refs
+            if ref.ticker_symbol
+            and not ref.ticker_symbol.upper().startswith(ISIN_PREFIX)
+        }
+        by_ticker = {
+            a.ticker_symbol: a
+            for a in self._assets_where(models.Asset.ticker_symbol, tickers.values())
+        }
+        return {
+            ref: by_ticker[ticker]
+            for ref, ticker in tickers.items()
+            if ticker in by_ticker
+        }
+
+    def _by_name(self, refs: List[AssetRef]) -> Dict[AssetRef, models.Asset]:
+        by_name: Dict[str, models.Asset] = {}
+        for asset in self._assets_where(
+            models.Asset.name, (ref.ticker_symbol for ref in refs)
+        ):
+            by_name.setdefault(asset.name, asset)
+        return {
+            ref: by_name[ref.ticker_symbol]
+            for ref in refs
+            if ref.ticker_symbol in by_name
+        }
+
+    # --- Providers ---
+    def _fetch(self, refs: List[AssetRef]) -> None:
+        """
+        Looks up each reference's ISIN, then its ticker if the ISIN is not
+        found, each round in one provider batch.
+        """
+        candidates = {
+            ref: lookups for ref in refs if (lookups := self._provider_lookups(ref))
+        }
+        details: Dict[AssetRef, Dict] = {}
+        lookup_of: Dict[AssetRef, str] = {}
+        while candidates:
+            round_lookups = {ref: lookups[0] for ref, lookups in candidates.items()}
+            results = financial_data_service.get_asset_details_batch(
+                list(dict.fromkeys(round_lookups.values()))
+            )
+            next_candidates = {}
+            for ref, lookup in round_lookups.items():
+                if results.get(lookup):
+                    details[ref] = results[lookup]
+                    lookup_of[ref] = lookup
+                elif len(candidates[ref]) > 1:
+                    next_candidates[ref] = candidates[ref][1:]
+            candidates = next_candidates
+
+        assets = self._assets_from_details(details, lookup_of)
+        for ref in refs:
+            self._fetched[ref] = assets.get(ref)
+            if self.create and ref in assets:
+                self._local[ref] = assets[ref]
+
+    def _provider_lookups(self, ref: AssetRef) -> List[str]:
+        lookups = []
+        if ref.lookup_isin:
+            lookups.append(f"{ISIN_PREFIX}{ref.lookup_isin}")
+        if (
+            self.fetch_tickers
+            and ref.ticker_symbol
+            and not ref.ticker_symbol.upper().startswith(ISIN_PREFIX)
+        ):
+            lookups.append(ref.ticker_symbol)
+        return lookups
+
+    def _assets_from_details(
+        self, details: Dict[AssetRef, Dict], lookup_of: Dict[AssetRef, str]
+    ) -> Dict[AssetRef, models.Asset]:
+        """
+        Assets for the provider details, as `get_or_create_by_ticker` makes
+        them: under the provider's canonical ticker, reusing an asset that
+        already has it.
+        """
+        tickers = {
+            ref: (d.get("ticker_symbol") or lookup_of[ref]).upper()
+            for ref, d in details.items()
+        }
+        by_ticker = {
+            a.ticker_symbol: a
+            for a in self._assets_where(models.Asset.ticker_symbol, tickers.values())
+        }
+        new_assets = []
+        for ref, d in details.items():
+            ticker = tickers[ref]
+            if ticker in by_ticker:
+                continue
+            asset_in = schemas.AssetCreate(
+                ticker_symbol=ticker,
+                **{k: v for k, v in d.items() if k != "ticker_symbol"},
+            )
+            asset = models.Asset(**model_dump(asset_in))
+            by_ticker[ticker] = asset
+            new_assets.append(asset)
+
+        if new_assets and self.create:
+            self.db.add_all(new_assets)
+            self.db.flush()
+            logger.info(f"Created {len(new_assets)} assets from provider details")
+        return {ref: by_ticker[ticker] for ref, ticker in tickers.items()}
+
+
+def resolve_many(
+    db: Session, refs: Iterable[AssetRef], *, fetch: bool = False, **options
+) -> Dict[AssetRef, Optional[models.Asset]]:
+    """One-off resolution; see `AssetResolver` for the options."""
+    return AssetResolver(db, **options).resolve_many(refs, fetch=fetch)
@@ -1,27 +1,47 @@
 import collections
 import logging
 import re
+import uuid
 import zipfile
 from datetime import date, datetime
 from decimal import Decimal
-from typing import Any, Optional, Set, Tuple
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Set, Tuple
 
 import pandas as pd
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy import insert, or_
 from sqlalchemy.orm import Session
 
 from app import crud, models, schemas
 from app.schemas.bond import BondCreate
 from app.schemas.enums import BondType, PaymentFrequency
+from app.utils.pydantic_compat import model_dump
+
+if TYPE_CHECKING:
+    from app.services.asset_sync_state import AssetSyncState
 
 # Setup logger
 logger = logging.getLogger(__name__)
 
+# ICICI security master columns read by `_process_fallback_row`
+ICICI_ID_COLUMNS = [
+    "ExchangeCode", "ScripID", "Symbol", "ShortName", "CompanyName",
+    "ScripName", "ISINCode", "Series",
+]
+
 
 class AssetSeeder:
     # Commit every N assets for live progress updates
     COMMIT_BATCH_SIZE = 500
 
+    # Source columns parsed into typed bond fields, applied only to rows that
+    # survive de-duplication.
+    _FIELD_PARSERS = {
+        "maturity_date": "_parse_date",
+        "face_value": "_parse_decimal",
+        "coupon_rate": "_parse_decimal",
+        "payment_frequency": "_parse_frequency",
+    }
+
     def __init__(self, db: Session, debug: bool = False):
         self.db = db
         self.debug = debug
@@ -36,6 +56,22 @@ class AssetSeeder:
         self.existing_isins: Set[str] = set()
         self.existing_tickers: Set[str] = set()
         self.existing_composite_keys: Set[Tuple[str, str, str]] = set()
+        # Asset ids for alias creation without per-row lookups
+        self.asset_ids_by_isin: Dict[str, uuid.UUID] = {}
+        self.asset_ids_by_ticker: Dict[str, uuid.UUID] = {}
+        self._existing_alias_keys: Optional[Set[Tuple[str, str]]] = None
+
+        # Rows buffered for the next bulk insert
+        self._pending_assets: List[dict] = []
+        self._pending_bonds: List[dict] = []
+        self._pending_aliases: List[dict] = []
+
+        # Delta sync: when set, only rows that are new or changed since the
+        # last processed version of `sync_source` are seeded.
+        self.sync_state: Optional["AssetSyncState"] = None
+        self.sync_source: Optional[str] = None
+        # (source, row key, asset id) of changed rows whose asset is queued
+        self._pending_synced: List[Tuple[str, str, uuid.UUID]] = []
 
         self._load_existing_assets()
 
@@ -51,6 +87,7 @@ class AssetSeeder:
         self._fix_misclassified_bonds()
 
         assets = self.db.query(
+            models.Asset.id,
             models.Asset.isin,
             models.Asset.ticker_symbol,
             models.Asset.name,
@@ -58,11 +95,13 @@ class AssetSeeder:
             models.Asset.currency
         ).all()
 
-        for isin, ticker, name, atype, currency in assets:
+        for asset_id, isin, ticker, name, atype, currency in assets:
             if isin:
                 self.existing_isins.add(isin)
+                self.asset_ids_by_isin[isin] = asset_id
             if ticker:
                 self.existing_tickers.add(ticker)
+                self.asset_ids_by_ticker[ticker] = asset_id
             self.existing_composite_keys.add((name, atype, currency))
 
         if self.debug:
@@ -241,9 +280,10 @@ class AssetSeeder:
     def _create_asset(
         self, data: dict
     ) -> Optional[models.Asset]:
-        """Creates an asset and optionally a bond record.
+        """Queues an asset and optionally a bond record for bulk insertion.
 
-        Returns the created Asset object, or None if skipped/failed.
+        Returns a transient Asset carrying the new id, or None if skipped/failed.
+        The rows reach the database on the next `_write_pending`.
         """
         # Duplicate checks
         isin = data.get("isin")
@@ -261,6 +301,7 @@ class AssetSeeder:
             return None
 
         try:
+            asset_id = uuid.uuid4()
             asset_in = schemas.AssetCreate(
                 name=name,
                 ticker_symbol=ticker,
@@ -269,13 +310,12 @@ class AssetSeeder:
                 currency="INR",
                 exchange=data.get("exchange", "N/A")
             )
-            asset = crud.asset.create(
-                db=self.db, obj_in=asset_in
-            )
+            asset_row = {"id": asset_id, **model_dump(asset_in)}
 
+            bond_row = None
             if asset_type == "BOND" and data.get("bond_type"):
                 bond_in = BondCreate(
-                    asset_id=asset.id,
+                    asset_id=asset_id,
                     bond_type=data["bond_type"],
                     maturity_date=(
                         data.get("maturity_date")
@@ -288,34 +328,11 @@ class AssetSeeder:
                         data.get("payment_frequency")
                     ),
                 )
-                crud.bond.create(db=self.db, obj_in=bond_in)
-
-            # Update caches
-            if isin:
-                self.existing_isins.add(isin)
-            self.existing_tickers.add(ticker)
-            self.existing_composite_keys.add(composite_key)
-            self.created_count += 1
-            self._pending_commits += 1
-
-            # Commit periodically for live progress
-            if (
-                self._pending_commits
-                >= self.COMMIT_BATCH_SIZE
-            ):
-                self.db.commit()
-                self._pending_commits = 0
-                if self.debug:
-                    print(
-                        "[DEBUG] Committed batch, "
-                        f"total: {self.created_count}"
-                    )
-
-            return asset
-        except IntegrityError:
-            self.db.rollback()
-            self.skipped_count += 1
-            return None
+                bond_row = {
+                    key: getattr(value, "value", value)
+                    for key, value in model_dump(bond_in).items()
+                }
+                bond_row["id"] = uuid.uuid4()
         except Exception as e:
             if self.debug:
                 print(
@@ -325,46 +342,237 @@ class AssetSeeder:
             self.skipped_count += 1
             return None
 
+        self._pending_assets.append(asset_row)
+        if bond_row:
+            self._pending_bonds.append(bond_row)
+
+        # Update caches
+        if isin:
+            self.existing_isins.add(isin)
+            self.asset_ids_by_isin[isin] = asset_id
+        self.existing_tickers.add(ticker)
+        self.asset_ids_by_ticker[ticker] = asset_id
+        self.existing_composite_keys.add(composite_key)
+        self.created_count += 1
+        self._pending_commits += 1
+
+        # Commit periodically for live progress
+        if self._pending_commits >= self.COMMIT_BATCH_SIZE:
+            self.flush_pending()
+
+        return models.Asset(**asset_row)
+
+    def _create_assets_from_frame(self, frame: pd.DataFrame) -> None:
+        """Creates assets from a normalised DataFrame of `_create_asset` fields.
+
+        Rows whose ISIN or ticker is already known are dropped with vectorised
+        set lookups first, so a re-sync only touches new instruments. The
+        remaining rows go through `_create_asset` in file order, which keeps
+        the first-row-wins semantics for duplicates within a file.
+        """
+        if frame.empty:
+            return
+        frame = self._changed_rows(frame, self._frame_keys(frame))
+        known = frame["isin"].isin(self.existing_isins) | frame[
+            "ticker_symbol"
+        ].isin(self.existing_tickers)
+        if self.sync_state is not None and self.sync_source is not None:
+            self.sync_state.confirm(self.sync_source, self._frame_keys(frame[known]))
+        frame = frame[~known]
+
+        for key, data in zip(self._frame_keys(frame), frame.to_dict("records")):
+            for field, parser in self._FIELD_PARSERS.items():
+                if field in data:
+                    data[field] = getattr(self, parser)(data[field])
+            self._record_synced(key, data, self._create_asset(data))
+
+    @staticmethod
+    def _frame_keys(frame: pd.DataFrame) -> pd.Series:
+        """Delta-sync key of each row: its ISIN, else its ticker."""
+        isin = frame["isin"].fillna("")
+        return isin.where(isin != "", frame["ticker_symbol"]).astype(str)
+
+    def _record_synced(
+        self, key: Optional[str], data: dict, asset: Optional[models.Asset]
+    ) -> None:
+        """
+        Confirms a changed row's fingerprint once its asset is in the
+        database: on the next write for a queued asset, now for a known one.
+        Rows that were skipped or failed stay unconfirmed.
+        """
+        if self.sync_state is None or self.sync_source is None or key is None:
+            return
+        if asset is not None:
+            self._pending_synced.append((self.sync_source, key, asset.id))
+        elif (
+            data.get("isin") in self.existing_isins
+            or data.get("ticker_symbol") in self.existing_tickers
+        ):
+            self.sync_state.confirm(self.sync_source, [key])
+
+    def _changed_rows(self, frame: pd.DataFrame, keys: pd.Series) -> pd.DataFrame:
+        """Rows of `frame` new or changed since the last delta sync, if any."""
+        if self.sync_state is None or self.sync_source is None or frame.empty:
+            return frame
+        return frame[self.sync_state.changed_rows(self.sync_source, frame, keys)]
+
+    def _lookup_asset_id(
+        self, isin: Optional[str], ticker: str
+    ) -> Optional[uuid.UUID]:
+        """Id of an existing or queued asset by ISIN, then ticker."""
+        if isin and isin in self.asset_ids_by_isin:
+            return self.asset_ids_by_isin[isin]
+        if ticker in self.asset_ids_by_ticker:
+            return self.asset_ids_by_ticker[ticker]
+        # Known but not mapped (e.g. assigned outside this seeder)
+        if isin and isin in self.existing_isins:
+            asset = self.db.query(models.Asset.id).filter(
+                models.Asset.isin == isin
+            ).first()
+            if asset:
+                return asset.id
+        if ticker in self.existing_tickers:
+            asset = crud.asset.get_by_ticker(self.db, ticker_symbol=ticker)
+            if asset:
+                return asset.id
+        return None
+
     def _create_alias(
         self,
         alias_symbol: str,
         source: str,
         asset_id,
     ) -> bool:
-        """Create an alias if it doesn't already exist.
+        """Queue an alias if it doesn't already exist.
 
         Returns True if a new alias was created.
         """
-        existing = crud.asset_alias.get_by_alias(
-            self.db,
-            alias_symbol=alias_symbol,
-            source=source,
-        )
-        if existing:
-            return False
-        try:
-            alias_in = schemas.AssetAliasCreate(
-                alias_symbol=alias_symbol,
-                source=source,
-                asset_id=asset_id,
-            )
-            crud.asset_alias.create(
-                db=self.db, obj_in=alias_in
+        if self._existing_alias_keys is None:
+            self._existing_alias_keys = set(
+                self.db.query(
+                    models.AssetAlias.alias_symbol, models.AssetAlias.source
+                ).all()
             )
-            self.alias_count += 1
-            return True
-        except IntegrityError:
-            self.db.rollback()
+        key = (alias_symbol, source)
+        if key in self._existing_alias_keys:
             return False
 
+        self._existing_alias_keys.add(key)
+        self._pending_aliases.append({
+            "id": uuid.uuid4(),
+            "alias_symbol": alias_symbol,
+            "source": source,
+            "asset_id": asset_id,
+        })
+        self.alias_count += 1
+        self._pending_commits += 1
+        return True
+
+    def _bulk_insert(self, table, rows: List[dict]) -> Set[Any]:
+        """
+        Inserts rows with a single executemany, skipping rows that collide
+        with a unique constraint (`INSERT ... ON CONFLICT DO NOTHING`).
+        Returns the ids of the rows actually inserted.
+        """
+        dialect = self.db.get_bind().dialect.name
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        elif dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            self.db.execute(insert(table), rows)
+            return {row["id"] for row in rows}
+
+        stmt = dialect_insert(table).on_conflict_do_nothing().returning(table.c.id)
+        return {row[0] for row in self.db.execute(stmt, rows)}
+
+    def _write_pending(self):
+        """Bulk-inserts queued assets, then their bonds and aliases."""
+        assets, bonds, aliases = (
+            self._pending_assets, self._pending_bonds, self._pending_aliases
+        )
+        self._pending_assets, self._pending_bonds, self._pending_aliases = [], [], []
+        synced, self._pending_synced = self._pending_synced, []
+
+        rejected: Set[Any] = set()
+        if assets:
+            inserted = self._bulk_insert(models.Asset.__table__, assets)
+            rejected = {row["id"] for row in assets} - inserted
+            if rejected:
+                # Lost a race with another writer; drop dependants and mappings
+                self.created_count -= len(rejected)
+                self.skipped_count += len(rejected)
+                bonds = [b for b in bonds if b["asset_id"] not in rejected]
+                aliases = [a for a in aliases if a["asset_id"] not in rejected]
+                for mapping in (self.asset_ids_by_isin, self.asset_ids_by_ticker):
+                    for key in [k for k, v in mapping.items() if v in rejected]:
+                        del mapping[key]
+                self._resync_rejected([r for r in assets if r["id"] in rejected])
+        if bonds:
+            self._bulk_insert(models.Bond.__table__, bonds)
+        if aliases:
+            inserted = self._bulk_insert(models.AssetAlias.__table__, aliases)
+            self.alias_count -= len(aliases) - len(inserted)
+        if synced and self.sync_state is not None:
+            keys_by_source = collections.defaultdict(list)
+            for source, key, asset_id in synced:
+                if asset_id not in rejected:
+                    keys_by_source[source].append(key)
+            for source, keys in keys_by_source.items():
+                self.sync_state.confirm(source, keys)
+
+    def _resync_rejected(self, rows: List[Dict]):
+        """
+        Re-reads the identifiers of rejected rows so the dedupe caches only
+        hold values that are really in the database. A row that conflicted on
+        its ticker must not block a later assignment of its ISIN.
+        """
+        isins = {r["isin"] for r in rows if r.get("isin")}
+        tickers = {r["ticker_symbol"] for r in rows if r.get("ticker_symbol")}
+        found = self.db.query(
+            models.Asset.id, models.Asset.isin, models.Asset.ticker_symbol
+        ).filter(
+            or_(models.Asset.isin.in_(isins), models.Asset.ticker_symbol.in_(tickers))
+        ).all()
+        found_isins = {isin for _, isin, _ in found if isin}
+        found_tickers = {ticker for _, _, ticker in found if ticker}
+        self.existing_isins -= isins - found_isins
+        self.existing_tickers -= tickers - found_tickers
+        for asset_id, isin, ticker in found:
+            if isin in isins:
+                self.asset_ids_by_isin[isin] = asset_id
+            if ticker in tickers:
+                self.asset_ids_by_ticker[ticker] = asset_id
+
     def flush_pending(self):
         """Commit any pending assets that haven't been committed yet."""
         if self._pending_commits > 0:
+            self._write_pending()
             self.db.commit()
             self._pending_commits = 0
             if self.debug:
                 print(f"[DEBUG] Flushed pending, total: {self.created_count}")
 
+    @staticmethod
+    def _text(df: pd.DataFrame, *columns: str) -> pd.Series:
+        """
+        Vectorised ``str(value).strip()`` of the first of `columns` present in
+        `df`, with missing values mapped to an empty string.
+        """
+        for column in columns:
+            if column in df.columns:
+                values = df[column]
+                return values.where(values.notna(), "").astype(str).str.strip()
+        return pd.Series("", index=df.index)
+
+    @staticmethod
+    def _raw(df: pd.DataFrame, *columns: str) -> pd.Series:
+        """Raw values of the first of `columns` present in `df` (else None)."""
+        for column in columns:
+            if column in df.columns:
+                return df[column]
+        return pd.Series(None, index=df.index, dtype=object)
+
     # --- Phase 1: Master Debt Lists ---
     def process_nsdl_file(self, filepath: str):
         """Phase 1 Source 1: NSDL Debt Instruments (TSV/XLS)."""
@@ -381,37 +589,26 @@ class AssetSeeder:
                 print(f"Failed to read NSDL file: {e}")
                 return
 
-        for _, row in df.iterrows():
-            isin = str(row.get('ISIN', '')).strip()
-            if not isin or pd.isna(isin):
-                continue
-
-            # Use ISIN as ticker if no other identifier, but usually ISIN
-            # is the key here. We map NSDL -> BOND definitively.
-            name = str(row.get('NAME_OF_THE_INSTRUMENT', '')).strip()
-            if not name:
-                name = f"Bond {isin}"
-
-            maturity_date = self._parse_date(row.get('REDEMPTION'))
-            face_value = self._parse_decimal(row.get('FACE_VALUE'))
-            coupon_rate = self._parse_decimal(row.get('COUPON_RATE'))
-            payment_freq = self._parse_frequency(
-                row.get('FREQUENCY_OF_THE_INTEREST_PAYMENT')
-            )
-
-            data = {
-                "isin": isin,
-                "ticker_symbol": isin, # Fallback ticker
-                "name": name,
-                "asset_type": "BOND",
-                "bond_type": BondType.CORPORATE, # Default, could be refined
-                "maturity_date": maturity_date,
-                "face_value": face_value,
-                "coupon_rate": coupon_rate,
-                "payment_frequency": payment_freq,
-                "exchange": "N/A" # OTC / NSDL
-            }
-            self._create_asset(data)
+        isin = self._text(df, 'ISIN')
+        name = self._text(df, 'NAME_OF_THE_INSTRUMENT')
+        # Use ISIN as ticker if no other identifier, but usually ISIN
+        # is the key here. We map NSDL -> BOND definitively.
+        frame = pd.DataFrame({
+            "isin": isin,
+            "ticker_symbol": isin, # Fallback ticker
+            "name": name.where(name != "", "Bond " + isin),
+            "asset_type": "BOND",
+            "bond_type": BondType.CORPORATE, # Default, could be refined
+            "maturity_date": self._raw(df, 'REDEMPTION'),
+            "face_value": self._raw(df, 'FACE_VALUE'),
+            "coupon_rate": self._raw(df, 'COUPON_RATE'),
+            "payment_frequency": self._raw(
+                df, 'FREQUENCY_OF_THE_INTEREST_PAYMENT'
+            ),
+            "exchange": "N/A" # OTC / NSDL
+        })
+        self._create_assets_from_frame(frame[isin != ""])
+        self._write_pending()
 
     def process_bse_public_debt(self, filepath: str):
         """Phase 1 Source 2: BSE Public Bond (XLSX inside Zip)."""
@@ -425,86 +622,69 @@ class AssetSeeder:
                             self._process_bse_public_debt_df(df)
         except Exception as e:
             print(f"Error processing BSE Public Debt zip: {e}")
+        self._write_pending()
 
     def _process_bse_public_debt_df(self, df: pd.DataFrame):
-        for _, row in df.iterrows():
-            isin = str(row.get('ISIN', '')).strip()
-            ticker = str(row.get('Scrip_ Code', '')).strip()
-            name = str(row.get('Scrip_Long_Name', '')).strip()
-
-            if not isin or not ticker:
-                continue
-
-            maturity_date = self._parse_date(row.get('Conversion_Date'))
-            face_value = self._parse_decimal(row.get('Scrip_Face_Value'))
-            coupon_rate = self._parse_decimal(row.get('Interest_Rate'))
-
-            data = {
-                "isin": isin,
-                "ticker_symbol": ticker,
-                "name": name,
-                "asset_type": "BOND",
-                "bond_type": BondType.CORPORATE, # Mostly corporate public issues
-                "maturity_date": maturity_date,
-                "face_value": face_value,
-                "coupon_rate": coupon_rate,
-                "exchange": "BSE"
-            }
-            self._create_asset(data)
+        isin = self._text(df, 'ISIN')
+        ticker = self._text(df, 'Scrip_ Code')
+        frame = pd.DataFrame({
+            "isin": isin,
+            "ticker_symbol": ticker,
+            "name": self._text(df, 'Scrip_Long_Name'),
+            "asset_type": "BOND",
+            "bond_type": BondType.CORPORATE, # Mostly corporate public issues
+            "maturity_date": self._raw(df, 'Conversion_Date'),
+            "face_value": self._raw(df, 'Scrip_Face_Value'),
+            "coupon_rate": self._raw(df, 'Interest_Rate'),
+            "exchange": "BSE"
+        })
+        self._create_assets_from_frame(frame[(isin != "") & (ticker != "")])
 
     # --- Phase 2: Exchange Bhavcopy ---
+    # Classification based on Series (SctySrs): series -> (asset_type, bond_type)
+    BSE_EQUITY_SERIES = {
+        **{
+            series: ("STOCK", None) # Standard Equity Series
+            for series in ['A', 'B', 'T', 'X', 'XT', 'Z', 'P']
+        },
+        'E': ("ETF", None), # Or STOCK with specific flag
+        'G': ("BOND", BondType.GOVERNMENT),
+        'F': ("BOND", BondType.CORPORATE),
+        'M': ("STOCK", None), # SME
+        'MT': ("STOCK", None),
+    }
+
     def process_bse_equity_bhavcopy(self, filepath: str):
         """Phase 2 Source 3: BSE Equity Bhavcopy (CSV)."""
         print(f"Processing BSE Equity Bhavcopy: {filepath}")
         try:
             df = pd.read_csv(filepath)
-            for _, row in df.iterrows():
-                self._process_bse_equity_row(row)
+            self._process_bse_equity_df(df)
         except Exception as e:
             print(f"Error reading BSE Equity CSV: {e}")
-
-    def _process_bse_equity_row(self, row: pd.Series):
-        isin = str(row.get('ISIN', '')).strip()
-        ticker = str(row.get('TckrSymb', '')).strip()
-        series = str(row.get('SctySrs', '')).strip().upper()
-        name = str(row.get('FinInstrmNm', '')).strip()
-
-        if not isin or not ticker:
-            return
-
-        # Classification based on Series (SctySrs)
-        asset_type = None
-        bond_type = None
-
-        if series in ['A', 'B', 'T', 'X', 'XT', 'Z', 'P']: # Standard Equity Series
-            asset_type = "STOCK"
-        elif series == 'E':
-            asset_type = "ETF" # Or STOCK with specific flag
-        elif series == 'G':
-            asset_type = "BOND"
-            bond_type = BondType.GOVERNMENT
-        elif series == 'F':
-            asset_type = "BOND"
-            bond_type = BondType.CORPORATE
-        else:
-             # Unknown series, maybe skip or log?
-             # For now, default to STOCK if looks like equity,
-             # but better to skip if unsure.
-             if series in ['M', 'MT']: # SME
-                 asset_type = "STOCK"
-             else:
-                self.skipped_series_counts[series] += 1
-                return
-
-        data = {
-            "isin": isin,
-            "ticker_symbol": ticker,
-            "name": name,
-            "asset_type": asset_type,
-            "bond_type": bond_type,
+        self._write_pending()
+
+    def _process_bse_equity_df(self, df: pd.DataFrame):
+        isin = self._text(df, 'ISIN')
+        ticker = self._text(df, 'TckrSymb')
+        series = self._text(df, 'SctySrs').str.upper()
+        valid = (isin != "") & (ticker != "")
+
+        # Unknown series are skipped (and counted) rather than guessed
+        known_series = series.isin(list(self.BSE_EQUITY_SERIES))
+        self.skipped_series_counts.update(series[valid & ~known_series].tolist())
+
+        keep = valid & known_series
+        classification = series[keep].map(self.BSE_EQUITY_SERIES)
+        frame = pd.DataFrame({
+            "isin": isin[keep],
+            "ticker_symbol": ticker[keep],
+            "name": self._text(df, 'FinInstrmNm')[keep],
+            "asset_type": classification.str[0],
+            "bond_type": classification.str[1],
             "exchange": "BSE"
-        }
-        self._create_asset(data)
+        })
+        self._create_assets_from_frame(frame)
 
     def process_nse_equity_bhavcopy(self, filepath: str):
         """Phase 2 Source 4: NSE Equity Bhavcopy (CSV inside Zip)."""
@@ -518,44 +698,35 @@ class AssetSeeder:
                             self._process_nse_equity_df(df)
         except Exception as e:
             print(f"Error processing NSE Equity Zip: {e}")
+        self._write_pending()
 
     def _process_nse_equity_df(self, df: pd.DataFrame):
-        for _, row in df.iterrows():
-            isin = str(row.get('ISIN', '')).strip()
-            ticker = str(row.get('SYMBOL', '')).strip()
-            series = str(row.get('SERIES', '')).strip().upper()
-            # NSE Bhavcopy usually doesn't have full name, use Ticker as fallback
-            name = ticker
-
-            if not isin or not ticker:
-                continue
-
-            asset_type = "STOCK"
-            bond_type = None
+        isin = self._text(df, 'ISIN')
+        ticker = self._text(df, 'SYMBOL')
+        series = self._text(df, 'SERIES').str.upper()
+
+        # NSE Classification Logic
+        is_sgb = series == 'GB'
+        is_gov = series.isin(['GS', 'SG', 'CG'])
+        # Corporate bonds often start with N, Y, Z on NSE
+        is_corp = ~series.isin(['EQ', 'BE', 'SM', 'ST']) & series.str.startswith(
+            ('N', 'Y', 'Z')
+        )
+        bond_type = pd.Series(None, index=df.index, dtype=object)
+        bond_type[is_corp] = BondType.CORPORATE
+        bond_type[is_gov] = BondType.GOVERNMENT
+        bond_type[is_sgb] = BondType.SGB
 
-            # NSE Classification Logic
-            if series in ['EQ', 'BE', 'SM', 'ST']:
-                asset_type = "STOCK"
-            elif series == 'GB':
-                asset_type = "BOND"
-                bond_type = BondType.SGB
-            elif series in ['GS', 'SG', 'CG']:
-                asset_type = "BOND"
-                bond_type = BondType.GOVERNMENT
-            elif series.startswith(('N', 'Y', 'Z')):
-                # Corporate bonds often start with N, Y, Z on NSE
-                asset_type = "BOND"
-                bond_type = BondType.CORPORATE
-
-            data = {
-                "isin": isin,
-                "ticker_symbol": ticker,
-                "name": name,
-                "asset_type": asset_type,
-                "bond_type": bond_type,
-                "exchange": "NSE"
-            }
-            self._create_asset(data)
+        frame = pd.DataFrame({
+            "isin": isin,
+            "ticker_symbol": ticker,
+            # NSE Bhavcopy usually doesn't have full name, use Ticker as fallback
+            "name": ticker,
+            "asset_type": bond_type.notna().map({True: "BOND", False: "STOCK"}),
+            "bond_type": bond_type,
+            "exchange": "NSE"
+        })
+        self._create_assets_from_frame(frame[(isin != "") & (ticker != "")])
 
     # --- Phase 3: Specialized Debt ---
     def process_nse_daily_debt(self, filepath: str):
@@ -563,42 +734,31 @@ class AssetSeeder:
         print(f"Processing NSE Daily Debt: {filepath}")
         try:
             df = pd.read_excel(filepath, engine='openpyxl')
-            for _, row in df.iterrows():
-                self._process_nse_debt_row(row)
+            self._process_nse_debt_df(df)
         except Exception as e:
             print(f"Error reading NSE Daily Debt: {e}")
+        self._write_pending()
 
-    def _process_nse_debt_row(self, row: pd.Series):
-        isin = str(row.get('ISIN_CODE', '')).strip()
-        if not isin:
-            return
-
-        name = str(row.get('ISSUE_DESC', '')).strip()
-        issue_type = str(row.get('ISSUE_TYPE', '')).strip().upper()
-
-        bond_type = BondType.CORPORATE
-        if issue_type in ['GS', 'SB', 'SDL']:
-            bond_type = BondType.GOVERNMENT
-        elif issue_type == 'TBILLS':
-            bond_type = BondType.TBILL
+    def _process_nse_debt_df(self, df: pd.DataFrame):
+        isin = self._text(df, 'ISIN_CODE')
+        issue_type = self._text(df, 'ISSUE_TYPE').str.upper()
 
-        maturity_date = self._parse_date(row.get('MAT_DT'))
-        coupon_rate = self._parse_decimal(row.get('COUPON_RATE'))
+        bond_type = pd.Series(BondType.CORPORATE, index=df.index, dtype=object)
+        bond_type[issue_type.isin(['GS', 'SB', 'SDL'])] = BondType.GOVERNMENT
+        bond_type[issue_type == 'TBILLS'] = BondType.TBILL
 
-        # Ticker often missing in this file, use ISIN
-        ticker = isin
-
-        data = {
+        frame = pd.DataFrame({
             "isin": isin,
-            "ticker_symbol": ticker,
-            "name": name,
+            # Ticker often missing in this file, use ISIN
+            "ticker_symbol": isin,
+            "name": self._text(df, 'ISSUE_DESC'),
             "asset_type": "BOND",
             "bond_type": bond_type,
-            "maturity_date": maturity_date,
-            "coupon_rate": coupon_rate,
+            "maturity_date": self._raw(df, 'MAT_DT'),
+            "coupon_rate": self._raw(df, 'COUPON_RATE'),
             "exchange": "NSE"
-        }
-        self._create_asset(data)
+        })
+        self._create_assets_from_frame(frame[isin != ""])
 
     def process_bse_debt_bhavcopy(self, filepath: str):
         """Phase 3 Source 6: BSE Debt Bhavcopy (Zip)."""
@@ -614,50 +774,31 @@ class AssetSeeder:
                             self._process_bse_debt_csv(filename, df)
         except Exception as e:
             print(f"Error processing BSE Debt Zip: {e}")
+        self._write_pending()
 
     def _process_bse_debt_csv(self, filename: str, df: pd.DataFrame):
         # fgroup, icdm -> Corporate. wdm -> Govt usually
         is_gov = 'wdm' in filename.lower()
 
-        for _, row in df.iterrows():
-            # Column names vary slightly
-            isin = row.get('ISIN No.') or row.get('ISIN')
-            if not isin or pd.isna(isin):
-                continue
-            isin = str(isin).strip()
-
-            ticker = (row.get('Security Code') or row.get('Security_cd') or
-                      row.get('Scrip Code'))
-            ticker = str(ticker).strip() if ticker else isin
-
-            name = (row.get('sc_name') or row.get('Issuer Name') or
-                    row.get('Security Description'))
-            name = str(name).strip() if name else f"Bond {isin}"
+        # Column names vary slightly
+        isin = self._text(df, 'ISIN No.', 'ISIN')
+        ticker = self._text(df, 'Security Code', 'Security_cd', 'Scrip Code')
+        name = self._text(df, 'sc_name', 'Issuer Name', 'Security Description')
 
-            maturity_date = self._parse_date(
-                row.get('Maturity Date') or row.get('MaturityDate')
-            )
-            coupon_rate = self._parse_decimal(
-                row.get('COUP0N (%)') or
-                row.get('Coupon (%)') or
-                row.get('Coupon Rate (%)')
-            )
-            face_value = self._parse_decimal(
-                row.get('Face Value') or row.get('FACE VALUE')
-            )
-
-            data = {
-                "isin": isin,
-                "ticker_symbol": ticker,
-                "name": name,
-                "asset_type": "BOND",
-                "bond_type": BondType.GOVERNMENT if is_gov else BondType.CORPORATE,
-                "maturity_date": maturity_date,
-                "face_value": face_value,
-                "coupon_rate": coupon_rate,
-                "exchange": "BSE"
-            }
-            self._create_asset(data)
+        frame = pd.DataFrame({
+            "isin": isin,
+            "ticker_symbol": ticker.where(ticker != "", isin),
+            "name": name.where(name != "", "Bond " + isin),
+            "asset_type": "BOND",
+            "bond_type": BondType.GOVERNMENT if is_gov else BondType.CORPORATE,
+            "maturity_date": self._raw(df, 'Maturity Date', 'MaturityDate'),
+            "face_value": self._raw(df, 'Face Value', 'FACE VALUE'),
+            "coupon_rate": self._raw(
+                df, 'COUP0N (%)', 'Coupon (%)', 'Coupon Rate (%)'
+            ),
+            "exchange": "BSE"
+        })
+        self._create_assets_from_frame(frame[isin != ""])
 
     # --- Phase 4: Indices ---
     def process_bse_index(self, filepath: str):
@@ -665,23 +806,18 @@ class AssetSeeder:
         print(f"Processing BSE Index: {filepath}")
         try:
             df = pd.read_csv(filepath)
-            for _, row in df.iterrows():
-                ticker = str(row.get('IndexID', '')).strip()
-                name = str(row.get('IndexName', '')).strip()
-
-                if not ticker:
-                    continue
-
-                data = {
-                    "isin": None, # Indices usually don't have ISINs in this file
-                    "ticker_symbol": ticker,
-                    "name": name,
-                    "asset_type": "INDEX",
-                    "exchange": "BSE"
-                }
-                self._create_asset(data)
+            ticker = self._text(df, 'IndexID')
+            frame = pd.DataFrame({
+                "isin": None, # Indices usually don't have ISINs in this file
+                "ticker_symbol": ticker,
+                "name": self._text(df, 'IndexName'),
+                "asset_type": "INDEX",
+                "exchange": "BSE"
+            }, index=df.index)
+            self._create_assets_from_frame(frame[ticker != ""])
         except Exception as e:
             print(f"Error reading BSE Index: {e}")
+        self._write_pending()
 
     # --- Phase 5: Fallback (ICICI) with Heuristics ---
     def process_icici_fallback(self, filepath: str):
@@ -740,12 +876,37 @@ class AssetSeeder:
                                 )
                             )
 
-                        for _, row in df.iterrows():
-                             self._process_fallback_row(row, exchange)
+                        # Only the identifying columns matter for a delta;
+                        # the masters also carry daily-changing fields.
+                        code_col = (
+                            "ExchangeCode" if exchange == "NSE" else "ScripID"
+                        )
+                        keys = [None] * len(df)
+                        if self.sync_state is not None and code_col in df.columns:
+                            id_cols = [
+                                c for c in ICICI_ID_COLUMNS if c in df.columns
+                            ]
+                            row_keys = exchange + ":" + df[code_col].astype(str)
+                            mask = self._changed_rows(df[id_cols], row_keys).index
+                            df = df.loc[mask]
+                            keys = row_keys.loc[mask].tolist()
+
+                        # Rows stay on the per-row path: known assets still
+                        # get their ShortName alias, and the heuristics read
+                        # each name. Plain dicts are far cheaper to iterate
+                        # than the Series objects produced by iterrows().
+                        for key, row in zip(keys, df.to_dict("records")):
+                            self._process_fallback_row(row, exchange, sync_key=key)
         except Exception as e:
             print(f"Error processing Fallback Zip: {e}")
+        self._write_pending()
 
-    def _process_fallback_row(self, row: pd.Series, exchange: Optional[str] = None):
+    def _process_fallback_row(
+        self,
+        row: pd.Series,
+        exchange: Optional[str] = None,
+        sync_key: Optional[str] = None,
+    ):
         # NSE: ExchangeCode, CompanyName, ISINCode, Series
         # BSE: ScripID, ScripName, ISINCode, Series
 
@@ -829,22 +990,15 @@ class AssetSeeder:
             "exchange": exchange,
         }
         asset = self._create_asset(data)
+        self._record_synced(sync_key, data, asset)
 
         # Auto-create ICICI ShortName alias (#216)
         # If asset was already created by an earlier phase,
         # look it up so we can still create the alias.
-        if not asset:
-            if isin and isin in self.existing_isins:
-                asset = self.db.query(models.Asset).filter(
-                    models.Asset.isin == isin
-                ).first()
-            if not asset and ticker in self.existing_tickers:
-                asset = crud.asset.get_by_ticker(
-                    self.db, ticker_symbol=ticker
-                )
+        asset_id = asset.id if asset else self._lookup_asset_id(isin, ticker)
 
         if (
-            asset
+            asset_id
             and short_name
             and not pd.isna(short_name)
         ):
@@ -853,7 +1007,7 @@ class AssetSeeder:
                 self._create_alias(
                     alias_symbol=sn,
                     source="ICICI Direct Tradebook",
-                    asset_id=asset.id,
+                    asset_id=asset_id,
                 )
 
     def _classify_asset_heuristic(
@@ -986,6 +1140,7 @@ class AssetSeeder:
                         stats["created"] += 1
 
             # 2. Cross-Verify existing assets in DB
+            self._write_pending()
             db_assets = self.db.query(models.Asset).filter(
                 models.Asset.exchange.in_(["NSE", "N/A"])
             ).all()
@@ -999,6 +1154,7 @@ class AssetSeeder:
                         asset.isin = candidate_isin
                         asset.exchange = "NSE"
                         self.existing_isins.add(candidate_isin)
+                        self.asset_ids_by_isin[candidate_isin] = asset.id
                         stats["updated"] += 1
                 elif asset.isin and ticker in symbol_to_key:
                     stats["verified"] += 1
@@ -0,0 +1,249 @@
+"""
+Persistent state for incremental (delta) asset-master syncs.
+
+For every source the last processed version is recorded: the HTTP validators
+(ETag / Last-Modified) of its download, a SHA-256 of the file, and a
+fingerprint of every instrument row it contained. A delta sync uses these to
+skip unchanged downloads and files outright and to hand only inserted or
+changed rows to the seeder. Rows that disappeared since the last version are
+reported as removed.
+
+State lives on disk next to the disk cache and is only written after the
+database changes of a sync have been committed, so a failed sync is simply
+redone in full on the next run. A changed row's fingerprint is only kept once
+the seeder confirms the row is in the database, and a source with rows left
+unconfirmed keeps no file hash or download validators, so those rows are
+offered again by the next sync.
+"""
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, Optional, Set
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "manifest.json"
+
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def default_state_dir() -> str:
+    return os.path.join(settings.DISK_CACHE_DIR or "/tmp", "asset_sync")
+
+
+class AssetSyncState:
+    """Last processed version of every asset-master source."""
+
+    def __init__(self, state_dir: Optional[str] = None):
+        self.state_dir = Path(state_dir or default_state_dir())
+        self.manifest: Dict = {"sources": {}}
+        self._lock = threading.Lock()
+        # Per-source results of the current run, persisted by save()
+        self._downloads: Dict[str, Dict[str, Optional[str]]] = {}
+        self._content_hashes: Dict[str, str] = {}
+        self._fingerprints: Dict[str, Dict[str, str]] = {}
+        # Changed rows awaiting `confirm`
+        self._unconfirmed: Dict[str, Dict[str, str]] = {}
+        self._previous: Dict[str, Dict[str, str]] = {}
+        self._changed: Dict[str, int] = {}
+        self.not_modified: Set[str] = set()
+        self.unchanged: Set[str] = set()
+
+        manifest_path = self.state_dir / MANIFEST_FILE
+        if manifest_path.exists():
+            try:
+                self.manifest = json.loads(manifest_path.read_text())
+            except (OSError, ValueError) as e:
+                logger.warning(f"Ignoring unreadable asset sync state: {e}")
+
+    @property
+    def sources(self) -> Dict[str, Dict]:
+        return self.manifest.setdefault("sources", {})
+
+    @property
+    def synced_at(self) -> Optional[datetime]:
+        value = self.manifest.get("synced_at")
+        return datetime.fromisoformat(value) if value else None
+
+    def reset(self) -> None:
+        """Forget all previous versions so the next sync runs in full."""
+        self.manifest = {"sources": {}}
+
+    # --- Downloads ---
+    def validators(self, source: str, url: str) -> Dict[str, str]:
+        """Conditional request headers for `url` if it was fetched last time."""
+        entry = self.sources.get(source) or {}
+        if entry.get("url") != url:
+            return {}
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def record_download(
+        self,
+        source: str,
+        url: str,
+        etag: Optional[str],
+        last_modified: Optional[str],
+        not_modified: bool = False,
+    ) -> None:
+        with self._lock:
+            if not_modified:
+                self.not_modified.add(source)
+                return
+            self._downloads[source] = {
+                "url": url, "etag": etag, "last_modified": last_modified
+            }
+
+    # --- Files ---
+    def is_unchanged(self, source: str, path: str) -> bool:
+        """True if `path` is byte-identical to the last processed file."""
+        content_hash = file_sha256(path)
+        self._content_hashes[source] = content_hash
+        if self.sources.get(source, {}).get("content_hash") == content_hash:
+            self.unchanged.add(source)
+            return True
+        return False
+
+    # --- Rows ---
+    def _load_fingerprints(self, source: str) -> Dict[str, str]:
+        if source not in self._previous:
+            path = self.state_dir / f"{source}.json.gz"
+            rows: Dict[str, str] = {}
+            if source in self.sources and path.exists():
+                try:
+                    with gzip.open(path, "rt") as f:
+                        rows = json.load(f)
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Ignoring unreadable fingerprints {path}: {e}")
+            self._previous[source] = rows
+        return self._previous[source]
+
+    def changed_rows(
+        self, source: str, frame: "pd.DataFrame", keys: "pd.Series"
+    ) -> "pd.Series":
+        """
+        Boolean mask of the rows of `frame` that are new or differ from the
+        last processed version of `source`. `keys` identifies each instrument.
+        The fingerprints of the changed rows are held until `confirm`.
+        """
+        import pandas as pd
+
+        previous = self._load_fingerprints(source)
+        hashes = pd.util.hash_pandas_object(
+            frame.astype(str), index=False
+        ).map("{:016x}".format)
+        keys = keys.astype(str)
+
+        current = self._fingerprints.setdefault(source, {})
+        unconfirmed = self._unconfirmed.setdefault(source, {})
+        changed = []
+        for key, row_hash in zip(keys, hashes):
+            is_changed = previous.get(key) != row_hash
+            (unconfirmed if is_changed else current)[key] = row_hash
+            changed.append(is_changed)
+
+        mask = pd.Series(changed, index=frame.index, dtype=bool)
+        self._changed[source] = self._changed.get(source, 0) + int(mask.sum())
+        return mask
+
+    def confirm(self, source: str, keys: Iterable[str]) -> None:
+        """Keeps the fingerprints of changed rows now in the database."""
+        with self._lock:
+            unconfirmed = self._unconfirmed.get(source, {})
+            current = self._fingerprints.setdefault(source, {})
+            for key in keys:
+                if key in unconfirmed:
+                    current[key] = unconfirmed.pop(key)
+
+    def removed_keys(self, source: str) -> Set[str]:
+        """Instruments of the last version of `source` missing from this one."""
+        if source not in self._fingerprints:
+            return set()
+        return (
+            set(self._load_fingerprints(source))
+            - set(self._fingerprints[source])
+            - set(self._unconfirmed.get(source, {}))
+        )
+
+    def summary(self) -> Dict[str, Dict]:
+        result = {}
+        for source in sorted(self.not_modified | self.unchanged):
+            result[source] = {"status": "unchanged"}
+        for source, rows in self._fingerprints.items():
+            result[source] = {
+                "status": "delta" if self._load_fingerprints(source) else "full",
+                "rows": len(rows) + len(self._unconfirmed.get(source, {})),
+                "changed": self._changed.get(source, 0),
+                "removed": len(self.removed_keys(source)),
+            }
+        return result
+
+    def save(self, asset_count: int) -> None:
+        """Persist this run as the last processed version of each source."""
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+        for source, rows in self._fingerprints.items():
+            tmp = self.state_dir / f"{source}.json.gz.tmp"
+            with gzip.open(tmp, "wt") as f:
+                json.dump(rows, f)
+            os.replace(tmp, self.state_dir / f"{source}.json.gz")
+
+        for source in set(self._downloads) | set(self._content_hashes):
+            entry = self.sources.setdefault(source, {})
+            if self._unconfirmed.get(source):
+                # Neither skip this version's download nor its file next time
+                for field in ("url", "etag", "last_modified", "content_hash"):
+                    entry.pop(field, None)
+            else:
+                entry.update(self._downloads.get(source, {}))
+                if source in self._content_hashes:
+                    entry["content_hash"] = self._content_hashes[source]
+            if source in self._fingerprints:
+                entry["rows"] = len(self._fingerprints[source])
+
+        self.manifest["synced_at"] = datetime.now(timezone.utc).isoformat()
+        self.manifest["asset_count"] = asset_count
+        tmp = self.state_dir / f"{MANIFEST_FILE}.tmp"
+        tmp.write_text(json.dumps(self.manifest, indent=2))
+        os.replace(tmp, self.state_dir / MANIFEST_FILE)
+
+
+def load_sync_state(
+    db: Session, full: bool = False, state_dir: Optional[str] = None
+) -> AssetSyncState:
+    """
+    Loads the sync state for a new run. The state is discarded (forcing a
+    full sync) when `full` is set or when assets were deleted since the last
+    sync, as the recorded versions would then hide instruments that need to
+    be re-created.
+    """
+    from app.models import Asset
+
+    state = AssetSyncState(state_dir)
+    if full:
+        state.reset()
+    elif state.manifest.get("asset_count", 0) > db.query(Asset).count():
+        logger.info("Assets were removed since the last sync; running in full.")
+        state.reset()
+    return state
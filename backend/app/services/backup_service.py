@@ -1,18 +1,51 @@
+"""
+User data backup and restore.
+
+Backups are produced as a stream of records, section by section, and can be
+written either as the original single JSON document or as NDJSON (one record
+per line) so that neither side needs the whole backup in memory. Restores
+insert rows in multi-row batches per table.
+"""
+import json
 import logging
 import uuid
+from collections import defaultdict
 from datetime import date, datetime
 from decimal import Decimal
-from typing import Any, Dict
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
 from fastapi import HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import case, delete, func, insert, or_, select
+from sqlalchemy.orm import Session, selectinload
 
 from app import crud, models, schemas
+from app.crud import crud_corporate_action_adjustment
 from app.schemas.transaction import TransactionType
+from app.services import transaction_rules
+from app.services.adjustment_factors import LotBook
+from app.services.asset_resolver import AssetRef, AssetResolver
+from app.utils.pydantic_compat import model_dump
 
 logger = logging.getLogger(__name__)
 
-BACKUP_VERSION = "1.2"
+BACKUP_VERSION = "1.3"
+
+# Rows fetched per round trip when exporting, and rows per multi-row INSERT
+# when restoring
+BATCH_SIZE = 1000
+
+# Sections in the order they are written and restored. Later sections refer
+# to rows of earlier ones (portfolios, PPF and bond assets) by name.
+SECTIONS = [
+    "portfolios",
+    "watchlists",
+    "ppf_accounts",
+    "bonds",
+    "fixed_deposits",
+    "recurring_deposits",
+    "transactions",
+    "goals",
+]
 
 
 def _serialize_date(d: Any) -> str | None:
@@ -44,96 +77,149 @@ def _parse_date(d: Any) -> date | None:
     return None
 
 
-def create_backup(db: Session, user_id: uuid.UUID) -> Dict[str, Any]:
-    user = crud.user.get(db, id=user_id)
-    if not user:
-        raise ValueError("User not found")
+def _dumps(obj: Any) -> str:
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=str)
 
-    # Fetch Portfolios
-    portfolios = crud.portfolio.get_multi_by_owner(db, user_id=user_id)
-    portfolio_map = {p.id: p.name for p in portfolios}
 
-    # Fetch Transactions (iterating portfolios)
-    all_transactions = []
-    transaction_assets = set()
+def _tx_sort_key(tx: Dict[str, Any]) -> Tuple[str, int]:
+    """Restore order: by day, with SELLs after everything else on that day."""
+    t_date_str = _serialize_date(tx.get("transaction_date")) or ""
+    t_type = tx.get("transaction_type")
+    priority = 2 if t_type and str(t_type).upper() == "SELL" else 1
+    return (t_date_str, priority)
 
-    for p in portfolios:
-        txs = crud.transaction.get_multi_by_portfolio(db, portfolio_id=p.id)
-        for tx in txs:
-            transaction_assets.add(tx.asset_id)
-            t_type = tx.transaction_type
-            if t_type == TransactionType.CONTRIBUTION:
-                t_type = "PPF_CONTRIBUTION"
-
-            asset = crud.asset.get(db, id=tx.asset_id)
-
-            tx_data = {
-                "portfolio_name": p.name,
-                "transaction_type": t_type,
-                "quantity": _serialize_decimal(tx.quantity),
-                "price_per_unit": _serialize_decimal(tx.price_per_unit),
-                "transaction_date": _serialize_date(tx.transaction_date),
-                "fees": _serialize_decimal(tx.fees),
-                "details": tx.details,
-            }
 
-            if asset:
-                if asset.asset_type == "PPF":
-                    tx_data["ppf_account_number"] = asset.account_number
-                else:
-                    tx_data["ticker_symbol"] = asset.ticker_symbol
-                    tx_data["isin"] = asset.isin
+# --- Export ---
 
-            all_transactions.append(tx_data)
 
-    # Fetch Assets for Definitions (PPF, Bonds)
-    ppf_accounts = []
-    bonds = []
+def _user_portfolio_ids(user_id: uuid.UUID):
+    return select(models.Portfolio.id).where(models.Portfolio.user_id == user_id)
 
-    # Use a set to track processed assets to avoid duplicates in definitions
-    processed_assets = set()
 
-    if transaction_assets:
-        for aid in transaction_assets:
-            if aid in processed_assets:
-                continue
-            processed_assets.add(aid)
-
-            a = crud.asset.get(db, id=aid)
-            if a:
-                if a.asset_type == "PPF":
-                    ppf_accounts.append({
-                        "account_number": a.account_number,
-                        "institution": a.name,
-                        "opening_date": _serialize_date(a.opening_date)
-                    })
-                elif a.asset_type == "BOND":
-                    # Access related bond - handling both relationship styles just in
-                    # case
-                    b = a.bond
-                    if isinstance(b, list) and b:
-                        b = b[0]
-
-                    if b:
-                        bonds.append({
-                            "name": a.name,
-                            "isin": a.isin,
-                            "bond_type": b.bond_type,
-                            "coupon_rate": _serialize_decimal(b.coupon_rate),
-                            "face_value": _serialize_decimal(b.face_value),
-                            "maturity_date": _serialize_date(b.maturity_date)
-                        })
-
-    # Fetch FDs
-    fds = (
-        db.query(models.FixedDeposit)
+def _iter_portfolios(db: Session, user_id: uuid.UUID) -> Iterator[Dict[str, Any]]:
+    rows = (
+        db.query(models.Portfolio.name, models.Portfolio.description)
+        .filter(models.Portfolio.user_id == user_id)
+        .order_by(models.Portfolio.name)
+    )
+    for name, description in rows:
+        yield {"name": name, "description": description}
+
+
+def _iter_transactions(db: Session, user_id: uuid.UUID) -> Iterator[Dict[str, Any]]:
+    """
+    All transactions of the user's portfolios with their asset identifiers,
+    from one joined query streamed in batches. Rows come out in restore
+    order so that an NDJSON backup can be restored without sorting.
+    """
+    tx = models.Transaction
+    query = (
+        db.query(
+            tx.transaction_type,
+            tx.quantity,
+            tx.price_per_unit,
+            tx.transaction_date,
+            tx.fees,
+            tx.details,
+            models.Portfolio.name.label("portfolio_name"),
+            models.Asset.asset_type,
+            models.Asset.ticker_symbol,
+            models.Asset.isin,
+            models.Asset.account_number,
+        )
+        .join(models.Portfolio, tx.portfolio_id == models.Portfolio.id)
+        .outerjoin(models.Asset, tx.asset_id == models.Asset.id)
+        .filter(models.Portfolio.user_id == user_id)
+        .order_by(
+            func.date(tx.transaction_date),
+            case((tx.transaction_type == TransactionType.SELL.value, 2), else_=1),
+            tx.transaction_date,
+            tx.id,
+        )
+    )
+    for row in query.yield_per(BATCH_SIZE):
+        t_type = row.transaction_type
+        if t_type == TransactionType.CONTRIBUTION:
+            t_type = "PPF_CONTRIBUTION"
+
+        tx_data = {
+            "portfolio_name": row.portfolio_name,
+            "transaction_type": t_type,
+            "quantity": _serialize_decimal(row.quantity),
+            "price_per_unit": _serialize_decimal(row.price_per_unit),
+            "transaction_date": _serialize_date(row.transaction_date),
+            "fees": _serialize_decimal(row.fees),
+            "details": row.details,
+        }
+
+        if row.asset_type is not None:
+            if row.asset_type == "PPF":
+                tx_data["ppf_account_number"] = row.account_number
+            else:
+                tx_data["ticker_symbol"] = row.ticker_symbol
+                tx_data["isin"] = row.isin
+
+        yield tx_data
+
+
+def _transaction_assets(db: Session, user_id: uuid.UUID, asset_type: str):
+    asset_ids = (
+        select(models.Transaction.asset_id)
+        .where(models.Transaction.portfolio_id.in_(_user_portfolio_ids(user_id)))
+        .distinct()
+    )
+    return (
+        db.query(models.Asset)
+        .filter(models.Asset.id.in_(asset_ids), models.Asset.asset_type == asset_type)
+        .order_by(models.Asset.ticker_symbol)
+    )
+
+
+def _iter_ppf_accounts(
+    db: Session, user_id: uuid.UUID
+) -> Iterator[Dict[str, Any]]:
+    for a in _transaction_assets(db, user_id, "PPF"):
+        yield {
+            "account_number": a.account_number,
+            "institution": a.name,
+            "opening_date": _serialize_date(a.opening_date),
+        }
+
+
+def _iter_bonds(db: Session, user_id: uuid.UUID) -> Iterator[Dict[str, Any]]:
+    assets = _transaction_assets(db, user_id, "BOND").options(
+        selectinload(models.Asset.bond)
+    )
+    for a in assets:
+        # Access related bond - handling both relationship styles just in case
+        b = a.bond
+        if isinstance(b, list) and b:
+            b = b[0]
+
+        if b:
+            yield {
+                "name": a.name,
+                "isin": a.isin,
+                "bond_type": b.bond_type,
+                "coupon_rate": _serialize_decimal(b.coupon_rate),
+                "face_value": _serialize_decimal(b.face_value),
+                "maturity_date": _serialize_date(b.maturity_date),
+            }
+
+
+def _iter_fixed_deposits(
+    db: Session, user_id: uuid.UUID
+) -> Iterator[Dict[str, Any]]:
+    rows = (
+        db.query(models.FixedDeposit, models.Portfolio.name)
+        .outerjoin(
+            models.Portfolio,
+            models.FixedDeposit.portfolio_id == models.Portfolio.id,
+        )
         .filter(models.FixedDeposit.user_id == user_id)
-        .all()
     )
-    fd_list = []
-    for fd in fds:
-        p_name = portfolio_map.get(fd.portfolio_id)
-        fd_list.append({
+    for fd, p_name in rows:
+        yield {
             "portfolio_name": p_name,
             "account_number": fd.account_number,
             "institution": fd.name,
@@ -147,30 +233,41 @@ def create_backup(db: Session, user_id: uuid.UUID) -> Dict[str, Any]:
             "payout_type": fd.interest_payout.upper()
             if fd.interest_payout
             else "CUMULATIVE",
-        })
+        }
 
-    # Fetch RDs
-    rds = (
-        db.query(models.RecurringDeposit)
+
+def _iter_recurring_deposits(
+    db: Session, user_id: uuid.UUID
+) -> Iterator[Dict[str, Any]]:
+    rows = (
+        db.query(models.RecurringDeposit, models.Portfolio.name)
+        .outerjoin(
+            models.Portfolio,
+            models.RecurringDeposit.portfolio_id == models.Portfolio.id,
+        )
         .filter(models.RecurringDeposit.user_id == user_id)
-        .all()
     )
-    rd_list = []
-    for rd in rds:
-        p_name = portfolio_map.get(rd.portfolio_id)
-        rd_list.append({
+    for rd, p_name in rows:
+        yield {
             "portfolio_name": p_name,
             "account_number": rd.account_number,
             "institution": rd.name,
             "monthly_installment": _serialize_decimal(rd.monthly_installment),
             "interest_rate": _serialize_decimal(rd.interest_rate),
             "start_date": _serialize_date(rd.start_date),
-            "tenure_months": rd.tenure_months
-        })
+            "tenure_months": rd.tenure_months,
+        }
 
-    # Fetch Goals
-    goals = crud.goal.get_multi_by_owner(db, user_id=user_id)
-    goal_list = []
+
+def _iter_goals(db: Session, user_id: uuid.UUID) -> Iterator[Dict[str, Any]]:
+    goals = (
+        db.query(models.Goal)
+        .options(
+            selectinload(models.Goal.links).joinedload(models.GoalLink.portfolio),
+            selectinload(models.Goal.links).joinedload(models.GoalLink.asset),
+        )
+        .filter(models.Goal.user_id == user_id)
+    )
     for g in goals:
         linked_names = []
         linked_assets = []
@@ -180,51 +277,573 @@ def create_backup(db: Session, user_id: uuid.UUID) -> Dict[str, Any]:
             elif link.asset:
                 linked_assets.append(link.asset.ticker_symbol)
 
-        goal_list.append({
+        yield {
             "name": g.name,
             "target_amount": _serialize_decimal(g.target_amount),
             "target_date": _serialize_date(g.target_date),
             "linked_portfolios": linked_names,
-            "linked_assets": linked_assets
-        })
+            "linked_assets": linked_assets,
+        }
+
 
-    # Fetch Watchlists
-    watchlists = crud.watchlist.get_multi_by_user(db, user_id=user_id)
-    watchlist_list = []
+def _iter_watchlists(db: Session, user_id: uuid.UUID) -> Iterator[Dict[str, Any]]:
+    watchlists = (
+        db.query(models.Watchlist)
+        .options(
+            selectinload(models.Watchlist.items).joinedload(models.WatchlistItem.asset)
+        )
+        .filter(models.Watchlist.user_id == user_id)
+    )
     for w in watchlists:
         items = [wi.asset.ticker_symbol for wi in w.items if wi.asset]
-        watchlist_list.append({
-            "name": w.name,
-            "items": items
-        })
-
-    # Portfolios list
-    portfolio_list = [
-        {"name": p.name, "description": p.description} for p in portfolios
-    ]
+        yield {"name": w.name, "items": items}
+
+
+_SECTION_READERS: Dict[
+    str, Callable[[Session, uuid.UUID], Iterator[Dict[str, Any]]]
+] = {
+    "portfolios": _iter_portfolios,
+    "watchlists": _iter_watchlists,
+    "ppf_accounts": _iter_ppf_accounts,
+    "bonds": _iter_bonds,
+    "fixed_deposits": _iter_fixed_deposits,
+    "recurring_deposits": _iter_recurring_deposits,
+    "transactions": _iter_transactions,
+    "goals": _iter_goals,
+}
 
-    data = {
-        "portfolios": portfolio_list,
-        "transactions": all_transactions,
-        "fixed_deposits": fd_list,
-        "recurring_deposits": rd_list,
-        "ppf_accounts": ppf_accounts,
-        "bonds": bonds,
-        "goals": goal_list,
-        "watchlists": watchlist_list,
+
+def _metadata() -> Dict[str, Any]:
+    return {
+        "version": BACKUP_VERSION,
+        "export_date": datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
     }
 
+
+def create_backup(db: Session, user_id: uuid.UUID) -> Dict[str, Any]:
+    """Builds the whole backup as one dict. Prefer `iter_backup` for export."""
+    if not crud.user.get(db, id=user_id):
+        raise ValueError("User not found")
+
     return {
-        "metadata": {
-            "version": BACKUP_VERSION,
-            "export_date": datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "metadata": _metadata(),
+        "data": {
+            section: list(_SECTION_READERS[section](db, user_id))
+            for section in SECTIONS
         },
-        "data": data,
     }
 
 
-def restore_backup(db: Session, user_id: uuid.UUID, backup_data: Dict[str, Any]):
-    metadata = backup_data.get("metadata", {})
+def iter_backup(db: Session, user_id: uuid.UUID, fmt: str = "json") -> Iterator[str]:
+    """
+    Streams the user's backup as text chunks of at most `BATCH_SIZE` records.
+
+    `fmt="json"` produces the same document as `create_backup`; `"ndjson"`
+    writes a metadata line followed by one ``{"section": ..., "data": ...}``
+    line per record.
+    """
+    if not crud.user.get(db, id=user_id):
+        raise ValueError("User not found")
+    if fmt not in ("json", "ndjson"):
+        raise ValueError(f"Unsupported backup format: {fmt}")
+    return _iter_ndjson(db, user_id) if fmt == "ndjson" else _iter_json(db, user_id)
+
+
+def _iter_json(db: Session, user_id: uuid.UUID) -> Iterator[str]:
+    yield '{"metadata":' + _dumps(_metadata()) + ',"data":{'
+    for index, section in enumerate(SECTIONS):
+        yield ("," if index else "") + _dumps(section) + ":["
+        chunk: List[str] = []
+        first = True
+        for record in _SECTION_READERS[section](db, user_id):
+            chunk.append(_dumps(record))
+            if len(chunk) >= BATCH_SIZE:
+                yield ("" if first else ",") + ",".join(chunk)
+                chunk, first = [], False
+        if chunk:
+            yield ("" if first else ",") + ",".join(chunk)
+        yield "]"
+    yield "}}"
+
+
+def _iter_ndjson(db: Session, user_id: uuid.UUID) -> Iterator[str]:
+    yield _dumps({"metadata": {**_metadata(), "format": "ndjson"}}) + "\n"
+    for section in SECTIONS:
+        chunk: List[str] = []
+        for record in _SECTION_READERS[section](db, user_id):
+            chunk.append(_dumps({"section": section, "data": record}))
+            if len(chunk) >= BATCH_SIZE:
+                yield "\n".join(chunk) + "\n"
+                chunk = []
+        if chunk:
+            yield "\n".join(chunk) + "\n"
+
+
+# --- Restore ---
+
+
+class _LotLedger:
+    """
+    Incremental replica of `CRUDTransaction.get_available_lots` for one
+    portfolio and asset. Restored SELLs get the FIFO links they would have
+    been given by `create_with_portfolio` one at a time, without re-reading
+    the asset's history for every SELL.
+    """
+
+    def __init__(self, currency: Optional[str]):
+        self.book = LotBook(floor_splits=currency == "INR")
+        # Events of the current day, applied in lot-matching order (buys,
+        # then splits, then sells) once the day is complete or a SELL needs
+        # the lots
+        self._day: Optional[datetime] = None
+        self._pending: List[Tuple[str, Any]] = []
+
+    def add(self, day: datetime, t_type: str, event: Any) -> None:
+        if t_type not in transaction_rules.LOT_EVENT_PRIORITY:
+            return
+        if day != self._day:
+            self._apply_pending()
+            self._day = day
+        self._pending.append((t_type, event))
+
+    def available_lots(self) -> List[Tuple[uuid.UUID, Decimal]]:
+        self._apply_pending()
+        return [(lot.key, lot.quantity) for lot in self.book.open_lots()]
+
+    def _apply_pending(self) -> None:
+        pending = sorted(
+            self._pending, key=lambda e: transaction_rules.LOT_EVENT_PRIORITY[e[0]]
+        )
+        self._pending = []
+        for t_type, event in pending:
+            if t_type == "SPLIT":
+                quantity, price_per_unit = event
+                if price_per_unit > 0 and quantity > 0:
+                    self.book.split(quantity / price_per_unit)
+            elif t_type == "SELL":
+                self.book.sell(*event)
+            else:
+                self.book.add(*event)
+
+
+class _BackupRestorer:
+    """
+    Recreates backup records for a user. Rows are queued per table and
+    written with multi-row INSERTs, in foreign-key order, every `BATCH_SIZE`
+    rows; transactions are replayed with the same validation, lot linking
+    and sell-to-cover handling as `crud.transaction.create_with_portfolio`.
+    """
+
+    _TABLE_ORDER = [
+        models.Portfolio.__table__,
+        models.Watchlist.__table__,
+        models.WatchlistItem.__table__,
+        models.FixedDeposit.__table__,
+        models.RecurringDeposit.__table__,
+        models.Transaction.__table__,
+        models.TransactionLink.__table__,
+        models.Goal.__table__,
+        models.GoalLink.__table__,
+    ]
+
+    def __init__(self, db: Session, user_id: uuid.UUID):
+        self.db = db
+        self.user_id = user_id
+        self.portfolio_map: Dict[str, uuid.UUID] = {}  # name -> id
+        self._rows: Dict[Any, List[Dict[str, Any]]] = defaultdict(list)
+        self._pending_rows = 0
+        # Backups name assets by their exact ticker or ISIN, never by alias
+        self._assets = AssetResolver(db, aliases=False, names=False, fetch_tickers=True)
+        self._pending_transactions: List[Tuple[Dict[str, Any], str]] = []
+        self._last_tx_key: Optional[Tuple[str, int]] = None
+        self._once_keys: set = set()
+        self._units: Dict[uuid.UUID, Decimal] = defaultdict(Decimal)
+        self._ledgers: Dict[Tuple[uuid.UUID, uuid.UUID], _LotLedger] = {}
+        # (portfolio id, asset id) of holdings with corporate actions
+        self._adjusted: set = set()
+        self._handlers = {
+            "portfolios": self._add_portfolio,
+            "watchlists": self._add_watchlist,
+            "ppf_accounts": self._add_ppf_account,
+            "bonds": self._add_bond,
+            "fixed_deposits": self._add_fixed_deposit,
+            "recurring_deposits": self._add_recurring_deposit,
+            "transactions": self._add_transaction,
+            "goals": self._add_goal,
+        }
+
+    def add(self, section: str, record: Dict[str, Any]) -> None:
+        handler = self._handlers.get(section)
+        if handler:
+            handler(record)
+
+    def _queue(self, model, row: Dict[str, Any]) -> None:
+        self._rows[model.__table__].append(row)
+        self._pending_rows += 1
+        if self._pending_rows >= BATCH_SIZE:
+            self._insert_rows()
+
+    def flush(self) -> None:
+        self._add_pending_transactions()
+        self._insert_rows()
+        for portfolio_id, asset_id in self._adjusted:
+            crud.corporate_action_adjustment.rebuild(
+                self.db, portfolio_id=portfolio_id, asset_id=asset_id
+            )
+
+    def _insert_rows(self) -> None:
+        for table in self._TABLE_ORDER:
+            rows = self._rows.pop(table, None)
+            if rows:
+                self.db.execute(insert(table), rows)
+        self._pending_rows = 0
+
+    def _row(self, obj_in, **extra) -> Dict[str, Any]:
+        return {**model_dump(obj_in), "id": uuid.uuid4(), **extra}
+
+    # --- Assets ---
+    def _asset_by_ticker(
+        self, ticker: str, create: bool = False
+    ) -> Optional[Tuple[uuid.UUID, str]]:
+        asset = self._assets.resolve(AssetRef(ticker), fetch=create)
+        return (asset.id, asset.currency) if asset else None
+
+    def _ppf_ticker(self, account_number: str) -> str:
+        user_id_short = f"{str(self.user_id)[:8]}-"
+        return f"PPF-{user_id_short}{account_number}".upper()
+
+    def _transaction_asset_ref(
+        self, tx_data: Dict[str, Any]
+    ) -> Tuple[Optional[AssetRef], bool]:
+        """The transaction's asset and whether the providers may be asked."""
+        if "ppf_account_number" in tx_data:
+            return AssetRef(self._ppf_ticker(tx_data["ppf_account_number"])), False
+        if tx_data.get("isin"):
+            return AssetRef(tx_data.get("ticker_symbol"), tx_data["isin"]), True
+        if "ticker_symbol" in tx_data:
+            return AssetRef(tx_data["ticker_symbol"]), True
+        return None, False
+
+    # --- Sections ---
+    def _add_portfolio(self, p_data: Dict[str, Any]) -> None:
+        p_in = schemas.PortfolioCreate(
+            name=p_data["name"], description=p_data.get("description")
+        )
+        row = self._row(p_in, user_id=self.user_id)
+        self.portfolio_map[p_in.name] = row["id"]
+        self._queue(models.Portfolio, row)
+
+    def _add_watchlist(self, w_data: Dict[str, Any]) -> None:
+        w_in = schemas.WatchlistCreate(name=w_data["name"])
+        row = self._row(w_in, user_id=self.user_id)
+        self._queue(models.Watchlist, row)
+
+        asset_ids = set()
+        for ticker in w_data.get("items", []):
+            asset = self._asset_by_ticker(ticker, create=True)
+            if asset and asset[0] not in asset_ids:
+                asset_ids.add(asset[0])
+                item_in = schemas.WatchlistItemCreate(asset_id=asset[0])
+                self._queue(
+                    models.WatchlistItem,
+                    self._row(item_in, watchlist_id=row["id"], user_id=self.user_id),
+                )
+
+    def _add_ppf_account(self, ppf_data: Dict[str, Any]) -> None:
+        new_ticker = self._ppf_ticker(ppf_data["account_number"])
+        asset = crud.asset.get_by_ticker(self.db, ticker_symbol=new_ticker)
+        if not asset:
+            asset_in = schemas.AssetCreate(
+                name=ppf_data["institution"],
+                ticker_symbol=new_ticker,
+                asset_type="PPF",
+                currency="INR",
+                account_number=ppf_data["account_number"],
+                opening_date=_parse_date(ppf_data.get("opening_date")),
+            )
+            crud.asset.create(self.db, obj_in=asset_in)
+
+    def _add_bond(self, bond_data: Dict[str, Any]) -> None:
+        isin = bond_data.get("isin")
+        if not isin:
+            return
+        asset = self.db.query(models.Asset).filter(models.Asset.isin == isin).first()
+        if asset:
+            return
+        # Bonds in a backup carry no ticker; use the ISIN, which is unique
+        asset_in = schemas.AssetCreate(
+            name=bond_data["name"],
+            ticker_symbol=isin,
+            asset_type="BOND",
+            currency="INR",
+            isin=isin,
+        )
+        asset = crud.asset.create(self.db, obj_in=asset_in)
+        bond_in = schemas.BondCreate(
+            asset_id=asset.id,
+            bond_type=bond_data["bond_type"],
+            face_value=Decimal(bond_data["face_value"]),
+            coupon_rate=Decimal(bond_data["coupon_rate"]),
+            maturity_date=_parse_date(bond_data["maturity_date"]),
+            isin=isin,
+        )
+        crud.bond.create(self.db, obj_in=bond_in)
+
+    def _add_fixed_deposit(self, fd_data: Dict[str, Any]) -> None:
+        p_name = fd_data.get("portfolio_name")
+        if not p_name or p_name not in self.portfolio_map:
+            return
+        fd_in = schemas.FixedDepositCreate(
+            name=fd_data["institution"],
+            account_number=fd_data["account_number"],
+            principal_amount=Decimal(fd_data["principal"]),
+            interest_rate=Decimal(fd_data["interest_rate"]),
+            start_date=_parse_date(fd_data["start_date"]),
+            maturity_date=_parse_date(fd_data["maturity_date"]),
+            compounding_frequency=fd_data.get("compounding_frequency"),
+            interest_payout=fd_data.get("payout_type"),
+            portfolio_id=self.portfolio_map[p_name],
+        )
+        self._queue(models.FixedDeposit, self._row(fd_in, user_id=self.user_id))
+
+    def _add_recurring_deposit(self, rd_data: Dict[str, Any]) -> None:
+        p_name = rd_data.get("portfolio_name")
+        if not p_name or p_name not in self.portfolio_map:
+            return
+        rd_in = schemas.RecurringDepositCreate(
+            name=rd_data["institution"],
+            account_number=rd_data["account_number"],
+            monthly_installment=Decimal(rd_data["monthly_installment"]),
+            interest_rate=Decimal(rd_data["interest_rate"]),
+            start_date=_parse_date(rd_data["start_date"]),
+            tenure_months=rd_data.get("tenure_months", 12),
+            portfolio_id=self.portfolio_map[p_name],
+        )
+        self._queue(models.RecurringDeposit, self._row(rd_in, user_id=self.user_id))
+
+    def _add_goal(self, g_data: Dict[str, Any]) -> None:
+        g_in = schemas.GoalCreate(
+            name=g_data["name"],
+            target_amount=Decimal(g_data["target_amount"]),
+            target_date=_parse_date(g_data["target_date"]),
+        )
+        goal_row = self._row(g_in, user_id=self.user_id)
+        self._queue(models.Goal, goal_row)
+
+        links = [
+            schemas.GoalLinkCreate(
+                goal_id=goal_row["id"], portfolio_id=self.portfolio_map[p_name]
+            )
+            for p_name in g_data.get("linked_portfolios", [])
+            if p_name in self.portfolio_map
+        ]
+        for ticker in g_data.get("linked_assets", []):
+            asset = self._asset_by_ticker(ticker)
+            if asset:
+                links.append(
+                    schemas.GoalLinkCreate(goal_id=goal_row["id"], asset_id=asset[0])
+                )
+        for link_in in links:
+            self._queue(models.GoalLink, self._row(link_in, user_id=self.user_id))
+
+    def _add_transaction(self, tx_data: Dict[str, Any]) -> None:
+        sort_key = _tx_sort_key(tx_data)
+        if self._last_tx_key is not None and sort_key < self._last_tx_key:
+            raise HTTPException(
+                status_code=400,
+                detail="Backup transactions must be in date order.",
+            )
+        self._last_tx_key = sort_key
+
+        p_name = tx_data.get("portfolio_name")
+        if not p_name or p_name not in self.portfolio_map:
+            return
+
+        t_type = tx_data.get("transaction_type")
+        if t_type and isinstance(t_type, str):
+            t_type = t_type.upper()
+        if t_type == "PPF_CONTRIBUTION":
+            t_type = TransactionType.CONTRIBUTION
+
+        # Skip sell-to-cover SELL transactions - they are auto-created
+        # when restoring the parent RSU_VEST transaction
+        details = tx_data.get("details")
+        if t_type == "SELL" and details and details.get("related_rsu_vest_id"):
+            logger.debug(f"Skipping sell-to-cover SELL: {tx_data}")
+            return
+
+        self._pending_transactions.append((tx_data, t_type))
+        if len(self._pending_transactions) >= BATCH_SIZE:
+            self._add_pending_transactions()
+
+    def _add_pending_transactions(self) -> None:
+        """Creates the buffered transactions, resolving their assets together."""
+        pending, self._pending_transactions = self._pending_transactions, []
+        refs = [self._transaction_asset_ref(tx_data) for tx_data, _ in pending]
+        assets = {
+            **self._assets.resolve_many(
+                [ref for ref, fetch in refs if ref and not fetch]
+            ),
+            **self._assets.resolve_many(
+                [ref for ref, fetch in refs if ref and fetch], fetch=True
+            ),
+        }
+        for (tx_data, t_type), (ref, _) in zip(pending, refs):
+            asset = assets.get(ref)
+            if not asset:
+                # Best effort: skip transactions whose asset cannot be resolved
+                logger.warning(f"Could not find asset for transaction: {tx_data}")
+                continue
+
+            tx_in = schemas.TransactionCreate(
+                asset_id=asset.id,
+                transaction_type=t_type,
+                quantity=Decimal(tx_data["quantity"]),
+                price_per_unit=Decimal(tx_data["price_per_unit"]),
+                transaction_date=_parse_date(tx_data["transaction_date"]),
+                fees=Decimal(tx_data.get("fees", 0)),
+                details=tx_data.get("details"),
+            )
+            self._create_transaction(
+                tx_in, self.portfolio_map[tx_data["portfolio_name"]], asset.currency
+            )
+
+    def _create_transaction(
+        self,
+        tx_in: schemas.TransactionCreate,
+        portfolio_id: uuid.UUID,
+        currency: Optional[str],
+    ) -> None:
+        """
+        Queues `tx_in` as `create_with_portfolio` would have created it,
+        checking it against the holdings and lots replayed so far in place of
+        the database. Restores run in date order, so those are the holdings
+        `get_holdings_on_date` would have found.
+        """
+        t_type = tx_in.transaction_type
+        asset_id = tx_in.asset_id
+
+        once_key = transaction_rules.once_key(tx_in, portfolio_id)
+        if once_key is not None:
+            if once_key in self._once_keys:
+                return
+            self._once_keys.add(once_key)
+
+        if transaction_rules.needs_holdings_check(tx_in):
+            transaction_rules.check_holdings(tx_in, self._units[asset_id])
+
+        row = self._row(
+            tx_in,
+            user_id=self.user_id,
+            portfolio_id=portfolio_id,
+        )
+        row.pop("links", None)
+        self._queue(models.Transaction, row)
+        tx_id = row["id"]
+        if t_type in crud_corporate_action_adjustment.ADJUSTED_ACTIONS:
+            self._adjusted.add((portfolio_id, asset_id))
+
+        self._units[asset_id] = transaction_rules.holdings_after(
+            self._units[asset_id], t_type, tx_in.quantity, tx_in.price_per_unit
+        )
+
+        ledger = self._ledgers.get((portfolio_id, asset_id))
+        if ledger is None:
+            ledger = self._ledgers[(portfolio_id, asset_id)] = _LotLedger(currency)
+        day = tx_in.transaction_date
+        if t_type == TransactionType.SELL:
+            if tx_in.links:
+                links = [
+                    (link.buy_transaction_id, link.quantity) for link in tx_in.links
+                ]
+            else:
+                links, remaining_qty = transaction_rules.fifo_links(
+                    tx_in.quantity, ledger.available_lots()
+                )
+                if remaining_qty > 0:
+                    logger.warning(
+                        f"Auto-FIFO: Could not fully link SELL tx {tx_id}. "
+                        f"Remaining: {remaining_qty}"
+                    )
+            for buy_id, quantity in links:
+                self._queue(
+                    models.TransactionLink,
+                    {
+                        "id": uuid.uuid4(),
+                        "sell_transaction_id": tx_id,
+                        "buy_transaction_id": buy_id,
+                        "quantity": quantity,
+                    },
+                )
+            ledger.add(day, t_type, (tx_in.quantity, links))
+        elif t_type == TransactionType.SPLIT:
+            ledger.add(day, t_type, (tx_in.quantity, tx_in.price_per_unit))
+        else:
+            ledger.add(day, t_type, (tx_id, tx_in.quantity))
+
+        sell_in = transaction_rules.sell_to_cover(tx_id, tx_in)
+        if sell_in is not None:
+            self._create_transaction(sell_in, portfolio_id, currency)
+
+
+def _delete_user_data(db: Session, user_id: uuid.UUID) -> None:
+    """Deletes everything a restore replaces, with set-based DELETEs."""
+    portfolio_ids = _user_portfolio_ids(user_id)
+    tx_ids = select(models.Transaction.id).where(
+        models.Transaction.portfolio_id.in_(portfolio_ids)
+    )
+    goal_ids = select(models.Goal.id).where(models.Goal.user_id == user_id)
+    watchlist_ids = select(models.Watchlist.id).where(
+        models.Watchlist.user_id == user_id
+    )
+
+    statements = [
+        delete(models.WatchlistItem).where(
+            models.WatchlistItem.watchlist_id.in_(watchlist_ids)
+        ),
+        delete(models.Watchlist).where(models.Watchlist.user_id == user_id),
+        delete(models.GoalLink).where(models.GoalLink.goal_id.in_(goal_ids)),
+        delete(models.Goal).where(models.Goal.user_id == user_id),
+        delete(models.FixedDeposit).where(
+            or_(
+                models.FixedDeposit.user_id == user_id,
+                models.FixedDeposit.portfolio_id.in_(portfolio_ids),
+            )
+        ),
+        delete(models.RecurringDeposit).where(
+            or_(
+                models.RecurringDeposit.user_id == user_id,
+                models.RecurringDeposit.portfolio_id.in_(portfolio_ids),
+            )
+        ),
+        delete(models.CorporateActionAdjustment).where(
+            models.CorporateActionAdjustment.portfolio_id.in_(portfolio_ids)
+        ),
+        delete(models.TransactionLink).where(
+            or_(
+                models.TransactionLink.sell_transaction_id.in_(tx_ids),
+                models.TransactionLink.buy_transaction_id.in_(tx_ids),
+            )
+        ),
+        delete(models.Transaction).where(
+            models.Transaction.portfolio_id.in_(portfolio_ids)
+        ),
+    ]
+    for stmt in statements:
+        db.execute(stmt, execution_options={"synchronize_session": False})
+
+    # Portfolios go through the ORM for the remaining (small) cascades such
+    # as import sessions and snapshots; drop stale collections first.
+    db.expire_all()
+    portfolios = db.query(models.Portfolio).filter(
+        models.Portfolio.user_id == user_id
+    )
+    for p in portfolios:
+        db.delete(p)
+    db.flush()
+
+
+def _check_version(metadata: Dict[str, Any]) -> None:
     # Basic version check (allow major version match 1.x)
     version = metadata.get("version", "0.0")
     if not version.startswith("1."):
@@ -232,293 +851,67 @@ def restore_backup(db: Session, user_id: uuid.UUID, backup_data: Dict[str, Any])
             status_code=400, detail=f"Unsupported backup version: {version}"
         )
 
+
+def restore_backup(db: Session, user_id: uuid.UUID, backup_data: Dict[str, Any]):
+    """Restores a backup document (as produced by `create_backup`)."""
+    _check_version(backup_data.get("metadata", {}))
     data = backup_data.get("data", {})
 
+    def records() -> Iterator[Tuple[str, Dict[str, Any]]]:
+        for section in SECTIONS:
+            items = data.get(section, [])
+            if section == "transactions":
+                items = sorted(items, key=_tx_sort_key)
+            for item in items:
+                yield section, item
+
+    _restore(db, user_id, records())
+
+
+def restore_backup_stream(
+    db: Session, user_id: uuid.UUID, lines: Iterable[Any]
+) -> None:
+    """
+    Restores an NDJSON backup from an iterable of lines without holding it in
+    memory. Transactions must be in the order `iter_backup` writes them.
+    """
+    lines = iter(lines)
     try:
-        with db.begin_nested():
-            # 1. Delete Phase
-            # Delete Watchlists
-            watchlists = crud.watchlist.get_multi_by_user(db, user_id=user_id)
-            for w in watchlists:
-                db.delete(w)
-
-            # Delete Goals
-            goals = crud.goal.get_multi_by_owner(db, user_id=user_id)
-            for g in goals:
-                db.delete(g)
+        header = json.loads(next(lines, "") or "{}")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid backup file")
+    _check_version(header.get("metadata", {}))
+
+    def records() -> Iterator[Tuple[str, Dict[str, Any]]]:
+        for line in lines:
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+                yield entry["section"], entry["data"]
+            except (ValueError, KeyError, TypeError):
+                raise HTTPException(status_code=400, detail="Invalid backup file")
 
-            # Delete FDs
-            db.query(models.FixedDeposit).filter(
-                models.FixedDeposit.user_id == user_id
-            ).delete()
+    _restore(db, user_id, records())
 
-            # Delete RDs
-            db.query(models.RecurringDeposit).filter(
-                models.RecurringDeposit.user_id == user_id
-            ).delete()
 
-            # Delete Portfolios (Cascades transactions)
-            portfolios = crud.portfolio.get_multi_by_owner(db, user_id=user_id)
-            for p in portfolios:
-                db.delete(p)
+def _restore(
+    db: Session,
+    user_id: uuid.UUID,
+    records: Iterable[Tuple[str, Dict[str, Any]]],
+) -> None:
+    restorer = _BackupRestorer(db, user_id)
+    portfolio_map = restorer.portfolio_map
 
-            db.flush() # Ensure deletions are applied before recreation
+    try:
+        with db.begin_nested():
+            # 1. Delete Phase
+            _delete_user_data(db, user_id)
 
             # 2. Restore Phase
-
-            # Create Portfolios
-            portfolio_map = {} # name -> id
-            for p_data in data.get("portfolios", []):
-                p_in = schemas.PortfolioCreate(
-                    name=p_data["name"],
-                    description=p_data.get("description")
-                )
-                p = crud.portfolio.create_with_owner(db, obj_in=p_in, user_id=user_id)
-                portfolio_map[p.name] = p.id
-
-            # Create Watchlists
-            watchlist_map = {} # name -> id
-            for w_data in data.get("watchlists", []):
-                w_in = schemas.WatchlistCreate(name=w_data["name"])
-                w = crud.watchlist.create_with_user(db, obj_in=w_in, user_id=user_id)
-                watchlist_map[w.name] = w.id
-
-                for ticker in w_data.get("items", []):
-                    asset = crud.asset.get_or_create_by_ticker(db, ticker_symbol=ticker)
-                    if asset:
-                        crud.watchlist_item.create_with_watchlist_and_user(
-                            db,
-                            obj_in=schemas.WatchlistItemCreate(asset_id=asset.id),
-                            watchlist_id=w.id,
-                            user_id=user_id
-                        )
-
-            # Independent Assets: PPF
-            for ppf_data in data.get("ppf_accounts", []):
-                user_id_short = f"{str(user_id)[:8]}-"
-                new_ticker = f"PPF-{user_id_short}{ppf_data['account_number']}".upper()
-                asset = crud.asset.get_by_ticker(db, ticker_symbol=new_ticker)
-                if not asset:
-                    # Create Asset
-                    asset_in = schemas.AssetCreate(
-                        name=ppf_data["institution"],
-                        ticker_symbol=new_ticker,
-                        asset_type="PPF",
-                        currency="INR",
-                        account_number=ppf_data["account_number"],
-                        opening_date=_parse_date(ppf_data.get("opening_date"))
-                    )
-                    crud.asset.create(db, obj_in=asset_in)
-
-            # Independent Assets: Bonds
-            for bond_data in data.get("bonds", []):
-                isin = bond_data.get("isin")
-                if not isin:
-                    continue
-                # Check if asset exists by ISIN or Ticker? ISIN is unique
-                # Models don't always have ISIN unique constraint enforced in get_by,
-                # but Asset model has unique index on ISIN.
-                asset = db.query(models.Asset).filter(models.Asset.isin == isin).first()
-                if not asset:
-                    # Create Asset
-                    asset_in = schemas.AssetCreate(
-                        name=bond_data["name"],
-                        ticker_symbol=isin,  # Bonds use ISIN as ticker
-                        # Requirement doesn't specify ticker for bonds in backup.
-                        # We can assume ticker=isin or check if backup provides ticker?
-                        asset_type="BOND",
-                        currency="INR",
-                        isin=isin
-                    )
-                    # Need unique ticker. If Bond definition doesn't have ticker, use
-                    # ISIN.
-                    asset = crud.asset.create(db, obj_in=asset_in)
-
-                    # Create Bond details
-                    bond_in = schemas.BondCreate(
-                        asset_id=asset.id,
-                        bond_type=bond_data["bond_type"],
-                        face_value=Decimal(bond_data["face_value"]),
-                        coupon_rate=Decimal(bond_data["coupon_rate"]),
-                        maturity_date=_parse_date(bond_data["maturity_date"]),
-                        isin=isin
-                    )
-                    crud.bond.create(db, obj_in=bond_in)
-
-            # FDs
-            for fd_data in data.get("fixed_deposits", []):
-                p_name = fd_data.get("portfolio_name")
-                if p_name and p_name in portfolio_map:
-                    fd_in = schemas.FixedDepositCreate(
-                        name=fd_data["institution"],
-                        account_number=fd_data["account_number"],
-                        principal_amount=Decimal(fd_data["principal"]),
-                        interest_rate=Decimal(fd_data["interest_rate"]),
-                        start_date=_parse_date(fd_data["start_date"]),
-                        maturity_date=_parse_date(fd_data["maturity_date"]),
-                        compounding_frequency=fd_data.get("compounding_frequency"),
-                        interest_payout=fd_data.get("payout_type"),
-                        portfolio_id=portfolio_map[p_name]
-                    )
-                    crud.fixed_deposit.create_with_owner(
-                        db, obj_in=fd_in, owner_id=user_id
-                    )
-
-            # RDs
-            for rd_data in data.get("recurring_deposits", []):
-                p_name = rd_data.get("portfolio_name")
-                if p_name and p_name in portfolio_map:
-                    rd_in = schemas.RecurringDepositCreate(
-                        name=rd_data["institution"],
-                        account_number=rd_data["account_number"],
-                        monthly_installment=Decimal(rd_data["monthly_installment"]),
-                        interest_rate=Decimal(rd_data["interest_rate"]),
-                        start_date=_parse_date(rd_data["start_date"]),
-                        tenure_months=rd_data.get("tenure_months", 12),
-                        portfolio_id=portfolio_map[p_name]
-                    )
-                    crud.recurring_deposit.create_with_owner(
-                        db, obj_in=rd_in, owner_id=user_id
-                    )
-
-            # Transactions
-            transactions = data.get("transactions", [])
-            def get_tx_sort_key(tx):
-                t_date = tx.get("transaction_date")
-                t_date_str = _serialize_date(t_date) or ""
-                t_type = tx.get("transaction_type")
-                priority = 2 if t_type and str(t_type).upper() == "SELL" else 1
-                return (t_date_str, priority)
-
-            sorted_transactions = sorted(transactions, key=get_tx_sort_key)
-
-            for tx_data in sorted_transactions:
-                p_name = tx_data.get("portfolio_name")
-                if not p_name or p_name not in portfolio_map:
-                    continue
-
-                p_id = portfolio_map[p_name]
-                t_type = tx_data.get("transaction_type")
-                if t_type and isinstance(t_type, str):
-                    t_type = t_type.upper()
-                if t_type == "PPF_CONTRIBUTION":
-                    t_type = TransactionType.CONTRIBUTION
-
-                # Skip sell-to-cover SELL transactions - they are auto-created
-                # when restoring the parent RSU_VEST transaction
-                details = tx_data.get("details")
-                if t_type == "SELL" and details and details.get("related_rsu_vest_id"):
-                    logger.debug(f"Skipping sell-to-cover SELL: {tx_data}")
-                    continue
-
-                # Find Asset
-                asset = None
-                if "ppf_account_number" in tx_data:
-                    user_id_short = f"{str(user_id)[:8]}-"
-                    acc_num = tx_data["ppf_account_number"]
-                    new_ticker = f"PPF-{user_id_short}{acc_num}".upper()
-                    asset = crud.asset.get_by_ticker(db, ticker_symbol=new_ticker)
-                elif "isin" in tx_data and tx_data["isin"]:
-                    # First try to find by ISIN in the database
-                    asset = (
-                        db.query(models.Asset)
-                        .filter(models.Asset.isin == tx_data["isin"])
-                        .first()
-                    )
-                    # If not found in DB, try looking up ISIN in AMFI data
-                    if not asset:
-                        try:
-                            from app.services.providers.amfi_provider import (
-                                amfi_provider,
-                            )
-                            isin_code = tx_data["isin"]
-                            all_mf_data = amfi_provider.get_all_nav_data()
-                            for scheme_code, mf_info in all_mf_data.items():
-                                isin_match = mf_info.get("isin") == isin_code
-                                isin2_match = mf_info.get("isin2") == isin_code
-                                if isin_match or isin2_match:
-                                    # Found in AMFI - create the asset
-                                    logger.info(
-                                        f"Found MF in AMFI: {isin_code} -> "
-                                        f"{mf_info.get('scheme_name', scheme_code)}"
-                                    )
-                                    asset = crud.asset.get_or_create_by_ticker(
-                                        db,
-                                        ticker_symbol=scheme_code,
-                                        asset_type="Mutual Fund",
-                                    )
-                                    break
-                        except Exception as e:
-                            logger.warning(f"AMFI lookup failed for {tx_data}: {e}")
-                    # Final fallback: try yfinance with ticker_symbol
-                    if not asset and "ticker_symbol" in tx_data:
-                        logger.debug(
-                            f"AMFI lookup failed, trying yfinance: "
-                            f"{tx_data['ticker_symbol']}"
-                        )
-                        asset = crud.asset.get_or_create_by_ticker(
-                            db, ticker_symbol=tx_data["ticker_symbol"]
-                        )
-                elif "ticker_symbol" in tx_data:
-                    logger.debug(
-                        f"Looking up foreign stock via yfinance: "
-                        f"{tx_data['ticker_symbol']}"
-                    )
-                    asset = crud.asset.get_or_create_by_ticker(
-                        db, ticker_symbol=tx_data["ticker_symbol"]
-                    )
-
-                if not asset:
-                    # Log warning but skip? Or fail?
-                    # We should try best effort.
-                    logger.warning(f"Could not find asset for transaction: {tx_data}")
-                    continue
-
-                # Create Transaction
-                tx_in = schemas.TransactionCreate(
-                    asset_id=asset.id,
-                    transaction_type=t_type,
-                    quantity=Decimal(tx_data["quantity"]),
-                    price_per_unit=Decimal(tx_data["price_per_unit"]),
-                    transaction_date=_parse_date(tx_data["transaction_date"]),
-                    fees=Decimal(tx_data.get("fees", 0)),
-                    details=tx_data.get("details"),
-                )
-                crud.transaction.create_with_portfolio(
-                    db, obj_in=tx_in, portfolio_id=p_id
-                )
-
-            # Goals
-            for g_data in data.get("goals", []):
-                g_in = schemas.GoalCreate(
-                    name=g_data["name"],
-                    target_amount=Decimal(g_data["target_amount"]),
-                    target_date=_parse_date(g_data["target_date"])
-                )
-                goal = crud.goal.create_with_owner(db, obj_in=g_in, user_id=user_id)
-
-                # Links
-                for p_name in g_data.get("linked_portfolios", []):
-                    if p_name in portfolio_map:
-                        crud.goal_link.create_with_owner(
-                            db,
-                            obj_in=schemas.GoalLinkCreate(
-                                goal_id=goal.id, portfolio_id=portfolio_map[p_name]
-                            ),
-                            user_id=user_id,
-                        )
-
-                # Asset Links
-                for ticker in g_data.get("linked_assets", []):
-                    asset = crud.asset.get_by_ticker(db, ticker_symbol=ticker)
-                    if asset:
-                        crud.goal_link.create_with_owner(
-                            db,
-                            obj_in=schemas.GoalLinkCreate(
-                                goal_id=goal.id, asset_id=asset.id
-                            ),
-                            user_id=user_id,
-                        )
+            for section, record in records:
+                restorer.add(section, record)
+            restorer.flush()
 
         db.commit()
 
@@ -577,6 +970,9 @@ def restore_backup(db: Session, user_id: uuid.UUID, backup_data: Dict[str, Any])
             f"Invalidated all caches for user {user_id} after restore"
         )
 
+    except HTTPException:
+        db.rollback()
+        raise
     except Exception:
         db.rollback()
         logger.error("Restore failed", exc_info=True)
@@ -42,10 +42,7 @@ except ImportError:
             return 0.0
 
 from app import crud
-from app.crud.crud_holding import (
-    _calculate_fd_current_value,
-    _calculate_rd_value_at_date,
-)
+from app.services import deposit_valuation
 from app.services.financial_data_service import FinancialDataService
 
 logger = logging.getLogger(__name__)
@@ -136,13 +133,8 @@ class BenchmarkService:
 
             # Maturity (SELL)
             if fd.maturity_date <= date.today():
-                maturity_value = _calculate_fd_current_value(
-                    principal=fd.principal_amount,
-                    interest_rate=fd.interest_rate,
-                    start_date=fd.start_date,
-                    end_date=fd.maturity_date,
-                    compounding_frequency=fd.compounding_frequency,
-                    interest_payout=fd.interest_payout
+                maturity_value = deposit_valuation.fd_value_on(
+                    fd, fd.maturity_date
                 )
                 synthetic_txns.append(
                     self._create_mock_txn(
@@ -170,13 +162,7 @@ class BenchmarkService:
 
             # Maturity (SELL)
             if maturity_date <= date.today():
-                maturity_value = _calculate_rd_value_at_date(
-                    monthly_installment=rd.monthly_installment,
-                    interest_rate=rd.interest_rate,
-                    start_date=rd.start_date,
-                    tenure_months=rd.tenure_months,
-                    calculation_date=maturity_date
-                )
+                maturity_value = deposit_valuation.rd_value_on(rd, maturity_date)
                 synthetic_txns.append(
                     self._create_mock_txn(
                         maturity_date, maturity_value, "SELL"
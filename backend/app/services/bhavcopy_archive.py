@@ -0,0 +1,322 @@
+"""
+A local archive of NSE bhavcopies, the exchange's daily closing prices.
+
+Each trading day's bhavcopy is downloaded once and kept on disk. Days are
+stored a month to a file, as compressed NumPy arrays with one column per
+field: trading date, symbol, ISIN, close and previous close. Prices are kept
+as integers in ten-thousandths so they convert back to exact Decimals. Rows
+are sorted by symbol and date, with a second ordering by ISIN, so finding a
+security's closes for one day or a range of days is a binary search per key
+and month rather than a scan over every row.
+
+Days without a bhavcopy (weekends, holidays) are recorded too, so they are
+not asked for again. `backfill-bhavcopy` fills in history for a date range.
+"""
+import csv
+import io
+import json
+import logging
+import os
+import threading
+import zipfile
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "manifest.json"
+# Prices are stored in units of 1/SCALE
+SCALE = 10_000
+# Months kept loaded in memory
+MONTH_CACHE_SIZE = 24
+# Series that are not regularly traded securities
+EXCLUDED_SERIES = {"IV", "MF", "ME", "RR", "P1"}
+
+_DECIMAL_SCALE = Decimal(SCALE)
+_COLUMNS = ("TckrSymb", "ISIN", "SctySrs", "ClsPric", "PrvsClsgPric")
+
+Columns = Dict[str, np.ndarray]
+
+
+def default_archive_dir() -> str:
+    return os.path.join(settings.DISK_CACHE_DIR or "/tmp", "bhavcopy")
+
+
+def parse_bhavcopy(content: bytes, csv_filename: str) -> Columns:
+    """
+    The symbol, ISIN, close and previous close columns of a zipped
+    bhavcopy, leaving out the excluded series.
+    """
+    symbols: List[str] = []
+    isins: List[str] = []
+    closes: List[str] = []
+    previous_closes: List[str] = []
+    with zipfile.ZipFile(io.BytesIO(content)) as thezip:
+        with thezip.open(csv_filename) as thefile:
+            reader = csv.reader(io.TextIOWrapper(thefile, "utf-8"))
+            # Header names can be padded (e.g. "  TckrSymb  ")
+            header = [name.strip() for name in next(reader)]
+            symbol_i, isin_i, series_i, close_i, previous_i = (
+                header.index(name) for name in _COLUMNS
+            )
+            for row in reader:
+                series = row[series_i].strip().upper()
+                close = row[close_i].strip()
+                if not series or series in EXCLUDED_SERIES or not close:
+                    continue
+                symbols.append(row[symbol_i].strip().upper())
+                isins.append(row[isin_i].strip().upper())
+                closes.append(close)
+                previous_closes.append(row[previous_i].strip() or close)
+    return {
+        "symbols": np.array(symbols, dtype=str),
+        "isins": np.array(isins, dtype=str),
+        "close": _to_units(closes),
+        "prev_close": _to_units(previous_closes),
+    }
+
+
+def _to_units(prices: List[str]) -> np.ndarray:
+    if not prices:
+        return np.zeros(0, dtype=np.int64)
+    values = np.char.replace(np.array(prices, dtype=str), ",", "").astype(np.float64)
+    return np.rint(values * SCALE).astype(np.int64)
+
+
+def _price(units: np.integer) -> Decimal:
+    return Decimal(int(units)) / _DECIMAL_SCALE
+
+
+@dataclass
+class _Month:
+    """One month of bhavcopies, sorted by (symbol, date)."""
+
+    dates: np.ndarray  # date ordinals
+    symbols: np.ndarray
+    isins: np.ndarray
+    close: np.ndarray
+    prev_close: np.ndarray
+    by_isin: np.ndarray  # row order by (ISIN, date)
+
+    def __post_init__(self):
+        self.sorted_isins = self.isins[self.by_isin]
+
+    @classmethod
+    def empty(cls) -> "_Month":
+        return cls(
+            dates=np.zeros(0, dtype=np.int32),
+            symbols=np.zeros(0, dtype=str),
+            isins=np.zeros(0, dtype=str),
+            close=np.zeros(0, dtype=np.int64),
+            prev_close=np.zeros(0, dtype=np.int64),
+            by_isin=np.zeros(0, dtype=np.int64),
+        )
+
+    @classmethod
+    def from_rows(cls, dates, symbols, isins, close, prev_close) -> "_Month":
+        # Stable sorts keep a day's rows in file order among equal keys
+        order = np.lexsort((dates, symbols))
+        dates, symbols, isins = dates[order], symbols[order], isins[order]
+        close, prev_close = close[order], prev_close[order]
+        return cls(
+            dates, symbols, isins, close, prev_close, np.lexsort((dates, isins))
+        )
+
+    def rows(self, key: str) -> np.ndarray:
+        """The rows for a symbol or else an ISIN, in date order."""
+        lo = np.searchsorted(self.symbols, key, side="left")
+        hi = np.searchsorted(self.symbols, key, side="right")
+        if lo < hi:
+            return np.arange(lo, hi)
+        lo = np.searchsorted(self.sorted_isins, key, side="left")
+        hi = np.searchsorted(self.sorted_isins, key, side="right")
+        return self.by_isin[lo:hi]
+
+    def arrays(self) -> Columns:
+        return {
+            "dates": self.dates,
+            "symbols": self.symbols,
+            "isins": self.isins,
+            "close": self.close,
+            "prev_close": self.prev_close,
+            "by_isin": self.by_isin,
+        }
+
+
+def _month_key(day: date) -> str:
+    return f"{day.year:04d}-{day.month:02d}"
+
+
+def _months(start: date, end: date) -> Iterable[str]:
+    year, month = start.year, start.month
+    while (year, month) <= (end.year, end.month):
+        yield f"{year:04d}-{month:02d}"
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+class BhavcopyArchive:
+    def __init__(self, root: Optional[str] = None):
+        self.root = Path(root or default_archive_dir())
+        self._lock = threading.Lock()
+        # Month key to (file modification time, month). Lookups read it
+        # without `_lock`, so it has its own.
+        self._months_lock = threading.Lock()
+        self._months: "OrderedDict[str, Tuple[float, _Month]]" = OrderedDict()
+        self._manifest: Dict[str, Set[date]] = {"days": set(), "missing": set()}
+        self._manifest_mtime: Optional[float] = None
+
+    # --- Manifest ---
+    def _read_manifest(self) -> Dict[str, Set[date]]:
+        path = self.root / MANIFEST_FILE
+        try:
+            mtime = path.stat().st_mtime
+        except FileNotFoundError:
+            return self._manifest
+        if mtime != self._manifest_mtime:
+            with open(path) as f:
+                raw = json.load(f)
+            self._manifest = {
+                name: {date.fromisoformat(d) for d in raw.get(name, [])}
+                for name in ("days", "missing")
+            }
+            self._manifest_mtime = mtime
+        return self._manifest
+
+    def _write_manifest(self) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        path = self.root / MANIFEST_FILE
+        tmp = self.root / f"{MANIFEST_FILE}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(
+                {
+                    name: sorted(d.isoformat() for d in days)
+                    for name, days in self._manifest.items()
+                },
+                f,
+            )
+        os.replace(tmp, path)
+        self._manifest_mtime = path.stat().st_mtime
+
+    def has_day(self, day: date) -> bool:
+        return day in self._read_manifest()["days"]
+
+    def is_missing(self, day: date) -> bool:
+        """Whether the day is known to have no bhavcopy."""
+        return day in self._read_manifest()["missing"]
+
+    def days(self, start: date, end: date) -> List[date]:
+        return sorted(d for d in self._read_manifest()["days"] if start <= d <= end)
+
+    def latest_day(self, on_or_before: date) -> Optional[date]:
+        return max(
+            (d for d in self._read_manifest()["days"] if d <= on_or_before),
+            default=None,
+        )
+
+    def mark_missing(self, day: date) -> None:
+        with self._lock:
+            self._read_manifest()["missing"].add(day)
+            self._write_manifest()
+
+    # --- Months ---
+    def _month_path(self, key: str) -> Path:
+        return self.root / f"{key}.npz"
+
+    def _month(self, key: str) -> _Month:
+        path = self._month_path(key)
+        try:
+            mtime = path.stat().st_mtime
+        except FileNotFoundError:
+            return _Month.empty()
+        with self._months_lock:
+            cached = self._months.get(key)
+            if cached and cached[0] == mtime:
+                self._months.move_to_end(key)
+                return cached[1]
+        with np.load(path, allow_pickle=False) as data:
+            month = _Month(**{name: data[name] for name in data.files})
+        with self._months_lock:
+            self._months[key] = (mtime, month)
+            if len(self._months) > MONTH_CACHE_SIZE:
+                self._months.popitem(last=False)
+        return month
+
+    def add_day(self, day: date, columns: Columns) -> int:
+        """Stores a parsed bhavcopy as the day's, replacing any already there."""
+        key = _month_key(day)
+        with self._lock:
+            month = self._month(key)
+            keep = month.dates != day.toordinal()
+            count = len(columns["symbols"])
+            updated = _Month.from_rows(
+                np.concatenate(
+                    [month.dates[keep], np.full(count, day.toordinal(), np.int32)]
+                ),
+                np.concatenate([month.symbols[keep], columns["symbols"]]),
+                np.concatenate([month.isins[keep], columns["isins"]]),
+                np.concatenate([month.close[keep], columns["close"]]),
+                np.concatenate([month.prev_close[keep], columns["prev_close"]]),
+            )
+            self.root.mkdir(parents=True, exist_ok=True)
+            tmp = self.root / f"{key}.npz.tmp"
+            with open(tmp, "wb") as f:
+                np.savez_compressed(f, **updated.arrays())
+            os.replace(tmp, self._month_path(key))
+            with self._months_lock:
+                self._months.pop(key, None)
+
+            manifest = self._read_manifest()
+            manifest["days"].add(day)
+            manifest["missing"].discard(day)
+            self._write_manifest()
+        logger.info(f"Archived the {day} bhavcopy ({count} securities)")
+        return count
+
+    # --- Lookups ---
+    def closes_on(
+        self, day: date, keys: Iterable[str]
+    ) -> Dict[str, Dict[str, Decimal]]:
+        """The close and previous close on `day` of each symbol or ISIN found."""
+        month = self._month(_month_key(day))
+        ordinal = day.toordinal()
+        prices: Dict[str, Dict[str, Decimal]] = {}
+        for key in set(keys):
+            rows = month.rows(key.upper())
+            rows = rows[month.dates[rows] == ordinal]
+            if len(rows):
+                # As in the bhavcopy, a symbol's last row wins
+                row = rows[-1]
+                prices[key] = {
+                    "current_price": _price(month.close[row]),
+                    "previous_close": _price(month.prev_close[row]),
+                }
+        return prices
+
+    def history(
+        self, keys: Iterable[str], start: date, end: date
+    ) -> Dict[str, Dict[date, Decimal]]:
+        """The closes of each symbol or ISIN on the archived days in a range."""
+        keys = set(keys)
+        first, last = start.toordinal(), end.toordinal()
+        history: Dict[str, Dict[date, Decimal]] = {}
+        for month_key in _months(start, end):
+            month = self._month(month_key)
+            if not len(month.dates):
+                continue
+            for key in keys:
+                rows = month.rows(key.upper())
+                dates = month.dates[rows]
+                rows = rows[(dates >= first) & (dates <= last)]
+                for row in rows:
+                    history.setdefault(key, {})[
+                        date.fromordinal(int(month.dates[row]))
+                    ] = _price(month.close[row])
+        return history
@@ -2,11 +2,12 @@ import logging
 from collections import defaultdict
 from datetime import date, datetime
 from decimal import Decimal
-from typing import Dict, List, Optional, Tuple
+from typing import List, Optional, Tuple
 
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
+from app import crud
 from app.models import Asset, Transaction, TransactionLink
 from app.schemas.capital_gains import (
     CapitalGainsSummary,
@@ -17,6 +18,7 @@ from app.schemas.capital_gains import (
     Schedule112AEntry,
 )
 from app.schemas.enums import BondType, TransactionType
+from app.services.adjustment_factors import AdjustmentTable
 
 logger = logging.getLogger(__name__)
 
@@ -77,9 +79,9 @@ class CapitalGainsService:
 
         links = self.db.scalars(query).all()
 
-        # 1.5. Pre-fetch and pre-calculate Demerger Cost Reductions
-        demerger_ratios = self._calculate_demerger_ratios(
-            portfolio_id, user_id, end_date
+        # 1.5. Pre-resolved corporate-action adjustments (splits, demergers)
+        adjustments = crud.corporate_action_adjustment.get_tables(
+            self.db, portfolio_id=portfolio_id, user_id=user_id
         )
 
         gains: List[GainEntry] = []
@@ -104,19 +106,21 @@ class CapitalGainsService:
             buy_tx = link.buy_transaction
             asset = sell_tx.asset
 
+            holding_adjustments = adjustments.get((sell_tx.portfolio_id, asset.id))
+
             # Check if foreign asset
             is_foreign = asset.currency and asset.currency != "INR"
 
             if is_foreign:
                 # Process as foreign gain (no INR conversion)
                 foreign_entry = self._process_foreign_link(
-                    link, asset, sell_tx, buy_tx, demerger_ratios
+                    link, asset, sell_tx, buy_tx, holding_adjustments
                 )
                 foreign_gains.append(foreign_entry)
             else:
                 # 2. Calculate Gain for this specific lot (domestic)
                 entry, s112a_entry = self._process_single_link(
-                    link, asset, sell_tx, buy_tx, demerger_ratios
+                    link, asset, sell_tx, buy_tx, holding_adjustments
                 )
                 gains.append(entry)
 
@@ -190,85 +194,37 @@ class CapitalGainsService:
         end_date = datetime(start_year + 1, 3, 31, 23, 59, 59)
         return start_date, end_date
 
-    def _calculate_demerger_ratios(
+    def _adjust_buy(
         self,
-        portfolio_id: Optional[str],
-        user_id: Optional[str],
-        end_date: datetime
-    ) -> Dict[str, List[Tuple[date, Decimal]]]:
+        adjustments: Optional[AdjustmentTable],
+        asset: Asset,
+        buy_tx: Transaction,
+        buy_price: Decimal,
+        buy_date: date,
+        sell_date: date,
+    ) -> Tuple[Decimal, Decimal, bool]:
         """
-        Calculates remaining cost basis ratios for assets that underwent demergers.
-        Returns: { asset_id_str: [(demerger_date, remaining_ratio), ...] }
+        The buy's per-unit cost and quantity in the units sold, after the
+        splits and demergers between the buy and the sale (those after the
+        buy date and on or before the sell date). Links are in the units
+        held when the SELL was linked, so a lot split 2:1 is sold in twice
+        its bought quantity at half its bought price. The flag tells whether
+        any applied.
         """
-        # 1. Fetch all DEMERGER transactions before end_date
-        query = select(Transaction).where(
-            Transaction.transaction_type == TransactionType.DEMERGER,
-            Transaction.transaction_date <= end_date
-        )
-        if user_id:
-            query = query.where(Transaction.user_id == user_id)
-        if portfolio_id:
-            query = query.where(Transaction.portfolio_id == portfolio_id)
-
-        demerger_txs = self.db.scalars(query).all()
-        if not demerger_txs:
-            return {}
-
-        # Group demergers by asset_id
-        demergers_by_asset: Dict[str, List[Transaction]] = defaultdict(list)
-        for tx in demerger_txs:
-            if tx.details and "total_cost_allocated" in tx.details:
-                demergers_by_asset[str(tx.asset_id)].append(tx)
-
-        if not demergers_by_asset:
-            return {}
-
-        result: Dict[str, List[Tuple[date, Decimal]]] = defaultdict(list)
-
-        # 2. For each asset, fetch relevant BUYs before its earliest demerger
-        for asset_id_str, d_txs in demergers_by_asset.items():
-            # Sort demergers by date
-            d_txs.sort(key=lambda x: x.transaction_date)
-            earliest_demerger_date = d_txs[0].transaction_date
-
-            # Fetch relevant BUYs for this asset before earliest demerger
-            buy_query = select(Transaction).where(
-                Transaction.asset_id == asset_id_str,
-                Transaction.transaction_type.in_(["BUY", "ESPP_PURCHASE", "RSU_VEST"]),
-                Transaction.transaction_date < earliest_demerger_date
-            )
-            if portfolio_id:
-                buy_query = buy_query.where(Transaction.portfolio_id == portfolio_id)
-
-            buys = self.db.scalars(buy_query).all()
-
-            pre_demerger_cost = Decimal("0.0")
-            for buy in buys:
-                price = buy.price_per_unit if buy.price_per_unit else Decimal("0")
-                pre_demerger_cost += buy.quantity * price
-
-            current_pre_demerger_cost = pre_demerger_cost
-
-            for d_tx in d_txs:
-                cost_allocated = Decimal(str(d_tx.details["total_cost_allocated"]))
-                if current_pre_demerger_cost > 0 and cost_allocated > 0:
-                    remaining_ratio = (
-                        current_pre_demerger_cost - cost_allocated
-                    ) / current_pre_demerger_cost
-                else:
-                    remaining_ratio = Decimal("1.0")
-
-                result[asset_id_str].append(
-                    (d_tx.transaction_date.date(), remaining_ratio)
+        buy_quantity = buy_tx.quantity
+        adjusted = False
+        if adjustments:
+            quantity_factor = adjustments.quantity_factor(buy_date, sell_date)
+            price_factor = adjustments.price_factor(buy_date, sell_date)
+            if quantity_factor != 1 or price_factor != 1:
+                adjusted = True
+                buy_quantity *= quantity_factor
+                buy_price *= price_factor
+                logger.debug(
+                    f"Applied corporate-action price factor {price_factor} for "
+                    f"{asset.ticker_symbol}. New price: {buy_price}"
                 )
-
-                # For subsequent demergers on the same asset, the cost basis is reduced.
-                # `total_cost_allocated` from `crud_corporate_action.py` is
-                # calculated based on the remaining cost basis at the time of
-                # the demerger.
-                current_pre_demerger_cost -= cost_allocated
-
-        return result
+        return buy_price, buy_quantity, adjusted
 
     def _process_foreign_link(
         self,
@@ -276,7 +232,7 @@ class CapitalGainsService:
         asset: Asset,
         sell_tx: Transaction,
         buy_tx: Transaction,
-        demerger_ratios: Optional[Dict[str, List[Tuple[date, Decimal]]]] = None
+        adjustments: Optional[AdjustmentTable] = None
     ) -> ForeignGainEntry:
         """
         Process a foreign asset gain entry.
@@ -296,23 +252,16 @@ class CapitalGainsService:
         ] and buy_tx.details and "fmv" in buy_tx.details):
             buy_price = Decimal(str(buy_tx.details["fmv"]))
 
-        # --- Corporate Action Adjustment (Demerger) ---
-        asset_id_str = str(asset.id)
-        if demerger_ratios and asset_id_str in demerger_ratios:
-            for d_date, ratio in demerger_ratios[asset_id_str]:
-                if buy_date < d_date <= sell_date:
-                    buy_price *= ratio
-                    logger.debug(
-                        f"Applied demerger ratio {ratio} for foreign "
-                        f"{asset.ticker_symbol}. New price: {buy_price}"
-                    )
+        buy_price, buy_quantity, _ = self._adjust_buy(
+            adjustments, asset, buy_tx, buy_price, buy_date, sell_date
+        )
 
         sell_price = sell_tx.price_per_unit
 
         # Proportional Fees
         prop_buy_fees = (
-            (buy_tx.fees / buy_tx.quantity) * quantity
-            if buy_tx.quantity > 0
+            (buy_tx.fees / buy_quantity) * quantity
+            if buy_quantity > 0
             else Decimal(0)
         )
         prop_sell_fees = (
@@ -369,7 +318,7 @@ class CapitalGainsService:
         asset: Asset,
         sell_tx: Transaction,
         buy_tx: Transaction,
-        demerger_ratios: Optional[Dict[str, List[Tuple[date, Decimal]]]] = None
+        adjustments: Optional[AdjustmentTable] = None
     ) -> Tuple[GainEntry, Optional[Schedule112AEntry]]:
 
         buy_date = buy_tx.transaction_date.date()
@@ -389,25 +338,16 @@ class CapitalGainsService:
                 f"Using ESPP FMV {buy_price} as cost basis for {asset.ticker_symbol}"
             )
 
-        # --- Corporate Action Adjustment (Demerger) ---
-        asset_id_str = str(asset.id)
-        if demerger_ratios and asset_id_str in demerger_ratios:
-            for d_date, ratio in demerger_ratios[asset_id_str]:
-                # If the buy happened before the demerger,
-                # and we sold on or after the demerger
-                if buy_date < d_date <= sell_date:
-                    buy_price *= ratio
-                    logger.debug(
-                        f"Applied demerger ratio {ratio} for "
-                        f"{asset.ticker_symbol}. New price: {buy_price}"
-                    )
+        buy_price, buy_quantity, adjusted = self._adjust_buy(
+            adjustments, asset, buy_tx, buy_price, buy_date, sell_date
+        )
 
         sell_price = sell_tx.price_per_unit
 
         # Proportional Fees
         prop_buy_fees = (
-            (buy_tx.fees / buy_tx.quantity) * quantity
-            if buy_tx.quantity > 0
+            (buy_tx.fees / buy_quantity) * quantity
+            if buy_quantity > 0
             else Decimal(0)
         )
         prop_sell_fees = (
@@ -482,6 +422,7 @@ class CapitalGainsService:
             holding_days=holding_days,
             tax_rate=tax_rate_label,
             is_grandfathered=is_grandfathered,
+            corporate_action_adjusted=adjusted,
             is_hybrid_warning=self._is_hybrid_fund(asset),
             note=note
         )
@@ -0,0 +1,423 @@
+"""
+Vectorised valuation curves for fixed-income deposits (FD, RD and PPF).
+
+The scalar helpers in ``crud_holding`` / ``crud_ppf`` value a deposit on a
+single date. Historical charts and cash-flow generators need the value on
+every day of a range, and calling the scalar helpers once per day is
+O(days x installments) for RDs and O(days x transactions) for PPF.
+
+The functions here take a deposit and an array of dates and return the whole
+curve in one call. Curves are memoised per deposit *version* (the tuple of
+fields that affect valuation), so editing a deposit naturally invalidates its
+cached curve. Values are computed in float64 and only converted to ``Decimal``
+at the output boundary (see ``fd_value_on`` / ``rd_value_on``).
+
+A curve is the value the deposit contributes to the portfolio on each date:
+zero before it starts and zero after it matures (matured deposits are treated
+as withdrawn, matching the live holdings calculation).
+"""
+import functools
+import logging
+from datetime import date
+from decimal import Decimal
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.models.asset import Asset
+from app.models.fixed_deposit import FixedDeposit
+from app.models.historical_interest_rate import HistoricalInterestRate
+from app.models.recurring_deposit import RecurringDeposit
+from app.models.transaction import Transaction
+from app.schemas.enums import TransactionType
+
+logger = logging.getLogger(__name__)
+
+CURVE_CACHE_SIZE = 512
+
+FD_COMPOUNDING_PERIODS = {
+    "ANNUALLY": 1,
+    "SEMI-ANNUALLY": 2,
+    "QUARTERLY": 4,
+    "MONTHLY": 12,
+}
+
+_DAY = "datetime64[D]"
+_MONTH = "datetime64[M]"
+
+
+def to_date_array(dates: Iterable) -> np.ndarray:
+    """Converts a sequence of dates (or a datetime64 array) to datetime64[D]."""
+    if isinstance(dates, np.ndarray):
+        return dates.astype(_DAY)
+    return np.array(list(dates), dtype=_DAY)
+
+
+def daily_dates(start_date: date, end_date: date) -> np.ndarray:
+    """Returns every calendar day between start_date and end_date, inclusive."""
+    return np.arange(
+        np.datetime64(start_date, "D"),
+        np.datetime64(end_date, "D") + 1,
+        dtype=_DAY,
+    )
+
+
+def _add_months(base: np.ndarray, months: np.ndarray) -> np.ndarray:
+    """
+    Vectorised ``base + relativedelta(months=months)``.
+
+    The day of month is clamped to the length of the target month, exactly
+    like dateutil does (e.g. Jan 31 + 1 month -> Feb 28/29).
+    """
+    base_month = base.astype(_MONTH)
+    day_offset = (base - base_month.astype(_DAY)).astype(np.int64)
+    target_month = base_month + months.astype("timedelta64[M]")
+    first_day = target_month.astype(_DAY)
+    days_in_month = ((target_month + 1).astype(_DAY) - first_day).astype(np.int64)
+    return first_day + np.minimum(day_offset, days_in_month - 1)
+
+
+def _elapsed_years(start: np.ndarray, end: np.ndarray) -> np.ndarray:
+    """
+    Vectorised equivalent of the RD elapsed-time convention:
+    ``full_months / 12 + remaining_days / 365.25`` where ``full_months`` is
+    taken from ``relativedelta(end, start)``.
+    """
+    full_months = (end.astype(_MONTH) - start.astype(_MONTH)).astype(np.int64)
+    anchor = _add_months(start, full_months)
+    overshoot = anchor > end
+    full_months = np.where(overshoot, full_months - 1, full_months)
+    anchor = np.where(overshoot, _add_months(start, full_months), anchor)
+    remaining_days = (end - anchor).astype(np.int64)
+    return full_months / 12.0 + remaining_days / 365.25
+
+
+def _freeze(values: np.ndarray) -> np.ndarray:
+    values.setflags(write=False)
+    return values
+
+
+def to_decimal(value: float) -> Decimal:
+    """Converts a curve value to a Decimal rounded to paise."""
+    return Decimal(str(round(float(value), 2)))
+
+
+class InterestRateTable:
+    """
+    Interest-rate periods for a scheme, pre-indexed for vectorised lookups.
+
+    Lookups follow the same precedence as the row-by-row scans elsewhere in
+    the code: the first period (in the order given) that covers a date wins.
+    """
+
+    def __init__(self, periods: Iterable[Tuple[date, Optional[date], Decimal]]):
+        self.periods: Tuple[Tuple[date, Optional[date], Decimal], ...] = tuple(
+            periods
+        )
+        self._starts = np.array([p[0] for p in self.periods], dtype=_DAY)
+        self._ends = np.array(
+            [p[1] if p[1] is not None else date.max for p in self.periods],
+            dtype=_DAY,
+        )
+
+    @classmethod
+    def from_rates(
+        cls, rates: Iterable[HistoricalInterestRate]
+    ) -> "InterestRateTable":
+        return cls((r.start_date, r.end_date, Decimal(r.rate)) for r in rates)
+
+    def index_for(self, dates: np.ndarray) -> np.ndarray:
+        """Returns the period index covering each date, or -1 if none does."""
+        index = np.full(dates.shape, -1, dtype=np.int64)
+        for i in range(len(self.periods)):
+            covered = (
+                (index < 0) & (self._starts[i] <= dates) & (self._ends[i] >= dates)
+            )
+            index[covered] = i
+        return index
+
+    def rate_for(self, index: int) -> Optional[Decimal]:
+        return self.periods[index][2] if index >= 0 else None
+
+
+# --- Fixed Deposits ---
+
+
+def fd_version(fd: FixedDeposit) -> tuple:
+    return (
+        fd.id,
+        Decimal(fd.principal_amount),
+        Decimal(fd.interest_rate),
+        fd.start_date,
+        fd.maturity_date,
+        (fd.compounding_frequency or "").upper(),
+        (fd.interest_payout or "").upper(),
+    )
+
+
+@functools.lru_cache(maxsize=CURVE_CACHE_SIZE)
+def _fd_curve(version: tuple, dates_key: bytes) -> np.ndarray:
+    _, principal, rate, start, maturity, compounding, payout = version
+    dates = np.frombuffer(dates_key, dtype=_DAY)
+    start_d = np.datetime64(start, "D")
+    active = (dates >= start_d) & (dates <= np.datetime64(maturity, "D"))
+
+    principal_f = float(principal)
+    if payout != "CUMULATIVE":
+        return _freeze(np.where(active, principal_f, 0.0))
+
+    n = FD_COMPOUNDING_PERIODS.get(compounding, 4)  # Default to quarterly
+    t = (dates - start_d).astype(np.int64) / 365.25
+    values = principal_f * (1.0 + float(rate) / 100.0 / n) ** (n * t)
+    return _freeze(np.where(active, values, 0.0))
+
+
+def fd_value_curve(fd: FixedDeposit, dates: Iterable) -> np.ndarray:
+    """Returns the value of an FD on each of the given dates."""
+    return _fd_curve(fd_version(fd), to_date_array(dates).tobytes())
+
+
+def fd_value_on(fd: FixedDeposit, on_date: date) -> Decimal:
+    """Returns the value of an FD on a single date as a Decimal."""
+    return to_decimal(fd_value_curve(fd, [on_date])[0])
+
+
+# --- Recurring Deposits ---
+
+
+def rd_version(rd: RecurringDeposit) -> tuple:
+    return (
+        rd.id,
+        Decimal(rd.monthly_installment),
+        Decimal(rd.interest_rate),
+        rd.start_date,
+        int(rd.tenure_months),
+    )
+
+
+@functools.lru_cache(maxsize=CURVE_CACHE_SIZE)
+def _rd_curve(version: tuple, dates_key: bytes) -> np.ndarray:
+    _, installment, rate, start, tenure = version
+    dates = np.frombuffer(dates_key, dtype=_DAY)
+    values = np.zeros(dates.shape, dtype=np.float64)
+    if tenure <= 0 or dates.size == 0:
+        return _freeze(values)
+
+    start_d = np.array([start], dtype=_DAY)
+    installment_dates = _add_months(
+        np.repeat(start_d, tenure), np.arange(tenure, dtype=np.int64)
+    )
+    maturity = _add_months(start_d, np.array([tenure]))[0]
+    active = (dates >= start_d[0]) & (dates <= maturity)
+    if not active.any():
+        return _freeze(values)
+
+    # (active dates x installments) matrix of the time each installment has
+    # been compounding, masked to installments already paid on that date.
+    on = dates[active][:, None]
+    paid = installment_dates[None, :] <= on
+    t = _elapsed_years(
+        np.broadcast_to(installment_dates[None, :], paid.shape),
+        np.broadcast_to(on, paid.shape),
+    )
+    growth = (1.0 + float(rate) / 100.0 / 4.0) ** (4.0 * t)
+    values[active] = np.round(
+        float(installment) * np.where(paid, growth, 0.0).sum(axis=1), 2
+    )
+    return _freeze(values)
+
+
+def rd_value_curve(rd: RecurringDeposit, dates: Iterable) -> np.ndarray:
+    """Returns the value of an RD on each of the given dates."""
+    return _rd_curve(rd_version(rd), to_date_array(dates).tobytes())
+
+
+def rd_value_on(rd: RecurringDeposit, on_date: date) -> Decimal:
+    """Returns the value of an RD on a single date as a Decimal."""
+    return to_decimal(rd_value_curve(rd, [on_date])[0])
+
+
+# --- Public Provident Fund ---
+
+
+def _fy_start_years(dates: np.ndarray) -> np.ndarray:
+    years = dates.astype("datetime64[Y]").astype(np.int64) + 1970
+    months = dates.astype(_MONTH).astype(np.int64) % 12 + 1
+    return np.where(months >= 4, years, years - 1)
+
+
+def ppf_version(
+    ppf_asset: Asset,
+    transactions: Sequence[Transaction],
+    rate_table: InterestRateTable,
+) -> tuple:
+    ledger = tuple(
+        sorted(
+            (
+                t.transaction_date.date(),
+                getattr(t.transaction_type, "value", t.transaction_type),
+                Decimal(t.quantity),
+            )
+            for t in transactions
+            if t.transaction_type
+            in (TransactionType.CONTRIBUTION, TransactionType.INTEREST_CREDIT)
+        )
+    )
+    return (ppf_asset.id, ppf_asset.opening_date, ledger, rate_table.periods)
+
+
+def _ppf_fy_ledger(
+    opening_date: date,
+    contributions: List[Tuple[date, Decimal]],
+    credits: dict,
+    rate_table: InterestRateTable,
+    last_fy_year: int,
+) -> Tuple[List[Decimal], List[List[Decimal]]]:
+    """
+    Walks the financial years once, month by month, and returns for each FY
+    the opening balance and the running (unrounded) interest accrued before
+    each month, using the monthly-minimum-balance rule from
+    ``crud_ppf._calculate_ppf_interest_for_fy``.
+    """
+    first_fy_year = opening_date.year if opening_date.month >= 4 else (
+        opening_date.year - 1
+    )
+    n_fy = max(last_fy_year - first_fy_year + 1, 0)
+    if n_fy == 0:
+        return [], []
+
+    month_starts = np.datetime64(f"{first_fy_year}-04", "M") + np.arange(
+        12 * n_fy
+    )
+    rate_index = rate_table.index_for(month_starts.astype(_DAY))
+    month_of = {m: i for i, m in enumerate(month_starts.astype(_DAY).tolist())}
+
+    monthly_total = [Decimal("0.0")] * len(month_starts)
+    early_total: List[list] = [[] for _ in month_starts]
+    for tx_date, quantity in contributions:
+        i = month_of.get(tx_date.replace(day=1))
+        if i is None:
+            continue
+        monthly_total[i] += quantity
+        if tx_date.day <= 5:
+            early_total[i].append(quantity)
+
+    openings: List[Decimal] = []
+    accrued: List[List[Decimal]] = []
+    balance = Decimal("0.0")
+    for f in range(n_fy):
+        openings.append(balance)
+        month_balance = balance
+        running = Decimal("0.0")
+        prefix = []
+        fy_contributions = Decimal("0.0")
+        for i in range(12 * f, 12 * f + 12):
+            prefix.append(running)
+            balance_for_interest = month_balance
+            for quantity in early_total[i]:
+                balance_for_interest += quantity
+            rate = rate_table.rate_for(int(rate_index[i]))
+            if rate is not None:
+                running += balance_for_interest * (
+                    rate / Decimal("100") / Decimal("12")
+                )
+            month_balance += monthly_total[i]
+            fy_contributions += monthly_total[i]
+        prefix.append(running)
+        accrued.append(prefix)
+
+        fy_end = date(first_fy_year + f + 1, 3, 31)
+        fy_interest = credits.get(fy_end, running.quantize(Decimal("0.01")))
+        balance += fy_contributions + fy_interest
+    return openings, accrued
+
+
+@functools.lru_cache(maxsize=CURVE_CACHE_SIZE)
+def _ppf_curve(version: tuple, dates_key: bytes) -> np.ndarray:
+    _, opening_date, ledger, periods = version
+    dates = np.frombuffer(dates_key, dtype=_DAY)
+    values = np.zeros(dates.shape, dtype=np.float64)
+    if dates.size == 0:
+        return _freeze(values)
+
+    contributions = [
+        (d, q) for d, t, q in ledger if t == TransactionType.CONTRIBUTION.value
+    ]
+    contribution_dates = np.array([d for d, _ in contributions], dtype=_DAY)
+    cumulative = np.concatenate(
+        ([0.0], np.cumsum([float(q) for _, q in contributions]))
+    )
+
+    if not opening_date:
+        # Without an opening date the account is valued at cost.
+        values[:] = cumulative[np.searchsorted(contribution_dates, dates, "right")]
+        return _freeze(values)
+
+    credits: dict = {}
+    for d, t, q in ledger:
+        if t == TransactionType.INTEREST_CREDIT.value:
+            fy_end = date(d.year if d.month <= 3 else d.year + 1, 3, 31)
+            credits[fy_end] = credits.get(fy_end, Decimal(0)) + q
+
+    fy_years = _fy_start_years(dates)
+    openings, accrued = _ppf_fy_ledger(
+        opening_date,
+        contributions,
+        credits,
+        InterestRateTable(periods),
+        int(fy_years.max()),
+    )
+    if not openings:
+        return _freeze(values)
+
+    first_fy_year = int(_fy_start_years(np.array([opening_date], dtype=_DAY))[0])
+    fy_index = fy_years - first_fy_year
+    in_range = fy_index >= 0
+    fy_index = np.clip(fy_index, 0, None)
+
+    opening_f = np.array([float(b) for b in openings])
+    accrued_f = np.array(
+        [[float(a.quantize(Decimal("0.01"))) for a in row] for row in accrued]
+    )
+    months_passed = (dates.astype(_MONTH).astype(np.int64) - 3) % 12
+    fy_start_dates = (
+        (fy_years - 1970).astype("datetime64[Y]").astype(_MONTH) + 3
+    ).astype(_DAY)
+    contributed_in_fy = (
+        cumulative[np.searchsorted(contribution_dates, dates, "right")]
+        - cumulative[np.searchsorted(contribution_dates, fy_start_dates, "left")]
+    )
+    values = np.where(
+        in_range,
+        opening_f[fy_index]
+        + contributed_in_fy
+        + accrued_f[fy_index, months_passed],
+        0.0,
+    )
+    return _freeze(np.round(values, 2))
+
+
+def ppf_value_curve(
+    ppf_asset: Asset,
+    transactions: Sequence[Transaction],
+    rate_table: InterestRateTable,
+    dates: Iterable,
+) -> np.ndarray:
+    """
+    Returns the balance of a PPF account on each of the given dates.
+
+    Equivalent to calling ``process_ppf_holding(..., simulate_only=True)``
+    once per date, but the financial-year interest ledger is built once.
+    Transactions after a given date are ignored for that date.
+    """
+    return _ppf_curve(
+        ppf_version(ppf_asset, transactions, rate_table),
+        to_date_array(dates).tobytes(),
+    )
+
+
+def clear_cache() -> None:
+    """Drops all memoised curves."""
+    _fd_curve.cache_clear()
+    _rd_curve.cache_clear()
+    _ppf_curve.cache_clear()
@@ -1,12 +1,13 @@
 import logging
+from collections import defaultdict
 from datetime import date, datetime, timedelta
 from decimal import Decimal
-from typing import Dict, Optional, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
+from sqlalchemy import case, extract, func
 from sqlalchemy.orm import Session
 
 from app.models.asset import Asset
-from app.models.portfolio import Portfolio
 from app.models.transaction import Transaction
 from app.schemas.dividends import DividendEntry, DividendSummary
 from app.schemas.enums import TransactionType
@@ -14,6 +15,18 @@ from app.services.financial_data_service import financial_data_service
 
 logger = logging.getLogger(__name__)
 
+ADVANCE_TAX_PERIODS = [
+    "Upto 15/6",
+    "16/6 - 15/9",
+    "16/9 - 15/12",
+    "16/12 - 15/3",
+    "16/3 - 31/3",
+]
+
+# Rows fetched per round trip when streaming dividend entries.
+ENTRY_BATCH_SIZE = 1000
+
+
 class DividendService:
     def __init__(self, db: Session):
         self.db = db
@@ -31,32 +44,6 @@ class DividendService:
         last_day_of_prev_month = first_day_of_month - timedelta(days=1)
         return last_day_of_prev_month
 
-    def get_advance_tax_period(self, txn_date: date, fy_start_year: int) -> str:
-        """
-        Groups the transaction date into the standard Advance Tax buckets:
-        - Upto 15/6
-        - 16/6 - 15/9
-        - 16/9 - 15/12
-        - 16/12 - 15/3
-        - 16/3 - 31/3
-        """
-        # Quarter end cutoffs
-        q1_cutoff = date(fy_start_year, 6, 15)
-        q2_cutoff = date(fy_start_year, 9, 15)
-        q3_cutoff = date(fy_start_year, 12, 15)
-        q4_cutoff = date(fy_start_year + 1, 3, 15)
-
-        if txn_date <= q1_cutoff:
-            return "Upto 15/6"
-        elif txn_date <= q2_cutoff:
-            return "16/6 - 15/9"
-        elif txn_date <= q3_cutoff:
-            return "16/9 - 15/12"
-        elif txn_date <= q4_cutoff:
-            return "16/12 - 15/3"
-        else:
-            return "16/3 - 31/3"
-
     def get_proxy_ttbr_rate(self, currency: str, ttbr_date: date) -> Optional[Decimal]:
         """
         Fetch proxy TTBR rate (using yfinance via financial_data_service).
@@ -76,111 +63,216 @@ class DividendService:
         self._ttbr_cache[cache_key] = rate
         return rate
 
-    def get_dividend_report(
-        self,
-        fy_year: str,
-        portfolio_id: Optional[str] = None,
-        user_id: Optional[str] = None,
-    ) -> DividendSummary:
+    def prefetch_ttbr_rates(self, pairs: Iterable[Tuple[str, date]]) -> None:
         """
-        Generate a dividend report for a specific financial year.
-        If portfolio_id is provided, limit to that portfolio.
+        Loads proxy TTBR rates for many (currency, date) pairs into the cache,
+        issuing one bulk FX request per currency instead of one per pair.
         """
+        dates_by_currency: Dict[str, set] = defaultdict(set)
+        for currency, ttbr_date in pairs:
+            if currency.upper() != "INR" and (currency, ttbr_date) not in (
+                self._ttbr_cache
+            ):
+                dates_by_currency[currency].add(ttbr_date)
+
+        for currency, dates in dates_by_currency.items():
+            rates = financial_data_service.get_exchange_rates(
+                currency.upper(), "INR", sorted(dates)
+            )
+            for ttbr_date in dates:
+                self._ttbr_cache[(currency, ttbr_date)] = rates.get(ttbr_date)
+
+    def _convert_to_inr(
+        self, amount_native: Decimal, currency: str, txn_date: date
+    ) -> Tuple[Decimal, Optional[date], Optional[Decimal]]:
+        if currency.upper() == "INR":
+            return amount_native, None, None
+
+        ttbr_date = self.get_ttbr_date(txn_date)
+        ttbr_rate = self.get_proxy_ttbr_rate(currency, ttbr_date)
+        if ttbr_rate:
+            return amount_native * ttbr_rate, ttbr_date, ttbr_rate
+
+        logger.warning(
+            f"Could not fetch TTBR proxy rate for {currency} on {ttbr_date}"
+        )
+        return Decimal("0"), ttbr_date, ttbr_rate  # Or leave it as distinct error state
+
+    @staticmethod
+    def _fy_bounds(fy_year: str) -> Tuple[int, datetime, datetime]:
         # Parse FY dates (fy_year format: "2025-26")
         start_year = int(fy_year.split("-")[0])
-        start_date = date(start_year, 4, 1)
-        end_date = date(start_year + 1, 3, 31)
-
-        # Base query for DIVIDEND transactions
-        query = (
-            self.db.query(Transaction)
-            .join(Asset, Transaction.asset_id == Asset.id)
-            .join(Portfolio, Transaction.portfolio_id == Portfolio.id)
-            .filter(
-                Transaction.transaction_type == TransactionType.DIVIDEND,
-                Transaction.transaction_date >= start_date,
-                Transaction.transaction_date <= end_date,
-            )
+        return (
+            start_year,
+            datetime(start_year, 4, 1),
+            datetime(start_year + 1, 4, 1),
+        )
+
+    @staticmethod
+    def _period_expression(start_year: int):
+        """
+        The `ADVANCE_TAX_PERIODS` bucket of a transaction's date, as a SQL
+        expression: up to 15/6, 16/6 - 15/9, 16/9 - 15/12 and 16/12 - 15/3 of
+        the financial year, and the rest of March. The cutoffs are compared as
+        exclusive upper bounds on the following day so that the whole cutoff
+        day falls in the earlier bucket regardless of the time of day.
+        """
+        date_col = Transaction.transaction_date
+        return case(
+            (date_col < datetime(start_year, 6, 16), ADVANCE_TAX_PERIODS[0]),
+            (date_col < datetime(start_year, 9, 16), ADVANCE_TAX_PERIODS[1]),
+            (date_col < datetime(start_year, 12, 16), ADVANCE_TAX_PERIODS[2]),
+            (date_col < datetime(start_year + 1, 3, 16), ADVANCE_TAX_PERIODS[3]),
+            else_=ADVANCE_TAX_PERIODS[4],
         )
 
+    def _filtered(self, query, fy_year: str, portfolio_id, user_id):
+        _, start_dt, end_dt = self._fy_bounds(fy_year)
+        query = query.filter(
+            Transaction.transaction_type == TransactionType.DIVIDEND,
+            Transaction.transaction_date >= start_dt,
+            Transaction.transaction_date < end_dt,
+        )
         if user_id:
             query = query.filter(Transaction.user_id == user_id)
         if portfolio_id:
             query = query.filter(Transaction.portfolio_id == portfolio_id)
+        return query
 
-        # Sort by date
-        transactions = query.order_by(Transaction.transaction_date.asc()).all()
+    def get_bucket_totals(
+        self,
+        fy_year: str,
+        portfolio_id: Optional[str] = None,
+        user_id: Optional[str] = None,
+    ) -> Dict[str, Decimal]:
+        """
+        Totals dividends per advance-tax period in INR.
 
-        entries = []
-        total_amount_inr = Decimal("0")
+        The native amounts are summed in the database, grouped by period,
+        currency and calendar month (which determines the Rule 115 TTBR date),
+        so only a handful of rows come back regardless of the number of
+        dividends. The TTBR rates for those groups are fetched in bulk and
+        cached for any subsequent `iter_dividend_entries` call.
+        """
+        start_year, _, _ = self._fy_bounds(fy_year)
+        period = self._period_expression(start_year).label("period")
+        currency = func.coalesce(Asset.currency, "INR").label("currency")
+        year = extract("year", Transaction.transaction_date).label("year")
+        month = extract("month", Transaction.transaction_date).label("month")
+        amount = func.sum(
+            Transaction.quantity * Transaction.price_per_unit
+        ).label("amount")
 
-        # Initialize bucket totals
-        bucket_totals = {
-            "Upto 15/6": Decimal("0"),
-            "16/6 - 15/9": Decimal("0"),
-            "16/9 - 15/12": Decimal("0"),
-            "16/12 - 15/3": Decimal("0"),
-            "16/3 - 31/3": Decimal("0")
+        query = self.db.query(period, currency, year, month, amount).join(
+            Asset, Transaction.asset_id == Asset.id
+        )
+        groups = (
+            self._filtered(query, fy_year, portfolio_id, user_id)
+            .group_by(period, currency, year, month)
+            .all()
+        )
+
+        month_starts = {
+            (row.currency, date(int(row.year), int(row.month), 1)) for row in groups
         }
+        self.prefetch_ttbr_rates(
+            (currency, self.get_ttbr_date(month_start))
+            for currency, month_start in month_starts
+        )
+
+        bucket_totals = {p: Decimal("0") for p in ADVANCE_TAX_PERIODS}
+        for row in groups:
+            amount_inr, _, _ = self._convert_to_inr(
+                Decimal(row.amount or 0),
+                row.currency,
+                date(int(row.year), int(row.month), 1),
+            )
+            bucket_totals[row.period] += amount_inr
+        return bucket_totals
+
+    def iter_dividend_entries(
+        self,
+        fy_year: str,
+        portfolio_id: Optional[str] = None,
+        user_id: Optional[str] = None,
+    ) -> Iterator[DividendEntry]:
+        """
+        Yields the dividend entries for a financial year in date order.
 
-        for txn in transactions:
-            asset = txn.asset
+        Only the needed columns are selected (no ORM objects, no lazy loads of
+        `txn.asset`) and rows are fetched in batches, so large histories can
+        be streamed without holding them all in memory. Call
+        `get_bucket_totals` first to have all TTBR rates fetched in bulk.
+        """
+        start_year, _, _ = self._fy_bounds(fy_year)
+        query = self.db.query(
+            Transaction.id,
+            Transaction.transaction_date,
+            Transaction.quantity,
+            Transaction.price_per_unit,
+            Asset.name,
+            Asset.ticker_symbol,
+            Asset.currency,
+            self._period_expression(start_year).label("period"),
+        ).join(Asset, Transaction.asset_id == Asset.id)
+        query = self._filtered(query, fy_year, portfolio_id, user_id).order_by(
+            Transaction.transaction_date.asc(), Transaction.id.asc()
+        )
 
+        for row in query.yield_per(ENTRY_BATCH_SIZE):
+            txn_date = (
+                row.transaction_date.date()
+                if isinstance(row.transaction_date, datetime)
+                else row.transaction_date
+            )
             # For dividends, the quantity field and price_per_unit dictate the
             # amount received. (UI often treats quantity as shares held and price
             # as dividend per share, or quantity as dividend amount and price
             # as 1 for cash funds)
-            amount_native = txn.quantity * txn.price_per_unit
-
-            currency = asset.currency or "INR"
-
-            entry_data = {
-                "transaction_id": str(txn.id),
-                "asset_name": asset.name,
-                "asset_ticker": asset.ticker_symbol,
-                "date": (
-                    txn.transaction_date.date()
-                    if isinstance(txn.transaction_date, datetime)
-                    else txn.transaction_date
-                ),
+            amount_native = row.quantity * row.price_per_unit
+            currency = row.currency or "INR"
+            amount_inr, ttbr_date, ttbr_rate = self._convert_to_inr(
+                amount_native, currency, txn_date
+            )
+
+            yield DividendEntry(
+                transaction_id=str(row.id),
+                asset_name=row.name,
+                asset_ticker=row.ticker_symbol,
+                date=txn_date,
                 # The quantity of shares held (sometimes dividend quantity is the
                 # amount, UI handles this but let's just pass raw qty)
-                "quantity": txn.quantity,
-                "amount_native": amount_native,
-                "currency": currency,
-            }
-
-            if currency.upper() != "INR":
-                ttbr_date = self.get_ttbr_date(entry_data["date"])
-                ttbr_rate = self.get_proxy_ttbr_rate(currency, ttbr_date)
-
-                entry_data["ttbr_date"] = ttbr_date
-                entry_data["ttbr_rate"] = ttbr_rate
-
-                if ttbr_rate:
-                    amount_inr = amount_native * ttbr_rate
-                else:
-                    logger.warning(
-                        f"Could not fetch TTBR proxy rate for {currency} on {ttbr_date}"
-                    )
-                    amount_inr = Decimal("0") # Or leave it as distinct error state
-            else:
-                amount_inr = amount_native
-
-            # Determine the tax period bucket
-            period = self.get_advance_tax_period(entry_data["date"], start_year)
-
-            entry_data["amount_inr"] = amount_inr
-            entry_data["period"] = period
-
-            total_amount_inr += amount_inr
-            bucket_totals[period] += amount_inr
+                quantity=row.quantity,
+                amount_native=amount_native,
+                currency=currency,
+                ttbr_date=ttbr_date,
+                ttbr_rate=ttbr_rate,
+                amount_inr=amount_inr,
+                period=row.period,
+            )
 
-            entries.append(DividendEntry(**entry_data))
+    def get_dividend_report(
+        self,
+        fy_year: str,
+        portfolio_id: Optional[str] = None,
+        user_id: Optional[str] = None,
+    ) -> DividendSummary:
+        """
+        Generate a dividend report for a specific financial year.
+        If portfolio_id is provided, limit to that portfolio.
+        """
+        bucket_totals = self.get_bucket_totals(
+            fy_year, portfolio_id=portfolio_id, user_id=user_id
+        )
+        entries: List[DividendEntry] = list(
+            self.iter_dividend_entries(
+                fy_year, portfolio_id=portfolio_id, user_id=user_id
+            )
+        )
 
         return DividendSummary(
             fy_year=fy_year,
             entries=entries,
-            total_amount_inr=total_amount_inr,
+            total_amount_inr=sum(bucket_totals.values(), Decimal("0")),
             bucket_totals=bucket_totals
         )
@@ -0,0 +1,236 @@
+"""
+A float64 replay of market-traded transactions, the fast path of the
+holdings calculation (``settings.HOLDINGS_FAST_PATH``).
+
+``crud_holding._accumulate_positions`` replays every transaction in
+``Decimal``, converting each FX rate through ``str`` and reading the
+transaction's ORM attributes again for each check, which dominates the
+holdings calculation for large portfolios. This module reads each
+transaction once, computes the same per-ticker quantity, amount invested and
+realized P&L in float64 and only converts to ``Decimal`` at the output
+boundary, rounded to ``QUANTITY_PLACES`` and ``AMOUNT_PLACES``. It is about
+twice as fast.
+
+Transactions are gathered into arrays grouped by ticker. Tickers whose
+transactions only add up (buys, vests, dividends and coupons) are summed
+with one ``np.bincount`` per column. The rest, where a sale, split or other
+corporate action depends on the position before it, are replayed in date
+order with plain floats.
+"""
+import math
+import uuid
+from collections import defaultdict
+from decimal import Decimal
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+
+from app import models
+from app.crud.crud_transaction import TransactionRecord
+from app.models.transaction_link import TransactionLink
+
+ACQUISITION_TYPES = {"BUY", "ESPP_PURCHASE", "RSU_VEST"}
+INCOME_TYPES = {"DIVIDEND", "COUPON"}
+# Transactions whose effect depends on the position before them
+ORDERED_TYPES = {"SELL", "SPLIT", "MERGER", "RENAME", "DEMERGER"}
+_RELEVANT_TYPES = ACQUISITION_TYPES | INCOME_TYPES | ORDERED_TYPES
+
+# Transaction quantities are stored to 8 places
+QUANTITY_PLACES = Decimal("1E-8")
+AMOUNT_PLACES = Decimal("1E-4")
+
+# Float error allowed below a whole number when flooring split quantities
+_FLOOR_TOLERANCE = 1e-9
+
+
+class _Row(NamedTuple):
+    """A transaction's replay inputs, with its amounts as floats."""
+
+    ticker_id: int
+    tx_type: str
+    quantity: float
+    # The cost basis price for acquisitions (FMV for RSU vests)
+    price: float
+    fx_rate: float
+    details: Optional[dict]
+    tx_id: uuid.UUID
+
+
+def _columns(tx: Union[models.Transaction, TransactionRecord]) -> tuple:
+    """
+    (type, asset id, quantity, price, details, id) of a transaction. An ORM
+    instance is read from its loaded values, which is several times cheaper
+    than going through the ORM attributes; an expired instance is read
+    through them, which reloads it.
+    """
+    if isinstance(tx, TransactionRecord):
+        return (
+            tx.transaction_type, tx.asset_id, tx.quantity,
+            tx.price_per_unit, tx.details, tx.id,
+        )
+    values = tx.__dict__
+    try:
+        return (
+            values["transaction_type"], values["asset_id"], values["quantity"],
+            values["price_per_unit"], values["details"], values["id"],
+        )
+    except KeyError:
+        return (
+            tx.transaction_type, tx.asset_id, tx.quantity,
+            tx.price_per_unit, tx.details, tx.id,
+        )
+
+
+def _fx_rate(details: Optional[dict]) -> float:
+    return float(details.get("fx_rate", 1)) if details else 1.0
+
+
+def _linked_buy_price(buy_tx: models.Transaction) -> float:
+    """The price a lot sold against a specific buy was carried at, in INR."""
+    details = buy_tx.details
+    if buy_tx.transaction_type == "RSU_VEST" and details and "fmv" in details:
+        price = float(details["fmv"])
+    else:
+        price = float(buy_tx.price_per_unit)
+    return price * _fx_rate(details)
+
+
+def _replay_in_order(
+    state: List[float],
+    row: _Row,
+    currency: str,
+    sell_links_map: Dict[uuid.UUID, List[TransactionLink]],
+    tx_map: Dict[uuid.UUID, models.Transaction],
+) -> None:
+    """Applies one transaction to a ticker's [quantity, invested, realized]."""
+    tx_type = row.tx_type
+    if tx_type in ACQUISITION_TYPES:
+        state[0] += row.quantity
+        state[1] += row.quantity * row.price * row.fx_rate
+    elif tx_type in INCOME_TYPES:
+        state[2] += row.quantity * row.price * row.fx_rate
+    elif tx_type == "SPLIT":
+        if state[0] > 0 and row.price > 0:
+            state[0] *= row.quantity / row.price
+            if currency == "INR":
+                state[0] = float(math.floor(state[0] + _FLOOR_TOLERANCE))
+    elif tx_type in ("MERGER", "RENAME"):
+        state[0] = 0.0
+        state[1] = 0.0
+    elif tx_type == "DEMERGER":
+        if row.details and "total_cost_allocated" in row.details:
+            state[1] -= float(row.details["total_cost_allocated"])
+    elif tx_type == "SELL" and state[0] > 0:
+        sell_price = row.price * row.fx_rate
+        unlinked = row.quantity
+        pnl = 0.0
+        cost_sold = 0.0
+        for link in sell_links_map.get(row.tx_id, ()):
+            buy_tx = tx_map.get(link.buy_transaction_id)
+            if buy_tx:
+                buy_price = _linked_buy_price(buy_tx)
+                linked = float(link.quantity)
+                pnl += (sell_price - buy_price) * linked
+                cost_sold += buy_price * linked
+                unlinked -= linked
+        if unlinked > 0:
+            average_cost = state[1] / state[0]
+            pnl += (sell_price - average_cost) * unlinked
+            cost_sold += average_cost * unlinked
+        state[2] += pnl
+        state[1] -= cost_sold
+        state[0] -= row.quantity
+
+
+def _sum_by_ticker(rows: List[_Row], count: int) -> np.ndarray:
+    """[quantity, invested, realized] per ticker, as a (count, 3) array."""
+    if not rows:
+        return np.zeros((count, 3))
+    ids, _, quantity, price, fx_rate = (
+        np.array(column) for column in list(zip(*rows))[:5]
+    )
+    acquired = np.array([row.tx_type in ACQUISITION_TYPES for row in rows])
+    amount = quantity * price * fx_rate
+    return np.column_stack([
+        np.bincount(ids[acquired], weights=quantity[acquired], minlength=count),
+        np.bincount(ids[acquired], weights=amount[acquired], minlength=count),
+        np.bincount(ids[~acquired], weights=amount[~acquired], minlength=count),
+    ])
+
+
+def _to_decimal(value: float, places: Decimal) -> Decimal:
+    # `+ 0` turns a negative zero into zero
+    return Decimal(value).quantize(places) + 0
+
+
+def accumulate_positions(
+    transactions: List[Union[models.Transaction, TransactionRecord]],
+    asset_map: Dict[uuid.UUID, models.Asset],
+    sell_links_map: Dict[uuid.UUID, List[TransactionLink]],
+    tx_map: Dict[uuid.UUID, models.Transaction],
+    initial_realized_pnl: Decimal,
+) -> Tuple[Dict[str, Dict[str, Decimal]], Decimal]:
+    """
+    The float64 counterpart of ``crud_holding._accumulate_positions``, with
+    the same arguments and result.
+    """
+    ticker_ids: Dict[str, int] = {}
+    currencies: List[str] = []
+    # Asset id to its ticker's id, or None for assets without a ticker
+    asset_ticker_ids: Dict[uuid.UUID, Optional[int]] = {}
+    rows: List[_Row] = []
+    ordered = set()
+    for tx in transactions:
+        tx_type, asset_id, quantity, price, details, tx_id = _columns(tx)
+        if tx_type not in _RELEVANT_TYPES:
+            continue
+        ticker_id = asset_ticker_ids.get(asset_id, -1)
+        if ticker_id == -1:
+            asset = asset_map.get(asset_id)
+            ticker = asset.ticker_symbol if asset else None
+            if ticker and ticker not in ticker_ids:
+                ticker_ids[ticker] = len(ticker_ids)
+                currencies.append(asset.currency)
+            ticker_id = asset_ticker_ids[asset_id] = ticker_ids.get(ticker)
+        if ticker_id is None:
+            continue
+        if tx_type == "RSU_VEST" and details:
+            price = details.get("fmv", 0)
+        rows.append(_Row(
+            ticker_id, tx_type, float(quantity), float(price),
+            float(details.get("fx_rate", 1)) if details else 1.0, details, tx_id,
+        ))
+        if tx_type in ORDERED_TYPES:
+            ordered.add(ticker_id)
+
+    # Tickers whose transactions commute: summed column-wise
+    commuting = [row for row in rows if row.ticker_id not in ordered]
+    totals = _sum_by_ticker(commuting, len(ticker_ids)).tolist()
+
+    # The rest: replayed one transaction at a time, in date order
+    for row in rows:
+        if row.ticker_id in ordered:
+            _replay_in_order(
+                totals[row.ticker_id], row, currencies[row.ticker_id],
+                sell_links_map, tx_map,
+            )
+
+    holdings_state: Dict[str, Dict[str, Decimal]] = defaultdict(
+        lambda: {
+            "quantity": Decimal("0.0"),
+            "total_invested": Decimal("0.0"),
+            "realized_pnl": Decimal("0.0"),
+        }
+    )
+    total_realized = 0.0
+    for ticker, ticker_id in ticker_ids.items():
+        quantity, invested, realized = totals[ticker_id]
+        total_realized += realized
+        holdings_state[ticker] = {
+            "quantity": _to_decimal(quantity, QUANTITY_PLACES),
+            "total_invested": _to_decimal(invested, AMOUNT_PLACES),
+            "realized_pnl": _to_decimal(realized, AMOUNT_PLACES),
+        }
+    return holdings_state, initial_realized_pnl + _to_decimal(
+        total_realized, AMOUNT_PLACES
+    )
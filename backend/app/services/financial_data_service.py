@@ -1,10 +1,13 @@
+import asyncio
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date
 from decimal import Decimal
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple, cast
 
 from app.cache.base import CacheClient
 from app.core.config import settings
+from app.utils.lazy import LazyProxy
 
 from .providers.amfi_provider import AmfiIndiaProvider  # type: ignore
 from .providers.nse_bhavcopy_provider import NseBhavcopyProvider
@@ -13,10 +16,66 @@ from .providers.yfinance_provider import YFinanceProvider  # type: ignore
 
 CACHE_TTL_CURRENT_PRICE = 900  # 15 minutes
 CACHE_TTL_HISTORICAL_PRICE = 86400  # 24 hours
+# Concurrent yfinance lookups in get_asset_details_batch
+ASSET_DETAILS_WORKERS = 8
 
 logger = logging.getLogger(__name__)
 
 
+def _split_by_type(assets: List[Dict[str, Any]]) -> Tuple[
+    List[Dict[str, Any]], List[Dict[str, Any]],
+    List[Dict[str, Any]], List[Dict[str, Any]],
+]:
+    """Splits assets into (mutual funds, stocks/ETFs, bonds, everything else)."""
+    mf_assets = [
+        a for a in assets
+        if str(a.get("asset_type")).upper().replace("_", " ") == "MUTUAL FUND"
+    ]
+    stock_assets = [
+        a for a in assets if str(a.get("asset_type")).upper() in ("STOCK", "ETF")
+    ]
+    bond_assets = [a for a in assets if str(a.get("asset_type")).upper() == "BOND"]
+    other_assets = [
+        a for a in assets
+        if a not in mf_assets and a not in stock_assets and a not in bond_assets
+    ]
+    return mf_assets, stock_assets, bond_assets, other_assets
+
+
+def _split_mutual_funds(assets: List[Dict[str, Any]]) -> Tuple[
+    List[Dict[str, Any]], List[Dict[str, Any]]
+]:
+    mf_assets = [
+        a for a in assets
+        if str(a.get("asset_type")).upper().replace("_", " ") == "MUTUAL FUND"
+    ]
+    other_assets = [
+        a for a in assets
+        if str(a.get("asset_type")).upper().replace("_", " ") != "MUTUAL FUND"
+    ]
+    return mf_assets, other_assets
+
+
+def _missing_stocks(
+    stock_assets: List[Dict[str, Any]], prices_data: Dict[str, Dict[str, Decimal]]
+) -> List[Dict[str, Any]]:
+    return [
+        a for a in stock_assets
+        if a.get("ticker_symbol") not in prices_data
+        and a.get("ticker_symbol", "").replace(".NS", "") not in prices_data
+    ]
+
+
+def _nse_fallback_needed(
+    candidates: List[Dict[str, Any]], prices_data: Dict[str, Dict[str, Decimal]]
+) -> List[Dict[str, Any]]:
+    found_tickers_cleaned = {t.replace('.NS', '') for t in prices_data.keys()}
+    return [
+        a for a in candidates
+        if a.get("ticker_symbol") not in found_tickers_cleaned
+    ]
+
+
 class FinancialDataService:
     def __init__(self, cache_client: Optional[CacheClient]):
         self.upstox_provider = UpstoxProvider(cache_client)
@@ -38,18 +97,7 @@ class FinancialDataService:
         prices_data: Dict[str, Dict[str, Decimal]] = {}
 
         # 1. Separate assets by type for different providers
-        mf_assets = [
-            a for a in assets
-            if str(a.get("asset_type")).upper().replace("_", " ") == "MUTUAL FUND"
-        ]
-        stock_assets = [
-            a for a in assets if str(a.get("asset_type")).upper() in ("STOCK", "ETF")
-        ]
-        bond_assets = [a for a in assets if str(a.get("asset_type")).upper() == "BOND"]
-        other_assets = [
-            a for a in assets
-            if a not in mf_assets and a not in stock_assets and a not in bond_assets
-        ]
+        mf_assets, stock_assets, bond_assets, other_assets = _split_by_type(assets)
 
         # --- Processing by Priority ---
 
@@ -70,11 +118,7 @@ class FinancialDataService:
             logger.debug(f"Prices after Upstox: {upstox_prices.keys()}")
 
             # Fallback to yfinance for any stock assets not resolved by Upstox
-            missing_stocks = [
-                a for a in stock_assets
-                if a.get("ticker_symbol") not in prices_data
-                and a.get("ticker_symbol", "").replace(".NS", "") not in prices_data
-            ]
+            missing_stocks = _missing_stocks(stock_assets, prices_data)
             if missing_stocks:
                 logger.debug(
                     f"Processing {len(missing_stocks)} missing stock assets "
@@ -93,14 +137,9 @@ class FinancialDataService:
             logger.debug(f"Prices after NSE (for bonds): {prices_data.keys()}")
 
         # 5. NSE Fallback: For any stocks or MFs not found by primary providers
-        found_tickers_cleaned = {t.replace('.NS', '') for t in prices_data.keys()}
-
-        nse_fallback_candidates = stock_assets + mf_assets
-        nse_fallback_needed = [
-            a
-            for a in nse_fallback_candidates
-            if a.get("ticker_symbol") not in found_tickers_cleaned
-        ]
+        nse_fallback_needed = _nse_fallback_needed(
+            stock_assets + mf_assets, prices_data
+        )
         if nse_fallback_needed:
             logger.debug(
                 f"Found {len(nse_fallback_needed)} assets needing NSE fallback."
@@ -118,17 +157,54 @@ class FinancialDataService:
         logger.debug(f"Final prices returned: {prices_data}")
         return prices_data
 
+    async def aget_current_prices(
+        self, assets: List[Dict[str, Any]]
+    ) -> Dict[str, Dict[str, Decimal]]:
+        """
+        Async variant of `get_current_prices` with the same provider priority.
+        The primary provider for each asset type is queried concurrently; the
+        fallbacks run once the primaries have answered.
+        """
+        mf_assets, stock_assets, bond_assets, other_assets = _split_by_type(assets)
+
+        async def nothing() -> Dict[str, Dict[str, Decimal]]:
+            return {}
+
+        mf_prices, stock_prices, bond_prices, other_prices = await asyncio.gather(
+            self.amfi_provider.aget_current_prices(mf_assets)
+            if mf_assets else nothing(),
+            self.upstox_provider.aget_current_prices(stock_assets)
+            if stock_assets else nothing(),
+            self.nse_provider.aget_current_prices(bond_assets)
+            if bond_assets else nothing(),
+            self.yfinance_provider.aget_current_prices(other_assets)
+            if other_assets else nothing(),
+        )
+
+        prices_data: Dict[str, Dict[str, Decimal]] = {}
+        prices_data.update(mf_prices)
+        prices_data.update(stock_prices)
+        missing_stocks = _missing_stocks(stock_assets, prices_data)
+        if missing_stocks:
+            prices_data.update(
+                await self.yfinance_provider.aget_current_prices(missing_stocks)
+            )
+        prices_data.update(bond_prices)
+
+        nse_fallback_needed = _nse_fallback_needed(
+            stock_assets + mf_assets, prices_data
+        )
+        if nse_fallback_needed:
+            prices_data.update(
+                await self.nse_provider.aget_current_prices(nse_fallback_needed)
+            )
+        prices_data.update(other_prices)
+        return prices_data
+
     def get_historical_prices(
         self, assets: List[Dict[str, Any]], start_date: date, end_date: date
     ) -> Dict[str, Dict[date, Decimal]]:
-        mf_assets = [
-            a for a in assets
-            if str(a.get("asset_type")).upper().replace("_", " ") == "MUTUAL FUND"
-        ]
-        other_assets = [
-            a for a in assets
-            if str(a.get("asset_type")).upper().replace("_", " ") != "MUTUAL FUND"
-        ]
+        mf_assets, other_assets = _split_mutual_funds(assets)
 
         historical_data: Dict[str, Dict[date, Decimal]] = {}
 
@@ -148,6 +224,15 @@ class FinancialDataService:
                     missing_assets, start_date, end_date
                 ))
 
+            # 3. Fall back to the archived NSE bhavcopies
+            missing_assets = [
+                a for a in other_assets if a.get("ticker_symbol") not in historical_data
+            ]
+            if missing_assets:
+                historical_data.update(self.nse_provider.get_historical_prices(
+                    missing_assets, start_date, end_date
+                ))
+
         if mf_assets:
             historical_data.update(self.amfi_provider.get_historical_prices(
                 mf_assets, start_date, end_date
@@ -155,6 +240,44 @@ class FinancialDataService:
 
         return historical_data
 
+    async def aget_historical_prices(
+        self, assets: List[Dict[str, Any]], start_date: date, end_date: date
+    ) -> Dict[str, Dict[date, Decimal]]:
+        """Async variant of `get_historical_prices`."""
+        mf_assets, other_assets = _split_mutual_funds(assets)
+
+        async def other_history() -> Dict[str, Dict[date, Decimal]]:
+            if not other_assets:
+                return {}
+            history = await self.upstox_provider.aget_historical_prices(
+                other_assets, start_date, end_date
+            )
+            missing_assets = [
+                a for a in other_assets if a.get("ticker_symbol") not in history
+            ]
+            if missing_assets:
+                history.update(await self.yfinance_provider.aget_historical_prices(
+                    missing_assets, start_date, end_date
+                ))
+            missing_assets = [
+                a for a in other_assets if a.get("ticker_symbol") not in history
+            ]
+            if missing_assets:
+                history.update(await self.nse_provider.aget_historical_prices(
+                    missing_assets, start_date, end_date
+                ))
+            return history
+
+        async def mf_history() -> Dict[str, Dict[date, Decimal]]:
+            if not mf_assets:
+                return {}
+            return await self.amfi_provider.aget_historical_prices(
+                mf_assets, start_date, end_date
+            )
+
+        other, mf = await asyncio.gather(other_history(), mf_history())
+        return {**other, **mf}
+
     def get_asset_details(
         self, ticker_symbol: str, asset_type: Optional[str] = None
     ) -> Optional[Dict[str, Any]]:
@@ -187,6 +310,32 @@ class FinancialDataService:
         # Default to yfinance for other types or if type is unknown
         return self.yfinance_provider.get_asset_details(ticker_symbol)
 
+    def get_asset_details_batch(
+        self, ticker_symbols: List[str]
+    ) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        `get_asset_details` for many tickers, keyed by the ticker asked for.
+        Mutual fund ISINs are answered from the AMFI data, loaded once; the
+        remaining lookups go to yfinance concurrently.
+        """
+        results: Dict[str, Optional[Dict[str, Any]]] = {}
+        remaining = []
+        for ticker_symbol in dict.fromkeys(ticker_symbols):
+            if ticker_symbol.upper().startswith("ISIN:"):
+                isin_code = ticker_symbol.split(":", 1)[1]
+                mf_details = self.amfi_provider.get_scheme_by_isin(isin_code)
+                if mf_details:
+                    results[ticker_symbol] = mf_details
+                    continue
+            remaining.append(ticker_symbol)
+        if remaining:
+            workers = min(len(remaining), ASSET_DETAILS_WORKERS)
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results.update(
+                    zip(remaining, executor.map(self.get_asset_details, remaining))
+                )
+        return results
+
     def search_mutual_funds(self, query: str) -> List[Dict[str, Any]]:
         """Proxy to AMFI provider search."""
         return self.amfi_provider.search(query)
@@ -195,6 +344,10 @@ class FinancialDataService:
         """Search Yahoo Finance for stocks by name, ticker, or ISIN."""
         return self.yfinance_provider.search(query)
 
+    async def asearch_stocks(self, query: str) -> List[Dict[str, Any]]:
+        """Async variant of `search_stocks`."""
+        return await self.yfinance_provider.asearch(query)
+
     def get_price_from_yfinance(self, ticker_symbol: str) -> Optional[Decimal]:
         """Proxy to YFinance provider to get a single price."""
         return self.yfinance_provider.get_price(ticker_symbol)
@@ -210,6 +363,28 @@ class FinancialDataService:
             from_currency, to_currency, date_obj
         )
 
+    async def aget_exchange_rate(
+        self, from_currency: str, to_currency: str, date_obj: date
+    ) -> Optional[Decimal]:
+        """
+        Async variant of `get_exchange_rate`. yfinance has no async API, so the
+        lookup runs in a worker thread.
+        """
+        return await asyncio.to_thread(
+            self.get_exchange_rate, from_currency, to_currency, date_obj
+        )
+
+    def get_exchange_rates(
+        self, from_currency: str, to_currency: str, dates: List[date]
+    ) -> Dict[date, Optional[Decimal]]:
+        """
+        Fetches exchange rates between two currencies for several dates at once.
+        Delegates to yfinance provider.
+        """
+        return self.yfinance_provider.get_exchange_rates(
+            from_currency, to_currency, dates
+        )
+
     def get_enrichment_data_batch(
         self, assets: List[Dict[str, Any]]
     ) -> Dict[str, Dict[str, Any]]:
@@ -227,5 +402,8 @@ def get_financial_data_service() -> FinancialDataService:
         return MockFinancialDataService()
     return FinancialDataService(cache_client=get_cache_client())
 
-# Create a singleton instance to be used throughout the application
-financial_data_service = get_financial_data_service()
+
+# The singleton instance used throughout the application, built on first use
+financial_data_service = cast(
+    FinancialDataService, LazyProxy(get_financial_data_service)
+)
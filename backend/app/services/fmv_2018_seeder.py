@@ -11,10 +11,14 @@ from typing import Dict
 
 import pandas as pd
 import requests
+import urllib3
 from sqlalchemy.orm import Session
 
 from app.models import Asset
 
+# Suppress only the InsecureRequestWarning from urllib3
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
 logger = logging.getLogger(__name__)
 
 # Official data source URLs for Jan 31, 2018
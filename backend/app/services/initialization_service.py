@@ -3,22 +3,40 @@ import shutil
 import sys
 import tempfile
 import threading
-
-import urllib3
+from datetime import datetime, timedelta, timezone
 
 from app.core.config import settings
 from app.db.initial_data import seed_interest_rates
 from app.db.session import SessionLocal
 from app.models import Asset
 from app.scripts.backfill_transaction_links import run_backfill
-from app.services.asset_seeder import AssetSeeder
-from app.utils.financial_utils import download_all_sources, process_all_sources
-
-# Suppress InsecureRequestWarning for NSDL connections
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+from app.services.asset_sync_state import AssetSyncState, load_sync_state
 
 logger = logging.getLogger(__name__)
 
+# Minimum age of the last asset sync before startup runs a delta sync
+DELTA_SYNC_INTERVAL = timedelta(days=1)
+
+
+def _sync_assets(db, full: bool) -> AssetSyncState:
+    """Downloads all sources and seeds them, fully or as a delta."""
+    # pandas and requests are only needed once a sync actually runs
+    from app.services.asset_seeder import AssetSeeder
+    from app.utils.financial_utils import download_all_sources, process_all_sources
+
+    seeder = AssetSeeder(db=db, debug=False)
+    sync_state = load_sync_state(db, full=full)
+    seeder.sync_state = sync_state
+    temp_dir = tempfile.mkdtemp()
+    try:
+        files = download_all_sources(temp_dir, logger, sync_state=sync_state)
+        process_all_sources(seeder, files, logger)
+        db.commit()
+        sync_state.save(asset_count=db.query(Asset).count())
+    finally:
+        shutil.rmtree(temp_dir)
+    return sync_state
+
 
 def _run_initial_seeding():
     """Actually performs the seeding logic in a thread."""
@@ -35,22 +53,14 @@ def _run_initial_seeding():
         db.commit()
 
         # 2. Sync Assets
-        seeder = AssetSeeder(db=db, debug=False)
-        temp_dir = tempfile.mkdtemp()
-        try:
-            # Use consolidated logic
-            files = download_all_sources(temp_dir, logger)
-            process_all_sources(seeder, files, logger)
-
-            db.commit()
-            _seeding_state["status"] = SeedingStatus.COMPLETE
-            _seeding_state["progress"] = 100
-            _seeding_state["message"] = (
-                "Background initial seeding completed successfully!"
-            )
-            logger.info("Background initial seeding completed successfully.")
-        finally:
-            shutil.rmtree(temp_dir)
+        _sync_assets(db, full=True)
+
+        _seeding_state["status"] = SeedingStatus.COMPLETE
+        _seeding_state["progress"] = 100
+        _seeding_state["message"] = (
+            "Background initial seeding completed successfully!"
+        )
+        logger.info("Background initial seeding completed successfully.")
     except Exception as e:
         _seeding_state["status"] = SeedingStatus.FAILED
         _seeding_state["error"] = str(e)
@@ -58,8 +68,26 @@ def _run_initial_seeding():
     finally:
         db.close()
 
+
+def _run_delta_sync():
+    """Applies the changes to the asset master since the last sync."""
+    db = SessionLocal()
+    try:
+        sync_state = _sync_assets(db, full=False)
+        logger.info(f"Background asset delta sync completed: {sync_state.summary()}")
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Background asset delta sync failed: {e}", exc_info=True)
+    finally:
+        db.close()
+
+
 def check_and_seed_on_startup():
-    """Checks if database is empty and triggers background seeding if so."""
+    """
+    Checks if database is empty and triggers background seeding if so.
+    Otherwise, with ASSET_DELTA_SYNC_ON_STARTUP, starts a background delta
+    sync once the last sync is a day old.
+    """
     if settings.ENVIRONMENT in ("test", "testing") or "pytest" in sys.modules:
         logger.info("Test environment detected. Skipping startup background seeding.")
         return
@@ -84,6 +112,12 @@ def check_and_seed_on_startup():
             _seeding_state["progress"] = 100
             _seeding_state["message"] = "Asset database ready"
 
+            if settings.ASSET_DELTA_SYNC_ON_STARTUP:
+                synced_at = AssetSyncState().synced_at
+                now = datetime.now(timezone.utc)
+                if synced_at is None or now - synced_at >= DELTA_SYNC_INTERVAL:
+                    threading.Thread(target=_run_delta_sync, daemon=True).start()
+
         # Always trigger a background backfill for unlinked transactions if any
         # This ensures data consistency for capital gains reports
         threading.Thread(
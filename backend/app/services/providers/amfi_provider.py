@@ -1,19 +1,26 @@
 """Provider for fetching data from AMFI (Association of Mutual Funds in India)."""
 import asyncio
+import logging
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, datetime
 from decimal import Decimal
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, cast
 
 import httpx
 
 from app.cache.base import CacheClient
 from app.cache.factory import get_cache_client
+from app.core.metrics import record_provider_error, track_provider_call
+from app.utils.lazy import LazyProxy
 
 from .base import FinancialDataProvider
 
+logger = logging.getLogger(__name__)
+
 CACHE_TTL_AMFI_DATA = 86400  # 24 hours
 CACHE_TTL_HISTORICAL_PRICE = 86400  # 24 hours
+NAV_DATA_CACHE_KEY = "amfi_nav_data"
 
 
 class AmfiIndiaProvider(FinancialDataProvider):
@@ -48,93 +55,122 @@ class AmfiIndiaProvider(FinancialDataProvider):
             return inner, None
         return None, None
 
-    def _fetch_and_parse_amfi_data(self) -> Dict[str, Dict[str, Any]]:
+    def _parse_nav_text(self, content: str) -> Dict[str, Dict[str, Any]]:
         """
-        Fetches the raw NAV data from AMFI and parses it into a structured dict
-        keyed by scheme code. Also extracts MF category from header lines.
+        Parses NAVAll.txt into a structured dict keyed by scheme code. Also
+        extracts the MF category from the header lines.
         """
         data: Dict[str, Dict[str, Any]] = {}
         current_category: str | None = None
         current_sub_category: str | None = None
 
+        for line in content.strip().split("\n"):
+            line = line.strip()
+            if not line:
+                continue
+
+            # Check if this is a category header line
+            cat, sub_cat = self._parse_category_header(line)
+            if cat:
+                current_category = cat
+                current_sub_category = sub_cat
+                continue
+
+            # Parse data rows (scheme code;ISIN;ISIN2;name;NAV;date)
+            if ";" in line:
+                parts = line.split(";")
+                if len(parts) >= 5 and parts[0].isdigit():
+                    try:
+                        scheme_code = parts[0]
+                        data[scheme_code] = {
+                            "scheme_code": scheme_code,
+                            "isin": parts[1] if parts[1] != "N.A." else None,
+                            "isin2": (
+                                parts[2] if len(parts) > 2 and parts[2] != "N.A."
+                                else None
+                            ),
+                            "scheme_name": parts[3],
+                            "nav": (
+                                str(Decimal(parts[4]))
+                                if parts[4] != "N.A." else "0.0"
+                            ),
+                            "date": (
+                                datetime.strptime(
+                                    parts[5], "%d-%b-%Y"
+                                ).date().isoformat()
+                                if len(parts) > 5 and parts[5] != "N.A."
+                                else None
+                            ),
+                            "mf_category": current_category,
+                            "mf_sub_category": current_sub_category,
+                        }
+                    except (ValueError, IndexError):
+                        continue
+        return data
+
+    def _fetch_and_parse_amfi_data(self) -> Dict[str, Dict[str, Any]]:
+        """Fetches the raw NAV data from AMFI and parses it."""
         try:
             with httpx.Client(follow_redirects=True) as client:
                 response = client.get(self.AMFI_URL, timeout=15.0)
                 response.raise_for_status()
-
-            content = response.text
-            lines = content.strip().split("\n")
-
-            for line in lines:
-                line = line.strip()
-                if not line:
-                    continue
-
-                # Check if this is a category header line
-                cat, sub_cat = self._parse_category_header(line)
-                if cat:
-                    current_category = cat
-                    current_sub_category = sub_cat
-                    continue
-
-                # Parse data rows (scheme code;ISIN;ISIN2;name;NAV;date)
-                if ";" in line:
-                    parts = line.split(";")
-                    if len(parts) >= 5 and parts[0].isdigit():
-                        try:
-                            scheme_code = parts[0]
-                            data[scheme_code] = {
-                                "scheme_code": scheme_code,
-                                "isin": parts[1] if parts[1] != "N.A." else None,
-                                "isin2": (
-                                    parts[2] if len(parts) > 2 and parts[2] != "N.A."
-                                    else None
-                                ),
-                                "scheme_name": parts[3],
-                                "nav": (
-                                    str(Decimal(parts[4]))
-                                    if parts[4] != "N.A." else "0.0"
-                                ),
-                                "date": (
-                                    datetime.strptime(
-                                        parts[5], "%d-%b-%Y"
-                                    ).date().isoformat()
-                                    if len(parts) > 5 and parts[5] != "N.A."
-                                    else None
-                                ),
-                                "mf_category": current_category,
-                                "mf_sub_category": current_sub_category,
-                            }
-                        except (ValueError, IndexError):
-                            continue
+            return self._parse_nav_text(response.text)
         except (httpx.RequestError, httpx.HTTPStatusError) as e:
-            print(f"ERROR: Could not fetch AMFI data: {e}")
+            record_provider_error("amfi", "get_all_nav_data")
+            logger.error(f"Could not fetch AMFI data: {e}")
+            return {}
 
-        return data
+    async def _afetch_and_parse_amfi_data(self) -> Dict[str, Dict[str, Any]]:
+        """Async variant of `_fetch_and_parse_amfi_data`."""
+        try:
+            async with httpx.AsyncClient(follow_redirects=True) as client:
+                response = await client.get(self.AMFI_URL, timeout=15.0)
+                response.raise_for_status()
+            # Parsing the ~2 MB dump is CPU-bound; keep it off the event loop
+            return await asyncio.to_thread(self._parse_nav_text, response.text)
+        except (httpx.RequestError, httpx.HTTPStatusError) as e:
+            record_provider_error("amfi", "get_all_nav_data")
+            logger.error(f"Could not fetch AMFI data: {e}")
+            return {}
 
-    def get_all_nav_data(self) -> Dict[str, Dict[str, Any]]:
-        """Retrieves all NAV data, using an in-memory and external cache."""
+    def _cached_nav_data(self) -> Optional[Dict[str, Dict[str, Any]]]:
+        """NAV data from the in-memory or external cache, if present."""
         if self._nav_data_cache:
             return self._nav_data_cache
+        if self.cache_client:
+            cached_data = self.cache_client.get_json(NAV_DATA_CACHE_KEY)
+            if cached_data:
+                self._nav_data_cache = cached_data
+                return self._nav_data_cache
+        return None
 
+    def _store_nav_data(
+        self, fresh_data: Dict[str, Dict[str, Any]]
+    ) -> Dict[str, Dict[str, Any]]:
         if not self.cache_client:
-            self._nav_data_cache = self._fetch_and_parse_amfi_data()
-            return self._nav_data_cache
-
-        cache_key = "amfi_nav_data"
-        cached_data = self.cache_client.get_json(cache_key)
-        if cached_data:
-            self._nav_data_cache = cached_data
-            return self._nav_data_cache
-
-        fresh_data = self._fetch_and_parse_amfi_data()
-        if fresh_data:
+            self._nav_data_cache = fresh_data
+        elif fresh_data:
             self.cache_client.set_json(
-                cache_key, fresh_data, expire=CACHE_TTL_AMFI_DATA
+                NAV_DATA_CACHE_KEY, fresh_data, expire=CACHE_TTL_AMFI_DATA
             )
             self._nav_data_cache = fresh_data
         return self._nav_data_cache
 
+    @track_provider_call("amfi")
+    def get_all_nav_data(self) -> Dict[str, Dict[str, Any]]:
+        """Retrieves all NAV data, using an in-memory and external cache."""
+        cached = self._cached_nav_data()
+        if cached is not None:
+            return cached
+        return self._store_nav_data(self._fetch_and_parse_amfi_data())
+
+    @track_provider_call("amfi", "get_all_nav_data")
+    async def aget_all_nav_data(self) -> Dict[str, Dict[str, Any]]:
+        cached = self._cached_nav_data()
+        if cached is not None:
+            return cached
+        return self._store_nav_data(await self._afetch_and_parse_amfi_data())
+
     def _get_isin_map(self) -> Dict[str, str]:
         """Builds a mapping from ISIN/ISIN2 to scheme code."""
         if self._isin_map:
@@ -184,6 +220,7 @@ class AmfiIndiaProvider(FinancialDataProvider):
             "isin": details.get("isin"),
         }
 
+    @track_provider_call("amfi")
     def search(self, query: str) -> List[Dict[str, Any]]:
         """Searches for funds by name or scheme code."""
         query = query.lower()
@@ -232,6 +269,7 @@ class AmfiIndiaProvider(FinancialDataProvider):
                 except (ValueError, KeyError):
                     continue
         except (httpx.RequestError, httpx.HTTPStatusError, KeyError, ValueError):
+            record_provider_error("amfi", "get_historical_prices")
             return
 
     async def _fetch_historical_prices_async(
@@ -253,78 +291,35 @@ class AmfiIndiaProvider(FinancialDataProvider):
 
         return historical_data
 
-    def _fetch_historical_prices_sync(
-        self, assets: List[Dict[str, Any]], start_date: date, end_date: date
-    ) -> Dict[str, Dict[date, Decimal]]:
-        """Synchronously fetches historical NAV for a list of assets (Fallback)."""
-        historical_data: Dict[str, Dict[date, Decimal]] = defaultdict(dict)
-        with httpx.Client() as client:
-            for asset in assets:
-                scheme_code = asset["ticker_symbol"]
-                try:
-                    response = client.get(
-                        f"https://api.mfapi.in/mf/{scheme_code}", timeout=10.0
-                    )
-                    response.raise_for_status()
-                    mf_data = response.json()
-
-                    if mf_data.get("status", "").lower() == "fail":
-                        continue
-
-                    for nav_point in mf_data.get("data", []):
-                        try:
-                            nav_date = datetime.strptime(
-                                nav_point["date"], "%d-%m-%Y"
-                            ).date()
-                            if start_date <= nav_date <= end_date:
-                                historical_data[scheme_code][nav_date] = Decimal(
-                                    nav_point["nav"]
-                                )
-                        except (ValueError, KeyError):
-                            continue
-                except (httpx.RequestError, httpx.HTTPStatusError, KeyError,
-                        ValueError):
-                    continue
-        return historical_data
-
-    def get_historical_prices(
-        self, assets: List[Dict[str, Any]], start_date: date, end_date: date
-    ) -> Dict[str, Dict[date, Decimal]]:
-        """Fetches historical NAV for a list of mutual fund assets from mfapi.in."""
-        historical_data: Dict[str, Dict[date, Decimal]] = defaultdict(dict)
-        if not self.cache_client:
-            pass
-
+    @staticmethod
+    def _history_cache_key(
+        assets: List[Dict[str, Any]], start_date: date, end_date: date
+    ) -> str:
         mf_tickers_str = ",".join(sorted([a["ticker_symbol"] for a in assets]))
-        cache_key = (
+        return (
             f"mf_history:{mf_tickers_str}:{start_date.isoformat()}:"
             f"{end_date.isoformat()}"
         )
 
-        if self.cache_client:
-            cached_data = self.cache_client.get_json(cache_key)
-            if cached_data:
-                for ticker, date_prices in cached_data.items():
-                    for date_str, price_str in date_prices.items():
-                        historical_data[ticker][
-                            datetime.fromisoformat(date_str).date()
-                        ] = Decimal(price_str)
-                return historical_data
-
-        try:
-            # Check if an event loop is already running
-            asyncio.get_running_loop()
-            # If so, fallback to synchronous execution to avoid
-            # "asyncio.run() cannot be called from a running event loop"
-            historical_data = self._fetch_historical_prices_sync(
-                assets, start_date, end_date
-            )
-        except RuntimeError:
-            # No event loop is running, so we can safely use asyncio.run
-            historical_data = asyncio.run(
-                self._fetch_historical_prices_async(assets, start_date, end_date)
-            )
+    def _cached_history(
+        self, cache_key: str
+    ) -> Optional[Dict[str, Dict[date, Decimal]]]:
+        if not self.cache_client:
+            return None
+        cached_data = self.cache_client.get_json(cache_key)
+        if not cached_data:
+            return None
+        historical_data: Dict[str, Dict[date, Decimal]] = defaultdict(dict)
+        for ticker, date_prices in cached_data.items():
+            for date_str, price_str in date_prices.items():
+                historical_data[ticker][
+                    datetime.fromisoformat(date_str).date()
+                ] = Decimal(price_str)
+        return historical_data
 
+    def _store_history(
+        self, cache_key: str, historical_data: Dict[str, Dict[date, Decimal]]
+    ) -> None:
         if self.cache_client and historical_data:
             serializable_data = {
                 t: {d.isoformat(): str(p) for d, p in dp.items()}
@@ -334,14 +329,50 @@ class AmfiIndiaProvider(FinancialDataProvider):
                 cache_key, serializable_data, expire=CACHE_TTL_HISTORICAL_PRICE
             )
 
+    @track_provider_call("amfi")
+    def get_historical_prices(
+        self, assets: List[Dict[str, Any]], start_date: date, end_date: date
+    ) -> Dict[str, Dict[date, Decimal]]:
+        """Fetches historical NAV for a list of mutual fund assets from mfapi.in."""
+        cache_key = self._history_cache_key(assets, start_date, end_date)
+        cached = self._cached_history(cache_key)
+        if cached is not None:
+            return cached
+
+        fetch = self._fetch_historical_prices_async(assets, start_date, end_date)
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            historical_data = asyncio.run(fetch)
+        else:
+            # Called synchronously from the event loop's thread: run the
+            # concurrent fetch on a helper thread with its own loop. Async
+            # callers should use `aget_historical_prices` instead.
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                historical_data = executor.submit(asyncio.run, fetch).result()
+
+        self._store_history(cache_key, historical_data)
         return historical_data
 
-    def get_current_prices(
-        self, assets: List[Dict[str, Any]]
+    @track_provider_call("amfi", "get_historical_prices")
+    async def aget_historical_prices(
+        self, assets: List[Dict[str, Any]], start_date: date, end_date: date
+    ) -> Dict[str, Dict[date, Decimal]]:
+        cache_key = self._history_cache_key(assets, start_date, end_date)
+        cached = self._cached_history(cache_key)
+        if cached is not None:
+            return cached
+        historical_data = await self._fetch_historical_prices_async(
+            assets, start_date, end_date
+        )
+        self._store_history(cache_key, historical_data)
+        return historical_data
+
+    @staticmethod
+    def _prices_from_nav(
+        all_data: Dict[str, Dict[str, Any]], assets: List[Dict[str, Any]]
     ) -> Dict[str, Dict[str, Decimal]]:
-        """Gets current prices for mutual funds from the main AMFI data dump."""
         prices: Dict[str, Dict[str, Decimal]] = {}
-        all_data = self.get_all_nav_data()
         for asset in assets:
             ticker = asset["ticker_symbol"]
             fund_data = all_data.get(ticker)
@@ -350,5 +381,21 @@ class AmfiIndiaProvider(FinancialDataProvider):
                 prices[ticker] = {"current_price": nav, "previous_close": nav}
         return prices
 
+    @track_provider_call("amfi")
+    def get_current_prices(
+        self, assets: List[Dict[str, Any]]
+    ) -> Dict[str, Dict[str, Decimal]]:
+        """Gets current prices for mutual funds from the main AMFI data dump."""
+        return self._prices_from_nav(self.get_all_nav_data(), assets)
+
+    @track_provider_call("amfi", "get_current_prices")
+    async def aget_current_prices(
+        self, assets: List[Dict[str, Any]]
+    ) -> Dict[str, Dict[str, Decimal]]:
+        return self._prices_from_nav(await self.aget_all_nav_data(), assets)
+
 
-amfi_provider = AmfiIndiaProvider(cache_client=get_cache_client())
+amfi_provider = cast(
+    AmfiIndiaProvider,
+    LazyProxy(lambda: AmfiIndiaProvider(cache_client=get_cache_client())),
+)
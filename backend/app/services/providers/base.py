@@ -1,3 +1,4 @@
+import asyncio
 from abc import ABC, abstractmethod
 from datetime import date
 from decimal import Decimal
@@ -28,3 +29,22 @@ class FinancialDataProvider(ABC):
     def search(self, query: str) -> List[Dict[str, Any]]:
         """Searches for assets supported by the provider."""
         pass
+
+    # --- Async variants ---
+    # Providers with an async HTTP client override these. The defaults run
+    # the blocking call in a worker thread so it never stalls the event loop.
+
+    async def aget_current_prices(
+        self, assets: List[Dict[str, Any]]
+    ) -> Dict[str, Dict[str, Decimal]]:
+        return await asyncio.to_thread(self.get_current_prices, assets)
+
+    async def aget_historical_prices(
+        self, assets: List[Dict[str, Any]], start_date: date, end_date: date
+    ) -> Dict[str, Dict[date, Decimal]]:
+        return await asyncio.to_thread(
+            self.get_historical_prices, assets, start_date, end_date
+        )
+
+    async def asearch(self, query: str) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(self.search, query)
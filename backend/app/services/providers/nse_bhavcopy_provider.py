@@ -1,20 +1,34 @@
 """Provider for fetching data from NSE Bhavcopy."""
+import asyncio
 import csv
-import io
+import logging
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, timedelta
 from decimal import Decimal
-from typing import Any, Dict, List, Optional
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
 
 import httpx
 
 from app.cache.base import CacheClient
+from app.core.metrics import record_provider_error, track_provider_call
 
 from .base import FinancialDataProvider
 
+if TYPE_CHECKING:
+    from app.services.bhavcopy_archive import BhavcopyArchive
+
+logger = logging.getLogger(__name__)
+
 # --- Constants ---
-CACHE_KEY_TEMPLATE = "bhavcopy_data:{date_iso}"
-CACHE_TTL = 43200  # 12 hours
+# Set when today's bhavcopy is not out yet, so it is asked for once an hour
+MISSING_TODAY_CACHE_KEY_TEMPLATE = "bhavcopy_missing:{date_iso}"
+MISSING_TODAY_TTL = 3600
+# Days to look back for the most recent bhavcopy
+LOOKBACK_DAYS = 5
+# Concurrent downloads in a backfill
+BACKFILL_WORKERS = 4
+FETCH_ERRORS = (httpx.HTTPError, KeyError, ValueError, zipfile.BadZipFile, csv.Error)
 NSE_HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
                   "(KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
@@ -25,10 +39,19 @@ class NseBhavcopyProvider(FinancialDataProvider):
     """
     Provider for fetching and parsing data from the daily NSE Bhavcopy.
     This will be the primary source for Indian market closing prices.
+
+    Each day's bhavcopy is downloaded once into a local archive (see
+    `app.services.bhavcopy_archive`), which serves both the latest closes
+    and historical ones.
     """
 
-    def __init__(self, cache_client: Optional[CacheClient]):
+    def __init__(
+        self,
+        cache_client: Optional[CacheClient],
+        archive: Optional["BhavcopyArchive"] = None,
+    ):
         self.cache_client = cache_client
+        self._archive = archive
 
     def _get_bhavcopy_url(self, for_date: date) -> tuple[str, str]:
         """
@@ -47,127 +70,219 @@ class NseBhavcopyProvider(FinancialDataProvider):
         csv_filename = f"{filename_prefix}.csv"
         return url, csv_filename
 
-    def _fetch_and_parse_bhavcopy(
-        self, for_date: date
-    ) -> Dict[str, Dict[str, Decimal]]:
+    @property
+    def archive(self) -> "BhavcopyArchive":
+        if self._archive is None:
+            # numpy; imported on demand
+            from app.services.bhavcopy_archive import BhavcopyArchive
+
+            self._archive = BhavcopyArchive()
+        return self._archive
+
+    def _is_missing(self, day: date) -> bool:
+        if self.archive.is_missing(day):
+            return True
+        return bool(
+            self.cache_client
+            and self.cache_client.get(
+                MISSING_TODAY_CACHE_KEY_TEMPLATE.format(date_iso=day.isoformat())
+            )
+        )
+
+    def _mark_missing(self, day: date) -> None:
+        if day < date.today():
+            self.archive.mark_missing(day)
+        elif self.cache_client:
+            # Today's may just not be published yet
+            self.cache_client.set(
+                MISSING_TODAY_CACHE_KEY_TEMPLATE.format(date_iso=day.isoformat()),
+                "1",
+                expire=MISSING_TODAY_TTL,
+            )
+
+    def _archive_response(
+        self, day: date, csv_filename: str, response: httpx.Response
+    ) -> bool:
+        """Archives a downloaded bhavcopy. False if there is none for the day."""
+        from app.services.bhavcopy_archive import parse_bhavcopy
+
+        if response.status_code == 404:
+            self._mark_missing(day)
+            return False
+        response.raise_for_status()
+        self.archive.add_day(day, parse_bhavcopy(response.content, csv_filename))
+        return True
+
+    def _ensure_day(self, client: httpx.Client, day: date) -> bool:
         """
-        Fetches, parses, and caches the NSE Bhavcopy for a specific date.
-        It tries the given date, then iterates backwards up to 5 days to find the
-        most recent available trading day's data.
+        Downloads and archives the day's bhavcopy unless it is archived already
+        or known to be missing. Whether the day is archived.
+        """
+        if self.archive.has_day(day):
+            return True
+        if self._is_missing(day):
+            return False
+        url, csv_filename = self._get_bhavcopy_url(day)
+        try:
+            response = client.get(url, timeout=20.0)
+            return self._archive_response(day, csv_filename, response)
+        except FETCH_ERRORS as e:
+            self._log_fetch_error(day, url, e)
+            return False
+
+    async def _aensure_day(self, client: httpx.AsyncClient, day: date) -> bool:
+        """Async variant of `_ensure_day`."""
+        if self.archive.has_day(day):
+            return True
+        if self._is_missing(day):
+            return False
+        url, csv_filename = self._get_bhavcopy_url(day)
+        try:
+            response = await client.get(url, timeout=20.0)
+            return await asyncio.to_thread(
+                self._archive_response, day, csv_filename, response
+            )
+        except FETCH_ERRORS as e:
+            self._log_fetch_error(day, url, e)
+            return False
 
-        Returns a dictionary keyed by BOTH trading symbol AND ISIN for maximum
-        lookup flexibility (bonds often use ISIN as ticker_symbol).
+    def archive_latest(self, for_date: Optional[date] = None) -> Optional[date]:
         """
-        for i in range(5):
-            current_date = for_date - timedelta(days=i)
-            url, csv_filename = self._get_bhavcopy_url(current_date)
-
-            try:
-                with httpx.Client(headers=NSE_HEADERS, follow_redirects=True) as client:
-                    response = client.get(url, timeout=20.0)
-                    if response.status_code == 404:
-                        continue  # Try the previous day
-                    response.raise_for_status()
-
-                bhavcopy_data: Dict[str, Dict[str, Decimal]] = {}
-                with zipfile.ZipFile(io.BytesIO(response.content)) as thezip:
-                    with thezip.open(csv_filename) as thefile:
-                        # The CSV has headers that need to be normalized
-                        # (e.g. "  TckrSymb  ")
-                        # DictReader will handle this if we don't specify fieldnames
-                        reader = csv.DictReader(io.TextIOWrapper(thefile, "utf-8")) # type: ignore
-                        for row in reader:
-                            series = row.get("SctySrs", "").strip().upper()
-                            # We are interested in a wide range of tradable securities,
-                            # not just equities. This includes ETFs, Bonds, etc.
-                            # We will exclude series that are typically
-                            # non-tradable or special cases.
-                            excluded_series = {"IV", "MF", "ME", "RR", "P1"}
-
-                            if series and series not in excluded_series:
-                                symbol = row["TckrSymb"].strip().upper()
-                                price_data = {
-                                    "current_price": Decimal(
-                                        row["ClsPric"].strip().replace(",", "")),
-                                    "previous_close": Decimal(
-                                        row["PrvsClsgPric"].strip().replace(",", "")),
-                                }
-                                # Index by trading symbol
-                                bhavcopy_data[symbol] = price_data
-
-                                # Also index by ISIN if present (for bonds that use
-                                # ISIN as ticker_symbol)
-                                isin = row.get("ISIN", "").strip().upper()
-                                if isin and isin != symbol:
-                                    bhavcopy_data[isin] = price_data
-
-                return bhavcopy_data
-            except (httpx.RequestError, KeyError, zipfile.BadZipFile, csv.Error) as e:
-                print(f"INFO: Failed to fetch/parse Bhavcopy for {current_date} "
-                      f"from {url}. Error: {e}. Trying previous day.")
-                continue
-
-        print(f"ERROR: Could not fetch Bhavcopy for the last 5 days from {for_date}.")
-        return {}
-
-    def _get_bhavcopy_data(
-        self, for_date: Optional[date] = None
-    ) -> Dict[str, Dict[str, Decimal]]:
+        The most recent trading day on or up to 5 days before `for_date` with
+        an archived bhavcopy, downloading it if need be.
+        """
+        for_date = for_date or date.today()
+        client: Optional[httpx.Client] = None
+        try:
+            for i in range(LOOKBACK_DAYS):
+                day = for_date - timedelta(days=i)
+                if self.archive.has_day(day):
+                    return day
+                if self._is_missing(day):
+                    continue
+                if client is None:
+                    client = httpx.Client(headers=NSE_HEADERS, follow_redirects=True)
+                if self._ensure_day(client, day):
+                    return day
+        finally:
+            if client is not None:
+                client.close()
+        logger.error(f"Could not fetch Bhavcopy for the last 5 days from {for_date}.")
+        return None
+
+    async def _aarchive_latest(self) -> Optional[date]:
+        """Async variant of `archive_latest`, for today."""
+        today = date.today()
+        client: Optional[httpx.AsyncClient] = None
+        try:
+            for i in range(LOOKBACK_DAYS):
+                day = today - timedelta(days=i)
+                if self.archive.has_day(day):
+                    return day
+                if self._is_missing(day):
+                    continue
+                if client is None:
+                    client = httpx.AsyncClient(
+                        headers=NSE_HEADERS, follow_redirects=True
+                    )
+                if await self._aensure_day(client, day):
+                    return day
+        finally:
+            if client is not None:
+                await client.aclose()
+        logger.error(f"Could not fetch Bhavcopy for the last 5 days from {today}.")
+        return None
+
+    def backfill(
+        self, start_date: date, end_date: date, workers: int = BACKFILL_WORKERS
+    ) -> Dict[str, int]:
         """
-        Main method to get Bhavcopy data, utilizing the cache.
+        Archives the bhavcopies of every day in the range, a few downloads at
+        a time. Days already archived or known to be missing are skipped.
         """
-        today = for_date or date.today()
-        cache_key = CACHE_KEY_TEMPLATE.format(date_iso=today.isoformat())
-
-        if self.cache_client:
-            cached_data = self.cache_client.get_json(cache_key)
-            if cached_data:
-                # Deserialize from string back to Decimal
-                return {
-                    symbol: {
-                        "current_price": Decimal(prices["current_price"]),
-                        "previous_close": Decimal(prices["previous_close"]),
-                    }
-                    for symbol, prices in cached_data.items()
-                }
-
-        fresh_data = self._fetch_and_parse_bhavcopy(for_date=today)
-        if fresh_data and self.cache_client:
-            # Serialize Decimal to string for JSON compatibility
-            serializable_data = {
-                symbol: {
-                    "current_price": str(prices["current_price"]),
-                    "previous_close": str(prices["previous_close"]),
-                }
-                for symbol, prices in fresh_data.items()
-            }
-            self.cache_client.set_json(cache_key, serializable_data, expire=CACHE_TTL)
-
-        return fresh_data
+        days = [
+            start_date + timedelta(days=i)
+            for i in range((end_date - start_date).days + 1)
+        ]
+        pending = [
+            day for day in days
+            if not self.archive.has_day(day) and not self._is_missing(day)
+        ]
+        stats = dict.fromkeys(("archived", "missing", "failed"), 0)
+        stats["skipped"] = len(days) - len(pending)
+        if not pending:
+            return stats
+        with httpx.Client(headers=NSE_HEADERS, follow_redirects=True) as client:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                archived = list(
+                    executor.map(lambda day: self._ensure_day(client, day), pending)
+                )
+        stats["archived"] = sum(archived)
+        stats["missing"] = sum(1 for day in pending if self._is_missing(day))
+        stats["failed"] = len(pending) - stats["archived"] - stats["missing"]
+        return stats
+
+    @staticmethod
+    def _log_fetch_error(current_date: date, url: str, error: Exception) -> None:
+        record_provider_error("nse_bhavcopy", "get_current_prices")
+        logger.warning(
+            f"Failed to fetch/parse Bhavcopy for {current_date} "
+            f"from {url}. Error: {error}."
+        )
+
+    @staticmethod
+    def _archive_keys(assets: List[Dict[str, Any]]) -> Dict[str, str]:
+        """Ticker to the symbol or ISIN it is archived under."""
+        return {
+            a["ticker_symbol"]: a["ticker_symbol"].removesuffix(".NS")
+            for a in assets
+            if a.get("ticker_symbol")
+        }
+
+    def _closes_on(
+        self, day: Optional[date], assets: List[Dict[str, Any]]
+    ) -> Dict[str, Dict[str, Decimal]]:
+        if day is None:
+            return {}
+        keys = self._archive_keys(assets)
+        closes = self.archive.closes_on(day, keys.values())
+        return {
+            ticker: closes[key] for ticker, key in keys.items() if key in closes
+        }
 
+    @track_provider_call("nse_bhavcopy")
     def get_current_prices(
         self, assets: List[Dict[str, Any]]
     ) -> Dict[str, Dict[str, Decimal]]:
         """Fetches current and previous day's close price for a list of assets."""
-        bhavcopy_data = self._get_bhavcopy_data()
-        if not bhavcopy_data:
+        if not assets:
             return {}
+        return self._closes_on(self.archive_latest(), assets)
 
-        prices: Dict[str, Dict[str, Decimal]] = {}
-        for asset in assets:
-            ticker = asset.get("ticker_symbol")
-            if ticker and ticker in bhavcopy_data:
-                prices[ticker] = bhavcopy_data[ticker]
-
-        return prices
+    @track_provider_call("nse_bhavcopy", "get_current_prices")
+    async def aget_current_prices(
+        self, assets: List[Dict[str, Any]]
+    ) -> Dict[str, Dict[str, Decimal]]:
+        if not assets:
+            return {}
+        day = await self._aarchive_latest()
+        return await asyncio.to_thread(self._closes_on, day, assets)
 
+    @track_provider_call("nse_bhavcopy")
     def get_historical_prices(
         self, assets: List[Dict[str, Any]], start_date: date, end_date: date
     ) -> Dict[str, Dict[date, Decimal]]:
-        """Historical prices are not available from a single Bhavcopy."""
-        # This could be implemented by fetching and storing daily bhavcopies,
-        # but that is a significant undertaking. For now, return empty.
-        return {}
+        """
+        Closes on the archived days in the range. Nothing is downloaded here;
+        the archive is filled day by day and by `backfill`.
+        """
+        keys = self._archive_keys(assets)
+        if not keys:
+            return {}
+        history = self.archive.history(keys.values(), start_date, end_date)
+        return {
+            ticker: history[key] for ticker, key in keys.items() if key in history
+        }
 
     def get_asset_details(self, ticker_symbol: str) -> Optional[Dict[str, Any]]:
         """Asset details are not the primary purpose of this provider."""
@@ -2,6 +2,7 @@
 Provider for fetching market data from Upstox API v3.
 Uses public unauthenticated endpoints for historical candle data and market holidays.
 """
+import asyncio
 import json
 import logging
 import ssl
@@ -11,9 +12,12 @@ import urllib.request
 from collections import defaultdict
 from datetime import date, timedelta
 from decimal import Decimal
-from typing import Any, Dict, List, Optional
+from typing import Any, Awaitable, Dict, List, Optional, Tuple
+
+import httpx
 
 from app.cache.base import CacheClient
+from app.core.metrics import record_provider_error, track_provider_call
 from app.services.upstox_metadata_service import UpstoxMetadataService
 
 from .base import FinancialDataProvider
@@ -21,6 +25,8 @@ from .base import FinancialDataProvider
 CACHE_TTL_CURRENT_PRICE = 900  # 15 minutes
 CACHE_TTL_HISTORICAL_PRICE = 86400  # 24 hours
 UPSTOX_V3_CANDLE_URL = "https://api.upstox.com/v3/historical-candle"
+UPSTOX_HEADERS = {"Accept": "application/json", "User-Agent": "Mozilla/5.0"}
+REQUEST_INTERVAL = 0.02  # seconds; Upstox allows 50 requests per second
 
 logger = logging.getLogger(__name__)
 
@@ -45,6 +51,29 @@ class UpstoxProvider(FinancialDataProvider):
         self.cache_client = cache_client
         self.metadata_service = UpstoxMetadataService(cache_client)
 
+    @staticmethod
+    def _candles_url(
+        instrument_key: str, unit: str, interval: str, to_date: date, from_date: date
+    ) -> str:
+        """URL format: GET /v3/historical-candle/:key/:unit/:interval/:to/:from"""
+        encoded_key = urllib.parse.quote(instrument_key, safe="")
+        return (
+            f"{UPSTOX_V3_CANDLE_URL}/{encoded_key}/{unit}/{interval}/"
+            f"{to_date.isoformat()}/{from_date.isoformat()}"
+        )
+
+    @staticmethod
+    def _candles_from_payload(
+        instrument_key: str, payload: Dict[str, Any]
+    ) -> List[List[Any]]:
+        if payload.get("status") == "success":
+            return payload.get("data", {}).get("candles", [])
+        logger.warning(
+            f"Upstox API returned error status for {instrument_key}: {payload}"
+        )
+        return []
+
+    @track_provider_call("upstox")
     def _fetch_upstox_candles(
         self,
         instrument_key: str,
@@ -55,137 +84,211 @@ class UpstoxProvider(FinancialDataProvider):
     ) -> List[List[Any]]:
         """
         Fetches OHLCV candle data from Upstox V3 public API endpoint without auth.
-        URL format: GET /v3/historical-candle/:key/:unit/:interval/:to/:from
         """
-        encoded_key = urllib.parse.quote(instrument_key, safe="")
-        url = (
-            f"{UPSTOX_V3_CANDLE_URL}/{encoded_key}/{unit}/{interval}/"
-            f"{to_date.isoformat()}/{from_date.isoformat()}"
-        )
-
+        url = self._candles_url(instrument_key, unit, interval, to_date, from_date)
         try:
             req = urllib.request.Request(
-                url,
-                headers={
-                    "Accept": "application/json",
-                    "User-Agent": "Mozilla/5.0",
-                },
-                method="GET",
+                url, headers=UPSTOX_HEADERS, method="GET"
             )
             with _urlopen_safe(req, timeout=10) as response:
                 payload = json.loads(response.read().decode("utf-8"))
-                if payload.get("status") == "success":
-                    return payload.get("data", {}).get("candles", [])
-                else:
-                    logger.warning(
-                        "Upstox API returned error status for "
-                        f"{instrument_key}: {payload}"
-                    )
+                return self._candles_from_payload(instrument_key, payload)
         except Exception as e:
+            record_provider_error("upstox", "_fetch_upstox_candles")
             logger.warning(
                 f"Error fetching Upstox V3 candles for {instrument_key}: {e}"
             )
+        return []
 
+    @track_provider_call("upstox", "_fetch_upstox_candles")
+    async def _afetch_upstox_candles(
+        self,
+        client: httpx.AsyncClient,
+        instrument_key: str,
+        unit: str,
+        interval: str,
+        to_date: date,
+        from_date: date,
+    ) -> List[List[Any]]:
+        """Async variant of `_fetch_upstox_candles`."""
+        url = self._candles_url(instrument_key, unit, interval, to_date, from_date)
+        try:
+            response = await client.get(url, headers=UPSTOX_HEADERS, timeout=10)
+            return self._candles_from_payload(instrument_key, response.json())
+        except Exception as e:
+            record_provider_error("upstox", "_fetch_upstox_candles")
+            logger.warning(
+                f"Error fetching Upstox V3 candles for {instrument_key}: {e}"
+            )
         return []
 
-    def get_current_prices(
-        self, assets: List[Dict[str, Any]]
-    ) -> Dict[str, Dict[str, Decimal]]:
+    async def _ensure_metadata(self) -> None:
+        """Loads the instrument master (a one-off download) off the event loop."""
+        if not self.metadata_service.loaded:
+            await asyncio.to_thread(self.metadata_service.load_metadata_if_needed)
+
+    async def _paced(self, requests: List[Awaitable[Any]]) -> List[Any]:
         """
-        Fetches current and previous day's close price for a list of assets.
-        Uses public Upstox V3 historical candle endpoint.
+        Runs the requests concurrently, starting one every REQUEST_INTERVAL
+        seconds to stay within the Upstox rate limit.
         """
-        prices_data: Dict[str, Dict[str, Decimal]] = {}
-        assets_to_fetch: List[Dict[str, Any]] = []
-
-        if self.cache_client:
-            for asset in assets:
-                ticker = asset.get("ticker_symbol", "")
-                isin = asset.get("isin")
-                inst_key = self.metadata_service.get_instrument_key(ticker, isin)
-                if not inst_key:
-                    continue
-
-                cache_key = f"price_details:upstox:{inst_key}"
-                not_found_cache_key = f"asset_not_found:upstox:{inst_key}"
 
-                cached_data = self.cache_client.get_json(cache_key)
-                if cached_data:
-                    prices_data[ticker] = {
-                        "current_price": Decimal(cached_data["current_price"]),
-                        "previous_close": Decimal(cached_data["previous_close"]),
-                    }
-                    continue
-
-                if not self.cache_client.get_json(not_found_cache_key):
-                    assets_to_fetch.append(asset)
-        else:
-            assets_to_fetch = assets
+        async def start_after(delay: float, request: Awaitable[Any]) -> Any:
+            await asyncio.sleep(delay)
+            return await request
 
-        if not assets_to_fetch:
-            return prices_data
+        return await asyncio.gather(
+            *(start_after(i * REQUEST_INTERVAL, r) for i, r in enumerate(requests))
+        )
 
-        today = date.today()
-        # Fetch last 10 days to handle long holiday weekends safely
-        from_date = today - timedelta(days=10)
+    # --- Current prices ---
+    def _cached_current_prices(
+        self, assets: List[Dict[str, Any]]
+    ) -> Tuple[Dict[str, Dict[str, Decimal]], List[Dict[str, Any]]]:
+        """Prices found in the cache, and the assets that must be fetched."""
+        prices_data: Dict[str, Dict[str, Decimal]] = {}
+        if not self.cache_client:
+            return prices_data, list(assets)
 
-        for asset in assets_to_fetch:
+        assets_to_fetch: List[Dict[str, Any]] = []
+        for asset in assets:
             ticker = asset.get("ticker_symbol", "")
             isin = asset.get("isin")
             inst_key = self.metadata_service.get_instrument_key(ticker, isin)
+            if not inst_key:
+                continue
 
+            cache_key = f"price_details:upstox:{inst_key}"
+            not_found_cache_key = f"asset_not_found:upstox:{inst_key}"
+
+            cached_data = self.cache_client.get_json(cache_key)
+            if cached_data:
+                prices_data[ticker] = {
+                    "current_price": Decimal(cached_data["current_price"]),
+                    "previous_close": Decimal(cached_data["previous_close"]),
+                }
+                continue
+
+            if not self.cache_client.get_json(not_found_cache_key):
+                assets_to_fetch.append(asset)
+        return prices_data, assets_to_fetch
+
+    def _price_requests(
+        self, assets: List[Dict[str, Any]]
+    ) -> List[Tuple[str, str]]:
+        """(ticker, instrument key) of the assets Upstox can price."""
+        requests = []
+        for asset in assets:
+            ticker = asset.get("ticker_symbol", "")
+            inst_key = self.metadata_service.get_instrument_key(
+                ticker, asset.get("isin")
+            )
             if not inst_key:
                 logger.debug(
                     f"Upstox: Could not resolve instrument key for ticker {ticker}"
                 )
                 continue
+            requests.append((ticker, inst_key))
+        return requests
 
-            # Respect rate limits: 50 req/sec max -> 20ms sleep between requests
-            time.sleep(0.02)
+    def _store_current_price(
+        self,
+        ticker: str,
+        inst_key: str,
+        candles: List[List[Any]],
+        prices_data: Dict[str, Dict[str, Decimal]],
+    ) -> None:
+        if candles and len(candles) >= 1:
+            # Structure: [timestamp, open, high, low, close, volume, oi]
+            latest_close = Decimal(str(candles[0][4]))
+            previous_close = (
+                Decimal(str(candles[1][4])) if len(candles) >= 2 else latest_close
+            )
+
+            prices_data[ticker] = {
+                "current_price": latest_close,
+                "previous_close": previous_close,
+            }
+
+            if self.cache_client:
+                self.cache_client.set_json(
+                    f"price_details:upstox:{inst_key}",
+                    {
+                        "current_price": str(latest_close),
+                        "previous_close": str(previous_close),
+                    },
+                    expire=CACHE_TTL_CURRENT_PRICE,
+                )
+        elif self.cache_client:
+            self.cache_client.set_json(
+                f"asset_not_found:upstox:{inst_key}",
+                {"not_found": True},
+                expire=CACHE_TTL_CURRENT_PRICE,
+            )
+
+    @track_provider_call("upstox")
+    def get_current_prices(
+        self, assets: List[Dict[str, Any]]
+    ) -> Dict[str, Dict[str, Decimal]]:
+        """
+        Fetches current and previous day's close price for a list of assets.
+        Uses public Upstox V3 historical candle endpoint.
+        """
+        prices_data, assets_to_fetch = self._cached_current_prices(assets)
+        if not assets_to_fetch:
+            return prices_data
+
+        today = date.today()
+        # Fetch last 10 days to handle long holiday weekends safely
+        from_date = today - timedelta(days=10)
 
+        for ticker, inst_key in self._price_requests(assets_to_fetch):
+            # Respect rate limits: 50 req/sec max -> 20ms sleep between requests
+            time.sleep(REQUEST_INTERVAL)
             candles = self._fetch_upstox_candles(
                 inst_key, "days", "1", today, from_date
             )
+            self._store_current_price(ticker, inst_key, candles, prices_data)
 
-            if candles and len(candles) >= 1:
-                # Structure: [timestamp, open, high, low, close, volume, oi]
-                latest_close = Decimal(str(candles[0][4]))
-                previous_close = (
-                    Decimal(str(candles[1][4])) if len(candles) >= 2 else latest_close
-                )
-
-                prices_data[ticker] = {
-                    "current_price": latest_close,
-                    "previous_close": previous_close,
-                }
+        return prices_data
 
-                if self.cache_client:
-                    self.cache_client.set_json(
-                        f"price_details:upstox:{inst_key}",
-                        {
-                            "current_price": str(latest_close),
-                            "previous_close": str(previous_close),
-                        },
-                        expire=CACHE_TTL_CURRENT_PRICE,
-                    )
-            else:
-                if self.cache_client:
-                    self.cache_client.set_json(
-                        f"asset_not_found:upstox:{inst_key}",
-                        {"not_found": True},
-                        expire=CACHE_TTL_CURRENT_PRICE,
-                    )
+    @track_provider_call("upstox", "get_current_prices")
+    async def aget_current_prices(
+        self, assets: List[Dict[str, Any]]
+    ) -> Dict[str, Dict[str, Decimal]]:
+        """Async variant of `get_current_prices`; the candles load concurrently."""
+        await self._ensure_metadata()
+        prices_data, assets_to_fetch = self._cached_current_prices(assets)
+        requests = self._price_requests(assets_to_fetch)
+        if not requests:
+            return prices_data
 
+        today = date.today()
+        from_date = today - timedelta(days=10)
+        async with httpx.AsyncClient() as client:
+            results = await self._paced([
+                self._afetch_upstox_candles(
+                    client, inst_key, "days", "1", today, from_date
+                )
+                for _, inst_key in requests
+            ])
+        for (ticker, inst_key), candles in zip(requests, results):
+            self._store_current_price(ticker, inst_key, candles, prices_data)
         return prices_data
 
-    def get_historical_prices(
-        self, assets: List[Dict[str, Any]], start_date: date, end_date: date
-    ) -> Dict[str, Dict[date, Decimal]]:
+    # --- Historical prices ---
+    def _cached_history(
+        self,
+        assets: List[Dict[str, Any]],
+        start_date: date,
+        end_date: date,
+        historical_data: Dict[str, Dict[date, Decimal]],
+    ) -> List[Tuple[str, str, str]]:
         """
-        Fetches historical prices for a list of assets over a date range.
+        Fills `historical_data` from the cache and returns (ticker, instrument
+        key, cache key) of the assets that must be fetched.
         """
-        historical_data: Dict[str, Dict[date, Decimal]] = defaultdict(dict)
-
+        to_fetch = []
         for asset in assets:
             ticker = asset.get("ticker_symbol", "")
             isin = asset.get("isin")
@@ -204,27 +307,69 @@ class UpstoxProvider(FinancialDataProvider):
                         c_dt = date.fromisoformat(dt_str)
                         historical_data[ticker][c_dt] = Decimal(price_str)
                     continue
+            to_fetch.append((ticker, inst_key, cache_key))
+        return to_fetch
+
+    def _store_history(
+        self,
+        ticker: str,
+        cache_key: str,
+        candles: List[List[Any]],
+        historical_data: Dict[str, Dict[date, Decimal]],
+    ) -> None:
+        if not candles:
+            return
+        asset_history = {}
+        for candle in candles:
+            dt_str = candle[0].split("T")[0]
+            c_date = date.fromisoformat(dt_str)
+            close_price = Decimal(str(candle[4]))
+            historical_data[ticker][c_date] = close_price
+            asset_history[dt_str] = str(close_price)
 
+        if self.cache_client:
+            self.cache_client.set_json(
+                cache_key, asset_history, expire=CACHE_TTL_HISTORICAL_PRICE
+            )
+
+    @track_provider_call("upstox")
+    def get_historical_prices(
+        self, assets: List[Dict[str, Any]], start_date: date, end_date: date
+    ) -> Dict[str, Dict[date, Decimal]]:
+        """
+        Fetches historical prices for a list of assets over a date range.
+        """
+        historical_data: Dict[str, Dict[date, Decimal]] = defaultdict(dict)
+        to_fetch = self._cached_history(assets, start_date, end_date, historical_data)
+        for ticker, inst_key, cache_key in to_fetch:
             # Respect rate limits: 20ms sleep
-            time.sleep(0.02)
+            time.sleep(REQUEST_INTERVAL)
             candles = self._fetch_upstox_candles(
                 inst_key, "days", "1", end_date, start_date
             )
+            self._store_history(ticker, cache_key, candles, historical_data)
 
-            if candles:
-                asset_history = {}
-                for candle in candles:
-                    dt_str = candle[0].split("T")[0]
-                    c_date = date.fromisoformat(dt_str)
-                    close_price = Decimal(str(candle[4]))
-                    historical_data[ticker][c_date] = close_price
-                    asset_history[dt_str] = str(close_price)
-
-                if self.cache_client:
-                    self.cache_client.set_json(
-                        cache_key, asset_history, expire=CACHE_TTL_HISTORICAL_PRICE
-                    )
+        return historical_data
 
+    @track_provider_call("upstox", "get_historical_prices")
+    async def aget_historical_prices(
+        self, assets: List[Dict[str, Any]], start_date: date, end_date: date
+    ) -> Dict[str, Dict[date, Decimal]]:
+        await self._ensure_metadata()
+        historical_data: Dict[str, Dict[date, Decimal]] = defaultdict(dict)
+        to_fetch = self._cached_history(assets, start_date, end_date, historical_data)
+        if not to_fetch:
+            return historical_data
+
+        async with httpx.AsyncClient() as client:
+            results = await self._paced([
+                self._afetch_upstox_candles(
+                    client, inst_key, "days", "1", end_date, start_date
+                )
+                for _, inst_key, _ in to_fetch
+            ])
+        for (ticker, _, cache_key), candles in zip(to_fetch, results):
+            self._store_history(ticker, cache_key, candles, historical_data)
         return historical_data
 
     def get_asset_details(self, ticker_symbol: str) -> Optional[Dict[str, Any]]:
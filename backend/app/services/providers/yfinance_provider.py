@@ -1,15 +1,19 @@
-"""Provider for fetching data from Yahoo Finance."""
+"""Provider for fetching data from Yahoo Finance.
+
+yfinance (which loads pandas) is imported inside the methods that call it, so
+the provider can be constructed without paying for either at startup.
+"""
 import logging
+from bisect import bisect_right
 from collections import defaultdict
 from datetime import date, datetime, timedelta
 from decimal import Decimal
 from typing import Any, Dict, List, Optional
 
-import pandas as pd
-import yfinance as yf
 from pydantic import ValidationError
 
 from app.cache.base import CacheClient
+from app.core.metrics import record_provider_error, track_provider_call
 
 from .base import FinancialDataProvider
 
@@ -38,9 +42,12 @@ class YFinanceProvider(FinancialDataProvider):
             return f"{ticker_symbol}.BO"
         return ticker_symbol
 
+    @track_provider_call("yfinance")
     def get_current_prices(
         self, assets: List[Dict[str, Any]]
     ) -> Dict[str, Dict[str, Decimal]]:
+        import yfinance as yf
+
         logger.debug(
             f"get_current_prices: {len(assets)} assets - "
             f"{[(a.get('ticker_symbol'), a.get('exchange')) for a in assets]}"
@@ -138,6 +145,7 @@ class YFinanceProvider(FinancialDataProvider):
                         f"yfinance API returned empty history for {yf_symbol}"
                     )
         except (Exception, ValidationError) as e:
+            record_provider_error("yfinance", "get_current_prices")
             logger.error(f"WARNING: Error fetching batch data from yfinance: {e}")
 
         if self.cache_client:
@@ -186,6 +194,8 @@ class YFinanceProvider(FinancialDataProvider):
         Returns dict with keys: sector, industry, country, market_cap,
                                 trailing_pe, price_to_book, investment_style
         """
+        import yfinance as yf
+
         yf_ticker = self._get_yfinance_ticker(ticker_symbol, exchange)
         cache_key = f"enrichment:{yf_ticker}"
         failed_cache_key = f"enrichment_failed:{yf_ticker}"
@@ -289,9 +299,13 @@ class YFinanceProvider(FinancialDataProvider):
 
 
 
+    @track_provider_call("yfinance")
     def get_historical_prices(
         self, assets: List[Dict[str, Any]], start_date: date, end_date: date
     ) -> Dict[str, Dict[date, Decimal]]:
+        import pandas as pd
+        import yfinance as yf
+
         historical_data: Dict[str, Dict[date, Decimal]] = defaultdict(dict)
         assets_to_fetch = []
         if self.cache_client:
@@ -373,6 +387,7 @@ class YFinanceProvider(FinancialDataProvider):
                                         )
 
         except (Exception, ValidationError) as e:
+            record_provider_error("yfinance", "get_historical_prices")
             print(f"WARNING: Error fetching historical data from yfinance: {e}")
             return {}
 
@@ -405,6 +420,8 @@ class YFinanceProvider(FinancialDataProvider):
         Fetches historical closing prices for an index (e.g., ^NSEI, ^BSESN).
         Returns a dict of {date_str: close_price}.
         """
+        import yfinance as yf
+
         yf_ticker = ticker_symbol  # Index tickers are already in yfinance format
         cache_key = (
             f"index_history:{yf_ticker}:{start_date.isoformat()}:{end_date.isoformat()}"
@@ -449,7 +466,10 @@ class YFinanceProvider(FinancialDataProvider):
             logger.error(f"Error fetching index history for {yf_ticker}: {e}")
             return {}
 
+    @track_provider_call("yfinance")
     def get_asset_details(self, ticker_symbol: str) -> Optional[Dict[str, Any]]:
+        import yfinance as yf
+
         if self.cache_client:
             cache_key = f"asset_details_not_found:{ticker_symbol.upper()}"
             if self.cache_client.get_json(cache_key):
@@ -501,7 +521,10 @@ class YFinanceProvider(FinancialDataProvider):
             )
         return None
 
+    @track_provider_call("yfinance")
     def get_price(self, ticker_symbol: str) -> Optional[Decimal]:
+        import yfinance as yf
+
         ticker_obj = None
         for yf_ticker_str in [
             f"{ticker_symbol}.NS", f"{ticker_symbol}.BO", ticker_symbol
@@ -522,11 +545,14 @@ class YFinanceProvider(FinancialDataProvider):
                 return Decimal(str(hist["Close"].iloc[-1]))
         return None
 
+    @track_provider_call("yfinance")
     def search(self, query: str) -> List[Dict[str, Any]]:
         """
         Search Yahoo Finance for matching tickers by name, ticker, or ISIN.
         Returns a list of matching assets with their details.
         """
+        import yfinance as yf
+
         try:
             # yfinance provides a Search class for querying Yahoo Finance
             search_obj = yf.Search(query)
@@ -558,9 +584,11 @@ class YFinanceProvider(FinancialDataProvider):
             )
             return results
         except Exception as e:
+            record_provider_error("yfinance", "search")
             logger.warning(f"Yahoo search failed for '{query}': {e}")
             return []
 
+    @track_provider_call("yfinance")
     def get_exchange_rate(
         self, from_currency: str, to_currency: str, date_obj: date
     ) -> Optional[Decimal]:
@@ -602,6 +630,41 @@ class YFinanceProvider(FinancialDataProvider):
                 return result[ticker][latest_available_date]
         return None
 
+    @track_provider_call("yfinance")
+    def get_exchange_rates(
+        self, from_currency: str, to_currency: str, dates: List[date]
+    ) -> Dict[date, Optional[Decimal]]:
+        """
+        Fetches exchange rates for several dates with a single history request
+        spanning all of them. Each date resolves to the most recent rate within
+        the 7 days up to and including it, as in `get_exchange_rate`.
+        """
+        dates = sorted({d for d in dates if d.year >= 1900})
+        if not dates:
+            return {}
+
+        ticker = f"{from_currency}{to_currency}=X"
+        result = self.get_historical_prices(
+            [{"ticker_symbol": ticker, "exchange": None}], # type: ignore
+            dates[0] - timedelta(days=7),
+            dates[-1] + timedelta(days=1),
+        )
+        history = (result or {}).get(ticker) or {}
+        available_dates = sorted(history)
+
+        rates: Dict[date, Optional[Decimal]] = {}
+        for date_obj in dates:
+            # The latest available date on or before this one
+            index = bisect_right(available_dates, date_obj)
+            found = available_dates[index - 1] if index else None
+            rates[date_obj] = (
+                history[found]
+                if found is not None and found >= date_obj - timedelta(days=7)
+                else None
+            )
+        return rates
+
+    @track_provider_call("yfinance")
     def get_enrichment_data_batch(
         self, assets: List[Dict[str, Any]]
     ) -> Dict[str, Dict[str, Any]]:
@@ -6,12 +6,14 @@ Uses CALENDAR YEAR (Jan 1 - Dec 31 of AY-2) not Financial Year.
 
 Example: For AY 2025-26, report assets held Jan 1, 2024 to Dec 31, 2024.
 """
+import bisect
 import logging
 from collections import defaultdict
 from datetime import date, datetime, timedelta
 from decimal import Decimal
 from typing import Dict, List, Optional, Tuple
 
+import numpy as np
 from sqlalchemy.orm import Session, joinedload
 
 from app.models import Asset, Transaction
@@ -58,6 +60,49 @@ class ScheduleFAEntry:
         self.quantity_held = quantity_held
 
 
+class PriceRangeMax:
+    """
+    Sparse table over one ticker's daily prices for a reporting period,
+    answering "highest price between two dates" in O(1) after an
+    O(days * log(days)) build. Built once per ticker and shared by all of its
+    lots. Days without a price count as zero; ties resolve to the earliest day.
+    """
+
+    def __init__(
+        self, prices: Dict[date, Decimal], start_date: date, end_date: date
+    ):
+        self.start_date = start_date
+        n_days = max((end_date - start_date).days + 1, 1)
+        self._prices = [Decimal(0)] * n_days
+        for day, price in prices.items():
+            offset = (day - start_date).days
+            if 0 <= offset < n_days and price > 0:
+                self._prices[offset] = price
+
+        values = np.array([float(p) for p in self._prices])
+        level = np.arange(n_days)
+        # _table[k][i] is the index of the highest price in [i, i + 2**k).
+        self._table = [level]
+        width = 1
+        while width * 2 <= n_days:
+            left, right = level[:-width], level[width:]
+            level = np.where(values[left] >= values[right], left, right)
+            self._table.append(level)
+            width *= 2
+
+    def query(self, first: date, last: date) -> Tuple[Decimal, date]:
+        """Highest price and its date in [first, last] (inclusive)."""
+        lo = max((first - self.start_date).days, 0)
+        hi = min((last - self.start_date).days, len(self._prices) - 1)
+        if hi < lo:
+            return Decimal(0), first
+        k = (hi - lo + 1).bit_length() - 1
+        left = self._table[k][lo]
+        right = self._table[k][hi - (1 << k) + 1]
+        idx = int(left if self._prices[left] >= self._prices[right] else right)
+        return self._prices[idx], self.start_date + timedelta(days=idx)
+
+
 class ScheduleFAService:
     def __init__(self, db: Session):
         self.db = db
@@ -90,6 +135,13 @@ class ScheduleFAService:
             lots, start_date.date(), end_date.date()
         )
 
+        # One range-max index per ticker, shared by all lots of that asset
+        price_indexes = {
+            ticker: PriceRangeMax(prices, start_date.date(), end_date.date())
+            for ticker, prices in price_data.items()
+            if prices
+        }
+
         entries = []
         for lot in lots:
             asset = lot["asset"]
@@ -102,7 +154,8 @@ class ScheduleFAService:
                 lot, start_date, asset_prices
             )
             peak_value, peak_date = self._calculate_lot_peak_value(
-                lot, start_date, end_date, asset_prices
+                lot, start_date, end_date, asset_prices,
+                price_index=price_indexes.get(ticker),
             )
             closing_value = self._calculate_lot_closing_value(
                 lot, end_date, asset_prices
@@ -436,12 +489,17 @@ class ScheduleFAService:
 
     def _calculate_lot_peak_value(
         self, lot: dict, start_date: datetime, end_date: datetime,
-        yahoo_prices: Dict[date, Decimal]
+        yahoo_prices: Dict[date, Decimal],
+        price_index: Optional[PriceRangeMax] = None,
     ) -> Tuple[Decimal, Optional[date]]:
         """
         Peak value of this lot during the calendar year.
         Calculates Max(Qty_on_Day * Price_on_Day) for the year.
         Returns (Max Value, Date of Max Value).
+
+        The holding is constant between critical dates, so each interval needs
+        only its highest price, which `price_index` (built from `yahoo_prices`
+        when not supplied) answers in O(1).
         """
         buy_tx = lot["buy_transaction"]
         buy_date = buy_tx.transaction_date.date()
@@ -454,67 +512,65 @@ class ScheduleFAService:
             critical_dates.add(buy_date)
 
         disposals = sorted(
-            [d for d in lot["disposals"] if s_date <= d["date"].date() <= e_date],
-            key=lambda x: x["date"]
+            (d["date"].date(), d["qty"]) for d in lot["disposals"]
         )
-        for d in disposals:
-            d_date = d["date"].date()
-            critical_dates.add(d_date)
-            # Add next day to start a new interval with reduced quantity
-            if d_date < e_date:
-                critical_dates.add(d_date + timedelta(days=1))
+        for d_date, _ in disposals:
+            if s_date <= d_date <= e_date:
+                critical_dates.add(d_date)
+                # Add next day to start a new interval with reduced quantity
+                if d_date < e_date:
+                    critical_dates.add(d_date + timedelta(days=1))
 
-        sorted_dates = sorted(list(critical_dates))
+        sorted_dates = sorted(critical_dates)
 
-        # 2. Iterate intervals
-        global_peak = Decimal(0)
-        global_peak_date = None
+        if price_index is None and yahoo_prices:
+            price_index = PriceRangeMax(yahoo_prices, s_date, e_date)
+
+        # Cumulative disposed quantity, for O(log n) holding lookups
+        disposal_dates = [d_date for d_date, _ in disposals]
+        disposed_before = [Decimal(0)]
+        for _, qty in disposals:
+            disposed_before.append(disposed_before[-1] + qty)
 
-        # Helper to get qty on date
         def get_qty_on_date(d: date):
             if d < buy_date:
                 return Decimal(0)
-            q = lot["buy_transaction"].quantity  # Start with full lot
-            return q - sum(
-                disp["qty"] for disp in lot["disposals"] if disp["date"].date() < d
-            )
+            # Start with full lot, less everything disposed before `d`
+            return buy_tx.quantity - disposed_before[
+                bisect.bisect_left(disposal_dates, d)
+            ]
+
+        # 2. Iterate intervals
+        global_peak = Decimal(0)
+        global_peak_date = None
 
-        current_idx = 0
-        while sorted_dates[current_idx] < e_date:
-            seg_start = sorted_dates[current_idx]
-            if current_idx + 1 < len(sorted_dates):
-                seg_end = sorted_dates[current_idx + 1]
-            else:
-                seg_end = e_date
+        for idx, seg_start in enumerate(sorted_dates):
+            if seg_start >= e_date:
+                break
+            seg_end = (
+                sorted_dates[idx + 1] if idx + 1 < len(sorted_dates) else e_date
+            )
 
             qty = get_qty_on_date(seg_start)
+            if qty <= 0:
+                continue
 
-            if qty > 0:
-                # Find max price in range [seg_start, seg_end]
-                max_p = Decimal(0)
-                max_p_date = seg_start # Fallback
-
-                if yahoo_prices:
-                    curr = seg_start
-                    while curr <= seg_end and curr <= e_date:
-                        p = yahoo_prices.get(curr, Decimal(0))
-                        if p > max_p:
-                            max_p = p
-                            max_p_date = curr
-                        curr += timedelta(days=1)
-
-                if max_p == 0:
-                    max_p = buy_tx.price_per_unit
-                    max_p_date = seg_start # Use start of interval if flat price
-
-                val = qty * max_p
-                if val > global_peak:
-                    global_peak = val
-                    global_peak_date = max_p_date
-
-            current_idx += 1
-            if current_idx >= len(sorted_dates):
-                break
+            # Find max price in range [seg_start, seg_end]
+            max_p = Decimal(0)
+            max_p_date = seg_start # Fallback
+            if price_index is not None:
+                max_p, max_p_date = price_index.query(
+                    seg_start, min(seg_end, e_date)
+                )
+
+            if max_p == 0:
+                max_p = buy_tx.price_per_unit
+                max_p_date = seg_start # Use start of interval if flat price
+
+            val = qty * max_p
+            if val > global_peak:
+                global_peak = val
+                global_peak_date = max_p_date
 
         return global_peak, global_peak_date
 
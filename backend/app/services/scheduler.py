@@ -0,0 +1,270 @@
+"""
+Built-in scheduler for recurring background jobs.
+
+Jobs run at a fixed time of day in Indian Standard Time. Jobs marked
+`trading_days_only` are recorded as skipped on weekends and NSE holidays,
+using the holiday list from `UpstoxMetadataService`. Every run, scheduled or
+triggered by hand, is stored in `scheduled_job_runs` with its duration and
+statistics, which is what the admin jobs API reports.
+
+Scheduled runs claim their day through a unique key on the run row, so when
+several worker processes each run a scheduler only one of them executes a
+given day's job.
+"""
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, timezone
+from enum import Enum
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.cache.factory import get_cache_client
+from app.core import metrics
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.scheduled_job_run import ScheduledJobRun
+from app.services.providers.nse_bhavcopy_provider import NseBhavcopyProvider
+from app.services.snapshot_service import take_end_of_day_snapshots
+from app.services.upstox_metadata_service import UpstoxMetadataService
+
+logger = logging.getLogger(__name__)
+
+# India has no daylight saving, so a fixed offset is exact
+IST = timezone(timedelta(hours=5, minutes=30), "IST")
+
+EOD_SNAPSHOT_JOB = "eod_snapshots"
+BHAVCOPY_ARCHIVE_JOB = "bhavcopy_archive"
+
+STARTUP_DELAY_SECONDS = 10  # Give the server a moment to fully start
+POLL_SECONDS = 60
+# How far ahead next_run_at looks for a trading day
+MAX_LOOKAHEAD_DAYS = 14
+
+
+class JobStatus(str, Enum):
+    RUNNING = "running"
+    SUCCESS = "success"
+    FAILED = "failed"
+    SKIPPED = "skipped"
+
+
+class JobTrigger(str, Enum):
+    SCHEDULED = "scheduled"
+    STARTUP = "startup"
+    API = "api"
+    CLI = "cli"
+
+
+@dataclass(frozen=True)
+class ScheduledJob:
+    name: str
+    description: str
+    run_at: time  # IST
+    func: Callable[[Session, date], Dict[str, Any]]
+    trading_days_only: bool = True
+
+
+def now_ist() -> datetime:
+    return datetime.now(IST)
+
+
+def parse_run_time(value: str) -> time:
+    """Parses an HH:MM setting, falling back to 16:30 when it is malformed."""
+    try:
+        hours, minutes = value.split(":")
+        return time(int(hours), int(minutes))
+    except (ValueError, AttributeError):
+        logger.warning(f"Invalid scheduler time {value!r}; using 16:30.")
+        return time(16, 30)
+
+
+class JobScheduler:
+    def __init__(
+        self,
+        jobs: List[ScheduledJob],
+        session_factory: Callable[[], Session] = SessionLocal,
+        calendar: Optional[UpstoxMetadataService] = None,
+    ):
+        self.jobs: Dict[str, ScheduledJob] = {job.name: job for job in jobs}
+        self.session_factory = session_factory
+        self._calendar = calendar
+        # Last day each job's scheduled run was claimed, by any process
+        self._claimed: Dict[str, date] = {}
+
+    @property
+    def calendar(self) -> UpstoxMetadataService:
+        if self._calendar is None:
+            self._calendar = UpstoxMetadataService(get_cache_client())
+        return self._calendar
+
+    def is_trading_day(self, day: date) -> bool:
+        return not self.calendar.is_market_closed(day)
+
+    def next_run_at(self, job: ScheduledJob, now: datetime) -> Optional[datetime]:
+        """The next time the job will actually execute (not be skipped)."""
+        day = now.date()
+        if self._claimed.get(job.name) == day or now.time() >= job.run_at:
+            day += timedelta(days=1)
+        for _ in range(MAX_LOOKAHEAD_DAYS):
+            if not job.trading_days_only or self.is_trading_day(day):
+                return datetime.combine(day, job.run_at, tzinfo=IST)
+            day += timedelta(days=1)
+        return None
+
+    def due_jobs(self, now: datetime) -> List[ScheduledJob]:
+        return [
+            job
+            for job in self.jobs.values()
+            if now.time() >= job.run_at and self._claimed.get(job.name) != now.date()
+        ]
+
+    def run_job(
+        self, name: str, trigger: JobTrigger, run_date: Optional[date] = None
+    ) -> Optional[ScheduledJobRun]:
+        """
+        Executes a job and records the run. Returns the finished run, or None
+        if this was a scheduled run whose day another process already claimed.
+        Raises KeyError for an unknown job.
+        """
+        job = self.jobs[name]
+        if run_date is None:
+            run_date = now_ist().date()
+
+        with self.session_factory() as db:
+            run = ScheduledJobRun(
+                job_name=name,
+                trigger=trigger.value,
+                status=JobStatus.RUNNING.value,
+                run_date=run_date,
+                claim_key=(
+                    f"{name}:{run_date.isoformat()}"
+                    if trigger == JobTrigger.SCHEDULED
+                    else None
+                ),
+                started_at=datetime.now(timezone.utc),
+            )
+            db.add(run)
+            try:
+                db.commit()
+            except IntegrityError:
+                db.rollback()
+                self._claimed[name] = run_date
+                logger.info(f"Job {name} for {run_date} was already claimed.")
+                return None
+            if trigger == JobTrigger.SCHEDULED:
+                self._claimed[name] = run_date
+
+            logger.info(f"Running job {name} for {run_date} ({trigger.value})...")
+            timer = metrics.start_timer(f"job:{name}")
+            try:
+                if (
+                    job.trading_days_only
+                    and trigger == JobTrigger.SCHEDULED
+                    and not self.is_trading_day(run_date)
+                ):
+                    run.status = JobStatus.SKIPPED.value
+                    run.details = {"reason": "market closed"}
+                else:
+                    run.details = job.func(db, run_date)
+                    run.status = JobStatus.SUCCESS.value
+            except Exception as e:
+                logger.error(f"Job {name} failed: {e}", exc_info=True)
+                db.rollback()
+                run.status = JobStatus.FAILED.value
+                run.error = str(e)
+            run.duration_seconds = round(timer.stop(), 3)
+            run.finished_at = datetime.now(timezone.utc)
+            db.commit()
+            db.refresh(run)
+            db.expunge(run)
+
+        logger.info(
+            f"Job {name} finished: {run.status} in {run.duration_seconds}s."
+        )
+        return run
+
+    def catch_up(self, now: datetime) -> None:
+        """
+        Local installs are often not running at the scheduled time, so on
+        startup they run each job once per day, as the old desktop snapshot
+        loop did, unless today's scheduled run is already due and about to.
+        """
+        for job in self.jobs.values():
+            today = now.date()
+            with self.session_factory() as db:
+                done = crud.scheduled_job_run.get_last(
+                    db,
+                    job_name=job.name,
+                    status=JobStatus.SUCCESS.value,
+                    run_date=today,
+                )
+            if done:
+                continue
+            scheduled_run_due = now.time() >= job.run_at and (
+                not job.trading_days_only or self.is_trading_day(today)
+            )
+            if not scheduled_run_due:
+                self.run_job(job.name, JobTrigger.STARTUP, today)
+
+    async def run_forever(self, catch_up: bool = False) -> None:
+        await asyncio.sleep(STARTUP_DELAY_SECONDS)
+        loop = asyncio.get_running_loop()
+
+        if catch_up:
+            try:
+                await loop.run_in_executor(None, self.catch_up, now_ist())
+            except Exception as e:
+                logger.error(f"Error in scheduler startup catch-up: {e}")
+
+        while True:
+            for job in self.due_jobs(now_ist()):
+                try:
+                    # Jobs do blocking DB and provider work; keep them off the
+                    # event loop.
+                    await loop.run_in_executor(
+                        None, self.run_job, job.name, JobTrigger.SCHEDULED
+                    )
+                except Exception as e:
+                    logger.error(f"Error running scheduled job {job.name}: {e}")
+            await asyncio.sleep(POLL_SECONDS)
+
+
+def _run_eod_snapshots(db: Session, run_date: date) -> Dict[str, Any]:
+    return take_end_of_day_snapshots(
+        db, target_date=run_date, batch_size=settings.SCHEDULER_SNAPSHOT_BATCH_SIZE
+    )
+
+
+def _archive_bhavcopy(db: Session, run_date: date) -> Dict[str, Any]:
+    day = NseBhavcopyProvider(get_cache_client()).archive_latest(run_date)
+    if day is None:
+        raise RuntimeError(f"No NSE bhavcopy found in the 5 days to {run_date}")
+    return {"archived_day": day.isoformat()}
+
+
+scheduler = JobScheduler(
+    jobs=[
+        ScheduledJob(
+            name=EOD_SNAPSHOT_JOB,
+            description=(
+                "Snapshots every portfolio in bulk, pricing all held assets "
+                "in one batched lookup."
+            ),
+            run_at=parse_run_time(settings.SCHEDULER_EOD_TIME),
+            func=_run_eod_snapshots,
+        ),
+        ScheduledJob(
+            name=BHAVCOPY_ARCHIVE_JOB,
+            description=(
+                "Downloads the day's NSE bhavcopy into the local closing "
+                "price archive."
+            ),
+            run_at=parse_run_time(settings.SCHEDULER_BHAVCOPY_TIME),
+            func=_archive_bhavcopy,
+        ),
+    ]
+)
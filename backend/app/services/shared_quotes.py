@@ -0,0 +1,122 @@
+"""
+Current prices shared by the live streams of one process.
+
+Every open quote or valuation stream asks for its prices each interval. The
+store fetches each ticker at most once per `max_age` seconds, however many
+streams hold it, and streams asking at the same moment share one provider
+call. Many open dashboards therefore cost about one pricing pass per
+interval rather than one per stream.
+"""
+import asyncio
+import logging
+import time
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.services.financial_data_service import financial_data_service
+
+logger = logging.getLogger(__name__)
+
+Prices = Dict[str, Dict[str, Decimal]]
+
+
+class SharedQuotes:
+    def __init__(self, max_age: float):
+        self.max_age = max_age
+        # Ticker to (fetched at, price data or None if not found)
+        self._quotes: Dict[str, Tuple[float, Optional[Dict[str, Decimal]]]] = {}
+        self._in_flight: Dict[str, "asyncio.Future[Prices]"] = {}
+
+    async def get(self, requests: List[Dict[str, Any]]) -> Prices:
+        """
+        Prices for the `get_current_prices` requests, keyed by ticker.
+        Tickers whose provider call failed are left out.
+        """
+        now = time.monotonic()
+        prices: Prices = {}
+        waiting: Dict["asyncio.Future[Prices]", List[Dict[str, Any]]] = {}
+        to_fetch = []
+        for request in requests:
+            ticker = request["ticker_symbol"]
+            fetched_at, data = self._quotes.get(ticker, (None, None))
+            if fetched_at is not None and now - fetched_at < self.max_age:
+                if data is not None:
+                    prices[ticker] = data
+            elif ticker in self._in_flight:
+                waiting.setdefault(self._in_flight[ticker], []).append(request)
+            else:
+                to_fetch.append(request)
+
+        if to_fetch:
+            try:
+                prices.update(await self._fetch(to_fetch))
+            except Exception as e:
+                logger.warning(
+                    f"Failed to fetch prices for {len(to_fetch)} assets: {e}"
+                )
+        for future, pending in waiting.items():
+            try:
+                # Another stream's call; shielded so our cancellation leaves it be
+                fetched = await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                # The stream making the call went away; ask again
+                prices.update(await self.get(pending))
+                continue
+            except Exception:
+                # Logged by the stream that made the call
+                continue
+            prices.update(
+                {r["ticker_symbol"]: fetched[r["ticker_symbol"]]
+                 for r in pending if r["ticker_symbol"] in fetched}
+            )
+        return prices
+
+    async def _fetch(self, requests: List[Dict[str, Any]]) -> Prices:
+        """
+        One provider call for the requests, shared with the streams that ask
+        for the same tickers meanwhile. Only a completed call is cached; its
+        failure or cancellation is passed on to those streams.
+        """
+        future: "asyncio.Future[Prices]" = asyncio.get_running_loop().create_future()
+        # Waiters may all have gone; the exception is still considered seen
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        tickers = [r["ticker_symbol"] for r in requests]
+        for ticker in tickers:
+            self._in_flight[ticker] = future
+        try:
+            prices = await financial_data_service.aget_current_prices(requests)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        else:
+            fetched_at = time.monotonic()
+            self._prune(fetched_at)
+            for ticker in tickers:
+                self._quotes[ticker] = (fetched_at, prices.get(ticker))
+            future.set_result(prices)
+            return prices
+        finally:
+            for ticker in tickers:
+                if self._in_flight.get(ticker) is future:
+                    del self._in_flight[ticker]
+
+    def _prune(self, now: float) -> None:
+        stale = [
+            ticker
+            for ticker, (fetched_at, _) in self._quotes.items()
+            if now - fetched_at >= self.max_age
+        ]
+        for ticker in stale:
+            del self._quotes[ticker]
+
+    def clear(self) -> None:
+        self._quotes.clear()
+
+
+shared_quotes = SharedQuotes(max_age=settings.LIVE_STREAM_INTERVAL_SECONDS)
@@ -1,39 +1,33 @@
 import logging
+import uuid
 from datetime import date
 from decimal import Decimal
-from typing import Optional
+from typing import Any, Dict, List, Optional, Sequence
 
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import Session
 
 from app import crud
+from app.core import metrics
 from app.models.portfolio import Portfolio
 from app.models.portfolio_snapshot import DailyPortfolioSnapshot
 from app.schemas.holding import PortfolioHoldingsAndSummary
 
 logger = logging.getLogger(__name__)
 
+# Bound parameters per snapshot row in the upsert. Older SQLite builds (as
+# shipped on some Android versions) allow only 999 parameters per statement.
+_PARAMS_PER_ROW = 9
+_SQLITE_MAX_PARAMS = 999
 
-def take_snapshot_for_portfolio(
-    db: Session, portfolio_id: str, target_date: Optional[date] = None
-) -> DailyPortfolioSnapshot:
-    """
-    Calculates the current value and holdings of a portfolio and saves it
-    as a snapshot for the given date (defaults to today).
-    Note: Since this relies on live market prices, it should be called on the
-    actual date we want to snapshot.
-    """
-    if target_date is None:
-        target_date = date.today()
-
-    logger.info(f"Taking snapshot for portfolio {portfolio_id} on {target_date}")
-
-    # Calculate current state
-    portfolio_data: PortfolioHoldingsAndSummary = (
-        crud.holding.get_portfolio_holdings_and_summary(db, portfolio_id=portfolio_id)
-    )
 
+def _snapshot_values(
+    portfolio_id: uuid.UUID,
+    target_date: date,
+    portfolio_data: PortfolioHoldingsAndSummary,
+) -> Dict[str, Any]:
+    """The snapshot row for a portfolio's holdings and summary."""
     summary = portfolio_data.summary
     holdings = portfolio_data.holdings
 
@@ -74,8 +68,8 @@ def take_snapshot_for_portfolio(
             "currency": h.currency,
         })
 
-    # Upsert the snapshot based on active database dialect
-    values = dict(
+    return dict(
+        id=uuid.uuid4(),
         portfolio_id=portfolio_id,
         snapshot_date=target_date,
         total_value=summary.total_value,
@@ -86,13 +80,16 @@ def take_snapshot_for_portfolio(
         holdings_snapshot=holdings_json,
     )
 
+
+def _upsert_statement(db: Session, rows: List[Dict[str, Any]]):
+    """A multi-row insert that refreshes existing snapshots for the same date."""
     dialect_name = db.bind.dialect.name if db.bind else "postgresql"
     insert_fn = sqlite_insert if dialect_name == "sqlite" else pg_insert
 
-    stmt = insert_fn(DailyPortfolioSnapshot).values(**values)
+    stmt = insert_fn(DailyPortfolioSnapshot).values(rows)
 
     # If a snapshot for this date already exists, update it with fresh values
-    stmt = stmt.on_conflict_do_update(
+    return stmt.on_conflict_do_update(
         index_elements=['portfolio_id', 'snapshot_date'],
         set_={
             'total_value': stmt.excluded.total_value,
@@ -103,6 +100,30 @@ def take_snapshot_for_portfolio(
             'holdings_snapshot': stmt.excluded.holdings_snapshot,
             'updated_at': stmt.excluded.updated_at,
         }
+    )
+
+
+def take_snapshot_for_portfolio(
+    db: Session, portfolio_id: str, target_date: Optional[date] = None
+) -> DailyPortfolioSnapshot:
+    """
+    Calculates the current value and holdings of a portfolio and saves it
+    as a snapshot for the given date (defaults to today).
+    Note: Since this relies on live market prices, it should be called on the
+    actual date we want to snapshot.
+    """
+    if target_date is None:
+        target_date = date.today()
+
+    logger.info(f"Taking snapshot for portfolio {portfolio_id} on {target_date}")
+
+    # Calculate current state
+    portfolio_data: PortfolioHoldingsAndSummary = (
+        crud.holding.get_portfolio_holdings_and_summary(db, portfolio_id=portfolio_id)
+    )
+
+    stmt = _upsert_statement(
+        db, [_snapshot_values(portfolio_id, target_date, portfolio_data)]
     ).returning(DailyPortfolioSnapshot)
 
     result = db.execute(stmt)
@@ -112,21 +133,100 @@ def take_snapshot_for_portfolio(
     return snapshot
 
 
-def take_daily_snapshots_for_all(db: Session) -> int:
+def take_bulk_snapshots(
+    db: Session, portfolio_ids: Sequence[uuid.UUID], target_date: date
+) -> int:
     """
-    Iterates through all portfolios in the system and takes a snapshot for today.
-    Returns the number of snapshots created/updated.
+    Snapshots many portfolios at once: their transactions are loaded in one
+    pass, the union of held assets is priced once, and all rows are written
+    with one multi-row upsert (split only where SQLite's parameter limit
+    requires it). Returns the number of snapshots written.
     """
-    portfolios = db.query(Portfolio).all()
-    count = 0
-    today = date.today()
+    if not portfolio_ids:
+        return 0
 
-    for portfolio in portfolios:
+    results = crud.holding.get_holdings_and_summaries_bulk(
+        db, portfolio_ids=list(portfolio_ids)
+    )
+    rows = [
+        _snapshot_values(portfolio_id, target_date, portfolio_data)
+        for portfolio_id, portfolio_data in results.items()
+    ]
+
+    dialect_name = db.bind.dialect.name if db.bind else "postgresql"
+    rows_per_statement = (
+        _SQLITE_MAX_PARAMS // _PARAMS_PER_ROW
+        if dialect_name == "sqlite"
+        else len(rows)
+    )
+    for start in range(0, len(rows), rows_per_statement):
+        db.execute(_upsert_statement(db, rows[start:start + rows_per_statement]))
+    db.commit()
+    return len(rows)
+
+
+def take_end_of_day_snapshots(
+    db: Session, target_date: Optional[date] = None, batch_size: int = 200
+) -> Dict[str, Any]:
+    """
+    The end-of-day job: snapshots every portfolio with `take_bulk_snapshots`,
+    `batch_size` portfolios at a time to bound memory. If a batch fails, its
+    portfolios are retried one by one so a single bad portfolio only loses its
+    own snapshot. Returns run statistics for the job history.
+    """
+    if target_date is None:
+        target_date = date.today()
+
+    portfolio_ids = [row.id for row in db.query(Portfolio.id).all()]
+    batch_size = max(1, batch_size)
+    updated = 0
+    failed: List[uuid.UUID] = []
+    retried_batches = 0
+
+    timer = metrics.start_timer("eod_snapshots")
+    for start in range(0, len(portfolio_ids), batch_size):
+        batch = portfolio_ids[start:start + batch_size]
         try:
-            take_snapshot_for_portfolio(db, portfolio.id, target_date=today)
-            count += 1
+            updated += take_bulk_snapshots(db, batch, target_date)
+            continue
         except Exception as e:
-            logger.error(f"Failed to take snapshot for portfolio {portfolio.id}: {e}")
+            logger.error(
+                f"Bulk snapshot of {len(batch)} portfolios failed ({e}); "
+                "retrying them one by one."
+            )
             db.rollback()
+            retried_batches += 1
+
+        for portfolio_id in batch:
+            try:
+                take_snapshot_for_portfolio(db, portfolio_id, target_date=target_date)
+                updated += 1
+            except Exception as e:
+                logger.error(
+                    f"Failed to take snapshot for portfolio {portfolio_id}: {e}"
+                )
+                db.rollback()
+                failed.append(portfolio_id)
+    snapshot_seconds = timer.stop()
+
+    logger.info(
+        f"End-of-day snapshots for {target_date}: {updated} updated, "
+        f"{len(failed)} failed in {snapshot_seconds:.2f}s."
+    )
+    return {
+        "snapshot_date": target_date.isoformat(),
+        "portfolios": len(portfolio_ids),
+        "updated": updated,
+        "failed": [str(pid) for pid in failed],
+        "batches": -(-len(portfolio_ids) // batch_size),
+        "retried_batches": retried_batches,
+        "snapshot_seconds": round(snapshot_seconds, 3),
+    }
 
-    return count
+
+def take_daily_snapshots_for_all(db: Session) -> int:
+    """
+    Takes today's snapshot for every portfolio in the system.
+    Returns the number of snapshots created/updated.
+    """
+    return take_end_of_day_snapshots(db)["updated"]
@@ -0,0 +1,164 @@
+"""
+The rules a new transaction is created under, as pure functions of the state
+they need.
+
+`crud.transaction.create_with_portfolio` applies them one transaction at a
+time against the database; the backup restorer applies them to a whole
+history it replays in memory. Both go through these functions so the rules
+only live here.
+"""
+import uuid
+from decimal import Decimal
+from typing import Iterable, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+
+from app import schemas
+from app.schemas.enums import TransactionType
+
+ACQUISITION_TYPES = ("BUY", "ESPP_PURCHASE", "RSU_VEST")
+
+# Order of same-day events when matching lots: acquisitions, then splits,
+# then disposals, so a sell-to-cover finds the vest it sells from
+LOT_EVENT_PRIORITY = {
+    **dict.fromkeys(ACQUISITION_TYPES, 1),
+    "SPLIT": 2,
+    "SELL": 3,
+}
+
+# Types whose units `holdings_after` adds. BONUS is an audit record; its
+# shares are in a BUY.
+_HOLDING_ADDITIONS = {
+    TransactionType.BUY,
+    TransactionType.ESPP_PURCHASE,
+    TransactionType.RSU_VEST,
+    TransactionType.CONTRIBUTION,
+}
+
+Link = Tuple[uuid.UUID, Decimal]
+
+
+def once_key(
+    obj_in: schemas.TransactionCreate, portfolio_id: uuid.UUID
+) -> Optional[tuple]:
+    """
+    Identity of an RSU vest or ESPP purchase, which is only created once so
+    that a repeated submission does not add the shares twice. None for the
+    other types.
+    """
+    if obj_in.transaction_type not in (
+        TransactionType.RSU_VEST,
+        TransactionType.ESPP_PURCHASE,
+    ):
+        return None
+    return (
+        portfolio_id,
+        obj_in.asset_id,
+        obj_in.transaction_date,
+        obj_in.transaction_type,
+        obj_in.quantity,
+        obj_in.price_per_unit,
+    )
+
+
+def is_sell_to_cover(obj_in: schemas.TransactionCreate) -> bool:
+    return bool(obj_in.details and "related_rsu_vest_id" in obj_in.details)
+
+
+def needs_holdings_check(obj_in: schemas.TransactionCreate) -> bool:
+    """
+    Standalone SELLs must not exceed the holdings. A sell-to-cover is created
+    together with its vest, so it is not checked.
+    """
+    return (
+        obj_in.transaction_type.upper() == TransactionType.SELL
+        and not is_sell_to_cover(obj_in)
+    )
+
+
+def check_holdings(obj_in: schemas.TransactionCreate, holdings: Decimal) -> None:
+    """Raises 400 if the SELL `obj_in` exceeds `holdings`."""
+    if obj_in.quantity > holdings:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=(
+                "Insufficient holdings to sell. Current holdings:"
+                f" {holdings}, trying to sell: {obj_in.quantity}"
+            ),
+        )
+
+
+def holdings_after(
+    units: Decimal,
+    transaction_type: str,
+    quantity: Decimal,
+    price_per_unit: Optional[Decimal],
+) -> Decimal:
+    """
+    The units of an asset held after a transaction, as the holdings check
+    counts them. Mergers, demergers and renames leave the count unchanged.
+    """
+    if transaction_type in _HOLDING_ADDITIONS:
+        return units + quantity
+    if transaction_type == TransactionType.SELL:
+        return units - quantity
+    if transaction_type == TransactionType.SPLIT:
+        # quantity = new shares, price_per_unit = old shares
+        if price_per_unit and price_per_unit > 0:
+            return units * (quantity / price_per_unit)
+    return units
+
+
+def fifo_links(
+    quantity: Decimal, lots: Iterable[Link]
+) -> Tuple[List[Link], Decimal]:
+    """
+    Links for a SELL without explicit ones: `quantity` taken from the open
+    `(buy id, available quantity)` lots oldest first. Also returns what no
+    lot could cover.
+    """
+    links: List[Link] = []
+    remaining = quantity
+    for buy_id, available in lots:
+        if remaining <= 0:
+            break
+        take = min(available, remaining)
+        if take > 0:
+            links.append((buy_id, take))
+            remaining -= take
+    return links, remaining
+
+
+def sell_to_cover(
+    vest_id: uuid.UUID, vest: schemas.TransactionCreate
+) -> Optional[schemas.TransactionCreate]:
+    """
+    The SELL an RSU vest's `sell_to_cover` details ask for, linked to the
+    vest, or None if there is none.
+    """
+    if not (
+        vest.transaction_type == TransactionType.RSU_VEST
+        and vest.details
+        and "sell_to_cover" in vest.details
+    ):
+        return None
+    sell_details = vest.details["sell_to_cover"]
+    sell_quantity = Decimal(str(sell_details.get("quantity", 0)))
+    if sell_quantity <= 0:
+        return None
+    return schemas.TransactionCreate(
+        asset_id=vest.asset_id,
+        transaction_type=TransactionType.SELL,
+        quantity=sell_quantity,
+        price_per_unit=Decimal(str(sell_details.get("price_per_unit", 0))),
+        transaction_date=vest.transaction_date,
+        details={
+            "fx_rate": vest.details.get("fx_rate"),
+            "related_rsu_vest_id": str(vest_id),
+        },
+        links=[
+            schemas.TransactionLinkCreate(
+                buy_transaction_id=vest_id, quantity=sell_quantity
+            )
+        ],
+    )
@@ -45,17 +45,30 @@ class UpstoxMetadataService:
         self._symbol_to_isin_map: Dict[str, str] = {}
         self._symbol_to_key_map: Dict[str, str] = {}
         self._holidays: Set[date] = set()
+        self._holidays_loaded = False
         self._loaded = False
 
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
     def load_metadata_if_needed(self) -> None:
         """Loads instrument maps and holiday lists if not already in memory."""
         if self._loaded:
             return
 
-        self._load_market_holidays()
+        self.load_holidays_if_needed()
         self._load_instrument_master()
         self._loaded = True
 
+    def load_holidays_if_needed(self) -> None:
+        """Loads only the holiday list; enough for market-calendar checks."""
+        if self._holidays_loaded or self._loaded:
+            return
+
+        self._load_market_holidays()
+        self._holidays_loaded = True
+
     def _load_market_holidays(self) -> None:
         """Fetches market holidays from Upstox public API."""
         cache_key = "upstox:market_holidays"
@@ -162,7 +175,7 @@ class UpstoxMetadataService:
         """
         Returns True if check_date is a weekend or an official trading holiday.
         """
-        self.load_metadata_if_needed()
+        self.load_holidays_if_needed()
         # Weekend check (Saturday = 5, Sunday = 6)
         if check_date.weekday() in (5, 6):
             return True
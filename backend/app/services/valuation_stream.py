@@ -0,0 +1,185 @@
+"""
+Live valuation of a user's portfolios, pushed to open dashboards.
+
+A stream starts from the user's holdings as last valued in full (the cached
+all-portfolios holdings and summary) and keeps their positions. Each
+interval it reprices only the market-priced positions, from the quotes
+shared by all open streams, and pushes the total value, the day's P&L and
+the top movers when they change. Deposits, PPF and bonds keep their last
+full valuation, which has their interest and accrual logic. The positions
+are reloaded once that cached valuation is invalidated (by a transaction)
+or expires.
+"""
+import asyncio
+import uuid
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app import models, schemas
+from app.cache.factory import get_cache_client
+from app.crud.crud_holding import ALL_PORTFOLIOS_HOLDINGS_CACHE_PREFIX
+from app.services.shared_quotes import Prices, shared_quotes
+from app.utils import sse
+
+# Valued by the full holdings calculation only
+_FIXED_ASSET_TYPES = {"FIXED_DEPOSIT", "RECURRING_DEPOSIT", "PPF", "BOND"}
+TOP_MOVERS = 5
+
+
+@dataclass
+class Position:
+    """A holding as last valued in full, and how to request its live price."""
+
+    holding: schemas.Holding
+    exchange: Optional[str] = None
+    repriced: bool = False
+
+    @property
+    def fx_ticker(self) -> Optional[str]:
+        currency = self.holding.currency
+        return f"{currency}INR=X" if currency and currency != "INR" else None
+
+    def valued_at(self, prices: Prices) -> Tuple[Decimal, Decimal, Decimal, float]:
+        """(current price, current value, day's P&L, day's change) at `prices`."""
+        h = self.holding
+        last = (h.current_price, h.current_value, h.days_pnl, h.days_pnl_percentage)
+        if not self.repriced:
+            return last
+        quote = prices.get(h.ticker_symbol) or {}
+        price = quote.get("current_price")
+        if price is None or not price.is_finite() or price <= 0:
+            return last
+        fx_rate = Decimal(1)
+        if self.fx_ticker:
+            fx_rate = (prices.get(self.fx_ticker) or {}).get("current_price")
+            if fx_rate is None or not fx_rate.is_finite() or fx_rate <= 0:
+                return last
+        previous_close = quote.get("previous_close")
+        if previous_close is None or not previous_close.is_finite():
+            previous_close = price
+        if previous_close <= 0:
+            previous_close = price
+        return (
+            price,
+            h.quantity * price * fx_rate,
+            (price - previous_close) * h.quantity * fx_rate,
+            float((price - previous_close) / previous_close),
+        )
+
+
+class Positions:
+    def __init__(self, positions: List[Position]):
+        self.positions = positions
+
+    @classmethod
+    def from_holdings(
+        cls, db: Session, holdings: List[schemas.Holding]
+    ) -> "Positions":
+        repriced_ids = {
+            h.asset_id
+            for h in holdings
+            if str(h.asset_type).upper() not in _FIXED_ASSET_TYPES and h.quantity > 0
+        }
+        exchanges = dict(
+            db.execute(
+                select(models.Asset.id, models.Asset.exchange).where(
+                    models.Asset.id.in_(repriced_ids)
+                )
+            ).tuples().all()
+        ) if repriced_ids else {}
+        return cls([
+            Position(
+                holding=h,
+                exchange=exchanges.get(h.asset_id),
+                repriced=h.asset_id in repriced_ids,
+            )
+            for h in holdings
+        ])
+
+    def price_requests(self) -> List[Dict[str, Any]]:
+        requests: Dict[str, Dict[str, Any]] = {}
+        for position in self.positions:
+            if not position.repriced:
+                continue
+            h = position.holding
+            requests.setdefault(h.ticker_symbol, {
+                "ticker_symbol": h.ticker_symbol,
+                "exchange": position.exchange,
+                "asset_type": h.asset_type,
+            })
+            if position.fx_ticker:
+                requests.setdefault(position.fx_ticker, {
+                    "ticker_symbol": position.fx_ticker,
+                    "asset_type": "Currency",
+                    "exchange": None,
+                })
+        return list(requests.values())
+
+    def value(self, prices: Prices) -> schemas.PortfolioValuation:
+        total_value = Decimal("0.0")
+        days_pnl = Decimal("0.0")
+        movers = []
+        for position in self.positions:
+            h = position.holding
+            price, value, pnl, change = position.valued_at(prices)
+            total_value += value
+            days_pnl += pnl
+            # As the dashboard summary picks its top movers
+            if pnl != 0 and h.quantity > 0:
+                movers.append(
+                    schemas.TopMover(
+                        ticker_symbol=h.ticker_symbol,
+                        currency=h.currency,
+                        name=h.asset_name,
+                        current_price=price,
+                        daily_change=pnl / h.quantity,
+                        daily_change_percentage=change,
+                    )
+                )
+        movers.sort(key=lambda m: abs(m.daily_change_percentage), reverse=True)
+        previous_value = total_value - days_pnl
+        return schemas.PortfolioValuation(
+            total_value=total_value,
+            days_pnl=days_pnl,
+            days_pnl_percentage=(
+                float(days_pnl / previous_value) if previous_value > 0 else 0.0
+            ),
+            top_movers=movers[:TOP_MOVERS],
+        )
+
+
+def holdings_are_stale(user_id: uuid.UUID) -> bool:
+    """Whether the cached full valuation the positions came from is gone."""
+    cache = get_cache_client()
+    return cache.get(f"{ALL_PORTFOLIOS_HOLDINGS_CACHE_PREFIX}:{user_id}") is None
+
+
+async def stream_valuation(
+    load_positions: Callable[[], Positions],
+    is_stale: Callable[[], bool],
+    *,
+    interval: float,
+) -> AsyncIterator[str]:
+    """
+    Server-sent events with the valuation, every `interval` seconds when it
+    changed. `load_positions` and `is_stale` run in the threadpool.
+    """
+    positions: Optional[Positions] = None
+    previous: Optional[schemas.PortfolioValuation] = None
+    while True:
+        if positions is None or await run_in_threadpool(is_stale):
+            positions = await run_in_threadpool(load_positions)
+        valuation = positions.value(
+            await shared_quotes.get(positions.price_requests())
+        )
+        if valuation != previous:
+            yield sse.event("valuation", valuation)
+        else:
+            yield sse.KEEPALIVE
+        previous = valuation
+        await asyncio.sleep(interval)
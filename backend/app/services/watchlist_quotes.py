@@ -0,0 +1,168 @@
+"""
+Live quotes for the assets on a user's watchlists.
+
+Every asset across all of a user's watchlists is priced in one call to the
+financial data service, with its asset type so each goes to the right
+provider (AMFI for mutual funds, Upstox for stocks and so on) rather than
+all of them to yfinance. The providers keep each price in the shared cache,
+so repeated polls and other users watching the same assets are mostly
+served from it.
+
+Clients can poll with an ETag, or hold a server-sent event stream that
+only carries the quotes that changed since its previous event.
+"""
+import asyncio
+import hashlib
+import uuid
+from decimal import Decimal
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app import models, schemas
+from app.services.financial_data_service import financial_data_service
+from app.services.shared_quotes import shared_quotes
+from app.utils import sse
+
+
+def watchlist_assets(db: Session, user_id: uuid.UUID) -> List[models.Asset]:
+    """The distinct assets on all of the user's watchlists, in one query."""
+    return list(
+        db.scalars(
+            select(models.Asset)
+            .where(
+                models.Asset.id.in_(
+                    select(models.WatchlistItem.asset_id).where(
+                        models.WatchlistItem.user_id == user_id
+                    )
+                )
+            )
+            .order_by(models.Asset.ticker_symbol)
+        )
+    )
+
+
+def price_requests(assets: Iterable[models.Asset]) -> List[Dict[str, Any]]:
+    requests: Dict[str, Dict[str, Any]] = {}
+    for asset in assets:
+        requests.setdefault(
+            asset.ticker_symbol,
+            {
+                "ticker_symbol": asset.ticker_symbol,
+                "exchange": asset.exchange,
+                "asset_type": asset.asset_type,
+            },
+        )
+    return list(requests.values())
+
+
+def _quote(
+    asset: models.Asset, data: Dict[str, Decimal]
+) -> schemas.WatchlistQuote:
+    current_price = data.get("current_price")
+    previous_close = data.get("previous_close")
+    day_change = (
+        current_price - previous_close
+        if current_price is not None and previous_close is not None
+        else None
+    )
+    return schemas.WatchlistQuote(
+        asset_id=asset.id,
+        ticker_symbol=asset.ticker_symbol,
+        current_price=current_price,
+        previous_close=previous_close,
+        day_change=day_change,
+    )
+
+
+def _quotes(
+    assets: List[models.Asset], prices: Dict[str, Dict[str, Decimal]]
+) -> Dict[uuid.UUID, schemas.WatchlistQuote]:
+    return {
+        asset.id: _quote(asset, prices.get(asset.ticker_symbol) or {})
+        for asset in assets
+    }
+
+
+async def aget_quotes(
+    assets: List[models.Asset],
+) -> Dict[uuid.UUID, schemas.WatchlistQuote]:
+    """Quotes for the assets by asset id; unpriced assets have empty quotes."""
+    if not assets:
+        return {}
+    prices = await financial_data_service.aget_current_prices(price_requests(assets))
+    return _quotes(assets, prices)
+
+
+def etag(quotes: Dict[uuid.UUID, schemas.WatchlistQuote]) -> str:
+    digest = hashlib.sha1()
+    for asset_id in sorted(quotes, key=str):
+        quote = quotes[asset_id]
+        digest.update(
+            f"{asset_id}:{quote.current_price}:{quote.previous_close};".encode()
+        )
+    return f'"{digest.hexdigest()}"'
+
+
+def changed_quotes(
+    previous: Dict[uuid.UUID, schemas.WatchlistQuote],
+    current: Dict[uuid.UUID, schemas.WatchlistQuote],
+) -> List[schemas.WatchlistQuote]:
+    return [
+        quote
+        for asset_id, quote in current.items()
+        if asset_id not in previous or previous[asset_id] != quote
+    ]
+
+
+def _keep_last_prices(
+    previous: Dict[uuid.UUID, schemas.WatchlistQuote],
+    current: Dict[uuid.UUID, schemas.WatchlistQuote],
+) -> Dict[uuid.UUID, schemas.WatchlistQuote]:
+    """
+    `current`, with the previous quote for assets that had a price and now
+    have none. A failed provider call does not unprice them on the client.
+    """
+    return {
+        asset_id: (
+            previous[asset_id]
+            if quote.current_price is None
+            and asset_id in previous
+            and previous[asset_id].current_price is not None
+            else quote
+        )
+        for asset_id, quote in current.items()
+    }
+
+
+async def stream_quotes(
+    load_assets: Callable[[], List[models.Asset]],
+    *,
+    interval: float,
+) -> AsyncIterator[str]:
+    """
+    Server-sent events for a quote stream: all quotes first, then every
+    `interval` seconds the quotes that changed and the ids of assets no
+    longer on any watchlist. `load_assets` runs in the threadpool each time,
+    so items added to or removed from a watchlist show up in the stream.
+    Prices come from the quotes shared by all open streams; a quote that
+    had a price keeps it while the asset goes unpriced.
+    """
+    previous: Dict[uuid.UUID, schemas.WatchlistQuote] = {}
+    first = True
+    while True:
+        assets = await run_in_threadpool(load_assets)
+        quotes = _keep_last_prices(
+            previous,
+            _quotes(assets, await shared_quotes.get(price_requests(assets))),
+        )
+        changed = changed_quotes(previous, quotes)
+        removed = [str(asset_id) for asset_id in previous if asset_id not in quotes]
+        if first or changed or removed:
+            yield sse.event("quotes", {"quotes": changed, "removed": removed})
+        else:
+            yield sse.KEEPALIVE
+        previous, first = quotes, False
+        await asyncio.sleep(interval)
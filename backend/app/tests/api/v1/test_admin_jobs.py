@@ -0,0 +1,58 @@
+"""Tests for the admin job scheduler endpoints."""
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.services.scheduler import EOD_SNAPSHOT_JOB
+from app.tests.utils.user import create_random_user
+
+pytestmark = pytest.mark.usefixtures("pre_unlocked_key_manager")
+
+
+def test_admin_can_run_a_job_and_read_its_history(
+    client: TestClient, db: Session, get_auth_headers, mocker
+):
+    mocker.patch(
+        "app.services.scheduler.take_end_of_day_snapshots",
+        return_value={"updated": 0, "portfolios": 0},
+    )
+    admin, password = create_random_user(db, is_admin=True)
+    headers = get_auth_headers(admin.email, password)
+    # The test client's session is not committed per request; release its
+    # SQLite write lock before the job opens a session of its own.
+    db.commit()
+
+    response = client.post(
+        f"/api/v1/admin/jobs/{EOD_SNAPSHOT_JOB}/run", headers=headers
+    )
+    assert response.status_code == 200
+    run = response.json()
+    assert run["status"] == "success"
+    assert run["trigger"] == "api"
+    assert run["duration_seconds"] is not None
+
+    runs = client.get("/api/v1/admin/jobs/runs", headers=headers).json()
+    assert [r["id"] for r in runs] == [run["id"]]
+
+    mocker.patch(
+        "app.services.scheduler.JobScheduler.next_run_at", return_value=None
+    )
+    jobs = client.get("/api/v1/admin/jobs/", headers=headers).json()["jobs"]
+    assert jobs[0]["name"] == EOD_SNAPSHOT_JOB
+    assert jobs[0]["last_run"]["id"] == run["id"]
+
+    assert client.post(
+        "/api/v1/admin/jobs/unknown/run", headers=headers
+    ).status_code == 404
+
+
+def test_job_endpoints_are_admin_only(
+    client: TestClient, db: Session, get_auth_headers
+):
+    user, password = create_random_user(db)
+    headers = get_auth_headers(user.email, password)
+
+    assert client.get("/api/v1/admin/jobs/runs", headers=headers).status_code == 403
+    assert client.post(
+        f"/api/v1/admin/jobs/{EOD_SNAPSHOT_JOB}/run", headers=headers
+    ).status_code == 403
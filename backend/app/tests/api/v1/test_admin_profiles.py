@@ -0,0 +1,85 @@
+"""Tests for admin-only per-request profiling."""
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.tests.utils.user import create_random_user
+
+pytestmark = pytest.mark.usefixtures("pre_unlocked_key_manager")
+
+
+@pytest.fixture(autouse=True)
+def profile_dir(tmp_path, monkeypatch):
+    # A subdirectory: in desktop mode the test key file lives in tmp_path
+    directory = tmp_path / "profiles"
+    directory.mkdir()
+    monkeypatch.setattr(settings, "PROFILE_DIR", str(directory))
+    monkeypatch.setattr(settings, "PROFILING_ENABLED", True)
+    return directory
+
+
+def test_admin_can_profile_and_download_a_request(
+    client: TestClient, db: Session, get_auth_headers, profile_dir
+):
+    admin, password = create_random_user(db, is_admin=True)
+    headers = get_auth_headers(admin.email, password)
+
+    response = client.get(
+        "/api/v1/dashboard/summary", headers={**headers, "X-Profile": "1"}
+    )
+    assert response.status_code == 200
+    assert "total_value" in response.json()
+    profile_id = response.headers["x-profile-id"]
+
+    listed = client.get("/api/v1/admin/profiles/", headers=headers).json()
+    assert [p["id"] for p in listed] == [profile_id]
+
+    profile = client.get(f"/api/v1/admin/profiles/{profile_id}", headers=headers)
+    assert profile.status_code == 200
+    speedscope = profile.json()
+    assert speedscope["name"] == "GET /api/v1/dashboard/summary"
+    sql = [p for p in speedscope["profiles"] if p["type"] == "evented"]
+    assert sql and sql[0]["events"][0]["type"] == "O"
+
+    # profile=download returns the file in place of the response
+    response = client.get(
+        "/api/v1/dashboard/summary", headers=headers, params={"profile": "download"}
+    )
+    assert response.status_code == 200
+    assert response.headers["x-profiled-status"] == "200"
+    assert response.json()["exporter"] == "arthsaarthi"
+
+    assert client.get(
+        "/api/v1/admin/profiles/..%2Fsecret", headers=headers
+    ).status_code == 404
+
+
+def test_profile_flag_is_ignored_for_non_admins(
+    client: TestClient, db: Session, get_auth_headers, profile_dir
+):
+    user, password = create_random_user(db)
+    headers = get_auth_headers(user.email, password)
+
+    response = client.get(
+        "/api/v1/dashboard/summary", headers=headers, params={"profile": "1"}
+    )
+    assert response.status_code == 200
+    assert "x-profile-id" not in response.headers
+    assert not list(profile_dir.iterdir())
+    assert client.get("/api/v1/admin/profiles/", headers=headers).status_code == 403
+
+
+def test_profile_flag_is_ignored_unless_profiling_is_enabled(
+    client: TestClient, db: Session, get_auth_headers, profile_dir, monkeypatch
+):
+    monkeypatch.setattr(settings, "PROFILING_ENABLED", False)
+    admin, password = create_random_user(db, is_admin=True)
+    headers = get_auth_headers(admin.email, password)
+
+    response = client.get(
+        "/api/v1/dashboard/summary", headers={**headers, "X-Profile": "1"}
+    )
+    assert response.status_code == 200
+    assert "x-profile-id" not in response.headers
+    assert not list(profile_dir.iterdir())
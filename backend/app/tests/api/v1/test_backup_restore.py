@@ -332,3 +332,67 @@ def test_backup_restore_robust_sorting(db: Session):
     assert sell_tx.quantity == 5
 
 
+
+
+def test_backup_restore_ndjson_stream(
+    client: TestClient, db: Session, get_auth_headers
+):
+    user, password = create_random_user(db)
+    headers = get_auth_headers(user.email, password)
+    portfolio = create_test_portfolio(db, user_id=user.id, name="Streamed")
+    crud.asset.create(
+        db,
+        obj_in=schemas.AssetCreate(
+            name="HDFC Bank",
+            ticker_symbol="HDFCBANK",
+            asset_type="STOCK",
+            currency="INR",
+            isin="INE040A01034",
+        ),
+    )
+    for qty, tx_type, day in [(10, "BUY", 1), (5, "BUY", 2), (12, "SELL", 3)]:
+        create_test_transaction(
+            db,
+            portfolio_id=portfolio.id,
+            ticker="HDFCBANK",
+            quantity=qty,
+            price_per_unit=1500,
+            transaction_type=tx_type,
+            transaction_date=date(2023, 2, day),
+        )
+
+    response = client.get(
+        "/api/v1/users/me/backup", headers=headers, params={"format": "ndjson"}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = response.content.splitlines()
+    assert json.loads(lines[0])["metadata"]["format"] == "ndjson"
+    records = [json.loads(line) for line in lines[1:]]
+    assert [r["data"]["transaction_type"] for r in records[1:]] == [
+        "BUY", "BUY", "SELL"
+    ]
+
+    files = {"file": ("backup.ndjson", response.content, "application/x-ndjson")}
+    response = client.post("/api/v1/users/me/restore", headers=headers, files=files)
+    assert response.status_code == 200
+
+    db.expire_all()
+    portfolios = crud.portfolio.get_multi_by_owner(db, user_id=user.id)
+    assert [p.name for p in portfolios] == ["Streamed"]
+    restored = crud.transaction.get_multi_by_portfolio(
+        db, portfolio_id=portfolios[0].id
+    )
+    sell = next(t for t in restored if t.transaction_type == "SELL")
+    # The SELL is re-linked FIFO: all of the first lot, then 2 of the second
+    assert sorted(link.quantity for link in sell.sell_links) == [2, 10]
+
+    # Transactions out of date order cannot be streamed; nothing is changed
+    out_of_order = b"\n".join([lines[0], lines[1], lines[4], lines[2], lines[3]])
+    files = {"file": ("backup.ndjson", out_of_order, "application/x-ndjson")}
+    response = client.post("/api/v1/users/me/restore", headers=headers, files=files)
+    assert response.status_code == 400
+    db.expire_all()
+    assert len(crud.transaction.get_multi_by_portfolio(
+        db, portfolio_id=portfolios[0].id
+    )) == 3
@@ -316,3 +316,157 @@ def test_read_transactions_with_synthetic_fd_types(
     assert "FD_DEPOSIT" in types
     assert "FD_MATURITY" in types
 
+
+
+def test_read_transactions_keyset_pagination(
+    client: TestClient,
+    db: Session,
+    get_auth_headers: Callable[[str, str], Dict[str, str]],
+) -> None:
+    """
+    Walking the next_cursor chain returns every row exactly once, in order,
+    including rows that share a transaction date and synthetic FD rows.
+    """
+    user, password = create_random_user(db)
+    user_headers = get_auth_headers(user.email, password)
+    portfolio = create_test_portfolio(db, user_id=user.id, name="Keyset Portfolio")
+    asset = create_test_asset(db, ticker_symbol="KEYSET")
+
+    shared_date = datetime(2024, 3, 1, 10, 0)
+    dates = [
+        datetime(2024, 1, 5),
+        shared_date,
+        shared_date,
+        shared_date,
+        datetime(2024, 6, 10),
+    ]
+    for tx_date in dates:
+        crud.transaction.create_with_portfolio(
+            db,
+            obj_in=TransactionCreate(
+                asset_id=asset.id,
+                transaction_type="BUY",
+                quantity=1,
+                price_per_unit=100,
+                transaction_date=tx_date,
+                fees=0,
+            ),
+            portfolio_id=portfolio.id,
+        )
+    crud.fixed_deposit.create_with_portfolio(
+        db=db,
+        obj_in=FixedDepositCreate(
+            name="Keyset FD",
+            account_number="FD-KEYSET",
+            principal_amount=10000,
+            interest_rate=7,
+            start_date=date(2024, 2, 1),
+            maturity_date=date(2099, 2, 1),
+            portfolio_id=portfolio.id,
+            compounding_frequency="ANNUALLY",
+            interest_payout="CUMULATIVE",
+        ),
+        user_id=user.id,
+    )
+    db.commit()
+
+    base_url = f"{settings.API_V1_STR}/transactions/"
+    seen = []
+    cursor = None
+    for _ in range(10):
+        params = {"portfolio_id": str(portfolio.id), "limit": 2, "count": "none"}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get(base_url, params=params, headers=user_headers)
+        assert response.status_code == 200, response.json()
+        data = response.json()
+        assert data["total"] is None
+        seen.extend(data["transactions"])
+        cursor = data["next_cursor"]
+        if not cursor:
+            break
+
+    ids = [tx["id"] for tx in seen]
+    assert len(ids) == len(set(ids)) == 6
+    assert [tx["transaction_type"] for tx in seen].count("FD_DEPOSIT") == 1
+    keys = [(tx["transaction_date"], tx["id"]) for tx in seen]
+    assert keys == sorted(keys, reverse=True)
+
+    response = client.get(
+        base_url,
+        params={"portfolio_id": str(portfolio.id), "cursor": "not-a-cursor"},
+        headers=user_headers,
+    )
+    assert response.status_code == 400
+
+
+def test_read_transactions_offset_pagination_with_fixed_deposits(
+    client: TestClient,
+    db: Session,
+    get_auth_headers: Callable[[str, str], Dict[str, str]],
+) -> None:
+    """
+    Paging by skip shows each synthetic FD row on exactly one page, the one
+    whose stored rows it sorts between.
+    """
+    user, password = create_random_user(db)
+    user_headers = get_auth_headers(user.email, password)
+    portfolio = create_test_portfolio(db, user_id=user.id, name="Offset Portfolio")
+    asset = create_test_asset(db, ticker_symbol="OFFSET")
+
+    for month in (1, 3, 5, 7):
+        crud.transaction.create_with_portfolio(
+            db,
+            obj_in=TransactionCreate(
+                asset_id=asset.id,
+                transaction_type="BUY",
+                quantity=1,
+                price_per_unit=100,
+                transaction_date=datetime(2024, month, 10),
+                fees=0,
+            ),
+            portfolio_id=portfolio.id,
+        )
+    for start, account in (
+        (date(2023, 12, 1), "FD-OLDEST"),
+        (date(2024, 2, 1), "FD-OLD"),
+        (date(2024, 6, 1), "FD-NEW"),
+    ):
+        crud.fixed_deposit.create_with_portfolio(
+            db=db,
+            obj_in=FixedDepositCreate(
+                name=account,
+                account_number=account,
+                principal_amount=10000,
+                interest_rate=7,
+                start_date=start,
+                maturity_date=date(2099, 2, 1),
+                portfolio_id=portfolio.id,
+                compounding_frequency="ANNUALLY",
+                interest_payout="CUMULATIVE",
+            ),
+            user_id=user.id,
+        )
+    db.commit()
+
+    base_url = f"{settings.API_V1_STR}/transactions/"
+    pages = []
+    for skip in range(0, 8, 2):
+        response = client.get(
+            base_url,
+            params={"portfolio_id": str(portfolio.id), "skip": skip, "limit": 2},
+            headers=user_headers,
+        )
+        assert response.status_code == 200, response.json()
+        assert response.json()["total"] == 7
+        pages.append(
+            [tx["transaction_type"] for tx in response.json()["transactions"]]
+        )
+
+    # Stored rows newest first: Jul, May | Mar, Jan | (none)
+    assert pages == [
+        ["BUY", "FD_DEPOSIT", "BUY"],
+        ["BUY", "FD_DEPOSIT", "BUY"],
+        ["FD_DEPOSIT"],
+        [],
+    ]
@@ -1,10 +1,20 @@
+import asyncio
+import json
+from decimal import Decimal
+from unittest import mock
+
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy.orm import Session
 
+from app import crud, schemas
+from app.services import watchlist_quotes
+from app.services.financial_data_service import financial_data_service
+from app.services.shared_quotes import shared_quotes
 from app.tests.utils.asset import create_test_asset
 from app.tests.utils.user import create_random_user
 from app.tests.utils.watchlist import create_random_watchlist
+from app.utils import sse
 
 pytestmark = pytest.mark.usefixtures("pre_unlocked_key_manager")
 
@@ -208,3 +218,157 @@ def test_read_watchlist_with_items(
     assert items_by_ticker["TSLA"]["asset"]["day_change"] == 2.5
     assert items_by_ticker["NVDA"]["asset"]["current_price"] == 450.0
     assert items_by_ticker["NVDA"]["asset"]["day_change"] == -5.0
+
+
+def _add_item(db: Session, watchlist, asset, user_id):
+    crud.watchlist_item.create_with_watchlist_and_user(
+        db,
+        obj_in=schemas.WatchlistItemCreate(asset_id=asset.id),
+        watchlist_id=watchlist.id,
+        user_id=user_id,
+    )
+    db.commit()
+
+
+def _prices(**prices):
+    return {
+        ticker: {"current_price": Decimal(current), "previous_close": Decimal(prev)}
+        for ticker, (current, prev) in prices.items()
+    }
+
+
+def test_quotes_price_all_watchlists_in_one_call(
+    client: TestClient, db: Session, get_auth_headers
+):
+    user, password = create_random_user(db)
+    headers = get_auth_headers(user.email, password)
+    fund = crud.asset.create(
+        db,
+        obj_in=schemas.AssetCreate(
+            ticker_symbol="120503", name="Some Fund", asset_type="Mutual Fund",
+            currency="INR",
+        ),
+    )
+    stock = create_test_asset(db, ticker_symbol="TSLA")
+    first = create_random_watchlist(db, user_id=user.id)
+    second = create_random_watchlist(db, user_id=user.id)
+    _add_item(db, first, stock, user.id)
+    _add_item(db, second, stock, user.id)
+    _add_item(db, second, fund, user.id)
+
+    with mock.patch.object(
+        financial_data_service,
+        "aget_current_prices",
+        new=mock.AsyncMock(return_value=_prices(TSLA=("180", "177.5"))),
+    ) as aget_current_prices:
+        response = client.get("/api/v1/watchlists/quotes", headers=headers)
+
+    assert response.status_code == 200
+    aget_current_prices.assert_awaited_once()
+    requests = aget_current_prices.await_args.args[0]
+    assert sorted((r["ticker_symbol"], r["asset_type"]) for r in requests) == [
+        ("120503", "Mutual Fund"), ("TSLA", "STOCK"),
+    ]
+    quotes = {q["ticker_symbol"]: q for q in response.json()["quotes"]}
+    assert quotes["TSLA"]["current_price"] == 180.0
+    assert quotes["TSLA"]["day_change"] == 2.5
+    assert quotes["120503"]["current_price"] is None
+
+
+def test_unchanged_quotes_are_not_modified(
+    client: TestClient, db: Session, get_auth_headers
+):
+    user, password = create_random_user(db)
+    headers = get_auth_headers(user.email, password)
+    _add_item(
+        db,
+        create_random_watchlist(db, user_id=user.id),
+        create_test_asset(db, ticker_symbol="NVDA"),
+        user.id,
+    )
+    prices = mock.AsyncMock(return_value=_prices(NVDA=("450", "455")))
+
+    with mock.patch.object(financial_data_service, "aget_current_prices", new=prices):
+        response = client.get("/api/v1/watchlists/quotes", headers=headers)
+        etag = response.headers["ETag"]
+        response = client.get(
+            "/api/v1/watchlists/quotes", headers={**headers, "If-None-Match": etag}
+        )
+        assert response.status_code == 304
+
+        prices.return_value = _prices(NVDA=("451", "455"))
+        response = client.get(
+            "/api/v1/watchlists/quotes", headers={**headers, "If-None-Match": etag}
+        )
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert response.json()["quotes"][0]["current_price"] == 451.0
+
+
+def test_quote_stream_sends_only_changes(db: Session):
+    user, _ = create_random_user(db)
+    watchlist = create_random_watchlist(db, user_id=user.id)
+    tsla = create_test_asset(db, ticker_symbol="TSLA")
+    nvda = create_test_asset(db, ticker_symbol="NVDA")
+    _add_item(db, watchlist, tsla, user.id)
+    _add_item(db, watchlist, nvda, user.id)
+    ticks = [
+        _prices(TSLA=("180", "177.5"), NVDA=("450", "455")),
+        _prices(TSLA=("180", "177.5"), NVDA=("450", "455")),
+        _prices(TSLA=("181", "177.5"), NVDA=("450", "455")),
+    ]
+
+    async def events(count):
+        stream = watchlist_quotes.stream_quotes(
+            lambda: watchlist_quotes.watchlist_assets(db, user.id), interval=0
+        )
+        return [await anext(stream) for _ in range(count)]
+
+    with mock.patch.object(
+        financial_data_service,
+        "aget_current_prices",
+        new=mock.AsyncMock(side_effect=ticks),
+    ), mock.patch.object(shared_quotes, "max_age", 0):
+        first, unchanged, changed = asyncio.run(events(3))
+
+    def tickers(event):
+        assert event.startswith("event: quotes\n")
+        data = json.loads(event.split("data: ", 1)[1])
+        return [q["ticker_symbol"] for q in data["quotes"]]
+
+    assert tickers(first) == ["NVDA", "TSLA"]
+    assert unchanged == sse.KEEPALIVE
+    assert tickers(changed) == ["TSLA"]
+
+
+def test_quote_stream_keeps_prices_through_a_failed_fetch(db: Session):
+    user, _ = create_random_user(db)
+    watchlist = create_random_watchlist(db, user_id=user.id)
+    tsla = create_test_asset(db, ticker_symbol="TSLA")
+    _add_item(db, watchlist, tsla, user.id)
+    ticks = [
+        _prices(TSLA=("180", "177.5")),
+        RuntimeError("provider down"),
+        _prices(TSLA=("181", "177.5")),
+    ]
+
+    async def events(count):
+        stream = watchlist_quotes.stream_quotes(
+            lambda: watchlist_quotes.watchlist_assets(db, user.id), interval=0
+        )
+        return [await anext(stream) for _ in range(count)]
+
+    with mock.patch.object(
+        financial_data_service,
+        "aget_current_prices",
+        new=mock.AsyncMock(side_effect=ticks),
+    ), mock.patch.object(shared_quotes, "max_age", 0):
+        first, failed, recovered = asyncio.run(events(3))
+
+    def prices(event):
+        data = json.loads(event.split("data: ", 1)[1])
+        return [q["current_price"] for q in data["quotes"]]
+
+    assert prices(first) == [180.0]
+    assert failed == sse.KEEPALIVE
+    assert prices(recovered) == [181.0]
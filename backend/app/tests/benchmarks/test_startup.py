@@ -0,0 +1,42 @@
+"""Tests for the startup import-time budget."""
+import os
+
+from app.benchmarks import startup
+
+IMPORTTIME_OUTPUT = """\
+import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _io
+import time:       300 |        420 | encodings
+import time:      1500 |       1500 |     numpy.core
+import time:       700 |       2200 |   numpy
+import time:       100 |       2300 | app.crud
+"""
+
+
+def test_parse_importtime():
+    records = startup.parse_importtime(IMPORTTIME_OUTPUT)
+    assert [(r.module, r.depth) for r in records] == [
+        ("_io", 1), ("encodings", 0), ("numpy.core", 2), ("numpy", 1),
+        ("app.crud", 0),
+    ]
+    run = startup.StartupRun(wall_seconds=0.01, records=records)
+    assert run.import_seconds == 0.00272
+    assert run.package_seconds()["numpy"] == 0.0022
+
+
+def test_check_budget_reports_deferred_imports_and_regressions():
+    run = startup.StartupRun(0.01, startup.parse_importtime(IMPORTTIME_OUTPUT))
+    report = startup.build_report([run], "app.main", "desktop")
+    assert report["deferred_imported"] == ["numpy"]
+
+    problems = startup.check_budget(
+        report, budget_seconds=0.001, baseline={"import_seconds": {"median": 0.001}}
+    )
+    assert len(problems) == 3
+    assert problems[0] == "app.main imports numpy at startup"
+
+
+def test_app_startup_defers_heavy_packages():
+    run = startup.measure_startup(env=os.environ)
+    assert run.records
+    assert not set(run.imported_packages()) & set(startup.DEFERRED_PACKAGES)
@@ -0,0 +1,107 @@
+"""Tests for the synthetic data generator and the benchmark suite."""
+from collections import Counter
+from datetime import date
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app import crud, models
+from app.benchmarks import suite
+from app.benchmarks.synthetic import (
+    MarketUniverse,
+    OfflineProvider,
+    SyntheticSpec,
+    generate_backup,
+    load_synthetic_user,
+)
+from app.db.session import SessionLocal
+
+pytestmark = pytest.mark.usefixtures("pre_unlocked_key_manager")
+
+SMALL = SyntheticSpec(
+    years=2,
+    end_date=date(2025, 6, 30),
+    trades=200,
+    stocks=8,
+    mutual_funds=3,
+    foreign_stocks=1,
+    splits=1,
+    bonuses=1,
+    demergers=1,
+    fixed_deposits=1,
+    recurring_deposits=1,
+)
+
+
+def test_backup_is_deterministic_and_covers_corporate_actions():
+    backup = generate_backup(MarketUniverse(SMALL))
+    assert backup == generate_backup(MarketUniverse(SMALL))
+
+    types = Counter(t["transaction_type"] for t in backup["data"]["transactions"])
+    for t_type in ("SPLIT", "BONUS", "DEMERGER", "RSU_VEST", "PPF_CONTRIBUTION"):
+        assert types[t_type] > 0, t_type
+
+
+def test_offline_provider_serves_the_universe():
+    universe = MarketUniverse(SMALL)
+    provider = OfflineProvider(universe)
+    ticker = universe.actions[0].ticker
+
+    quotes = provider.get_current_prices([{"ticker_symbol": ticker}])
+    history = provider.get_historical_prices(
+        [{"ticker_symbol": ticker}], date(2025, 1, 1), SMALL.end_date
+    )
+    last_day = max(history[ticker])
+    assert quotes[ticker]["current_price"] == history[ticker][last_day]
+    assert provider.get_current_prices([{"ticker_symbol": "UNKNOWN"}]) == {}
+
+
+def test_synthetic_user_restores_and_benchmarks_run(db: Session):
+    universe = MarketUniverse(SMALL)
+    backup = generate_backup(universe)
+    with suite.benchmark_environment(universe):
+        user = load_synthetic_user(db, universe, backup=backup)
+        stored = db.scalar(
+            select(func.count(models.Transaction.id))
+            .join(models.Portfolio)
+            .where(models.Portfolio.user_id == user.id)
+        )
+        # Restores add the sell-to-cover SELLs of RSU vests
+        assert stored >= len(backup["data"]["transactions"])
+        summary = crud.holding.get_all_portfolios_holdings_and_summary(
+            db, user_id=user.id
+        ).summary
+        assert summary.total_value > 0
+
+        ctx = suite.prepare(SessionLocal, universe)
+        results = [
+            suite.run_benchmark(case, ctx, repeat=1)
+            for case in suite.select_benchmarks(
+                ["holdings", "assets.search", "backup.export"]
+            )
+        ]
+    assert [r.name for r in results] == [
+        "holdings.portfolio", "holdings.all_portfolios", "assets.search",
+        "backup.export",
+    ]
+    assert all(r.queries > 0 for r in results)
+
+
+def test_compare_reports_flags_regressions():
+    def report(**medians):
+        return {
+            "results": {
+                name: {"median": median, "queries": 10}
+                for name, median in medians.items()
+            }
+        }
+
+    comparisons = suite.compare_reports(
+        report(a=1.0, b=1.0, c=1.0, gone=1.0),
+        report(a=1.5, b=0.5, c=1.1, new=1.0),
+        threshold=0.2,
+    )
+    assert {c.name: c.status for c in comparisons} == {
+        "a": "regression", "b": "improvement", "c": "ok"
+    }
@@ -1,4 +1,5 @@
-import uuid
+
+from datetime import date
 
 import pytest
 from typer.testing import CliRunner
@@ -38,13 +39,6 @@ def test_seed_assets_with_local_dir(mocker, tmp_path, mock_db_session_empty):
     (tmp_path / "nsdl_debt.xls").write_text(MOCK_NSDL_TSV)
     (tmp_path / "bse_equity.csv").write_text(MOCK_BSE_EQUITY_CSV)
 
-    # Mock crud.asset.create
-    mock_asset = mocker.Mock()
-    mock_asset.id = uuid.uuid4() # Use real UUID
-    mock_asset.asset_type = "STOCK"
-    mock_asset_create = mocker.patch("app.crud.asset.create", return_value=mock_asset)
-    mocker.patch("app.crud.bond.create")
-
     # Mock seed_interest_rates to avoid recursion with mock DB
     mocker.patch("app.db.initial_data.seed_interest_rates")
 
@@ -60,7 +54,14 @@ def test_seed_assets_with_local_dir(mocker, tmp_path, mock_db_session_empty):
     assert "Processing BSE Equity Bhavcopy" in result.stdout
     assert "Total assets created: 2" in result.stdout
 
-    assert mock_asset_create.call_count == 2
+    # Assets are written with bulk inserts rather than per-row creates
+    inserted = [
+        row
+        for call in mock_db_session_empty.execute.call_args_list
+        if len(call.args) > 1 and call.args[0].table.name == "assets"
+        for row in call.args[1]
+    ]
+    assert sorted(row["ticker_symbol"] for row in inserted) == ["INE001", "STOCKB"]
 
 
 @pytest.fixture
@@ -119,3 +120,27 @@ def test_clear_assets_with_force(mocker, mock_db_session_with_data):
     assert "Deleted 2 rows from portfolios." in result.stdout
     assert "Deleted 10 rows from assets." in result.stdout
     assert mock_db_session_with_data.commit.call_count == 1
+
+
+def test_backfill_bhavcopy(mocker):
+    """Tests that backfill-bhavcopy archives the range and reports the counts."""
+    backfill = mocker.patch(
+        "app.services.providers.nse_bhavcopy_provider.NseBhavcopyProvider.backfill",
+        return_value={"archived": 20, "missing": 9, "failed": 0, "skipped": 2},
+    )
+    result = runner.invoke(
+        main_app,
+        ["db", "backfill-bhavcopy", "--start", "2025-01-01", "--end", "2025-01-31"],
+    )
+
+    assert result.exit_code == 0
+    backfill.assert_called_once_with(date(2025, 1, 1), date(2025, 1, 31))
+    assert "Archived 20 days, 9 without a bhavcopy" in result.stdout
+
+
+def test_backfill_bhavcopy_rejects_reversed_range():
+    result = runner.invoke(
+        main_app,
+        ["db", "backfill-bhavcopy", "--start", "2025-02-01", "--end", "2025-01-01"],
+    )
+    assert result.exit_code == 1
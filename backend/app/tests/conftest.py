@@ -8,9 +8,20 @@ from app.cache.factory import get_cache_client
 from app.core import security
 from app.core.config import settings
 from app.core.key_manager import key_manager
+from app.core.principal_cache import principal_cache
 from app.db.base_class import Base
 from app.db.session import SessionLocal, engine, get_db
 from app.main import app
+from app.services.shared_quotes import shared_quotes
+
+
+@pytest.fixture(autouse=True)
+def import_upload_dir(monkeypatch, tmp_path):
+    """Keeps the files written by imports out of the source tree."""
+    upload_dir = tmp_path / "uploads"
+    upload_dir.mkdir()
+    monkeypatch.setattr(settings, "IMPORT_UPLOAD_DIR", str(upload_dir))
+    return upload_dir
 
 
 @pytest.fixture(scope="function")
@@ -88,6 +99,8 @@ def db() -> Generator[Session, None, None]:
     cache = get_cache_client()
     if cache:
         cache.clear()
+    principal_cache.clear()
+    shared_quotes.clear()
 
     with SessionLocal() as db_session:
         yield db_session
@@ -0,0 +1,93 @@
+"""Tests for the performance metrics registry and the /metrics endpoint."""
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.core import metrics
+from app.core.config import settings
+from app.tests.utils.user import create_random_user
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    metrics.REGISTRY.reset()
+    yield
+    metrics.REGISTRY.reset()
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = metrics.Histogram("test_seconds", "Test.", ("op",), buckets=(1, 5))
+    histogram.observe(0.5, op="a")
+    histogram.observe(3, op="a")
+    histogram.observe(7, op="a")
+
+    lines = histogram.render()
+    assert 'test_seconds_bucket{op="a",le="1"} 1' in lines
+    assert 'test_seconds_bucket{op="a",le="5"} 2' in lines
+    assert 'test_seconds_bucket{op="a",le="+Inf"} 3' in lines
+    assert 'test_seconds_sum{op="a"} 10.5' in lines
+    assert 'test_seconds_count{op="a"} 3' in lines
+
+
+@pytest.mark.parametrize(
+    "key, prefix",
+    [
+        ("analytics:dashboard_summary:3f2b-uuid", "analytics:dashboard_summary"),
+        ("price_details:upstox:NSE_EQ|INE002A01018", "price_details:upstox"),
+        ("asset_details_not_found:RELIANCE", "asset_details_not_found"),
+        ("amfi_nav_data", "amfi_nav_data"),
+        ("RELIANCE", "other"),
+    ],
+)
+def test_cache_key_prefix(key, prefix):
+    assert metrics.cache_key_prefix(key) == prefix
+
+
+def test_provider_calls_record_latency_and_errors():
+    @metrics.track_provider_call("demo")
+    def fetch(fail=False):
+        if fail:
+            raise RuntimeError("boom")
+        return 1
+
+    fetch()
+    with pytest.raises(RuntimeError):
+        fetch(fail=True)
+
+    assert metrics.PROVIDER_CALL_DURATION.sample(
+        provider="demo", operation="fetch"
+    ).count == 2
+    assert metrics.PROVIDER_CALL_ERRORS.value(provider="demo", operation="fetch") == 1
+
+
+@pytest.mark.usefixtures("pre_unlocked_key_manager")
+def test_requests_record_route_queries_and_cache(
+    client: TestClient, db: Session, get_auth_headers, monkeypatch
+):
+    assert client.get("/metrics").status_code == 404
+    monkeypatch.setattr(settings, "METRICS_ENABLED", True)
+    user, password = create_random_user(db)
+    headers = get_auth_headers(user.email, password)
+
+    for _ in range(2):
+        response = client.get("/api/v1/dashboard/summary", headers=headers)
+        assert response.status_code == 200
+
+    route = "/api/v1/dashboard/summary"
+    latency = metrics.HTTP_REQUEST_DURATION.sample(
+        method="GET", route=route, status="200"
+    )
+    assert latency.count == 2
+    assert metrics.HTTP_REQUEST_QUERIES.sample(route=route).sum > 0
+    # The second summary is served from the analytics cache
+    prefix = "analytics:dashboard_summary"
+    assert metrics.CACHE_LOOKUPS.value(prefix=prefix, result="hit") == 1
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert (
+        'arthsaarthi_http_request_duration_seconds_count'
+        f'{{method="GET",route="{route}",status="200"}} 2'
+    ) in response.text
+    assert "arthsaarthi_cache_lookups_total" in response.text
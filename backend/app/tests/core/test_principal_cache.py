@@ -0,0 +1,127 @@
+"""Tests for the cache of users resolved from access tokens."""
+from unittest import mock
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.core.principal_cache import PrincipalCache, principal_cache
+from app.tests.utils.user import create_random_user, get_access_token
+
+pytestmark = pytest.mark.usefixtures("pre_unlocked_key_manager")
+
+
+def _headers(client: TestClient, email: str, password: str) -> dict:
+    token = get_access_token(client=client, email=email, password=password)
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_repeated_requests_reuse_the_cached_user(client: TestClient, db: Session):
+    user, password = create_random_user(db)
+    headers = _headers(client, user.email, password)
+
+    with mock.patch.object(
+        crud.user, "get_by_email", wraps=crud.user.get_by_email
+    ) as get_by_email:
+        for _ in range(3):
+            response = client.get("/api/v1/users/me", headers=headers)
+            assert response.status_code == 200
+            assert response.json()["email"] == user.email
+
+    assert get_by_email.call_count == 1
+
+
+def test_updating_a_user_invalidates_it(client: TestClient, db: Session):
+    user, password = create_random_user(db)
+    headers = _headers(client, user.email, password)
+    assert client.get("/api/v1/users/me", headers=headers).status_code == 200
+
+    user.is_active = False
+    db.add(user)
+    db.commit()
+
+    assert principal_cache.get(db, user.email) is None
+    response = client.get("/api/v1/users/me", headers=headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Inactive user"
+
+
+def test_user_cached_before_the_commit_is_invalidated_by_it(db: Session):
+    user, _ = create_random_user(db)
+    email = user.email
+
+    user.is_active = False
+    db.add(user)
+    db.flush()
+    # Meanwhile another request loads the committed, still active, row
+    principal_cache.put(email, principal_cache.version(email), user)
+    assert principal_cache.get(db, email) is not None
+
+    db.commit()
+    assert principal_cache.get(db, email) is None
+
+
+def test_deleting_a_user_invalidates_it(client: TestClient, db: Session):
+    user, password = create_random_user(db)
+    headers = _headers(client, user.email, password)
+    assert client.get("/api/v1/users/me", headers=headers).status_code == 200
+
+    crud.user.remove(db, id=user.id)
+    db.commit()
+
+    assert client.get("/api/v1/users/me", headers=headers).status_code == 404
+
+
+def test_put_after_invalidation_is_ignored(db: Session):
+    user, _ = create_random_user(db)
+    cache = PrincipalCache(maxsize=10, ttl_seconds=60)
+
+    version = cache.version(user.email)
+    cache.invalidate(user.email)  # e.g. a password change mid-request
+    cache.put(user.email, version, user)
+    assert cache.get(db, user.email) is None
+
+    cache.put(user.email, cache.version(user.email), user)
+    assert cache.get(db, user.email) is user
+
+    version = cache.version(user.email)
+    cache.clear()
+    cache.put(user.email, version, user)
+    assert cache.get(db, user.email) is None
+
+
+def test_cached_user_is_attached_without_a_query(db: Session):
+    user, _ = create_random_user(db)
+    user_id, email = user.id, user.email
+    cache = PrincipalCache(maxsize=10, ttl_seconds=60)
+    cache.put(email, cache.version(email), user)
+    db.expunge_all()
+
+    cached = cache.get(db, email)
+    assert cached in db
+    assert (cached.id, cached.email) == (user_id, email)
+    assert not db.dirty
+    assert cached.portfolios == []
+
+
+def test_entries_expire_and_are_bounded(db: Session):
+    users = [create_random_user(db)[0] for _ in range(3)]
+    cache = PrincipalCache(maxsize=2, ttl_seconds=60)
+    for user in users:
+        cache.put(user.email, cache.version(user.email), user)
+
+    assert len(cache) == 2
+    assert cache.get(db, users[0].email) is None
+    assert cache.get(db, users[2].email) is users[2]
+
+    with mock.patch("app.core.principal_cache.time.monotonic", return_value=1e12):
+        assert cache.get(db, users[2].email) is None
+
+
+def test_disabled_cache_stores_nothing(db: Session):
+    user, _ = create_random_user(db)
+    cache = PrincipalCache(maxsize=10, ttl_seconds=0)
+    cache.put(user.email, cache.version(user.email), user)
+    assert len(cache) == 0
+    assert cache.get(db, user.email) is None
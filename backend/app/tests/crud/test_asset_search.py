@@ -0,0 +1,158 @@
+"""Tests for ranked asset typeahead search and its SQLite index."""
+from unittest import mock
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.core.config import settings
+from app.db import asset_search
+from app.db.init_db import _ensure_sqlite_columns_exist
+from app.services.financial_data_service import financial_data_service
+from app.tests.utils.asset import create_test_asset
+from app.tests.utils.user import create_random_user, get_access_token
+
+pytestmark = pytest.mark.usefixtures("pre_unlocked_key_manager")
+
+
+@pytest.fixture
+def assets(db: Session):
+    for ticker, name in [
+        ("TATAPOWER", "Tata Power Company Limited"),
+        ("TCS", "Tata Consultancy Services Limited"),
+        ("TATAMOTORS", "Tata Motors Limited"),
+        ("TATA", "Tata Investment Corporation"),
+        ("NTPC", "NTPC Limited (Tata-free)"),
+        ("INFY", "Infosys Limited"),
+    ]:
+        create_test_asset(db, ticker_symbol=ticker, name=name)
+    db.commit()
+
+
+def _tickers(db: Session, query: str, **kwargs):
+    return [
+        a.ticker_symbol
+        for a in crud.asset.search_by_name_or_ticker(db, query=query, **kwargs)
+    ]
+
+
+@pytest.mark.usefixtures("assets")
+def test_results_are_ranked(db: Session):
+    # Exact ticker, shortest ticker prefixes, then names containing the query
+    assert _tickers(db, "tata") == [
+        "TATA", "TATAPOWER", "TATAMOTORS", "TCS", "NTPC",
+    ]
+    assert _tickers(db, "consultancy") == ["TCS"]
+    assert _tickers(db, "nfos") == ["INFY"]
+    assert _tickers(db, "ta", asset_type="STOCK") == [
+        "TATA", "TATAPOWER", "TATAMOTORS",
+    ]
+    assert _tickers(db, "tata", asset_type="BOND") == []
+
+
+def test_isin_matches_exactly(db: Session):
+    asset = create_test_asset(db, ticker_symbol="RELIANCE", name="Reliance Industries")
+    asset.isin = "INE002A01018"
+    db.commit()
+
+    assert _tickers(db, "ine002a01018") == ["RELIANCE"]
+    assert _tickers(db, "ine002") == []
+
+
+def test_index_follows_asset_changes(db: Session):
+    asset = create_test_asset(db, ticker_symbol="OLDCO", name="Old Name Industries")
+    db.commit()
+    assert _tickers(db, "old name") == ["OLDCO"]
+
+    asset.name = "New Name Industries"
+    db.commit()
+    assert _tickers(db, "old name") == []
+    assert _tickers(db, "new name") == ["OLDCO"]
+
+    crud.asset.remove(db, id=asset.id)
+    db.commit()
+    assert _tickers(db, "new name") == []
+
+
+@pytest.mark.usefixtures("assets")
+def test_search_without_the_index_matches_the_same(db: Session):
+    indexed = _tickers(db, "limited")
+    with mock.patch.object(asset_search, "is_available", return_value=False):
+        assert _tickers(db, "limited") == indexed
+    assert indexed == ["INFY", "TATAMOTORS", "NTPC", "TATAPOWER", "TCS"]
+
+
+def test_wildcards_in_queries_are_literal(db: Session):
+    create_test_asset(db, ticker_symbol="PCTCO", name="100% Returns Fund")
+    create_test_asset(db, ticker_symbol="OTHER", name="100 Returns Fund")
+    db.commit()
+
+    assert _tickers(db, "100%") == ["PCTCO"]
+    with mock.patch.object(asset_search, "is_available", return_value=False):
+        assert _tickers(db, "100%") == ["PCTCO"]
+
+
+def test_exact_local_ticker_skips_the_network(client: TestClient, db: Session):
+    create_test_asset(db, ticker_symbol="INFY", name="Infosys Limited")
+    user, password = create_random_user(db)
+    token = get_access_token(client=client, email=user.email, password=password)
+
+    with mock.patch.object(
+        financial_data_service, "asearch_stocks", new=mock.AsyncMock(return_value=[])
+    ) as asearch_stocks:
+        response = client.get(
+            f"{settings.API_V1_STR}/assets/search-stocks/?query=infy",
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        assert response.status_code == 200
+        assert [r["ticker_symbol"] for r in response.json()] == ["INFY"]
+        asearch_stocks.assert_not_called()
+
+        client.get(
+            f"{settings.API_V1_STR}/assets/search-stocks/?query=infos",
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        asearch_stocks.assert_awaited_once()
+
+
+def test_upgrade_builds_the_index_from_existing_assets(monkeypatch):
+    engine = create_engine("sqlite:///:memory:")
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "CREATE TABLE assets (id CHAR(32) PRIMARY KEY, "
+                "ticker_symbol VARCHAR, name VARCHAR, asset_type VARCHAR, "
+                "currency VARCHAR)"
+            )
+        )
+        conn.execute(
+            text(
+                "INSERT INTO assets VALUES "
+                "('a1', 'HDFCBANK', 'HDFC Bank Limited', 'STOCK', 'INR')"
+            )
+        )
+    monkeypatch.setattr("app.db.init_db.db_engine", engine)
+    monkeypatch.setattr("app.db.init_db.settings.DATABASE_TYPE", "sqlite")
+
+    _ensure_sqlite_columns_exist()
+
+    with engine.begin() as conn:
+        assert asset_search.is_available(conn)
+        rows = conn.execute(
+            text("SELECT asset_id FROM assets_search WHERE assets_search MATCH :q"),
+            {"q": asset_search.match_phrase("fc bank")},
+        ).all()
+        assert rows == [("a1",)]
+        conn.execute(
+            text(
+                "INSERT INTO assets (id, ticker_symbol, name, asset_type, currency) "
+                "VALUES ('a2', 'ICICIBANK', 'ICICI Bank Limited', 'STOCK', 'INR')"
+            )
+        )
+        rows = conn.execute(
+            text("SELECT asset_id FROM assets_search WHERE assets_search MATCH :q"),
+            {"q": asset_search.match_phrase("bank")},
+        ).all()
+        assert sorted(rows) == [("a1",), ("a2",)]
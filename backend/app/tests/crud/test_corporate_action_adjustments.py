@@ -0,0 +1,276 @@
+from datetime import date, datetime
+from decimal import Decimal
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app import crud, models, schemas
+from app.db import init_db
+from app.schemas.enums import TransactionType
+from app.services.adjustment_factors import AdjustmentTable
+from app.services.capital_gains_service import CapitalGainsService
+from app.tests.utils.asset import create_test_asset
+from app.tests.utils.portfolio import create_test_portfolio
+from app.tests.utils.transaction import create_test_transaction
+from app.tests.utils.user import create_random_user
+
+pytestmark = pytest.mark.usefixtures("pre_unlocked_key_manager")
+
+
+def _action(
+    db: Session, handler, portfolio_id, asset_id, t_type, day, quantity, price,
+    details=None,
+) -> models.Transaction:
+    return handler(
+        db,
+        portfolio_id=portfolio_id,
+        asset_id=asset_id,
+        transaction_in=schemas.TransactionCreate(
+            asset_id=asset_id,
+            transaction_type=t_type,
+            quantity=Decimal(quantity),
+            price_per_unit=Decimal(price),
+            transaction_date=day,
+            details=details,
+        ),
+    )
+
+
+def test_handlers_maintain_the_adjustments(db: Session):
+    user, _ = create_random_user(db)
+    portfolio = create_test_portfolio(db, user_id=user.id, name="Adjusted")
+    parent = create_test_asset(db, ticker_symbol="PARENT", currency="INR")
+    spinoff = create_test_asset(db, ticker_symbol="SPINOFF", currency="INR")
+    renamed = create_test_asset(db, ticker_symbol="RENAMED", currency="INR")
+    create_test_transaction(
+        db, portfolio_id=portfolio.id, asset_id=parent.id, quantity=10,
+        price_per_unit=100, transaction_date=date(2023, 1, 2),
+    )
+    handlers = crud.crud_corporate_action
+    split = _action(
+        db, handlers.handle_stock_split, portfolio.id, parent.id,
+        TransactionType.SPLIT, datetime(2023, 3, 1), "2", "1",
+    )
+    _action(
+        db, handlers.handle_demerger, portfolio.id, parent.id,
+        TransactionType.DEMERGER, datetime(2023, 6, 1), "1", "1",
+        {"new_asset_id": str(spinoff.id), "cost_allocation_pct": "20"},
+    )
+    _action(
+        db, handlers.handle_rename, portfolio.id, parent.id,
+        TransactionType.RENAME, datetime(2023, 9, 1), "1", "1",
+        {"new_asset_ticker": "RENAMED"},
+    )
+    db.commit()
+
+    rows = sorted(
+        db.query(models.CorporateActionAdjustment).all(),
+        key=lambda row: row.effective_date,
+    )
+    assert [row.action_type for row in rows] == ["SPLIT", "DEMERGER", "RENAME"]
+    assert rows[0].transaction_id == split.id
+    assert (rows[0].quantity_numerator, rows[0].quantity_denominator) == (2, 1)
+    # 20% of the 1,000 cost basis went to the spin-off
+    assert rows[1].cost_numerator / rows[1].cost_denominator == Decimal("0.8")
+    assert rows[1].successor_asset_id == spinoff.id
+    assert rows[2].successor_asset_id == renamed.id
+
+    table = crud.corporate_action_adjustment.get_tables(db, user_id=user.id)[
+        (portfolio.id, parent.id)
+    ]
+    assert table.successor.successor_asset_id == renamed.id
+    assert table.quantity_factor(date(2023, 1, 2), date(2023, 12, 1)) == 2
+    assert table.cost_factor(date(2023, 1, 2), date(2023, 12, 1)) == Decimal("0.8")
+    assert table.price_factor(date(2023, 1, 2), date(2023, 12, 1)) == Decimal("0.4")
+    # Only the actions after the first date and on or before the second count
+    assert table.quantity_factor(date(2023, 3, 1), date(2023, 12, 1)) == 1
+    assert table.cost_factor(date(2023, 1, 2), date(2023, 5, 31)) == 1
+    assert table.cost_factor(date(2023, 1, 2), date(2023, 6, 1)) == Decimal("0.8")
+
+    # Rows are re-derived from the audit transactions that remain
+    crud.transaction.remove(db, id=split.id)
+    db.flush()
+    crud.corporate_action_adjustment.rebuild(
+        db, portfolio_id=portfolio.id, asset_id=parent.id
+    )
+    assert sorted(
+        row.action_type for row in db.query(models.CorporateActionAdjustment)
+    ) == ["DEMERGER", "RENAME"]
+
+
+def test_demerger_cost_factor_is_fixed_when_recorded(db: Session):
+    user, _ = create_random_user(db)
+    portfolio = create_test_portfolio(db, user_id=user.id, name="Backdated")
+    parent = create_test_asset(db, ticker_symbol="FIXEDPARENT", currency="INR")
+    spinoff = create_test_asset(db, ticker_symbol="FIXEDCHILD", currency="INR")
+    create_test_transaction(
+        db, portfolio_id=portfolio.id, asset_id=parent.id, quantity=10,
+        price_per_unit=100, transaction_date=date(2023, 1, 2),
+    )
+    demerger = _action(
+        db, crud.crud_corporate_action.handle_demerger, portfolio.id, parent.id,
+        TransactionType.DEMERGER, datetime(2023, 6, 1), "1", "1",
+        {"new_asset_id": str(spinoff.id), "cost_allocation_pct": "20"},
+    )
+    assert Decimal(demerger.details["cost_basis_before"]) == 1000
+
+    # A back-dated BUY entered later, then a rebuild for another action
+    create_test_transaction(
+        db, portfolio_id=portfolio.id, asset_id=parent.id, quantity=10,
+        price_per_unit=300, transaction_date=date(2023, 2, 1),
+    )
+    [row] = crud.corporate_action_adjustment.rebuild(
+        db, portfolio_id=portfolio.id, asset_id=parent.id
+    )
+    assert row.cost_numerator / row.cost_denominator == Decimal("0.8")
+
+
+def test_legacy_demerger_keeps_the_cost_basis_it_was_first_derived_with(
+    db: Session,
+):
+    user, _ = create_random_user(db)
+    portfolio = create_test_portfolio(db, user_id=user.id, name="Legacy")
+    parent = create_test_asset(db, ticker_symbol="LEGACYPARENT", currency="INR")
+    create_test_asset(db, ticker_symbol="LEGACYCHILD", currency="INR")
+    create_test_transaction(
+        db, portfolio_id=portfolio.id, asset_id=parent.id, quantity=10,
+        price_per_unit=100, transaction_date=date(2023, 1, 2),
+    )
+    # Recorded without a cost basis, and with the child named by ticker
+    legacy = crud.transaction.create_with_portfolio(
+        db,
+        obj_in=schemas.TransactionCreate(
+            asset_id=parent.id,
+            transaction_type=TransactionType.DEMERGER,
+            quantity=Decimal(1),
+            price_per_unit=Decimal(1),
+            transaction_date=datetime(2023, 6, 1),
+            details={
+                "new_asset_ticker": "legacychild",
+                "total_cost_allocated": "250",
+            },
+        ),
+        portfolio_id=portfolio.id,
+    )
+    [row] = crud.corporate_action_adjustment.rebuild(
+        db, portfolio_id=portfolio.id, asset_id=parent.id
+    )
+    assert row.cost_numerator / row.cost_denominator == Decimal("0.75")
+    assert row.successor_asset_id == crud.asset.get_by_ticker(
+        db, ticker_symbol="LEGACYCHILD"
+    ).id
+    db.refresh(legacy)
+    assert Decimal(legacy.details["cost_basis_before"]) == 1000
+
+    create_test_transaction(
+        db, portfolio_id=portfolio.id, asset_id=parent.id, quantity=10,
+        price_per_unit=300, transaction_date=date(2023, 2, 1),
+    )
+    [row] = crud.corporate_action_adjustment.rebuild(
+        db, portfolio_id=portfolio.id, asset_id=parent.id
+    )
+    assert row.cost_numerator / row.cost_denominator == Decimal("0.75")
+
+
+def test_table_factors_past_a_fully_allocated_demerger():
+    def row(day, action, quantity=(1, 1), cost=(1, 1)):
+        return SimpleNamespace(
+            effective_date=datetime(2024, 1, day), action_type=action,
+            quantity_numerator=Decimal(quantity[0]),
+            quantity_denominator=Decimal(quantity[1]),
+            cost_numerator=Decimal(cost[0]), cost_denominator=Decimal(cost[1]),
+        )
+
+    table = AdjustmentTable([
+        row(20, "SPLIT", quantity=(3, 2)),
+        row(10, "DEMERGER", cost=(0, 500)),
+        row(5, "SPLIT", quantity=(5, 1)),
+    ])
+
+    assert table.successor is None
+    assert [split.effective_date.day for split in table.splits()] == [5, 20]
+    assert table.quantity_factor(date(2024, 1, 1), date(2024, 1, 31)) == Decimal(
+        "7.5"
+    )
+    assert table.cost_factor(date(2024, 1, 1), date(2024, 1, 31)) == 0
+    # Past the zero factor the cumulative products no longer divide
+    assert table.cost_factor(date(2024, 1, 10), date(2024, 1, 31)) == 1
+    assert table.price_factor(date(2024, 1, 10), date(2024, 1, 31)) == Decimal(
+        "1"
+    ) / Decimal("1.5")
+
+
+def test_capital_gains_look_up_split_and_demerger_adjustments(db: Session):
+    user, _ = create_random_user(db)
+    portfolio = create_test_portfolio(db, user_id=user.id, name="Gains")
+    parent = create_test_asset(db, ticker_symbol="GAINPARENT", currency="INR")
+    spinoff = create_test_asset(db, ticker_symbol="GAINCHILD", currency="INR")
+    create_test_transaction(
+        db, portfolio_id=portfolio.id, asset_id=parent.id, quantity=10,
+        price_per_unit=100, transaction_date=date(2023, 4, 10),
+    )
+    handlers = crud.crud_corporate_action
+    _action(
+        db, handlers.handle_stock_split, portfolio.id, parent.id,
+        TransactionType.SPLIT, datetime(2023, 6, 1), "2", "1",
+    )
+    _action(
+        db, handlers.handle_demerger, portfolio.id, parent.id,
+        TransactionType.DEMERGER, datetime(2023, 8, 1), "1", "1",
+        {"new_asset_id": str(spinoff.id), "cost_allocation_pct": "25"},
+    )
+    # Auto-linked against the split lot: 20 units
+    create_test_transaction(
+        db, portfolio_id=portfolio.id, asset_id=parent.id,
+        transaction_type="SELL", quantity=20, price_per_unit=60,
+        transaction_date=date(2023, 12, 1),
+    )
+    db.commit()
+
+    summary = CapitalGainsService(db).calculate_capital_gains(
+        portfolio_id=portfolio.id, fy_year="2023-24", user_id=user.id
+    )
+
+    [entry] = [g for g in summary.gains if g.asset_ticker == "GAINPARENT"]
+    assert entry.quantity == 20
+    # 100 per share, halved by the split, with 75% of the cost left
+    assert entry.buy_price == Decimal("37.5")
+    assert entry.total_buy_value == Decimal("750")
+    assert entry.gain == Decimal("450")
+    assert entry.corporate_action_adjusted
+
+
+def test_sqlite_startup_backfills_adjustments(db: Session, monkeypatch):
+    user, _ = create_random_user(db)
+    portfolio = create_test_portfolio(db, user_id=user.id, name="Upgraded")
+    asset = create_test_asset(db, ticker_symbol="PRESPLIT", currency="INR")
+    create_test_transaction(
+        db, portfolio_id=portfolio.id, asset_id=asset.id, quantity=10,
+        price_per_unit=100, transaction_date=date(2023, 1, 2),
+    )
+    # Recorded before the adjustments table existed: no rows for the split
+    create_test_transaction(
+        db, portfolio_id=portfolio.id, asset_id=asset.id,
+        transaction_type="SPLIT", quantity=2, price_per_unit=1,
+        transaction_date=date(2023, 3, 1),
+    )
+    db.commit()
+    assert db.query(models.CorporateActionAdjustment).count() == 0
+
+    monkeypatch.setattr(init_db.settings, "DATABASE_TYPE", "sqlite")
+    monkeypatch.setattr(init_db, "db_engine", db.get_bind())
+    init_db._backfill_corporate_action_adjustments()
+
+    [row] = db.query(models.CorporateActionAdjustment).all()
+    assert (row.action_type, row.quantity_numerator) == ("SPLIT", 2)
+    [lot] = crud.transaction.get_available_lots(
+        db, user_id=user.id, asset_id=asset.id
+    )
+    assert lot["available_quantity"] == 20
+
+    # Once the table has rows, later startups leave it alone
+    db.query(models.CorporateActionAdjustment).update({"quantity_numerator": 3})
+    db.commit()
+    init_db._backfill_corporate_action_adjustments()
+    assert db.query(models.CorporateActionAdjustment.quantity_numerator).scalar() == 3
@@ -1,3 +1,4 @@
+import asyncio
 from datetime import date, timedelta
 from decimal import Decimal
 from unittest.mock import patch
@@ -285,3 +286,53 @@ def test_get_holdings_current_value_conversion(
         # Verify Unrealized PnL
         # 94,600 - 85,000 = 9,600
         assert h.unrealized_pnl == expected_current_value - Decimal("85000")
+
+
+def test_get_holdings_async_matches_sync_and_shares_cache(
+    db: Session, test_user_portfolio, foreign_asset
+):
+    """
+    The async holdings path fetches the asset price and the FX rate concurrently
+    but must value the portfolio exactly like the sync path, and its result must
+    be served to the sync path from the shared analytics cache.
+    """
+    _, portfolio = test_user_portfolio
+    crud.transaction.create_with_portfolio(
+        db=db,
+        obj_in=schemas.TransactionCreate(
+            asset_id=foreign_asset.id,
+            transaction_type="BUY",
+            quantity=Decimal("10"),
+            price_per_unit=MOCK_USD_PRICE,
+            transaction_date=date.today() - timedelta(days=10),
+            details={"fx_rate": float(MOCK_FX_RATE)},
+        ),
+        portfolio_id=portfolio.id,
+    )
+    prices = {
+        "GOOGL": {"current_price": Decimal("110"), "previous_close": Decimal("108")},
+        "USDINR=X": {"current_price": Decimal("86"), "previous_close": Decimal("86")},
+    }
+
+    with patch(
+        "app.crud.crud_holding.financial_data_service.get_current_prices"
+    ) as mock_prices:
+        mock_prices.side_effect = lambda assets: {
+            a["ticker_symbol"]: prices[a["ticker_symbol"]] for a in assets
+        }
+        async_result = asyncio.run(
+            holding.get_portfolio_holdings_and_summary_async(
+                db=db, portfolio_id=portfolio.id
+            )
+        )
+        assert mock_prices.call_count == 2
+
+        h = async_result.holdings[0]
+        assert h.current_value == Decimal("10") * Decimal("110") * Decimal("86")
+        assert h.days_pnl == Decimal("10") * Decimal("2") * Decimal("86")
+
+        sync_result = holding.get_portfolio_holdings_and_summary(
+            db=db, portfolio_id=portfolio.id
+        )
+        assert mock_prices.call_count == 2  # served from the cache
+        assert sync_result.summary.total_value == async_result.summary.total_value
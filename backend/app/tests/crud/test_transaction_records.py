@@ -0,0 +1,62 @@
+from datetime import date, datetime
+from decimal import Decimal
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.crud.crud_transaction import TransactionRecord
+from app.tests.utils.portfolio import create_test_portfolio
+from app.tests.utils.transaction import create_test_transaction
+from app.tests.utils.user import create_random_user
+
+pytestmark = pytest.mark.usefixtures("pre_unlocked_key_manager")
+
+
+def test_get_records_projects_the_columns_in_date_order(db: Session):
+    user, _ = create_random_user(db)
+    portfolio = create_test_portfolio(db, user_id=user.id, name="Records")
+    other = create_test_portfolio(db, user_id=user.id, name="Other")
+    tcs = create_test_transaction(
+        db, portfolio_id=portfolio.id, ticker="TCS", quantity=2,
+        transaction_date=date(2024, 2, 1),
+    )
+    buy = create_test_transaction(
+        db, portfolio_id=portfolio.id, ticker="INFY", quantity=10,
+        price_per_unit=1500, fees=12.5, transaction_date=date(2024, 1, 1),
+    )
+    sell = create_test_transaction(
+        db, portfolio_id=portfolio.id, ticker="INFY", transaction_type="SELL",
+        quantity=4, price_per_unit=1700, transaction_date=date(2024, 3, 1),
+    )
+    create_test_transaction(
+        db, portfolio_id=other.id, ticker="INFY", transaction_date=date(2024, 1, 1)
+    )
+    db.commit()
+
+    records = crud.transaction.get_records(db, portfolio_id=portfolio.id)
+
+    assert [r.id for r in records] == [buy.id, tcs.id, sell.id]
+    assert all(isinstance(r, TransactionRecord) for r in records)
+    assert records[0] == TransactionRecord(
+        id=buy.id,
+        portfolio_id=portfolio.id,
+        asset_id=buy.asset_id,
+        transaction_type="BUY",
+        transaction_date=datetime(2024, 1, 1),
+        quantity=Decimal("10"),
+        price_per_unit=Decimal("1500"),
+        fees=Decimal("12.5"),
+        details=buy.details,
+    )
+
+    def ids(**filters):
+        return [r.id for r in crud.transaction.get_records(db, **filters)]
+
+    assert ids(portfolio_id=portfolio.id, asset_id=buy.asset_id) == [buy.id, sell.id]
+    assert ids(portfolio_id=portfolio.id, transaction_types=["SELL"]) == [sell.id]
+    assert ids(portfolio_id=portfolio.id, until=datetime(2024, 2, 1)) == [
+        buy.id, tcs.id
+    ]
+    assert ids(portfolio_id=portfolio.id, before=datetime(2024, 2, 1)) == [buy.id]
+    assert len(ids(user_id=user.id)) == 4
@@ -0,0 +1,39 @@
+"""Tests for looking users up by email through the desktop blind index."""
+import pytest
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.core.config import settings
+from app.db.custom_types import blind_index
+from app.models.user import User
+from app.tests.utils.user import create_random_user
+
+pytestmark = [
+    pytest.mark.usefixtures("pre_unlocked_key_manager"),
+    pytest.mark.skipif(
+        settings.DEPLOYMENT_MODE != "desktop",
+        reason="Emails are only encrypted and indexed in desktop mode",
+    ),
+]
+
+
+def test_email_lookup_uses_the_blind_index(db: Session):
+    user, _ = create_random_user(db)
+    assert user.email_index == blind_index(user.email)
+    assert blind_index(user.email) != blind_index(user.email.upper())
+
+    assert crud.user.get_by_email(db, email=user.email).id == user.id
+    assert crud.user.get_by_email(db, email="nobody@example.com") is None
+
+
+def test_unindexed_users_are_found_and_indexed(db: Session):
+    user, _ = create_random_user(db)
+    db.execute(update(User).values(email_index=None))
+    db.commit()
+    db.expire_all()
+
+    assert crud.user.get_by_email(db, email=user.email).id == user.id
+    db.commit()
+    db.expire_all()
+    assert db.get(User, user.id).email_index == blind_index(user.email)
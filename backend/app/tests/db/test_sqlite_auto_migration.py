@@ -61,3 +61,50 @@ def test_sqlite_auto_column_addition(monkeypatch):
         assert result[0] == "g1"
         assert result[1] == "Retirement"
         assert result[2] is None
+
+
+def test_sqlite_auto_index_creation(monkeypatch):
+    """
+    Tests that _ensure_sqlite_columns_exist creates the composite transaction
+    indexes declared on the models for a legacy table that predates them.
+    """
+    test_engine = create_engine("sqlite:///:memory:")
+
+    with test_engine.begin() as conn:
+        conn.execute(
+            text(
+                """
+                CREATE TABLE transactions (
+                    id CHAR(32) PRIMARY KEY,
+                    transaction_type VARCHAR NOT NULL,
+                    quantity NUMERIC(18, 8) NOT NULL,
+                    price_per_unit NUMERIC(18, 8) NOT NULL,
+                    fees NUMERIC(18, 8) NOT NULL,
+                    transaction_date DATETIME NOT NULL,
+                    is_reinvested BOOLEAN NOT NULL,
+                    details JSON,
+                    portfolio_id CHAR(32) NOT NULL,
+                    asset_id CHAR(32) NOT NULL,
+                    user_id CHAR(32) NOT NULL
+                )
+                """
+            )
+        )
+
+    assert inspect(test_engine).get_indexes("transactions") == []
+
+    monkeypatch.setattr("app.db.init_db.db_engine", test_engine)
+    monkeypatch.setattr("app.db.init_db.settings.DATABASE_TYPE", "sqlite")
+
+    _ensure_sqlite_columns_exist()
+
+    index_names = {i["name"] for i in inspect(test_engine).get_indexes("transactions")}
+    assert {
+        "ix_transactions_portfolio_id_transaction_date",
+        "ix_transactions_user_id_transaction_date",
+        "ix_transactions_asset_id_user_id_transaction_date",
+        "ix_transactions_user_id_transaction_type_transaction_date",
+    } <= index_names
+
+    # Running again is a no-op.
+    _ensure_sqlite_columns_exist()
@@ -0,0 +1,137 @@
+"""Tests for the incremental (delta) asset-master sync."""
+import zipfile
+from unittest.mock import MagicMock
+
+import pandas as pd
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.services.asset_seeder import AssetSeeder
+from app.services.asset_sync_state import AssetSyncState, load_sync_state
+from app.utils import financial_utils
+from app.utils.financial_utils import process_all_sources
+
+
+def _write_nse_bhavcopy(tmp_path, rows):
+    csv_path = tmp_path / "bhav.csv"
+    pd.DataFrame(rows).to_csv(csv_path, index=False)
+    zip_path = tmp_path / "BhavCopy_NSE_CM_0_0_0_20250102_F_0000.csv.zip"
+    with zipfile.ZipFile(zip_path, "w") as z:
+        z.write(csv_path, arcname="bhav.csv")
+    return str(zip_path)
+
+
+def _sync(db: Session, state_dir, path: str) -> AssetSyncState:
+    seeder = AssetSeeder(db=db)
+    seeder.sync_state = load_sync_state(db, state_dir=str(state_dir))
+    process_all_sources(seeder, {"nse_equity": path})
+    db.commit()
+    seeder.sync_state.save(asset_count=0)
+    return seeder.sync_state
+
+
+def test_delta_sync_only_processes_new_and_changed_rows(
+    db: Session, tmp_path, monkeypatch
+):
+    state_dir = tmp_path / "state"
+    rows = [
+        {"ISIN": "INEDELTA0001", "SYMBOL": "DELTAA", "SERIES": "EQ", "CLOSE": 10},
+        {"ISIN": "INEDELTA0002", "SYMBOL": "DELTAB", "SERIES": "EQ", "CLOSE": 20},
+    ]
+    path = _write_nse_bhavcopy(tmp_path, rows)
+    summary = _sync(db, state_dir, path).summary()
+    assert summary["nse_equity"] == {
+        "status": "full", "rows": 2, "changed": 2, "removed": 0
+    }
+
+    # Next day: prices move, one instrument is gone and one is listed
+    rows = [
+        {"ISIN": "INEDELTA0001", "SYMBOL": "DELTAA", "SERIES": "EQ", "CLOSE": 11},
+        {"ISIN": "INEDELTA0003", "SYMBOL": "DELTAC", "SERIES": "EQ", "CLOSE": 30},
+    ]
+    path = _write_nse_bhavcopy(tmp_path, rows)
+    seen = []
+    original = AssetSeeder._create_asset
+    monkeypatch.setattr(
+        AssetSeeder,
+        "_create_asset",
+        lambda self, data: seen.append(data["ticker_symbol"]) or original(self, data),
+    )
+    summary = _sync(db, state_dir, path).summary()
+
+    assert summary["nse_equity"] == {
+        "status": "delta", "rows": 2, "changed": 1, "removed": 1
+    }
+    assert seen == ["DELTAC"]
+    assert crud.asset.get_by_ticker(db, ticker_symbol="DELTAC") is not None
+
+    # The same file again is skipped without reading it
+    state = _sync(db, state_dir, path)
+    assert state.summary() == {"nse_equity": {"status": "unchanged"}}
+    assert seen == ["DELTAC"]
+
+
+def test_rows_not_written_are_offered_again(db: Session, tmp_path, monkeypatch):
+    state_dir = tmp_path / "state"
+    rows = [
+        {"ISIN": "INEDELTA0021", "SYMBOL": "DELTAR", "SERIES": "EQ"},
+        {"ISIN": "INEDELTA0022", "SYMBOL": "DELTAS", "SERIES": "EQ"},
+    ]
+    path = _write_nse_bhavcopy(tmp_path, rows)
+    seen = []
+    original = AssetSeeder._create_asset
+
+    def create_asset(self, data):
+        seen.append(data["ticker_symbol"])
+        # The first attempt at DELTAS fails
+        if data["ticker_symbol"] == "DELTAS" and seen.count("DELTAS") == 1:
+            return None
+        return original(self, data)
+
+    monkeypatch.setattr(AssetSeeder, "_create_asset", create_asset)
+    _sync(db, state_dir, path)
+    assert crud.asset.get_by_ticker(db, ticker_symbol="DELTAS") is None
+
+    # The file is read again, but only the row that was not written is seeded
+    summary = _sync(db, state_dir, path).summary()
+    assert summary["nse_equity"] == {
+        "status": "delta", "rows": 2, "changed": 1, "removed": 0
+    }
+    assert seen == ["DELTAR", "DELTAS", "DELTAS"]
+    assert crud.asset.get_by_ticker(db, ticker_symbol="DELTAS") is not None
+
+    state = _sync(db, state_dir, path)
+    assert state.summary() == {"nse_equity": {"status": "unchanged"}}
+
+
+def test_full_sync_discards_previous_versions(db: Session, tmp_path):
+    state_dir = tmp_path / "state"
+    path = _write_nse_bhavcopy(
+        tmp_path, [{"ISIN": "INEDELTA0011", "SYMBOL": "DELTAF", "SERIES": "EQ"}]
+    )
+    _sync(db, state_dir, path)
+
+    state = load_sync_state(db, full=True, state_dir=str(state_dir))
+    assert not state.is_unchanged("nse_equity", path)
+
+
+def test_conditional_download_reports_not_modified(tmp_path, monkeypatch):
+    state = AssetSyncState(str(tmp_path / "state"))
+    state.manifest["sources"]["icici"] = {
+        "url": "https://example.com/SecurityMaster.zip",
+        "etag": '"abc"',
+    }
+    response = MagicMock(status_code=304)
+    get = MagicMock(return_value=response)
+    monkeypatch.setattr(financial_utils.requests, "get", get)
+
+    headers = state.validators("icici", "https://example.com/SecurityMaster.zip")
+    result = financial_utils.fetch_file(
+        "https://example.com/SecurityMaster.zip",
+        str(tmp_path / "master.zip"),
+        validators=headers,
+    )
+
+    assert result.not_modified
+    assert get.call_args.kwargs["headers"]["If-None-Match"] == '"abc"'
+    assert state.validators("icici", "https://example.com/other.zip") == {}
@@ -0,0 +1,146 @@
+"""Tests for resolving import and backup asset references in bulk."""
+from unittest import mock
+
+import pytest
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app import crud, schemas
+from app.services.asset_resolver import AssetRef, AssetResolver
+from app.services.financial_data_service import financial_data_service
+from app.tests.utils.asset import create_test_asset
+from app.tests.utils.user import create_random_user
+
+pytestmark = pytest.mark.usefixtures("pre_unlocked_key_manager")
+
+
+class _QueryCounter:
+    def __init__(self, db: Session):
+        self.count = 0
+        self._engine = db.get_bind()
+
+    def _count(self, *args, **kwargs):
+        self.count += 1
+
+    def __enter__(self):
+        event.listen(self._engine, "before_cursor_execute", self._count)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self._engine, "before_cursor_execute", self._count)
+
+
+@pytest.fixture
+def assets(db: Session):
+    user, _ = create_random_user(db)
+    infy = create_test_asset(db, ticker_symbol="INFY", name="Infosys Limited")
+    infy.isin = "INE009A01021"
+    tcs = create_test_asset(db, ticker_symbol="TCS", name="Tata Consultancy")
+    wipro = create_test_asset(db, ticker_symbol="WIPRO", name="Wipro Limited")
+    for symbol, asset, source in [
+        ("INFOSYS LTD", infy, "Zerodha"),
+        ("TCS-EQ", tcs, "ICICI"),
+        ("WIPRO-EQ", tcs, "Zerodha"),  # a wrong mapping on the other source
+        ("WIPRO-EQ", wipro, "ICICI"),
+    ]:
+        crud.asset_alias.create(
+            db,
+            obj_in=schemas.AssetAliasCreate(
+                alias_symbol=symbol, asset_id=asset.id, user_id=user.id, source=source
+            ),
+        )
+    db.commit()
+    return {"INFY": infy, "TCS": tcs, "WIPRO": wipro}
+
+
+def test_references_resolve_in_order(db: Session, assets):
+    refs = {
+        AssetRef("ANYTHING", "ine009a01021"): "INFY",
+        AssetRef("ISIN:INE009A01021"): "INFY",
+        AssetRef("WIPRO-EQ"): "WIPRO",  # the import source's alias
+        AssetRef("TCS-EQ"): "TCS",  # an alias from any source
+        AssetRef("wipro"): "WIPRO",
+        AssetRef("Tata Consultancy"): "TCS",
+        AssetRef("UNKNOWN"): None,
+    }
+    resolved = AssetResolver(db, source="ICICI").resolve_many(refs)
+    assert {
+        ref: asset.ticker_symbol if asset else None
+        for ref, asset in resolved.items()
+    } == refs
+
+    exact = AssetResolver(db, aliases=False, names=False).resolve_many(
+        [AssetRef("TCS-EQ"), AssetRef("Tata Consultancy"), AssetRef("TCS")]
+    )
+    assert [a.ticker_symbol if a else None for a in exact.values()] == [
+        None, None, "TCS",
+    ]
+
+
+def test_pending_aliases_come_before_saved_ones(db: Session, assets):
+    resolver = AssetResolver(
+        db, source="Zerodha", pending_aliases={"WIPRO-EQ": assets["WIPRO"].id}
+    )
+    assert resolver.resolve(AssetRef("WIPRO-EQ")) is assets["WIPRO"]
+    assert resolver.resolve(AssetRef("INFOSYS LTD")) is assets["INFY"]
+
+
+def test_many_references_take_a_query_per_step(db: Session, assets):
+    refs = [AssetRef(f"NOPE{i}") for i in range(2000)] + [AssetRef("INFY")]
+    resolver = AssetResolver(db, source="ICICI")
+    with _QueryCounter(db) as queries:
+        resolved = resolver.resolve_many(refs)
+    assert resolved[AssetRef("INFY")] is assets["INFY"]
+    # Five steps, with the references split into IN lists of 900
+    assert queries.count <= 5 * 3 + 1
+
+    with _QueryCounter(db) as queries:
+        assert resolver.resolve_many(refs) == resolved
+    assert queries.count == 0
+
+
+def test_providers_are_asked_once_for_everything_missing(db: Session, assets):
+    details = {
+        "ISIN:INF000000001": {
+            "ticker_symbol": "100001", "name": "Fund One", "asset_type": "Mutual Fund",
+            "exchange": "AMFI", "currency": "INR", "isin": "INF000000001",
+        },
+        "ISIN:INF000000002": {
+            "ticker_symbol": "INFY", "name": "Infosys Limited",
+            "asset_type": "STOCK", "exchange": "NSE", "currency": "INR",
+        },
+    }
+    refs = [
+        AssetRef("FUND ONE", "INF000000001"),
+        AssetRef("ISIN:INF000000001"),
+        AssetRef("ISIN:INF000000002"),
+        AssetRef("ISIN:INF000000003"),
+        AssetRef("NEWCO"),
+    ]
+    with mock.patch.object(
+        financial_data_service,
+        "get_asset_details_batch",
+        side_effect=lambda lookups: {t: details.get(t) for t in lookups},
+    ) as batch:
+        resolved = AssetResolver(db).resolve_many(refs, fetch=True)
+
+    batch.assert_called_once_with(
+        ["ISIN:INF000000001", "ISIN:INF000000002", "ISIN:INF000000003"]
+    )
+    fund = resolved[refs[0]]
+    assert inspect(fund).persistent and fund.ticker_symbol == "100001"
+    assert resolved[refs[1]] is fund
+    # The provider's ticker is reused rather than duplicated
+    assert resolved[refs[2]] is assets["INFY"]
+    assert resolved[refs[3]] is None and resolved[refs[4]] is None
+
+
+def test_previews_do_not_save_fetched_assets(db: Session):
+    ref = AssetRef("AAPL")
+    resolver = AssetResolver(db, fetch_tickers=True, create=False)
+    assert resolver.resolve(ref) is None
+
+    asset = resolver.resolve(ref, fetch=True)
+    assert asset.ticker_symbol == "AAPL" and asset.name == "Apple Inc."
+    assert inspect(asset).transient
+    assert crud.asset.get_by_ticker(db, ticker_symbol="AAPL") is None
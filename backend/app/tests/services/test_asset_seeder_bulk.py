@@ -0,0 +1,96 @@
+"""Tests for the vectorised, bulk-insert asset seeding paths."""
+import zipfile
+
+import pandas as pd
+from sqlalchemy.orm import Session
+
+from app import crud, models
+from app.schemas.enums import BondType
+from app.services.asset_seeder import AssetSeeder
+
+
+def _write_nse_bhavcopy(tmp_path, rows):
+    csv_path = tmp_path / "bhav.csv"
+    pd.DataFrame(rows).to_csv(csv_path, index=False)
+    zip_path = tmp_path / "BhavCopy_NSE_CM_0_0_0_20250102_F_0000.csv.zip"
+    with zipfile.ZipFile(zip_path, "w") as z:
+        z.write(csv_path, arcname="bhav.csv")
+    return str(zip_path)
+
+
+def test_bse_equity_frame_classifies_and_dedupes(db: Session):
+    seeder = AssetSeeder(db=db)
+    df = pd.DataFrame({
+        "ISIN": ["INEBULK00001", "INEBULK00002", "INEBULK00003", "INEBULK00001",
+                 "INEBULK00004", None],
+        "TckrSymb": ["BULKA", "BULKETF", "BULKGS", "BULKDUP", "BULKUNK", "BULKNA"],
+        "SctySrs": ["A", "E", "G", "A", "QQ", "A"],
+        "FinInstrmNm": ["Bulk A Ltd", "Bulk ETF", "GOI 2030", "Dup", "Unk", "NA"],
+    })
+
+    seeder._process_bse_equity_df(df)
+    seeder.flush_pending()
+
+    # Duplicate ISIN (first row wins), unknown series and missing ISIN skipped
+    assert seeder.created_count == 3
+    assert seeder.skipped_series_counts == {"QQ": 1}
+    assert crud.asset.get_by_ticker(db, ticker_symbol="BULKDUP") is None
+    assert crud.asset.get_by_ticker(db, ticker_symbol="BULKETF").asset_type == "ETF"
+
+    gsec = crud.asset.get_by_ticker(db, ticker_symbol="BULKGS")
+    assert gsec.asset_type == "BOND"
+    assert gsec.bond.bond_type == BondType.GOVERNMENT
+    assert gsec.bond.maturity_date.year == 1970
+
+
+def test_nse_bhavcopy_reseed_only_inserts_new_rows(db: Session, tmp_path):
+    rows = [
+        {"ISIN": "INEBULK10001", "SYMBOL": "BULKEQ", "SERIES": "EQ"},
+        {"ISIN": "INEBULK10002", "SYMBOL": "BULKSGB", "SERIES": "GB"},
+        {"ISIN": "INEBULK10003", "SYMBOL": "BULKNCD", "SERIES": "N1"},
+    ]
+    path = _write_nse_bhavcopy(tmp_path, rows)
+
+    seeder = AssetSeeder(db=db)
+    seeder.process_nse_equity_bhavcopy(path)
+    db.commit()
+    assert seeder.created_count == 3
+    assert (
+        crud.asset.get_by_ticker(db, ticker_symbol="BULKSGB").bond.bond_type
+        == BondType.SGB
+    )
+    assert (
+        crud.asset.get_by_ticker(db, ticker_symbol="BULKNCD").bond.bond_type
+        == BondType.CORPORATE
+    )
+
+    rows.append({"ISIN": "INEBULK10004", "SYMBOL": "BULKNEW", "SERIES": "BE"})
+    path = _write_nse_bhavcopy(tmp_path, rows)
+    reseeder = AssetSeeder(db=db)
+    reseeder.process_nse_equity_bhavcopy(path)
+    db.commit()
+
+    assert reseeder.created_count == 1
+    assert crud.asset.get_by_ticker(db, ticker_symbol="BULKNEW") is not None
+
+
+def test_bulk_insert_skips_rows_created_concurrently(db: Session):
+    seeder = AssetSeeder(db=db)
+    seeder._create_asset({
+        "isin": "INEBULK20001",
+        "ticker_symbol": "BULKRACE",
+        "name": "Race Ltd",
+        "asset_type": "STOCK",
+        "exchange": "NSE",
+    })
+    # Another writer inserts the same ticker before the batch is written
+    db.add(models.Asset(
+        ticker_symbol="BULKRACE", name="Other", asset_type="STOCK", currency="INR"
+    ))
+    db.flush()
+
+    seeder.flush_pending()
+
+    assert seeder.created_count == 0
+    assert seeder.skipped_count == 1
+    assert crud.asset.get_by_ticker(db, ticker_symbol="BULKRACE").name == "Other"
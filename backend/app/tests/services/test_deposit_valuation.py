@@ -0,0 +1,189 @@
+import uuid
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from dateutil.relativedelta import relativedelta
+
+from app.crud.crud_holding import (
+    _calculate_fd_current_value,
+    _calculate_rd_value_at_date,
+)
+from app.crud.crud_ppf import process_ppf_holding
+from app.models.asset import Asset
+from app.models.fixed_deposit import FixedDeposit
+from app.models.historical_interest_rate import HistoricalInterestRate
+from app.models.recurring_deposit import RecurringDeposit
+from app.models.transaction import Transaction
+from app.schemas.enums import TransactionType
+from app.services import deposit_valuation
+
+
+def _every_nth_day(start: date, end: date, step: int = 7) -> list:
+    days = []
+    current = start
+    while current <= end:
+        days.append(current)
+        current += timedelta(days=step)
+    days.append(end)
+    return days
+
+
+@pytest.mark.parametrize("compounding", ["Annually", "Quarterly", "Monthly"])
+def test_fd_curve_matches_scalar_calculation(compounding: str):
+    fd = FixedDeposit(
+        id=uuid.uuid4(),
+        principal_amount=Decimal("100000.00"),
+        interest_rate=Decimal("7.25"),
+        start_date=date(2021, 1, 31),
+        maturity_date=date(2024, 1, 31),
+        compounding_frequency=compounding,
+        interest_payout="Cumulative",
+    )
+    dates = _every_nth_day(fd.start_date, fd.maturity_date, step=11)
+
+    curve = deposit_valuation.fd_value_curve(fd, dates)
+
+    for day, value in zip(dates, curve):
+        expected = _calculate_fd_current_value(
+            fd.principal_amount,
+            fd.interest_rate,
+            fd.start_date,
+            day,
+            fd.compounding_frequency,
+            fd.interest_payout,
+        )
+        assert value == pytest.approx(float(expected), abs=0.01)
+
+
+def test_fd_curve_is_zero_outside_deposit_lifetime():
+    fd = FixedDeposit(
+        id=uuid.uuid4(),
+        principal_amount=Decimal("5000.00"),
+        interest_rate=Decimal("6.00"),
+        start_date=date(2022, 6, 1),
+        maturity_date=date(2023, 6, 1),
+        compounding_frequency="Quarterly",
+        interest_payout="Payout",
+    )
+    curve = deposit_valuation.fd_value_curve(
+        fd, [date(2022, 5, 31), date(2022, 6, 1), date(2023, 6, 1), date(2023, 6, 2)]
+    )
+    assert list(curve) == [0.0, 5000.0, 5000.0, 0.0]
+    assert deposit_valuation.fd_value_on(fd, fd.maturity_date) == Decimal("5000.0")
+
+
+@pytest.mark.parametrize("start_date", [date(2022, 1, 31), date(2022, 3, 15)])
+def test_rd_curve_matches_scalar_calculation(start_date: date):
+    rd = RecurringDeposit(
+        id=uuid.uuid4(),
+        monthly_installment=Decimal("2500.00"),
+        interest_rate=Decimal("6.80"),
+        start_date=start_date,
+        tenure_months=18,
+    )
+    dates = _every_nth_day(start_date, start_date + timedelta(days=560), step=5)
+    maturity_date = start_date + relativedelta(months=rd.tenure_months)
+
+    curve = deposit_valuation.rd_value_curve(rd, dates)
+
+    for day, value in zip(dates, curve):
+        if day > maturity_date:
+            # Past maturity the RD is treated as withdrawn.
+            assert value == 0.0
+            continue
+        expected = _calculate_rd_value_at_date(
+            rd.monthly_installment,
+            rd.interest_rate,
+            rd.start_date,
+            rd.tenure_months,
+            day,
+        )
+        assert value == pytest.approx(float(expected), abs=0.01)
+
+
+def test_curves_are_memoised_per_deposit_version():
+    rd = RecurringDeposit(
+        id=uuid.uuid4(),
+        monthly_installment=Decimal("1000.00"),
+        interest_rate=Decimal("7.00"),
+        start_date=date(2023, 1, 1),
+        tenure_months=12,
+    )
+    dates = deposit_valuation.daily_dates(date(2023, 1, 1), date(2023, 12, 31))
+
+    first = deposit_valuation.rd_value_curve(rd, dates)
+    assert deposit_valuation.rd_value_curve(rd, dates) is first
+
+    rd.interest_rate = Decimal("7.50")
+    updated = deposit_valuation.rd_value_curve(rd, dates)
+    assert updated is not first
+    assert updated[-1] > first[-1]
+
+
+def _ppf_txn(asset: Asset, txn_type: TransactionType, on: date, amount: str):
+    return Transaction(
+        id=uuid.uuid4(),
+        asset_id=asset.id,
+        transaction_type=txn_type,
+        quantity=Decimal(amount),
+        price_per_unit=Decimal("1"),
+        transaction_date=datetime.combine(on, datetime.min.time()),
+    )
+
+
+def test_ppf_curve_matches_simulated_holding():
+    asset = Asset(
+        id=uuid.uuid4(),
+        ticker_symbol="PPF-TEST",
+        name="PPF Account",
+        asset_type="PPF",
+        currency="INR",
+        opening_date=date(2019, 5, 10),
+    )
+    transactions = [
+        _ppf_txn(asset, TransactionType.CONTRIBUTION, date(2019, 5, 10), "50000"),
+        _ppf_txn(asset, TransactionType.CONTRIBUTION, date(2019, 11, 3), "20000"),
+        _ppf_txn(asset, TransactionType.CONTRIBUTION, date(2020, 4, 4), "150000"),
+        _ppf_txn(asset, TransactionType.INTEREST_CREDIT, date(2021, 3, 31), "11234.5"),
+        _ppf_txn(asset, TransactionType.CONTRIBUTION, date(2021, 7, 20), "75000"),
+        _ppf_txn(asset, TransactionType.CONTRIBUTION, date(2022, 4, 1), "10000"),
+    ]
+    rates = [
+        HistoricalInterestRate(
+            scheme_name="PPF",
+            start_date=date(2019, 4, 1),
+            end_date=date(2019, 12, 31),
+            rate=Decimal("7.900"),
+        ),
+        HistoricalInterestRate(
+            scheme_name="PPF",
+            start_date=date(2020, 1, 1),
+            end_date=None,
+            rate=Decimal("7.100"),
+        ),
+    ]
+    dates = _every_nth_day(date(2019, 4, 1), date(2023, 2, 15), step=9)
+
+    curve = deposit_valuation.ppf_value_curve(
+        asset,
+        transactions,
+        deposit_valuation.InterestRateTable.from_rates(rates),
+        dates,
+    )
+
+    for day, value in zip(dates, curve):
+        day_txns = [t for t in transactions if t.transaction_date.date() <= day]
+        if not day_txns:
+            assert value == 0.0
+            continue
+        expected = process_ppf_holding(
+            db=None,
+            ppf_asset=asset,
+            portfolio_id=None,
+            calculation_date=day,
+            simulate_only=True,
+            transactions=day_txns,
+            ppf_rates=rates,
+        )
+        assert value == pytest.approx(float(expected.current_value), abs=0.01)
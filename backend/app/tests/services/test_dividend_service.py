@@ -0,0 +1,119 @@
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Callable, Dict
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.transaction import Transaction
+from app.services import dividend_service as dividend_module
+from app.services.dividend_service import DividendService
+from app.tests.utils.asset import create_test_asset
+from app.tests.utils.portfolio import create_test_portfolio
+from app.tests.utils.user import create_random_user
+
+pytestmark = pytest.mark.usefixtures("pre_unlocked_key_manager")
+
+
+def _add_dividend(db, portfolio, asset, on: datetime, quantity: str, price: str):
+    db.add(
+        Transaction(
+            transaction_type="DIVIDEND",
+            quantity=Decimal(quantity),
+            price_per_unit=Decimal(price),
+            fees=Decimal("0"),
+            transaction_date=on,
+            portfolio_id=portfolio.id,
+            asset_id=asset.id,
+            user_id=portfolio.user_id,
+        )
+    )
+
+
+def _seed(db: Session):
+    user, password = create_random_user(db)
+    portfolio = create_test_portfolio(db, user_id=user.id, name="Dividends")
+    inr_asset = create_test_asset(db, ticker_symbol="DIVINR", currency="INR")
+    usd_asset = create_test_asset(db, ticker_symbol="DIVUSD", currency="USD")
+
+    # Cutoff days with a time component stay in the earlier bucket, and the
+    # last day of the FY is included.
+    _add_dividend(db, portfolio, inr_asset, datetime(2024, 6, 15, 14, 30), "10", "5")
+    _add_dividend(db, portfolio, inr_asset, datetime(2024, 6, 16), "100", "1")
+    _add_dividend(db, portfolio, usd_asset, datetime(2024, 9, 2), "4", "0.5")
+    _add_dividend(db, portfolio, usd_asset, datetime(2024, 9, 20), "2", "1")
+    _add_dividend(db, portfolio, inr_asset, datetime(2025, 3, 31, 9, 0), "1", "7")
+    # Outside FY 2024-25
+    _add_dividend(db, portfolio, inr_asset, datetime(2024, 3, 31), "1", "1000")
+    db.commit()
+    return user, password, portfolio
+
+
+def test_dividend_report_groups_and_converts(db: Session, monkeypatch) -> None:
+    user, _, portfolio = _seed(db)
+    calls = []
+    original = dividend_module.financial_data_service.get_exchange_rates
+
+    def counting_get_exchange_rates(from_currency, to_currency, dates):
+        calls.append((from_currency, tuple(dates)))
+        return original(from_currency, to_currency, dates)
+
+    monkeypatch.setattr(
+        dividend_module.financial_data_service,
+        "get_exchange_rates",
+        counting_get_exchange_rates,
+    )
+
+    report = DividendService(db).get_dividend_report(
+        "2024-25", portfolio_id=str(portfolio.id), user_id=str(user.id)
+    )
+
+    assert report.bucket_totals == {
+        "Upto 15/6": Decimal("50"),
+        "16/6 - 15/9": Decimal("100") + Decimal("2") * Decimal("83.50"),
+        "16/9 - 15/12": Decimal("2") * Decimal("83.50"),
+        "16/12 - 15/3": Decimal("0"),
+        "16/3 - 31/3": Decimal("7"),
+    }
+    assert report.total_amount_inr == sum(report.bucket_totals.values())
+    assert report.total_amount_inr == sum(e.amount_inr for e in report.entries)
+
+    # One bulk FX request for the single foreign currency; both USD dividends
+    # were paid in September and share the same Rule 115 date.
+    assert calls == [("USD", (date(2024, 8, 31),))]
+
+    assert [e.date for e in report.entries] == sorted(e.date for e in report.entries)
+    usd_entries = [e for e in report.entries if e.currency == "USD"]
+    assert [e.ttbr_date for e in usd_entries] == [date(2024, 8, 31)] * 2
+    assert all(e.ttbr_rate == Decimal("83.50") for e in usd_entries)
+    assert [e.period for e in report.entries] == [
+        "Upto 15/6",
+        "16/6 - 15/9",
+        "16/6 - 15/9",
+        "16/9 - 15/12",
+        "16/3 - 31/3",
+    ]
+
+
+def test_dividend_csv_export_streams_all_entries(
+    client: TestClient,
+    db: Session,
+    get_auth_headers: Callable[[str, str], Dict[str, str]],
+    monkeypatch,
+) -> None:
+    user, password, portfolio = _seed(db)
+    monkeypatch.setattr(dividend_module, "ENTRY_BATCH_SIZE", 2)
+
+    response = client.get(
+        f"{settings.API_V1_STR}/dividends/export",
+        params={"fy": "2024-25", "portfolio_id": str(portfolio.id)},
+        headers=get_auth_headers(user.email, password),
+    )
+
+    assert response.status_code == 200
+    lines = response.text.strip().splitlines()
+    assert "Upto 15/6,50" in lines[3]
+    detail_start = lines.index(next(line for line in lines if "Asset Name" in line))
+    assert len(lines[detail_start + 1:]) == 5
@@ -0,0 +1,195 @@
+"""
+Property tests for the float64 holdings replay: on randomly generated
+portfolios it agrees with the Decimal replay to within rounding.
+"""
+import random
+import uuid
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from unittest import mock
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.core.config import settings
+from app.crud.crud_holding import _accumulate_positions
+from app.crud.crud_transaction import TransactionRecord
+from app.models.asset import Asset
+from app.models.transaction import Transaction
+from app.models.transaction_link import TransactionLink
+from app.services import fast_replay
+from app.tests.utils.portfolio import create_test_portfolio
+from app.tests.utils.transaction import create_test_transaction
+from app.tests.utils.user import create_random_user
+
+pytestmark = pytest.mark.usefixtures("pre_unlocked_key_manager")
+
+# Splits as (new shares, old shares)
+SPLIT_RATIOS = [(2, 1), (5, 1), (10, 1), (1, 2), (3, 2)]
+
+
+def _decimal(rng: random.Random, low: float, high: float, places: int) -> Decimal:
+    return round(Decimal(str(rng.uniform(low, high))), places)
+
+
+class _PortfolioGenerator:
+    """Random, internally consistent market-traded transactions."""
+
+    def __init__(self, seed: int):
+        self.rng = random.Random(seed)
+        self.transactions = []
+        self.sell_links_map = {}
+        self.held = {}
+        self.buys = {}
+
+    def asset(self, index: int) -> Asset:
+        currency = self.rng.choice(["INR", "INR", "USD"])
+        return Asset(
+            id=uuid.uuid4(), ticker_symbol=f"T{index}", currency=currency
+        )
+
+    def add(self, asset: Asset, tx_type: str, day: datetime, quantity: Decimal,
+            price: Decimal, details=None) -> Transaction:
+        tx = Transaction(
+            id=uuid.uuid4(), asset_id=asset.id, transaction_type=tx_type,
+            transaction_date=day, quantity=quantity, price_per_unit=price,
+            details=details,
+        )
+        self.transactions.append(tx)
+        return tx
+
+    def quantity(self, asset: Asset) -> Decimal:
+        places = 0 if asset.currency == "INR" else 4
+        return _decimal(self.rng, 1, 500, places) or Decimal(1)
+
+    def fx(self, asset: Asset):
+        if asset.currency == "INR":
+            return self.rng.choice([None, {}])
+        return {"fx_rate": float(_decimal(self.rng, 70, 90, 4))}
+
+    def step(self, asset: Asset, day: datetime) -> None:
+        rng = self.rng
+        held = self.held.get(asset.id, Decimal(0))
+        price = _decimal(rng, 1, 5000, 2)
+        roll = rng.random()
+        if held <= 0 or roll < 0.4:
+            tx_type = rng.choice(["BUY", "BUY", "ESPP_PURCHASE", "RSU_VEST"])
+            quantity = self.quantity(asset)
+            details = self.fx(asset)
+            if tx_type == "RSU_VEST":
+                details = {**(details or {}), "fmv": float(price)}
+                price = Decimal(0)
+            tx = self.add(asset, tx_type, day, quantity, price, details)
+            self.buys.setdefault(asset.id, []).append(tx)
+            self.held[asset.id] = held + quantity
+        elif roll < 0.55:
+            self.add(asset, rng.choice(["DIVIDEND", "COUPON"]), day,
+                     self.quantity(asset), _decimal(rng, 0.1, 50, 2),
+                     self.fx(asset))
+        elif roll < 0.85:
+            quantity = min(held, self.quantity(asset))
+            sell = self.add(asset, "SELL", day, quantity, price, self.fx(asset))
+            if rng.random() < 0.5:
+                buy = rng.choice(self.buys[asset.id])
+                linked = min(quantity, buy.quantity)
+                self.sell_links_map[sell.id] = [TransactionLink(
+                    sell_transaction_id=sell.id, buy_transaction_id=buy.id,
+                    quantity=linked,
+                )]
+            self.held[asset.id] = held - quantity
+        elif roll < 0.93:
+            new, old = rng.choice(SPLIT_RATIOS)
+            self.add(asset, "SPLIT", day, Decimal(new), Decimal(old))
+            self.held[asset.id] = held * new / old
+        elif roll < 0.97:
+            self.add(asset, "DEMERGER", day, Decimal(0), Decimal(0),
+                     {"total_cost_allocated": float(_decimal(rng, 1, 1000, 2))})
+        else:
+            self.add(asset, rng.choice(["MERGER", "RENAME"]), day,
+                     Decimal(0), Decimal(0))
+            self.held[asset.id] = Decimal(0)
+
+    def generate(self):
+        assets = [self.asset(i) for i in range(self.rng.randint(1, 6))]
+        day = datetime(2020, 1, 1)
+        for _ in range(self.rng.randint(1, 80)):
+            day += timedelta(days=self.rng.randint(0, 20))
+            self.step(self.rng.choice(assets), day)
+        return {asset.id: asset for asset in assets}
+
+
+def _assert_close(fast: Decimal, exact: Decimal, tolerance: Decimal) -> None:
+    assert abs(fast - exact) <= tolerance + abs(exact) * Decimal("1E-10"), (
+        fast, exact
+    )
+
+
+@pytest.mark.parametrize("seed", range(300))
+def test_fast_replay_matches_decimal_replay(seed: int):
+    generator = _PortfolioGenerator(seed)
+    asset_map = generator.generate()
+    transactions = sorted(generator.transactions, key=lambda tx: tx.transaction_date)
+    tx_map = {tx.id: tx for tx in transactions}
+    initial = Decimal("12.5")
+
+    exact, exact_total = _accumulate_positions(
+        transactions, asset_map, generator.sell_links_map, tx_map, initial
+    )
+    fast, fast_total = fast_replay.accumulate_positions(
+        transactions, asset_map, generator.sell_links_map, tx_map, initial
+    )
+
+    # Records, as the holdings calculation loads them, replay the same
+    records = [
+        TransactionRecord(
+            tx.id, None, tx.asset_id, tx.transaction_type, tx.transaction_date,
+            tx.quantity, tx.price_per_unit, Decimal(0), tx.details,
+        )
+        for tx in transactions
+    ]
+    assert fast_replay.accumulate_positions(
+        records, asset_map, generator.sell_links_map, tx_map, initial
+    ) == (fast, fast_total)
+
+    assert set(fast) == set(exact)
+    for ticker, state in exact.items():
+        _assert_close(fast[ticker]["quantity"], state["quantity"], Decimal("1E-6"))
+        _assert_close(
+            fast[ticker]["total_invested"], state["total_invested"], Decimal("0.001")
+        )
+        _assert_close(
+            fast[ticker]["realized_pnl"], state["realized_pnl"], Decimal("0.001")
+        )
+        # Sold-out positions stay out of the current holdings
+        assert (fast[ticker]["quantity"] > 0) == (state["quantity"] > 0)
+    _assert_close(fast_total, exact_total, Decimal("0.01"))
+
+
+def test_holdings_calculation_uses_fast_path_when_enabled(db: Session):
+    user, _ = create_random_user(db)
+    portfolio = create_test_portfolio(db, user_id=user.id, name="Fast")
+    for day, (ticker, tx_type, quantity, price) in enumerate([
+        ("INFY", "BUY", 10, 1500),
+        ("INFY", "BUY", 5, 1600),
+        ("INFY", "SELL", 6, 1700),
+        ("TCS", "BUY", 3, 3500),
+    ], start=1):
+        create_test_transaction(
+            db, portfolio_id=portfolio.id, ticker=ticker, transaction_type=tx_type,
+            quantity=quantity, price_per_unit=price,
+            transaction_date=date(2024, 1, day),
+        )
+    db.commit()
+
+    exact = crud.holding._replay_portfolio(db, portfolio.id)
+    with mock.patch.object(settings, "HOLDINGS_FAST_PATH", True), mock.patch.object(
+        fast_replay, "accumulate_positions", wraps=fast_replay.accumulate_positions
+    ) as accumulate:
+        fast = crud.holding._replay_portfolio(db, portfolio.id)
+
+    accumulate.assert_called_once()
+    assert fast.current_holdings_tickers == exact.current_holdings_tickers
+    for ticker in exact.current_holdings_tickers:
+        for key, value in exact.holdings_state[ticker].items():
+            _assert_close(fast.holdings_state[ticker][key], value, Decimal("0.001"))
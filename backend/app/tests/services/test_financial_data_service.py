@@ -0,0 +1,80 @@
+import asyncio
+from datetime import date
+from decimal import Decimal
+from unittest.mock import AsyncMock, MagicMock
+
+from app.services.financial_data_service import FinancialDataService
+
+
+def _price(value: str) -> dict:
+    return {"current_price": Decimal(value), "previous_close": Decimal(value)}
+
+
+def _service() -> FinancialDataService:
+    service = FinancialDataService(cache_client=None)
+    for name in (
+        "amfi_provider", "upstox_provider", "nse_provider", "yfinance_provider"
+    ):
+        provider = MagicMock()
+        provider.aget_current_prices = AsyncMock(return_value={})
+        provider.aget_historical_prices = AsyncMock(return_value={})
+        setattr(service, name, provider)
+    return service
+
+
+def test_aget_current_prices_follows_provider_priority():
+    service = _service()
+    service.amfi_provider.aget_current_prices.return_value = {"100033": _price("58")}
+    service.upstox_provider.aget_current_prices.return_value = {"TCS": _price("3500")}
+    service.yfinance_provider.aget_current_prices.side_effect = [
+        {"AAPL": _price("175")},  # other assets, queried alongside the primaries
+        {},  # missing stocks fallback
+    ]
+    service.nse_provider.aget_current_prices.side_effect = [
+        {"GSEC": _price("101")},  # bonds
+        {"INFY": _price("1500")},  # fallback for stocks nobody else priced
+    ]
+
+    prices = asyncio.run(service.aget_current_prices([
+        {"ticker_symbol": "100033", "asset_type": "Mutual Fund"},
+        {"ticker_symbol": "TCS", "asset_type": "STOCK"},
+        {"ticker_symbol": "INFY", "asset_type": "STOCK"},
+        {"ticker_symbol": "GSEC", "asset_type": "BOND"},
+        {"ticker_symbol": "AAPL", "asset_type": None},
+    ]))
+
+    assert set(prices) == {"100033", "TCS", "INFY", "GSEC", "AAPL"}
+    missing_stocks = service.yfinance_provider.aget_current_prices.call_args_list[1]
+    assert [a["ticker_symbol"] for a in missing_stocks.args[0]] == ["INFY"]
+    nse_fallback = service.nse_provider.aget_current_prices.call_args_list[1]
+    assert [a["ticker_symbol"] for a in nse_fallback.args[0]] == ["INFY"]
+
+
+def test_aget_historical_prices_falls_back_to_yfinance():
+    service = _service()
+    day = date(2024, 1, 1)
+    service.upstox_provider.aget_historical_prices.return_value = {
+        "TCS": {day: Decimal("3500")}
+    }
+    service.yfinance_provider.aget_historical_prices.return_value = {
+        "AAPL": {day: Decimal("175")}
+    }
+    service.amfi_provider.aget_historical_prices.return_value = {
+        "100033": {day: Decimal("58")}
+    }
+
+    history = asyncio.run(service.aget_historical_prices(
+        [
+            {"ticker_symbol": "TCS", "asset_type": "STOCK"},
+            {"ticker_symbol": "AAPL", "asset_type": "STOCK"},
+            {"ticker_symbol": "100033", "asset_type": "MUTUAL_FUND"},
+        ],
+        day,
+        day,
+    ))
+
+    assert set(history) == {"TCS", "AAPL", "100033"}
+    fallback = service.yfinance_provider.aget_historical_prices.call_args
+    assert [a["ticker_symbol"] for a in fallback.args[0]] == ["AAPL"]
+    # Everything was found, so the bhavcopy archive is not consulted
+    service.nse_provider.aget_historical_prices.assert_not_awaited()
@@ -8,6 +8,7 @@ from unittest.mock import MagicMock, patch
 import pytest
 
 from app.cache.base import CacheClient
+from app.services.bhavcopy_archive import BhavcopyArchive, parse_bhavcopy
 from app.services.providers.nse_bhavcopy_provider import NseBhavcopyProvider
 
 # Load sample data from file
@@ -15,16 +16,26 @@ SAMPLE_BHAVCOPY_PATH = Path(__file__).parent.parent / "assets/sample_bhavcopy.cs
 with open(SAMPLE_BHAVCOPY_PATH, "r") as f:
     SAMPLE_BHAVCOPY_CSV = f.read()
 
+TRADING_DAY = date(2025, 10, 22)
+
 
 @pytest.fixture
 def mock_cache_client():
     """Fixture for a mocked cache client."""
     client = MagicMock(spec=CacheClient)
-    client.get_json.return_value = None
-    client.set_json.return_value = None
+    client.get.return_value = None
     return client
 
 
+@pytest.fixture
+def archive(tmp_path):
+    return BhavcopyArchive(root=str(tmp_path / "bhavcopy"))
+
+
+def _csv_filename(day: date) -> str:
+    return f"BhavCopy_NSE_CM_0_0_0_{day.strftime('%Y%m%d')}_F_0000.csv"
+
+
 def _create_zip_in_memory(csv_content: str, csv_filename: str) -> bytes:
     """Helper to create a zip archive in memory."""
     zip_buffer = io.BytesIO()
@@ -32,120 +43,159 @@ def _create_zip_in_memory(csv_content: str, csv_filename: str) -> bytes:
         zf.writestr(csv_filename, csv_content)
     return zip_buffer.getvalue()
 
-@patch("app.services.providers.nse_bhavcopy_provider.httpx.Client")
-def test_fetch_and_parse_bhavcopy_success(mock_httpx_client_class):
-    """Test that the Bhavcopy is fetched, unzipped, and parsed correctly."""
-    today = date(2025, 10, 22)
-    csv_filename = f"BhavCopy_NSE_CM_0_0_0_{today.strftime('%Y%m%d')}_F_0000.csv"
-    zip_content = _create_zip_in_memory(SAMPLE_BHAVCOPY_CSV, csv_filename)
-
-    mock_response = MagicMock()
-    mock_response.status_code = 200
-    mock_response.content = zip_content
-    mock_response.raise_for_status.return_value = None
-
-    mock_client_instance = MagicMock()
-    mock_client_instance.get.return_value = mock_response
-    mock_httpx_client_class.return_value.__enter__.return_value = mock_client_instance
-
-    provider = NseBhavcopyProvider(cache_client=None)
-    data = provider._fetch_and_parse_bhavcopy(for_date=today) # type: ignore
-
-    assert "RELIANCE" in data
-    assert data["RELIANCE"]["current_price"] == Decimal("2845.50")
-    assert data["RELIANCE"]["previous_close"] == Decimal("2800.00")
-    assert "TCS" in data
-    # Should now include 'BE' series as it's not in the excluded list
-    assert "INFY" in data
-    # Data is now indexed by both ticker symbol AND ISIN (8 entries)
-    assert "INE002A01018" in data  # RELIANCE ISIN
-    assert len(data) == 8
+
+def _columns(day: date, csv_content: str = SAMPLE_BHAVCOPY_CSV):
+    return parse_bhavcopy(
+        _create_zip_in_memory(csv_content, _csv_filename(day)), _csv_filename(day)
+    )
+
+
+def _http_client(mock_httpx_client_class, responses):
+    """Serves the responses from the httpx.Client the provider opens."""
+    client = MagicMock()
+    client.get.side_effect = responses
+    mock_httpx_client_class.return_value = client
+    client.__enter__.return_value = client
+    return client
 
 
 @patch("app.services.providers.nse_bhavcopy_provider.httpx.Client")
-def test_fetch_bhavcopy_with_fallback(mock_httpx_client_class):
-    """Test that the provider falls back to previous days if today's is not found."""
-    today = date(2025, 10, 22)
-    yesterday = today - timedelta(days=1)
-    csv_filename = f"BhavCopy_NSE_CM_0_0_0_{yesterday.strftime('%Y%m%d')}_F_0000.csv"
-    zip_content = _create_zip_in_memory(SAMPLE_BHAVCOPY_CSV, csv_filename)
-
-    # Mock responses: 404 for today, 200 for yesterday
-    mock_response_404 = MagicMock(status_code=404)
-    mock_response_200 = MagicMock(status_code=200, content=zip_content)
-
-    mock_client_instance = MagicMock()
-    mock_client_instance.get.side_effect = [mock_response_404, mock_response_200]
-    mock_httpx_client_class.return_value.__enter__.return_value = mock_client_instance
-
-    provider = NseBhavcopyProvider(cache_client=None)
-    data = provider._fetch_and_parse_bhavcopy(for_date=today) # type: ignore
-
-    assert mock_client_instance.get.call_count == 2
-    assert "RELIANCE" in data
-    # Data is now indexed by both ticker symbol AND ISIN (8 entries)
-    assert len(data) == 8
-
-
-def test_get_current_prices(mock_cache_client):
-    """Test that get_current_prices correctly filters from the full bhavcopy data."""
-    provider = NseBhavcopyProvider(cache_client=mock_cache_client)
-    mock_bhavcopy_data = {
-        "RELIANCE": {
-            "current_price": Decimal("2845.50"),
-            "previous_close": Decimal("2800.00"),
-        },
-        "TCS": {
-            "current_price": Decimal("3510.00"),
-            "previous_close": Decimal("3500.00"),
-        },
+def test_bhavcopy_is_downloaded_once_and_archived(mock_httpx_client_class, archive):
+    """The bhavcopy is fetched, parsed into the archive and not fetched again."""
+    zip_content = _create_zip_in_memory(
+        SAMPLE_BHAVCOPY_CSV, _csv_filename(TRADING_DAY)
+    )
+    client = _http_client(
+        mock_httpx_client_class, [MagicMock(status_code=200, content=zip_content)]
+    )
+    provider = NseBhavcopyProvider(cache_client=None, archive=archive)
+
+    assert provider.archive_latest(TRADING_DAY) == TRADING_DAY
+    assert provider.archive_latest(TRADING_DAY) == TRADING_DAY
+    assert client.get.call_count == 1
+
+    closes = archive.closes_on(
+        TRADING_DAY, ["RELIANCE", "INE467B01029", "INFY", "NONEXISTENT"]
+    )
+    assert closes["RELIANCE"] == {
+        "current_price": Decimal("2845.50"),
+        "previous_close": Decimal("2800.00"),
     }
+    # Looked up by ISIN, as bonds often use it as their ticker symbol
+    assert closes["INE467B01029"]["current_price"] == Decimal("3510.00")
+    # 'BE' series is not in the excluded list
+    assert "INFY" in closes
+    assert "NONEXISTENT" not in closes
 
-    # Patch the internal method that fetches/caches the full data
-    with patch.object(provider, "_get_bhavcopy_data", return_value=mock_bhavcopy_data):
-        assets_to_price = [
-            {"ticker_symbol": "RELIANCE"},
-            {"ticker_symbol": "NONEXISTENT"},
-        ]
-        prices = provider.get_current_prices(assets_to_price) # type: ignore
 
-        assert "RELIANCE" in prices
-        assert "NONEXISTENT" not in prices
-        assert len(prices) == 1
-        assert prices["RELIANCE"]["current_price"] == Decimal("2845.50")
+@patch("app.services.providers.nse_bhavcopy_provider.httpx.Client")
+def test_fetch_bhavcopy_with_fallback(mock_httpx_client_class, archive):
+    """The provider falls back to previous days and remembers missing ones."""
+    yesterday = TRADING_DAY - timedelta(days=1)
+    zip_content = _create_zip_in_memory(SAMPLE_BHAVCOPY_CSV, _csv_filename(yesterday))
+    client = _http_client(
+        mock_httpx_client_class,
+        [MagicMock(status_code=404), MagicMock(status_code=200, content=zip_content)],
+    )
+    provider = NseBhavcopyProvider(cache_client=None, archive=archive)
 
+    assert provider.archive_latest(TRADING_DAY) == yesterday
+    assert client.get.call_count == 2
+    assert archive.is_missing(TRADING_DAY)
 
-def test_caching_mechanism(mock_cache_client):
-    """Test that data is fetched once and then served from cache."""
-    provider = NseBhavcopyProvider(cache_client=mock_cache_client)
+    # Neither day is asked for again
+    assert provider.archive_latest(TRADING_DAY) == yesterday
+    assert client.get.call_count == 2
 
-    # Simulate fresh data to be cached
-    fresh_data = {
-        "RELIANCE": {
-            "current_price": Decimal("2845.50"),
-            "previous_close": Decimal("2800.00"),
-        }
+
+@patch("app.services.providers.nse_bhavcopy_provider.httpx.Client")
+def test_todays_missing_bhavcopy_is_retried_later(
+    mock_httpx_client_class, archive, mock_cache_client
+):
+    """Today's bhavcopy may not be out yet, so it is only noted in the cache."""
+    today = date.today()
+    _http_client(mock_httpx_client_class, [MagicMock(status_code=404)] * 5)
+    provider = NseBhavcopyProvider(cache_client=mock_cache_client, archive=archive)
+
+    assert provider.archive_latest(today) is None
+    assert not archive.is_missing(today)
+    mock_cache_client.set.assert_called_once_with(
+        f"bhavcopy_missing:{today.isoformat()}", "1", expire=3600
+    )
+    assert archive.is_missing(today - timedelta(days=1))
+
+
+def test_get_current_prices(archive):
+    """Current prices are the closes of the latest archived day."""
+    archive.add_day(TRADING_DAY, _columns(TRADING_DAY))
+    provider = NseBhavcopyProvider(cache_client=None, archive=archive)
+
+    with patch.object(provider, "archive_latest", return_value=TRADING_DAY):
+        prices = provider.get_current_prices([
+            {"ticker_symbol": "RELIANCE"},
+            {"ticker_symbol": "SBIN.NS"},
+            {"ticker_symbol": "NONEXISTENT"},
+        ])
+
+    assert set(prices) == {"RELIANCE", "SBIN.NS"}
+    assert prices["RELIANCE"]["current_price"] == Decimal("2845.50")
+    assert prices["SBIN.NS"]["current_price"] == Decimal("605.75")
+
+
+def test_get_historical_prices_across_months(archive):
+    """History comes from every archived day in the range, by symbol or ISIN."""
+    october_csv = SAMPLE_BHAVCOPY_CSV
+    november = date(2025, 11, 3)
+    november_csv = october_csv.replace('"2845.50"', '"2900.25"')
+    archive.add_day(TRADING_DAY, _columns(TRADING_DAY, october_csv))
+    archive.add_day(november, _columns(november, november_csv))
+    # Re-archiving a day replaces it rather than adding rows
+    archive.add_day(november, _columns(november, november_csv))
+    provider = NseBhavcopyProvider(cache_client=None, archive=archive)
+
+    history = provider.get_historical_prices(
+        [{"ticker_symbol": "RELIANCE"}, {"ticker_symbol": "INE062A01020"}],
+        date(2025, 10, 1),
+        date(2025, 11, 30),
+    )
+
+    assert history["RELIANCE"] == {
+        TRADING_DAY: Decimal("2845.50"),
+        november: Decimal("2900.25"),
     }
-    # The data that will be set in the cache is serialized (strings)
-    serialized_data = {
-        "RELIANCE": {"current_price": "2845.50", "previous_close": "2800.00"}
+    assert history["INE062A01020"] == {
+        TRADING_DAY: Decimal("605.75"),
+        november: Decimal("605.75"),
     }
+    assert provider.get_historical_prices(
+        [{"ticker_symbol": "RELIANCE"}], date(2025, 11, 1), date(2025, 11, 2)
+    ) == {}
+    assert archive.days(date(2025, 1, 1), date(2025, 12, 31)) == [
+        TRADING_DAY, november
+    ]
+
 
-    with patch.object(provider, "_fetch_and_parse_bhavcopy", return_value=fresh_data) as mock_fetch: # noqa: E501
-        # 1. First call: cache is empty, should fetch and set cache
-        provider._get_bhavcopy_data() # type: ignore
-        mock_cache_client.get_json.assert_called_once()
-        mock_fetch.assert_called_once()
-        mock_cache_client.set_json.assert_called_once_with(
-            f"bhavcopy_data:{date.today().isoformat()}", # type: ignore
-            serialized_data,
-            expire=43200
+@patch("app.services.providers.nse_bhavcopy_provider.httpx.Client")
+def test_backfill_skips_archived_and_missing_days(mock_httpx_client_class, archive):
+    archive.add_day(TRADING_DAY, _columns(TRADING_DAY))
+    archive.mark_missing(TRADING_DAY + timedelta(days=1))
+    end = TRADING_DAY + timedelta(days=3)
+
+    def get(url, timeout):
+        if "20251025" in url:
+            return MagicMock(status_code=404)
+        day = date(2025, 10, int(url.split("_")[-3][-2:]))
+        return MagicMock(
+            status_code=200,
+            content=_create_zip_in_memory(SAMPLE_BHAVCOPY_CSV, _csv_filename(day)),
         )
 
-        # 2. Second call: simulate cache hit
-        mock_cache_client.get_json.return_value = serialized_data
-        provider._get_bhavcopy_data() # type: ignore
+    client = _http_client(mock_httpx_client_class, get)
+    provider = NseBhavcopyProvider(cache_client=None, archive=archive)
+
+    stats = provider.backfill(TRADING_DAY, end)
 
-        # Assert that get_json was called again, but fetch was not.
-        assert mock_cache_client.get_json.call_count == 2
-        mock_fetch.assert_called_once()
+    assert stats == {"archived": 1, "missing": 1, "failed": 0, "skipped": 2}
+    assert client.get.call_count == 2
+    assert archive.days(TRADING_DAY, end) == [TRADING_DAY, date(2025, 10, 24)]
+    assert provider.backfill(TRADING_DAY, end)["skipped"] == 4
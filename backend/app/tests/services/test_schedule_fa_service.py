@@ -1,7 +1,8 @@
-from datetime import date, datetime
+import random
+from datetime import date, datetime, timedelta
 from decimal import Decimal
 
-from app.services.schedule_fa_service import ScheduleFAService
+from app.services.schedule_fa_service import PriceRangeMax, ScheduleFAService
 
 
 # Mock Transaction class-like structure
@@ -127,3 +128,27 @@ class TestScheduleFAService:
 
         assert peak == Decimal(1500)
         assert peak_date == date(2023, 6, 1)
+
+    def test_price_range_max_matches_linear_scan(self):
+        """
+        Range-max queries agree with a day-by-day scan, including gaps in the
+        price history and ties (earliest day wins).
+        """
+        rng = random.Random(7)
+        start, end = date(2023, 1, 1), date(2023, 12, 31)
+        prices = {}
+        for offset in range(365):
+            if rng.random() < 0.7:
+                prices[start + timedelta(days=offset)] = Decimal(rng.randint(1, 50))
+        index = PriceRangeMax(prices, start, end)
+
+        for _ in range(300):
+            first = start + timedelta(days=rng.randrange(365))
+            last = first + timedelta(days=rng.randrange(60))
+            best, best_date = Decimal(0), first
+            curr = first
+            while curr <= min(last, end):
+                if prices.get(curr, Decimal(0)) > best:
+                    best, best_date = prices[curr], curr
+                curr += timedelta(days=1)
+            assert index.query(first, last) == (best, best_date)
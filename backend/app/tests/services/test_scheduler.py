@@ -0,0 +1,85 @@
+from datetime import date, datetime, time
+
+import pytest
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.services.scheduler import (
+    IST,
+    JobScheduler,
+    JobStatus,
+    JobTrigger,
+    ScheduledJob,
+)
+
+pytestmark = pytest.mark.usefixtures("pre_unlocked_key_manager")
+
+FRIDAY = date(2026, 8, 14)
+HOLIDAY = date(2026, 8, 15)
+
+
+class FakeCalendar:
+    def is_market_closed(self, check_date: date) -> bool:
+        return check_date.weekday() in (5, 6) or check_date == HOLIDAY
+
+
+def make_scheduler(func=None) -> JobScheduler:
+    job = ScheduledJob(
+        name="test_job",
+        description="Test job",
+        run_at=time(16, 30),
+        func=func or (lambda db, run_date: {"ran_for": run_date.isoformat()}),
+    )
+    return JobScheduler(jobs=[job], calendar=FakeCalendar())
+
+
+def test_scheduled_run_is_claimed_once_per_day(db: Session):
+    scheduler = make_scheduler()
+
+    run = scheduler.run_job("test_job", JobTrigger.SCHEDULED, FRIDAY)
+    assert run.status == JobStatus.SUCCESS.value
+    assert run.details == {"ran_for": "2026-08-14"}
+    assert run.duration_seconds is not None
+
+    # A second process finds the day already claimed
+    other = make_scheduler()
+    assert other.run_job("test_job", JobTrigger.SCHEDULED, FRIDAY) is None
+    assert other.due_jobs(datetime(2026, 8, 14, 17, 0, tzinfo=IST)) == []
+
+    # Manual runs are never deduplicated
+    assert scheduler.run_job("test_job", JobTrigger.API, FRIDAY) is not None
+    runs = crud.scheduled_job_run.get_recent(db, job_name="test_job")
+    assert [r.trigger for r in runs] == ["api", "scheduled"]
+
+
+def test_scheduled_run_is_skipped_on_market_holidays(db: Session):
+    calls = []
+    scheduler = make_scheduler(lambda db, run_date: calls.append(run_date) or {})
+
+    run = scheduler.run_job("test_job", JobTrigger.SCHEDULED, HOLIDAY)
+    assert run.status == JobStatus.SKIPPED.value
+    assert calls == []
+
+    # The next trading day after the holiday weekend
+    job = scheduler.jobs["test_job"]
+    now = datetime(2026, 8, 14, 18, 0, tzinfo=IST)
+    assert scheduler.next_run_at(job, now) == datetime(2026, 8, 17, 16, 30, tzinfo=IST)
+
+
+def test_failed_run_is_recorded(db: Session):
+    def fail(db, run_date):
+        raise RuntimeError("provider down")
+
+    run = make_scheduler(fail).run_job("test_job", JobTrigger.CLI, FRIDAY)
+    assert run.status == JobStatus.FAILED.value
+    assert run.error == "provider down"
+    assert crud.scheduled_job_run.get_last(db, job_name="test_job").id == run.id
+
+
+def test_catch_up_runs_once_before_the_scheduled_time(db: Session):
+    scheduler = make_scheduler()
+
+    scheduler.catch_up(datetime(2026, 8, 14, 9, 0, tzinfo=IST))
+    scheduler.catch_up(datetime(2026, 8, 14, 10, 0, tzinfo=IST))
+    runs = crud.scheduled_job_run.get_recent(db, job_name="test_job")
+    assert [r.trigger for r in runs] == ["startup"]
@@ -93,3 +93,62 @@ def test_take_snapshot_for_portfolio(db: Session, mocker):
     assert snapshot.mf_value == Decimal("0.00")
     assert snapshot.bond_value == Decimal("0.00")
     assert len(snapshot.holdings_snapshot) == 2
+
+
+def test_bulk_snapshots_match_per_portfolio_holdings(db: Session, mocker):
+    from app import crud
+    from app.models.portfolio_snapshot import DailyPortfolioSnapshot
+    from app.services.financial_data_service import financial_data_service
+    from app.services.snapshot_service import take_end_of_day_snapshots
+    from app.tests.utils.transaction import create_test_transaction
+
+    mocker.patch(
+        "app.core.key_manager.KeyManager.is_key_loaded",
+        new_callable=mocker.PropertyMock,
+        return_value=True,
+    )
+    mocker.patch(
+        "app.core.key_manager.KeyManager.master_key",
+        new_callable=mocker.PropertyMock,
+        return_value=b"12345678901234567890123456789012",
+    )
+    user, _ = create_random_user(db)
+    first = create_test_portfolio(db, user_id=user.id, name="Bulk 1")
+    second = create_test_portfolio(db, user_id=user.id, name="Bulk 2")
+    empty = create_test_portfolio(db, user_id=user.id, name="Bulk 3")
+    create_test_transaction(db, portfolio_id=first.id, ticker="AAPL", quantity=5)
+    create_test_transaction(db, portfolio_id=second.id, ticker="AAPL", quantity=2)
+    create_test_transaction(db, portfolio_id=second.id, ticker="GOOGL", quantity=3)
+    portfolio_ids = [first.id, second.id, empty.id]
+
+    expected = {
+        pid: crud.holding.get_portfolio_holdings_and_summary(db, portfolio_id=pid)
+        for pid in portfolio_ids
+    }
+    prices = mocker.spy(financial_data_service, "get_current_prices")
+
+    bulk = crud.holding.get_holdings_and_summaries_bulk(
+        db, portfolio_ids=portfolio_ids
+    )
+    # Held assets and FX are priced once for all portfolios together
+    assert prices.call_count == 2
+    for pid in portfolio_ids:
+        assert bulk[pid].summary == expected[pid].summary
+        assert len(bulk[pid].holdings) == len(expected[pid].holdings)
+
+    details = take_end_of_day_snapshots(db, target_date=date.today(), batch_size=2)
+    assert details["updated"] == 3
+    assert details["batches"] == 2
+    assert details["failed"] == []
+
+    snapshots = {
+        s.portfolio_id: s
+        for s in db.query(DailyPortfolioSnapshot).filter(
+            DailyPortfolioSnapshot.snapshot_date == date.today()
+        )
+    }
+    assert len(snapshots) == 3
+    for pid in portfolio_ids:
+        assert snapshots[pid].total_value == expected[pid].summary.total_value.quantize(
+            Decimal("0.01")
+        )
@@ -0,0 +1,117 @@
+"""
+The transaction creation rules shared by `create_with_portfolio` and the
+backup restorer.
+"""
+import uuid
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from fastapi import HTTPException
+
+from app import schemas
+from app.services import transaction_rules
+from app.services.adjustment_factors import LotBook
+
+
+def _tx(transaction_type: str, quantity: str, **kwargs) -> schemas.TransactionCreate:
+    return schemas.TransactionCreate(
+        asset_id=uuid.uuid4(),
+        transaction_type=transaction_type,
+        quantity=Decimal(quantity),
+        price_per_unit=Decimal("10"),
+        transaction_date=datetime(2024, 1, 2),
+        **kwargs,
+    )
+
+
+def test_only_vests_and_espp_purchases_have_a_once_key():
+    portfolio_id = uuid.uuid4()
+    assert transaction_rules.once_key(_tx("RSU_VEST", "5"), portfolio_id)
+    assert transaction_rules.once_key(_tx("ESPP_PURCHASE", "5"), portfolio_id)
+    assert transaction_rules.once_key(_tx("BUY", "5"), portfolio_id) is None
+
+
+def test_sell_to_cover_skips_the_holdings_check():
+    assert transaction_rules.needs_holdings_check(_tx("SELL", "5"))
+    assert not transaction_rules.needs_holdings_check(
+        _tx("SELL", "5", details={"related_rsu_vest_id": str(uuid.uuid4())})
+    )
+    assert not transaction_rules.needs_holdings_check(_tx("BUY", "5"))
+
+
+def test_check_holdings_rejects_overselling():
+    transaction_rules.check_holdings(_tx("SELL", "5"), Decimal("5"))
+    with pytest.raises(HTTPException) as exc:
+        transaction_rules.check_holdings(_tx("SELL", "6"), Decimal("5"))
+    assert exc.value.status_code == 400
+
+
+def test_holdings_after():
+    units = Decimal("0")
+    for t_type, quantity, price in [
+        ("BUY", "10", "100"),
+        ("BONUS", "5", "0"),
+        ("SPLIT", "2", "1"),
+        ("SELL", "4", "50"),
+        ("DEMERGER", "3", "0"),
+    ]:
+        units = transaction_rules.holdings_after(
+            units, t_type, Decimal(quantity), Decimal(price)
+        )
+    assert units == Decimal("16")
+
+
+def test_fifo_links_take_the_oldest_lots_first():
+    first, second, third = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+    links, remaining = transaction_rules.fifo_links(
+        Decimal("7"),
+        [(first, Decimal("5")), (second, Decimal("0")), (third, Decimal("4"))],
+    )
+    assert links == [(first, Decimal("5")), (third, Decimal("2"))]
+    assert remaining == 0
+
+    links, remaining = transaction_rules.fifo_links(
+        Decimal("7"), [(first, Decimal("5"))]
+    )
+    assert links == [(first, Decimal("5"))]
+    assert remaining == Decimal("2")
+
+
+def test_sell_to_cover_is_linked_to_its_vest():
+    vest_id = uuid.uuid4()
+    vest = _tx(
+        "RSU_VEST",
+        "10",
+        details={
+            "fx_rate": 83.1,
+            "sell_to_cover": {"quantity": "3", "price_per_unit": "12.5"},
+        },
+    )
+    sell = transaction_rules.sell_to_cover(vest_id, vest)
+    assert sell.transaction_type == "SELL"
+    assert sell.quantity == Decimal("3")
+    assert sell.price_per_unit == Decimal("12.5")
+    assert sell.details == {"fx_rate": 83.1, "related_rsu_vest_id": str(vest_id)}
+    assert [(link.buy_transaction_id, link.quantity) for link in sell.links] == [
+        (vest_id, Decimal("3"))
+    ]
+    assert transaction_rules.is_sell_to_cover(sell)
+
+
+def test_no_sell_to_cover_without_a_quantity():
+    vest = _tx("RSU_VEST", "10", details={"sell_to_cover": {"quantity": "0"}})
+    assert transaction_rules.sell_to_cover(uuid.uuid4(), vest) is None
+    assert transaction_rules.sell_to_cover(uuid.uuid4(), _tx("BUY", "10")) is None
+
+
+def test_lot_book_sell_applies_links_before_fifo():
+    first, second = uuid.uuid4(), uuid.uuid4()
+    book = LotBook()
+    book.add(first, Decimal("5"))
+    book.add(second, Decimal("5"))
+    book.sell(Decimal("6"), [(second, Decimal("4"))])
+    assert [(lot.key, lot.quantity) for lot in book.open_lots()] == [
+        (first, Decimal("3")),
+        (second, Decimal("1")),
+    ]
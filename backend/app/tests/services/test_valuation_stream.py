@@ -0,0 +1,187 @@
+"""Tests for the live portfolio valuation stream and its shared quotes."""
+import asyncio
+import json
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app import crud
+from app.cache.factory import get_cache_client
+from app.core.config import settings
+from app.crud.crud_holding import ALL_PORTFOLIOS_HOLDINGS_CACHE_PREFIX
+from app.services import valuation_stream
+from app.services.financial_data_service import financial_data_service
+from app.services.shared_quotes import SharedQuotes, shared_quotes
+from app.tests.utils.asset import create_test_asset
+from app.tests.utils.portfolio import create_test_portfolio
+from app.tests.utils.transaction import create_test_transaction
+from app.tests.utils.user import create_random_user
+from app.utils import sse
+
+pytestmark = pytest.mark.usefixtures("pre_unlocked_key_manager")
+
+
+def _quote(current: str, previous: str):
+    return {"current_price": Decimal(current), "previous_close": Decimal(previous)}
+
+
+def _valuation(event: str):
+    assert event.startswith("event: valuation\n")
+    return json.loads(event.split("data: ", 1)[1])
+
+
+def test_stream_reprices_the_cached_positions(db: Session):
+    user, _ = create_random_user(db)
+    portfolio = create_test_portfolio(db, user_id=user.id, name="Live")
+    create_test_asset(db, ticker_symbol="INFY", currency="INR")
+    for ticker, quantity in [("INFY", 10), ("AAPL", 2)]:
+        create_test_transaction(
+            db, portfolio_id=portfolio.id, ticker=ticker, quantity=quantity,
+            transaction_date=date(2024, 1, 1),
+        )
+    db.commit()
+    market = {
+        "INFY": _quote("150", "145"),
+        "AAPL": _quote("200", "190"),
+        "USDINR=X": _quote("80", "80"),
+    }
+
+    def load_positions():
+        holdings = crud.holding.get_all_portfolios_holdings_and_summary(
+            db, user_id=user.id
+        ).holdings
+        return valuation_stream.Positions.from_holdings(db, holdings)
+
+    async def events(count):
+        stream = valuation_stream.stream_valuation(
+            load_positions,
+            lambda: valuation_stream.holdings_are_stale(user.id),
+            interval=0,
+        )
+        results = []
+        for i in range(count):
+            results.append(await anext(stream))
+            if i == 0:
+                market["INFY"] = _quote("160", "145")
+            if i == 2:
+                get_cache_client().delete(
+                    f"{ALL_PORTFOLIOS_HOLDINGS_CACHE_PREFIX}:{user.id}"
+                )
+        return results
+
+    with mock.patch.object(
+        financial_data_service,
+        "get_current_prices",
+        side_effect=lambda requests: {
+            r["ticker_symbol"]: market[r["ticker_symbol"]]
+            for r in requests if r["ticker_symbol"] in market
+        },
+    ), mock.patch.object(
+        crud.holding,
+        "get_all_portfolios_holdings_and_summary",
+        wraps=crud.holding.get_all_portfolios_holdings_and_summary,
+    ) as full_valuation, mock.patch.object(shared_quotes, "max_age", 0):
+        first, changed, unchanged, reloaded = asyncio.run(events(4))
+
+    # 10 INFY at 150, and 2 AAPL at 200 USD at 80 INR
+    assert Decimal(str(_valuation(first)["total_value"])) == Decimal("33500")
+    assert Decimal(str(_valuation(first)["days_pnl"])) == Decimal("1650")
+    valuation = _valuation(changed)
+    assert Decimal(str(valuation["total_value"])) == Decimal("33600")
+    assert [m["ticker_symbol"] for m in valuation["top_movers"]] == ["INFY", "AAPL"]
+    assert unchanged == sse.KEEPALIVE
+    assert reloaded == sse.KEEPALIVE
+    assert full_valuation.call_count == 2
+
+
+def test_streams_share_one_pricing_pass():
+    quotes = SharedQuotes(max_age=60)
+    requests = [{"ticker_symbol": t, "asset_type": "STOCK"} for t in ("A", "B")]
+
+    async def slow_prices(requests):
+        await asyncio.sleep(0.01)
+        return {r["ticker_symbol"]: _quote("1", "1") for r in requests}
+
+    async def streams():
+        together = await asyncio.gather(
+            quotes.get(requests), quotes.get(requests[:1]), quotes.get(requests)
+        )
+        return together, await quotes.get(requests)
+
+    with mock.patch.object(
+        financial_data_service,
+        "aget_current_prices",
+        new=mock.AsyncMock(side_effect=slow_prices),
+    ) as aget_current_prices:
+        (first, second, third), later = asyncio.run(streams())
+
+    aget_current_prices.assert_awaited_once()
+    assert set(first) == set(third) == set(later) == {"A", "B"}
+    assert set(second) == {"A"}
+
+
+def test_stream_requires_authentication(client: TestClient):
+    response = client.get(f"{settings.API_V1_STR}/dashboard/stream")
+    assert response.status_code == 401
+
+
+def test_a_failed_pricing_pass_is_not_cached():
+    quotes = SharedQuotes(max_age=60)
+    requests = [{"ticker_symbol": "A", "asset_type": "STOCK"}]
+
+    calls = []
+
+    async def prices(requests):
+        calls.append(requests)
+        await asyncio.sleep(0.01)
+        if len(calls) == 1:
+            raise RuntimeError("provider down")
+        return {"A": _quote("1", "1")}
+
+    async def streams():
+        together = await asyncio.gather(quotes.get(requests), quotes.get(requests))
+        return together, await quotes.get(requests)
+
+    with mock.patch.object(
+        financial_data_service,
+        "aget_current_prices",
+        new=mock.AsyncMock(side_effect=prices),
+    ):
+        (first, second), later = asyncio.run(streams())
+
+    assert first == second == {}
+    assert len(calls) == 2
+    assert set(later) == {"A"}
+
+
+def test_waiters_fetch_again_when_the_shared_call_is_cancelled():
+    quotes = SharedQuotes(max_age=60)
+    requests = [{"ticker_symbol": "A", "asset_type": "STOCK"}]
+    calls = []
+
+    async def prices(requests):
+        calls.append(requests)
+        await asyncio.sleep(0.01)
+        return {"A": _quote("1", "1")}
+
+    async def streams():
+        fetching = asyncio.ensure_future(quotes.get(requests))
+        await asyncio.sleep(0)
+        waiting = asyncio.ensure_future(quotes.get(requests))
+        await asyncio.sleep(0)
+        fetching.cancel()
+        return await waiting
+
+    with mock.patch.object(
+        financial_data_service,
+        "aget_current_prices",
+        new=mock.AsyncMock(side_effect=prices),
+    ):
+        waited = asyncio.run(streams())
+
+    assert set(waited) == {"A"}
+    assert len(calls) == 2
@@ -140,6 +140,11 @@ class MockFinancialDataService:
                 results[ticker] = self.MOCK_MF_PRICES[ticker]
         return results
 
+    async def aget_current_prices(
+        self, assets: List[Dict[str, Any]]
+    ) -> Dict[str, Dict[str, Decimal]]:
+        return self.get_current_prices(assets)
+
     def get_price_from_yfinance(self, ticker_symbol: str) -> Decimal | None:
         """
         Mock implementation for fetching a single price from yfinance.
@@ -155,6 +160,11 @@ class MockFinancialDataService:
         # This can be expanded if tests need more complex historical data
         return {}
 
+    async def aget_historical_prices(
+        self, assets: List[Dict[str, Any]], start_date: date, end_date: date
+    ) -> Dict[str, Dict[date, Decimal]]:
+        return self.get_historical_prices(assets, start_date, end_date)
+
     def get_asset_details(
         self, ticker_symbol: str, asset_type: Optional[str] = None
     ) -> Optional[Dict[str, Any]]:
@@ -220,6 +230,11 @@ class MockFinancialDataService:
             }
         return None
 
+    def get_asset_details_batch(
+        self, ticker_symbols: List[str]
+    ) -> Dict[str, Optional[Dict[str, Any]]]:
+        return {t: self.get_asset_details(t) for t in dict.fromkeys(ticker_symbols)}
+
     def search_mutual_funds(self, query: str) -> List[Dict[str, Any]]:
         query = query.lower()
         return [
@@ -235,6 +250,16 @@ class MockFinancialDataService:
             return Decimal("83.50")
         return None
 
+    async def aget_exchange_rate(
+        self, from_currency: str, to_currency: str, date_obj: date
+    ) -> Optional[Decimal]:
+        return self.get_exchange_rate(from_currency, to_currency, date_obj)
+
+    def get_exchange_rates(
+        self, from_currency: str, to_currency: str, dates: List[date]
+    ) -> Dict[date, Optional[Decimal]]:
+        return {d: self.get_exchange_rate(from_currency, to_currency, d) for d in dates}
+
     def get_enrichment_data_batch(self, assets: List[Dict[str, Any]]):
         """Returns mock enrichment data for multiple assets."""
         return self.yfinance_provider.get_enrichment_data_batch(assets)
@@ -287,3 +312,6 @@ class MockFinancialDataService:
                 })
 
         return results
+
+    async def asearch_stocks(self, query: str) -> List[Dict[str, Any]]:
+        return self.search_stocks(query)
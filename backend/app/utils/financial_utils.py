@@ -1,7 +1,9 @@
 import logging
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, timedelta
-from typing import Dict, List, Optional, Union
+from typing import Dict, List, NamedTuple, Optional, Union
 
 import requests
 import urllib3
@@ -11,12 +13,23 @@ urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 logger = logging.getLogger(__name__)
 
-def download_file(
-    url: str, dest_path: str, log: Optional[logging.Logger] = None
-) -> bool:
+class DownloadResult(NamedTuple):
+    ok: bool
+    not_modified: bool = False
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
+def fetch_file(
+    url: str,
+    dest_path: str,
+    log: Optional[logging.Logger] = None,
+    validators: Optional[Dict[str, str]] = None,
+) -> DownloadResult:
     """
-    Downloads a file from a URL to a destination path.
-    Returns True if successful, False otherwise.
+    Downloads a file from a URL to a destination path. `validators` are sent
+    as conditional request headers; a 304 response leaves `dest_path`
+    untouched and is reported as `not_modified`.
     """
     if log:
         log.info(f"Downloading {url}...")
@@ -25,24 +38,43 @@ def download_file(
             "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
             "AppleWebKit/537.36 (KHTML, like Gecko) "
             "Chrome/91.0.4472.124 Safari/537.36"
-        )
+        ),
+        **(validators or {}),
     }
     try:
         # nosec B501: SSL verification disabled for NSDL/BSE/NSE with cert issues
         response = requests.get(
             url, stream=True, verify=False, headers=headers, timeout=30
         )
+        if response.status_code == 304:
+            if log:
+                log.info(f"Not modified since last sync: {url}")
+            return DownloadResult(ok=True, not_modified=True)
         response.raise_for_status()
         with open(dest_path, "wb") as f:
             for chunk in response.iter_content(chunk_size=8192):
                 f.write(chunk)
         if log:
             log.info(f"Saved to {dest_path}")
-        return True
+        return DownloadResult(
+            ok=True,
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+        )
     except Exception as e:
         if log:
             log.warning(f"Download failed for {url}: {e}")
-        return False
+        return DownloadResult(ok=False)
+
+
+def download_file(
+    url: str, dest_path: str, log: Optional[logging.Logger] = None
+) -> bool:
+    """
+    Downloads a file from a URL to a destination path.
+    Returns True if successful, False otherwise.
+    """
+    return fetch_file(url, dest_path, log).ok
 
 def get_latest_trading_date() -> date:
     """Returns the latest potential trading date (today or previous weekday)."""
@@ -98,10 +130,19 @@ def get_dynamic_urls(d: date) -> Dict[str, Union[str, List[str]]]:
     }
 
 def download_all_sources(
-    temp_dir: str, log: Optional[logging.Logger] = None
+    temp_dir: str,
+    log: Optional[logging.Logger] = None,
+    max_workers: int = 8,
+    sync_state=None,
 ) -> Dict[str, str]:
-    """Download all required data sources. Returns dict of source -> filepath."""
-    files: Dict[str, str] = {}
+    """
+    Download all required data sources concurrently (one worker per source).
+    Returns dict of source -> filepath.
+
+    With a `sync_state` (delta sync), files fetched last time are requested
+    conditionally; sources the server reports as not modified are left out
+    of the result.
+    """
     candidate_dates = []
     current_d = get_latest_trading_date()
     candidate_dates.append(current_d)
@@ -117,7 +158,8 @@ def download_all_sources(
         "nse_debt", "nse_equity", "bse_index", "icici"
     ]
 
-    for source in required_sources:
+    def download_source(source: str) -> Optional[str]:
+        # Dates are tried newest first, so each source stays sequential
         for d in candidate_dates:
             urls = get_dynamic_urls(d).get(source)
             if not urls:
@@ -126,20 +168,39 @@ def download_all_sources(
             if isinstance(urls, str):
                 urls = [urls]
 
-            success = False
             for url in urls:
                 filename = url.split("/")[-1]
                 dest = os.path.join(temp_dir, filename)
 
-                if download_file(url, dest, log):
-                    files[source] = dest
-                    success = True
-                    break
-            if success:
-                break
-
-        if source not in files and log:
+                validators = (
+                    sync_state.validators(source, url) if sync_state else None
+                )
+                result = fetch_file(url, dest, log, validators)
+                if not result.ok:
+                    continue
+                if sync_state:
+                    sync_state.record_download(
+                        source, url, result.etag, result.last_modified,
+                        not_modified=result.not_modified,
+                    )
+                return None if result.not_modified else dest
+        if log:
             log.warning(f"Could not download {source} after trying all dates.")
+        return None
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = executor.map(download_source, required_sources)
+        files: Dict[str, str] = {
+            source: path
+            for source, path in zip(required_sources, results)
+            if path
+        }
+    if log:
+        log.info(
+            f"Downloaded {len(files)}/{len(required_sources)} sources in "
+            f"{time.perf_counter() - started:.1f}s"
+        )
 
     # Enable Upstox metadata processing during full online download
     files["upstox"] = "upstox_metadata"
@@ -148,38 +209,60 @@ def download_all_sources(
 
 def process_all_sources(
     seeder, files: Dict[str, str], log: Optional[logging.Logger] = None
-) -> None:
-    """Process all downloaded files through the seeder."""
-    # Phase 1: Master Debt Lists
-    if "nsdl" in files:
-        seeder.process_nsdl_file(files["nsdl"])
-    if "bse_public" in files:
-        seeder.process_bse_public_debt(files["bse_public"])
-
-    # Phase 2: Exchange Bhavcopy
-    if "bse_equity" in files:
-        seeder.process_bse_equity_bhavcopy(files["bse_equity"])
-    if "nse_equity" in files:
-        seeder.process_nse_equity_bhavcopy(files["nse_equity"])
-
-    # Phase 3: Specialized Debt
-    if "nse_debt" in files:
-        seeder.process_nse_daily_debt(files["nse_debt"])
-    if "bse_debt" in files:
-        seeder.process_bse_debt_bhavcopy(files["bse_debt"])
-
-    # Phase 4: Market Indices
-    if "bse_index" in files:
-        seeder.process_bse_index(files["bse_index"])
-
-    # Phase 5: Fallback
-    if "icici" in files:
-        seeder.process_icici_fallback(files["icici"])
+) -> Dict[str, float]:
+    """
+    Process all downloaded files through the seeder.
+    Returns the wall-clock seconds spent on each source.
+
+    If the seeder has a `sync_state` (delta sync), files identical to the
+    last processed version are skipped and only new or changed rows of the
+    others are seeded.
+    """
+    sync_state = seeder.sync_state
+    # Phase 1: Master Debt Lists, Phase 2: Exchange Bhavcopy,
+    # Phase 3: Specialized Debt, Phase 4: Market Indices, Phase 5: Fallback
+    phases = [
+        ("nsdl", seeder.process_nsdl_file),
+        ("bse_public", seeder.process_bse_public_debt),
+        ("bse_equity", seeder.process_bse_equity_bhavcopy),
+        ("nse_equity", seeder.process_nse_equity_bhavcopy),
+        ("nse_debt", seeder.process_nse_daily_debt),
+        ("bse_debt", seeder.process_bse_debt_bhavcopy),
+        ("bse_index", seeder.process_bse_index),
+        ("icici", seeder.process_icici_fallback),
+    ]
+    timings: Dict[str, float] = {}
+    for source, process in phases:
+        if source not in files:
+            continue
+        started = time.perf_counter()
+        if sync_state is not None and sync_state.is_unchanged(
+            source, files[source]
+        ):
+            if log:
+                log.info(f"{source} unchanged since last sync, skipping.")
+        else:
+            seeder.sync_source = source
+            try:
+                process(files[source])
+            finally:
+                seeder.sync_source = None
+        timings[source] = time.perf_counter() - started
 
     # Phase 6: Upstox Metadata Integration & Cross-Verification
     if "upstox" in files:
+        started = time.perf_counter()
         try:
             seeder.process_upstox_metadata()
         except Exception as e:
             if log:
                 log.warning(f"Upstox metadata processing skipped/failed: {e}")
+        timings["upstox"] = time.perf_counter() - started
+
+    if log:
+        log.info(
+            "Asset seeding phase timings: "
+            + ", ".join(f"{k}={v:.2f}s" for k, v in timings.items())
+            + f" (created={seeder.created_count}, skipped={seeder.skipped_count})"
+        )
+    return timings
@@ -0,0 +1,37 @@
+import threading
+from typing import Any, Callable
+
+
+class LazyProxy:
+    """
+    Stands in for a module-level singleton until it is first used, so that
+    importing the module does not construct it (open the cache, build
+    providers, ...). Attribute reads, writes and deletes, which is all
+    `mock.patch` does, go to the real object.
+    """
+
+    def __init__(self, factory: Callable[[], Any]):
+        object.__setattr__(self, "_factory", factory)
+        object.__setattr__(self, "_instance", None)
+        object.__setattr__(self, "_lock", threading.Lock())
+
+    def _get_instance(self) -> Any:
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    object.__setattr__(self, "_instance", self._factory())
+        return self._instance
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._get_instance(), name)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        setattr(self._get_instance(), name, value)
+
+    def __delattr__(self, name: str) -> None:
+        delattr(self._get_instance(), name)
+
+    def __repr__(self) -> str:
+        if self._instance is None:
+            return f"<LazyProxy for {self._factory!r} (not built)>"
+        return repr(self._instance)
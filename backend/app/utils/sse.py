@@ -0,0 +1,15 @@
+"""Formatting for server-sent event streams."""
+import json
+from typing import Any
+
+from fastapi.encoders import jsonable_encoder
+
+MEDIA_TYPE = "text/event-stream"
+# Proxies (nginx) would otherwise buffer the stream
+HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+# A comment line sent when there is nothing new, so proxies keep the stream open
+KEEPALIVE = ": keep-alive\n\n"
+
+
+def event(name: str, data: Any) -> str:
+    return f"event: {name}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
@@ -466,8 +466,8 @@ def test_synthetic_transactions_generation_and_processing(
 
     fd_crud_path = "app.crud.fixed_deposit.get_multi_by_portfolio"
     rd_crud_path = "app.crud.recurring_deposit.get_multi_by_portfolio"
-    calc_fd_path = "app.services.benchmark_service._calculate_fd_current_value"
-    calc_rd_path = "app.services.benchmark_service._calculate_rd_value_at_date"
+    calc_fd_path = "app.services.deposit_valuation.fd_value_on"
+    calc_rd_path = "app.services.deposit_valuation.rd_value_on"
 
     with patch(fd_crud_path, return_value=[fd]):
         with patch(rd_crud_path, return_value=[rd]):
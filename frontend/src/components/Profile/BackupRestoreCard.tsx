@@ -91,7 +91,7 @@ const BackupRestoreCard: React.FC = () => {
                     </p>
                     <input
                         type="file"
-                        accept=".json"
+                        accept=".json,.ndjson"
                         ref={fileInputRef}
                         onChange={handleFileChange}
                         className="block w-full text-sm text-gray-500 dark:text-gray-400 file:mr-4 file:py-2 file:px-4 file:rounded-full file:border-0 file:text-sm file:font-semibold file:bg-blue-50 file:text-blue-700 hover:file:bg-blue-100 dark:file:bg-blue-900 dark:file:text-blue-300 dark:hover:file:bg-blue-800 mb-4"
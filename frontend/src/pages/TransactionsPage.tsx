@@ -90,8 +90,10 @@ const TransactionsPage: React.FC = () => {
       {isError && <div className="text-center p-8 text-red-500">Error: {(error as Error).message}</div>}
       {data && data.transactions && (
         (() => {
-          const pageCount = Math.ceil(data.total / PAGE_SIZE);
           const currentPage = (filters.skip || 0) / PAGE_SIZE;
+          // Without a count, a full page (one with a next_cursor) means there is at least one more
+          const total = data.total ?? (currentPage + (data.next_cursor ? 2 : 1)) * PAGE_SIZE;
+          const pageCount = Math.ceil(total / PAGE_SIZE);
           return (
             <>
               <TransactionHistoryTable transactions={data.transactions} onEdit={handleEdit} onDelete={handleDelete} />
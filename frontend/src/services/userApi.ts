@@ -15,6 +15,7 @@ export const changePassword = async (data: UserPasswordChange): Promise<Msg> =>
 
 export const downloadBackup = async (): Promise<void> => {
   const response = await apiClient.get('/api/v1/users/me/backup', {
+    params: { format: 'ndjson' },
     responseType: 'blob',
   });
 
@@ -23,7 +24,7 @@ export const downloadBackup = async (): Promise<void> => {
   link.href = url;
 
   const contentDisposition = response.headers['content-disposition'];
-  let filename = 'arthsaarthi_backup.json';
+  let filename = 'arthsaarthi_backup.ndjson';
   if (contentDisposition) {
     const match = contentDisposition.match(/filename="?([^"]+)"?/);
     if (match && match[1]) {
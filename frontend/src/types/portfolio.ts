@@ -65,7 +65,9 @@ export interface TransactionUpdate {
 
 export interface TransactionsResponse {
   transactions: Transaction[];
-  total: number;
+  /** Omitted (null) when the request asked for `count: 'none'`. */
+  total?: number | null;
+  next_cursor?: string | null;
 }
 
 export interface TransactionCreatedResponse {